@@ -0,0 +1,115 @@
+"""
+Measures the latency of single report lookups through the ReportServer.
+
+An index db with all reports of the 2010q1 test data is created in a temporary directory and
+a server is started in a separate process, like a real daemon. Every report is requested by
+several clients at the same time:
+- cold:     the report was never requested. The first reports are read from the parquet
+            files, after two scans the file is loaded as HotFile in the background and the
+            following reports are read from memory
+- response: the same request was answered before, the rendered response is returned
+- bag:      another presentation of a report that was read before (the bag is cached)
+"""
+import multiprocessing
+import os
+import statistics
+import tempfile
+import threading
+import time
+from typing import Callable, List
+
+import numpy as np
+
+from secfsdstools.b_setup.setupdb import DbCreator
+from secfsdstools.c_index.indexdataaccess import IndexFileProcessingState, \
+    ParquetDBIndexingAccessor
+from secfsdstools.d_container.databagmodel import read_parquet
+from secfsdstools.g_server.reportclient import ReportClient
+from secfsdstools.g_server.reportserver import ReportServer
+from secfsdstools.g_server.reportservice import ReportService
+
+CURRENT_DIR, _ = os.path.split(__file__)
+PATH_TO_PARQUET = os.path.realpath(f'{CURRENT_DIR}/../tests/_testdata/parquet/quarter/2010q1.zip')
+
+CLIENTS = 4
+
+
+def create_db(db_dir: str) -> List[str]:
+    DbCreator(db_dir=db_dir).create_db()
+    sub_df = read_parquet(os.path.join(PATH_TO_PARQUET, 'sub.txt.parquet'),
+                          columns=['adsh', 'cik', 'name', 'form', 'filed', 'period'])
+    sub_df['fullPath'] = PATH_TO_PARQUET
+    sub_df['originFile'] = '2010q1.zip'
+    sub_df['originFileType'] = 'quarter'
+    sub_df['url'] = ''
+    ParquetDBIndexingAccessor(db_dir=db_dir).add_index_report(sub_df, IndexFileProcessingState(
+        fileName='2010q1.zip', fullPath=PATH_TO_PARQUET, status='processed', entries=0,
+        processTime=''))
+    return sub_df.adsh.tolist()
+
+
+def run_clients(port: int, adshs: List[str], request: Callable[[ReportClient, str], None]) \
+        -> List[float]:
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def run_client(part: List[str]):
+        with ReportClient(port=port) as client:
+            for adsh in part:
+                start = time.perf_counter()
+                request(client, adsh)
+                with lock:
+                    latencies.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=run_client, args=(adshs[i::CLIENTS],))
+               for i in range(CLIENTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def print_latencies(name: str, latencies: List[float]):
+    print(f"{name:>9}: requests {len(latencies):>5}, p50 {statistics.median(latencies):6.1f} ms, "
+          f"p99 {np.percentile(latencies, 99):6.1f} ms")
+
+
+def serve(db_dir: str, connection):
+    service = ReportService(db_dir=db_dir)
+    service.snapshot.refresh()
+    server = ReportServer(service, port=0)
+    connection.send(server.port)
+    server.serve_forever()
+
+
+def run():
+    with tempfile.TemporaryDirectory() as db_dir:
+        adshs = create_db(db_dir)
+        # spawn, since the thread pools of pyarrow are not fork safe
+        context = multiprocessing.get_context('spawn')
+        receiver, sender = context.Pipe(duplex=False)
+        server = context.Process(target=serve, args=(db_dir, sender), daemon=True)
+        server.start()
+        try:
+            port = receiver.recv()
+
+            def balance_sheet(client: ReportClient, adsh: str):
+                client.get_report(adsh, stmts=['BS'], filters=['maincoreg', 'usdonly'])
+
+            def income_statement(client: ReportClient, adsh: str):
+                client.get_report(adsh, stmts=['IS'], filters=['maincoreg', 'usdonly'])
+
+            print_latencies('cold', run_clients(port, adshs, balance_sheet))
+            print_latencies('response', run_clients(port, adshs * 5, balance_sheet))
+            print_latencies('bag', run_clients(port, adshs, income_statement))
+            with ReportClient(port=port) as client:
+                stats = client.get_stats()
+            print(f"scans: {stats['scans']}, scanned reports: {stats['scanned_reports']}, "
+                  f"hot file hits: {stats['hot_file_hits']}, server p99: {stats['p99_ms']:.1f} ms")
+        finally:
+            server.terminate()
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,71 @@
+"""
+Compares the strategies to select the pre and num rows of a set of reports (adshs):
+
+- filter:   push an ('adsh', 'in', adshs) filter into the parquet scan
+- semijoin: read adsh dictionary encoded and select the rows by the dictionary indices
+- none:     read the whole file without an adsh filter (only correct if all reports are selected)
+
+In order to have data in the size of a real quarter, the num.txt of the 2010q1 test data is
+replicated with different adshs. The output shows the crossover points that are used by
+secfsdstools.e_collector.basecollector.choose_adsh_strategy.
+"""
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+import numpy as np
+import pandas as pd
+
+from secfsdstools.d_container.databagmodel import read_parquet, read_parquet_semi_join
+
+CURRENT_DIR, _ = os.path.split(__file__)
+PATH_TO_NUM = f'{CURRENT_DIR}/../tests/_testdata/parquet/quarter/2010q1.zip/num.txt.parquet'
+
+COPIES = 20
+FRACTIONS = [0.0002, 0.001, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0]
+
+
+def create_quarter(target_file: str) -> List[str]:
+    num_df = pd.read_parquet(PATH_TO_NUM)
+    copies = []
+    for copy in range(COPIES):
+        copy_df = num_df.copy()
+        copy_df['adsh'] = copy_df.adsh.str.slice(0, 12) + f'{copy:02d}' + \
+            copy_df.adsh.str.slice(14)
+        copies.append(copy_df)
+    quarter_df = pd.concat(copies, ignore_index=True)
+    quarter_df.to_parquet(target_file)
+    return quarter_df.adsh.unique().tolist()
+
+
+def measure(function: Callable[[], pd.DataFrame], repetitions: int = 3) -> float:
+    times = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def run():
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'num.txt.parquet')
+        all_adshs = create_quarter(path)
+        print(f"reports: {len(all_adshs)}, rows: {len(pd.read_parquet(path, columns=['adsh']))}")
+        print(f"{'fraction':>9} {'adshs':>6} {'filter':>8} {'semijoin':>9} {'none':>8}")
+
+        none_time = measure(lambda: read_parquet(path))
+        for fraction in FRACTIONS:
+            adshs = rng.choice(all_adshs, max(1, int(fraction * len(all_adshs))),
+                               replace=False).tolist()
+            filter_time = measure(lambda: read_parquet(path, filters=[('adsh', 'in', adshs)]))
+            semi_join_time = measure(lambda: read_parquet_semi_join(path, 'adsh', adshs))
+            print(f"{fraction:>9} {len(adshs):>6} {filter_time:>8.1f} {semi_join_time:>9.1f} "
+                  f"{none_time:>8.1f}")
+
+
+if __name__ == '__main__':
+    run()
@@ -12,6 +12,7 @@ from secfsdstools.a_config.configmodel import Configuration
 from secfsdstools.a_utils.dbutils import DBStateAcessor
 from secfsdstools.a_utils.downloadutils import UrlDownloader
 from secfsdstools.a_utils.rapiddownloadutils import RapidUrlBuilder
+from secfsdstools.a_utils.resourcegovernor import ResourceGovernor
 from secfsdstools.c_update.updateprocess import Updater
 
 DEFAULT_CONFIG_FILE: str = '.secfsdstools.cfg'
@@ -171,7 +172,11 @@ class ConfigurationManager:
             rapid_api_key=config['DEFAULT'].get('RapidApiKey', None),
             rapid_api_plan=config['DEFAULT'].get('RapidApiPlan', 'basic'),
             auto_update=config['DEFAULT'].getboolean('AutoUpdate', True),
-            keep_zip_files=config['DEFAULT'].getboolean('KeepZipFiles', False)
+            keep_zip_files=config['DEFAULT'].getboolean('KeepZipFiles', False),
+            max_processes=config['DEFAULT'].getint('MaxProcesses', None),
+            max_threads=config['DEFAULT'].getint('MaxThreads', None),
+            memory_budget_mb=config['DEFAULT'].getint('MemoryBudgetMB', None),
+            io_concurrency=config['DEFAULT'].getint('IoConcurrency', None)
         )
 
         check_messages = ConfigurationManager.check_basic_configuration(config)
@@ -190,6 +195,8 @@ class ConfigurationManager:
                            file_path, str(check_rapid_messages))
             config.rapid_api_key = None
             config.rapid_api_plan = None
+
+        ResourceGovernor.configure(config)
         return config
 
     @staticmethod
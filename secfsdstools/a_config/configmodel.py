@@ -19,6 +19,10 @@ class Configuration:
     daily_download_dir: Optional[str] = None
     auto_update: Optional[bool] = True
     keep_zip_files: Optional[bool] = False
+    max_processes: Optional[int] = None
+    max_threads: Optional[int] = None
+    memory_budget_mb: Optional[int] = None
+    io_concurrency: Optional[int] = None
 
     def __post_init__(self):
         self.daily_download_dir = os.path.join(self.download_dir, "daily")
@@ -0,0 +1,128 @@
+"""
+Helper to call the blocking functions of the library (parquet reads, sqlite queries) from
+asyncio code, e.g. from a web service that serves many requests concurrently.
+
+The blocking functions are executed in a bounded thread pool, so the event loop is never
+blocked and no processes are forked. Identical requests that are in flight at the same time
+are coalesced: the function is executed only once and all callers receive the same result.
+"""
+import asyncio
+import concurrent.futures
+import functools
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from secfsdstools.a_utils.resourcegovernor import ResourceGovernor
+
+T = TypeVar("T")
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class AsyncExecutionMetrics:
+    """ counts the executed and the coalesced requests """
+    executed: int = 0
+    coalesced: int = 0
+
+
+class AsyncRequestExecutor:
+    """
+    Executes blocking functions in a bounded thread pool and coalesces identical in-flight
+    requests. The executor can be used from several event loops and threads at the same time.
+    """
+
+    _default: Optional['AsyncRequestExecutor'] = None
+    _default_lock = threading.Lock()
+
+    @classmethod
+    def get_default(cls) -> 'AsyncRequestExecutor':
+        """
+        returns the executor that is shared by all async functions of the library. Its size is
+        defined by the max_threads limit of the ResourceGovernor.
+
+        Returns:
+            AsyncRequestExecutor: the shared executor
+        """
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = AsyncRequestExecutor()
+            return cls._default
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Args:
+            max_workers (int, optional, None): the number of threads, capped by the max_threads
+             limit of the ResourceGovernor. None uses max_threads.
+        """
+        self.max_workers = ResourceGovernor.get_threads(requested=max_workers)
+        self.metrics = AsyncExecutionMetrics()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix='secfsdstools-async')
+        self._in_flight: Dict[str, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        """ the number of requests with a key that are currently executed """
+        with self._lock:
+            return len(self._in_flight)
+
+    def _submit(self, key: Optional[str], function: Callable[..., T], *args: Any,
+                **kwargs: Any) -> concurrent.futures.Future:
+        call = functools.partial(function, *args, **kwargs)
+        if key is None:
+            with self._lock:
+                self.metrics.executed += 1
+            return self._executor.submit(call)
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.metrics.coalesced += 1
+                LOGGER.debug("coalescing request %s", key)
+                return future
+            self.metrics.executed += 1
+            future = self._executor.submit(call)
+            self._in_flight[key] = future
+
+        def remove(done: concurrent.futures.Future):
+            with self._lock:
+                if self._in_flight.get(key) is done:
+                    del self._in_flight[key]
+
+        future.add_done_callback(remove)
+        return future
+
+    async def run(self, function: Callable[..., T], *args: Any, key: Optional[str] = None,
+                  **kwargs: Any) -> T:
+        """
+        executes the function in the thread pool and waits for its result without blocking
+        the event loop.
+
+        Args:
+            function (Callable[..., T]): the blocking function
+            *args: the positional arguments of the function
+            key (str, optional, None): identifies the request. If a request with the same key is
+             in flight, its result is returned instead of calling the function again. Requests
+             without a key are never coalesced.
+            **kwargs: the keyword arguments of the function
+
+        Returns:
+            T: the result of the function
+        """
+        future = self._submit(key, function, *args, **kwargs)
+        # shield the shared future, so that a cancelled caller doesn't cancel the request
+        # of the other callers
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def shutdown(self, wait: bool = True):
+        """
+        shuts the thread pool down.
+
+        Args:
+            wait (bool, optional, True): wait until the running requests are finished
+        """
+        self._executor.shutdown(wait=wait)
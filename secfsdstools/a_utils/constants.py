@@ -6,6 +6,7 @@ NUM_TXT = "num.txt"
 PRE_TXT = "pre.txt"
 SUB_TXT = "sub.txt"
 PRE_NUM_TXT = "pre_num.txt"
+PRE_NUM_INDEX_TXT = "pre_num_index.txt"
 
 NUM_COLS = ['adsh', 'tag', 'version', 'coreg', 'ddate', 'qtrs', 'uom', 'value', 'footnote']
 PRE_COLS = ['adsh', 'report', 'line', 'stmt', 'inpth', 'rfile',
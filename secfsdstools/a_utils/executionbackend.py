@@ -0,0 +1,104 @@
+"""
+Chooses how the collectors execute the reading of several files: inline in the calling
+thread, in a thread pool, or in a pool of worker processes.
+
+Starting a process pool and pickling the results back to the parent is only worth it, if
+there is enough work to be distributed. Small reads are dominated by I/O and by the
+decompression and decoding in pyarrow, which releases the GIL, so they run well in a thread
+pool without any startup and pickling costs. Tiny requests are processed inline.
+
+The chosen backend can be overridden per collector or globally with the environment variable
+SECFSDSTOOLS_EXECUTION_BACKEND.
+"""
+import logging
+import os
+from typing import Optional
+
+from secfsdstools.a_utils.parallelexecution import ParallelExecutor, ParallelExecutorBase, \
+    ThreadExecutor
+from secfsdstools.a_utils.resourcegovernor import ResourceGovernor
+
+LOGGER = logging.getLogger(__name__)
+
+EXECUTION_BACKEND_ENV_VAR_NAME: str = 'SECFSDSTOOLS_EXECUTION_BACKEND'
+
+INLINE_BACKEND = 'inline'
+THREADS_BACKEND = 'threads'
+PROCESSES_BACKEND = 'processes'
+EXECUTION_BACKENDS = [INLINE_BACKEND, THREADS_BACKEND, PROCESSES_BACKEND]
+
+# below this amount of data, reading the files one after the other is faster than
+# starting any workers
+INLINE_MAX_BYTES: int = 16 * 1024 * 1024
+# up to this amount of data, the reads are I/O bound and the time to pickle the results
+# back from worker processes would outweigh the gain of using several cores
+THREADS_MAX_BYTES: int = 512 * 1024 * 1024
+
+
+def check_execution_backend(backend: Optional[str]):
+    """
+    checks whether the backend is supported.
+
+    Args:
+        backend (str, optional): the name of the backend, None means chosen by cost
+
+    """
+    if backend is not None and backend not in EXECUTION_BACKENDS:
+        raise ValueError(f"execution backend '{backend}' is not supported, "
+                         f"use one of {EXECUTION_BACKENDS}")
+
+
+def choose_execution_backend(entries: int, estimated_bytes: int,
+                             requested: Optional[str] = None) -> str:
+    """
+    chooses the backend for processing the entries. A requested backend, resp. the backend
+    defined in the environment variable SECFSDSTOOLS_EXECUTION_BACKEND, is always used.
+    Otherwise, single entries and tiny amounts of data are processed inline, small amounts of
+    data in threads, and large amounts in processes (if more than one process may be used).
+
+    Args:
+        entries (int): the number of entries (e.g. files) to process
+        estimated_bytes (int): the estimated amount of data that has to be read
+        requested (str, optional, None): the backend requested by the caller
+
+    Returns:
+        str: one of the EXECUTION_BACKENDS
+    """
+    if requested is None:
+        requested = os.getenv(EXECUTION_BACKEND_ENV_VAR_NAME) or None
+    check_execution_backend(requested)
+
+    if requested is not None:
+        backend = requested
+        reason = 'requested'
+    elif entries <= 1 or estimated_bytes <= INLINE_MAX_BYTES:
+        backend = INLINE_BACKEND
+        reason = 'tiny request'
+    elif estimated_bytes <= THREADS_MAX_BYTES or ResourceGovernor.get_processes() == 1:
+        backend = THREADS_BACKEND
+        reason = 'I/O bound request'
+    else:
+        backend = PROCESSES_BACKEND
+        reason = 'heavy request'
+
+    LOGGER.info("using the %s execution backend for %d entries with %.1f MB (%s)",
+                backend, entries, estimated_bytes / (1024 * 1024), reason)
+    return backend
+
+
+def create_executor(backend: str, chunksize: int = 0) -> ParallelExecutorBase:
+    """
+    creates the executor for the backend.
+
+    Args:
+        backend (str): one of the EXECUTION_BACKENDS
+        chunksize (int, optional, 0): see ParallelExecutorBase
+
+    Returns:
+        ParallelExecutorBase: a ThreadExecutor for 'threads', a ParallelExecutor for
+         'processes', and a serial ThreadExecutor for 'inline'
+    """
+    check_execution_backend(backend)
+    if backend == PROCESSES_BACKEND:
+        return ParallelExecutor(chunksize=chunksize)
+    return ThreadExecutor(chunksize=chunksize, execute_serial=backend == INLINE_BACKEND)
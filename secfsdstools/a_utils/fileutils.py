@@ -38,6 +38,28 @@ def get_directories_in_directory(directory: str) -> List[str]:
     return subdirectories
 
 
+def get_size(path: str) -> int:
+    """
+    returns the size of a file, resp. the summed up size of all files inside a directory
+    (including its subdirectories). Used to estimate the cost of processing a file or a
+    directory with parquet files.
+
+    Args:
+        path (str): path to a file or a directory
+
+    Returns:
+        int: size in bytes, 0 if the path does not exist
+    """
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+
+    size = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            size += os.path.getsize(os.path.join(root, file))
+    return size
+
+
 def read_df_from_file_in_zip(zip_file: str, file_to_extract: str,
                              dtype: Optional[Dict[str, object]] = None,
                              usecols: Optional[List[str]] = None, **kwargs) -> pd.DataFrame:
@@ -7,17 +7,167 @@ using pathos.multiprocessing instead of multiprocessing, so that method function
 
 import concurrent.futures
 import logging
+import os
+import sys
+import threading
+import traceback
 from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
 from time import time, sleep
-from typing import Generic, TypeVar, List, Callable, Optional, Tuple
+from typing import Any, Generic, TypeVar, List, Callable, Optional, Tuple, Iterator, \
+    Generator
 
+import pathos
 from pathos.multiprocessing import ProcessingPool as Pool
-from pathos.multiprocessing import cpu_count
+
+from secfsdstools.a_utils.resourcegovernor import ResourceGovernor
+
+try:
+    import resource
+except ImportError:  # pragma: no cover  # not available on windows
+    resource = None
 
 IT = TypeVar("IT")  # input type of the list to split
 PT = TypeVar("PT")  # processed type of the list to split
 OT = TypeVar("OT")  # PostProcessed Type
 
+# marks the end of the entries when they are submitted one by one
+_NO_ENTRY = object()
+
+# marks the result of an entry that failed permanently and was added to the dead letters
+_FAILED = object()
+
+# max length of the string representation of an item in the metrics
+_MAX_ITEM_LABEL_LENGTH = 200
+
+# min seconds between two progress messages on info level
+_PROGRESS_LOG_INTERVAL_SECONDS = 10.0
+
+# seconds between two checks whether a worker process died
+_WORKER_CHECK_INTERVAL_SECONDS = 0.1
+
+# pathos versions whose private attributes are used to detect crashed workers
+_PATHOS_VERSION = tuple(int(part) for part in pathos.__version__.split('.')[:2]
+                        if part.isdigit())
+_SUPPORTED_PATHOS_VERSIONS = [(0, 2), (0, 3)]
+
+
+def _get_peak_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macos and in kilobytes on linux
+    if sys.platform == 'darwin':
+        return maxrss / (1024 * 1024)
+    return maxrss / 1024
+
+
+@dataclass
+class ItemMetrics:
+    """
+    Metrics of a single processed item. They are measured inside the worker and are sent
+    back to the parent together with the result.
+    """
+    item: str
+    wall_time: float
+    worker_pid: int
+    peak_rss_mb: float
+    rows: int = 0
+    bytes: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class ItemResult(Generic[PT]):
+    """
+    Envelope which contains the result of a processed item, resp. the exception that was
+    raised, and the metrics measured inside the worker.
+    """
+    result: Optional[PT]
+    metrics: ItemMetrics
+    exception: Optional[BaseException] = None
+    crashed: bool = False
+
+
+@dataclass
+class ExecutionProgress:
+    """
+    Progress, throughput, and ETA of an execution. The instance is updated in the parent
+    every time the result of an item is received.
+    """
+    workers: int
+    items_total: int = 0
+    items_done: int = 0
+    items_failed: int = 0
+    retries: int = 0
+    rows: int = 0
+    bytes: int = 0
+    busy_time: float = 0.0
+    peak_rss_mb: float = 0.0
+    start_time: float = field(default_factory=time)
+    item_metrics: List[ItemMetrics] = field(default_factory=list)
+
+    @property
+    def items_remaining(self) -> int:
+        """ number of items which still have to be processed """
+        return max(0, self.items_total - self.items_done - self.items_failed)
+
+    @property
+    def elapsed(self) -> float:
+        """ seconds since the start of the execution """
+        return time() - self.start_time
+
+    @property
+    def throughput(self) -> float:
+        """ processed items per second """
+        elapsed = self.elapsed
+        return (self.items_done + self.items_failed) / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def worker_utilization(self) -> float:
+        """ share of the available worker time that was used to process items (0.0 - 1.0) """
+        elapsed = self.elapsed
+        if elapsed <= 0 or self.workers == 0:
+            return 0.0
+        return min(1.0, self.busy_time / (elapsed * self.workers))
+
+    @property
+    def eta(self) -> Optional[float]:
+        """ estimated remaining seconds, None as long as no item is finished """
+        finished = self.items_done + self.items_failed
+        if finished == 0:
+            return None
+        return self.elapsed / finished * self.items_remaining
+
+    def slowest_items(self, count: int = 5) -> List[ItemMetrics]:
+        """
+        returns the metrics of the items that took the longest time to process.
+
+        Args:
+            count (int, optional, 5): number of items to return
+
+        Returns:
+            List[ItemMetrics]: metrics of the slowest items, the slowest first
+        """
+        return sorted(self.item_metrics, key=lambda x: x.wall_time, reverse=True)[:count]
+
+    def add_item(self, metrics: ItemMetrics):
+        """
+        adds the metrics of a processed item.
+
+        Args:
+            metrics (ItemMetrics): the metrics measured in the worker
+        """
+        self.item_metrics.append(metrics)
+        if metrics.error is None:
+            self.items_done += 1
+        else:
+            self.items_failed += 1
+        self.rows += metrics.rows
+        self.bytes += metrics.bytes
+        self.busy_time += metrics.wall_time
+        self.peak_rss_mb = max(self.peak_rss_mb, metrics.peak_rss_mb)
+
 
 class ParallelExecutorBase(Generic[IT, PT, OT], ABC):
     """
@@ -46,18 +196,39 @@ class ParallelExecutorBase(Generic[IT, PT, OT], ABC):
     The post_process_chunk_function receives a list of processed entries. you use this
     function to update the processed entries, so that in the next call to
     get_entries_function, these entries will not be part of
+
+    Instead of execute(), which returns all results at the end, execute_streaming() can be
+    used to receive the results one by one as soon as they are processed.
+
+    The progress of the execution is available in the progress attribute (ExecutionProgress).
+    Moreover, a callback can be registered with set_progress_callback, which is called every
+    time an item was processed.
+
+    If the entries need very different processing times, a cost function can be set with
+    set_cost_function. The entries are then submitted with the most expensive first
+    (longest processing time first scheduling). Since every worker takes the next entry as
+    soon as it is free, this avoids that a single expensive entry is processed at the end
+    while all the other workers are idle.
+
+    If a worker process dies (e.g. killed by the OOM killer) or an entry raises a
+    MemoryError, the results that were already finished are kept and the unfinished entries
+    are retried with half the number of processes. If an entry also fails when it is
+    processed by a single worker, it is added to the dead_letters list and the processing
+    continues with the other entries.
     """
 
     def __init__(self,
-                 processes: int = cpu_count(),
+                 processes: Optional[int] = None,
                  chunksize: int = 100,
                  max_calls_per_sec: int = 0,
                  intend: str = "    ",
-                 execute_serial: bool = False):
+                 execute_serial: bool = False,
+                 memory_per_task_mb: Optional[int] = None):
         """
         Args:
-            processes (int, optional, cpu_count()): number of parallel processes,
-             default is cpu_count
+            processes (int, optional, None): number of parallel processes (resp. threads),
+             default is the limit defined by the ResourceGovernor. A provided value is capped
+             by the limit of the ResourceGovernor.
             chunksize (int, optional, 100): size of chunk - think of it as a commit,
              default is 100
             max_calls_per_sec (int, optional, 0): how many calls may be made per
@@ -65,23 +236,35 @@ class ParallelExecutorBase(Generic[IT, PT, OT], ABC):
             intend (str, optional, '    '): how much log messages should be intended
             execute_serial (bool, optional, False): for easier debugging, this
              flag ensures that all data areprocessed in the main thread
+            memory_per_task_mb (int, optional, None): estimated memory a single task needs.
+             used to reduce the number of processes, if a memory budget is defined in the
+             ResourceGovernor.
         """
 
-        self.processes = processes
+        self.processes = self._get_workers(processes, memory_per_task_mb)
         self.chunksize = chunksize
         self.intend = intend
-        self.execute_serial = execute_serial
+        # if only one worker is allowed, there is no need to start a pool
+        self.execute_serial = execute_serial or self.processes == 1
         self.min_roundtrip_time = 0
         self.max_calls_per_sec = max_calls_per_sec
         if max_calls_per_sec > 0:
             if execute_serial:
                 self.min_roundtrip_time = 1 / max_calls_per_sec
             else:
-                self.min_roundtrip_time = float(processes) / max_calls_per_sec
+                self.min_roundtrip_time = float(self.processes) / max_calls_per_sec
 
         self.get_entries_function: Optional[Callable[[], List[IT]]] = None
         self.process_element_function: Optional[Callable[[IT], PT]] = None
         self.post_process_chunk_function: Optional[Callable[[List[PT]], List[OT]]] = None
+        self.result_size_function: Optional[Callable[[PT], Tuple[int, int]]] = None
+        self.cost_function: Optional[Callable[[IT], float]] = None
+
+        # the following attributes are only used in the parent and not sent to the workers
+        self.progress_callback: Optional[Callable[[ExecutionProgress], None]] = None
+        self.progress: ExecutionProgress = ExecutionProgress(workers=self.processes)
+        self.dead_letters: List[IT] = []
+        self._last_progress_log: float = 0.0
 
         if len(logging.root.handlers) > 0:
             formatter = logging.root.handlers[0].formatter
@@ -119,21 +302,83 @@ class ParallelExecutorBase(Generic[IT, PT, OT], ABC):
         """
         self.post_process_chunk_function = post_process
 
-    def _process_throttled(self, data: IT) -> PT:
+    def set_result_size_function(self, result_size: Callable[[PT], Tuple[int, int]]):
+        """
+        set the function that measures the size of a processed element. The function is
+        called inside the worker and returns a tuple with the number of rows and the number
+        of bytes of the processed element. The sizes are summed up in the progress.
+
+        Args:
+            result_size (Callable[[PT], Tuple[int, int]]): function that returns the number of
+             rows and bytes of a processed element
+        """
+        self.result_size_function = result_size
+
+    def set_cost_function(self, cost: Callable[[IT], float]):
+        """
+        set the function that estimates the cost (e.g. the file size) of processing an entry.
+        If set, the entries with the highest cost are processed first. The function is
+        called in the parent before the entries are submitted.
+
+        Args:
+            cost (Callable[[IT], float]): function that returns the estimated cost of an entry
+        """
+        self.cost_function = cost
+
+    def set_progress_callback(self, progress_callback: Callable[[ExecutionProgress], None]):
+        """
+        set a function which is called in the parent every time an item was processed.
+
+        Args:
+            progress_callback (Callable[[ExecutionProgress], None]): function that receives
+             the current progress
+        """
+        self.progress_callback = progress_callback
+
+    def __getstate__(self):
+        # the progress and the callback are only needed in the parent and may not be picklable
+        state = self.__dict__.copy()
+        state['progress_callback'] = None
+        state['progress'] = None
+        state['dead_letters'] = []
+        return state
+
+    def _process_throttled(self, data: IT) -> ItemResult[PT]:
         """
         process the current data set and makes sure that only a limited number
-        of calls per seconds are made
+        of calls per seconds are made. Exceptions are not raised but returned together with
+        the measured metrics, so that they can be handled in the parent.
         """
         start = time()
-        result: PT = self.process_element_function(data)
+        result: Optional[PT] = None
+        exception: Optional[BaseException] = None
+        error: Optional[str] = None
+        rows = 0
+        size = 0
+        try:
+            result = self.process_element_function(data)
+            if self.result_size_function is not None:
+                rows, size = self.result_size_function(result)
+        except Exception as ex:  # pylint: disable=W0703  # reported back to the parent
+            exception = ex
+            error = traceback.format_exc()
         end = time()
+
+        metrics = ItemMetrics(item=str(data)[:_MAX_ITEM_LABEL_LENGTH],
+                              wall_time=end - start,
+                              worker_pid=os.getpid(),
+                              peak_rss_mb=_get_peak_rss_mb(),
+                              rows=rows,
+                              bytes=size,
+                              error=error)
+
         if self.min_roundtrip_time > 0:
             sleep_time = max(0.0, self.min_roundtrip_time - (end - start))
             sleep(sleep_time)
 
-        return result
+        return ItemResult(result=result, metrics=metrics, exception=exception)
 
-    def _process_throttled_parallel(self, data: IT) -> PT:
+    def _process_throttled_parallel(self, data: IT) -> ItemResult[PT]:
         logger = logging.getLogger()
         if not logger.hasHandlers():
             logger.setLevel(logging.INFO)
@@ -143,22 +388,144 @@ class ParallelExecutorBase(Generic[IT, PT, OT], ABC):
         return self._process_throttled(data)
 
     @abstractmethod
-    def _execute_parallel(self, chunk: List[IT]) -> List[PT]:
+    def _get_workers(self, requested: Optional[int], memory_per_task_mb: Optional[int]) -> int:
         pass
 
-    def _execute_serial(self, chunk: List[IT]) -> List[PT]:
-        results: List[PT] = [self._process_throttled(entry) for entry in chunk]
-        return results
+    @abstractmethod
+    def _execute_parallel_streaming(self, entries: List[IT], max_pending: int, processes: int) \
+            -> Generator[Tuple[int, ItemResult[PT]], None, List[int]]:
+        """
+        processes the entries in parallel and yields the index of the entry together with
+        its result as soon as it is finished. If the processing could not be completed
+        because a worker died, the indexes of the unfinished entries are returned.
+        """
+
+    def _execute_serial_streaming(self, entries: List[IT]) \
+            -> Generator[Tuple[int, ItemResult[PT]], None, List[int]]:
+        for index, entry in enumerate(entries):
+            yield index, self._process_throttled(entry)
+        return []
+
+    def _order_by_cost(self, entries: List[IT]) -> List[int]:
+        """ returns the indexes of the entries, ordered by descending cost (if defined) """
+        order = list(range(len(entries)))
+        if self.cost_function is not None:
+            costs = [self.cost_function(entry) for entry in entries]
+            order.sort(key=lambda index: costs[index], reverse=True)
+        return order
+
+    def _execute_streaming(self, entries: List[IT], max_pending: int) \
+            -> Iterator[Tuple[int, ItemResult[PT]]]:
+        # the entries are submitted ordered by their cost, the returned index
+        # refers to the position in the provided entries list
+        order = self._order_by_cost(entries)
+        processes = 1 if self.execute_serial else self.processes
+
+        while len(order) > 0:
+            ordered_entries = [entries[index] for index in order]
+
+            if self.execute_serial:
+                results = self._execute_serial_streaming(ordered_entries)
+            else:
+                results = self._execute_parallel_streaming(ordered_entries, max_pending,
+                                                           processes)
+
+            # positions in ordered_entries which have to be retried
+            unfinished: List[int] = []
+            while True:
+                try:
+                    position, item_result = next(results)
+                except StopIteration as stop:
+                    unfinished.extend(stop.value or [])
+                    break
+
+                if isinstance(item_result.exception, MemoryError):
+                    unfinished.append(position)
+                    continue
+                yield order[position], item_result
+
+            if len(unfinished) == 0:
+                return
+
+            # keep the order in which the entries were submitted
+            unfinished.sort()
+            if processes > 1:
+                processes = max(1, processes // 2)
+                logging.warning("%s%d items were not finished because a worker crashed or ran "
+                                "out of memory. retrying them with %d processes",
+                                self.intend, len(unfinished), processes)
+            else:
+                # a single worker processes the entries in order, so the first unfinished
+                # entry is the one which caused the failure
+                failed_position = unfinished.pop(0)
+                failed_entry = ordered_entries[failed_position]
+                logging.error("%s%s failed permanently and is added to the dead letters",
+                              self.intend, str(failed_entry)[:_MAX_ITEM_LABEL_LENGTH])
+                self.dead_letters.append(failed_entry)
+                yield order[failed_position], self._create_crashed_result(failed_entry)
+
+            order = [order[position] for position in unfinished]
+
+    @staticmethod
+    def _create_crashed_result(entry: IT) -> ItemResult[PT]:
+        metrics = ItemMetrics(item=str(entry)[:_MAX_ITEM_LABEL_LENGTH], wall_time=0.0,
+                              worker_pid=0, peak_rss_mb=0.0,
+                              error="worker crashed or ran out of memory")
+        return ItemResult(result=None, metrics=metrics, crashed=True)
+
+    def _handle_item_result(self, item_result: ItemResult[PT]) -> PT:
+        """
+        updates the progress with the metrics of the received item and returns its result.
+        If the processing of the item raised an exception, it is raised again.
+        If the item failed permanently because of a crash, _FAILED is returned.
+        """
+        self.progress.add_item(item_result.metrics)
+        eta = self.progress.eta
+        finished = self.progress.items_done + self.progress.items_failed
+
+        # every item is logged on debug level, on info level only every few seconds and
+        # when the last item is finished, so that big executions don't flood the log
+        level = logging.DEBUG
+        if finished >= self.progress.items_total or \
+                time() - self._last_progress_log >= _PROGRESS_LOG_INTERVAL_SECONDS:
+            level = logging.INFO
+            self._last_progress_log = time()
+        logging.log(level, "%sprocessed %d/%d items in %.1fs (item %.1fs), eta %s", self.intend,
+                    finished, self.progress.items_total, self.progress.elapsed,
+                    item_result.metrics.wall_time, f"{eta:.0f}s" if eta is not None else "-")
+        if self.progress_callback is not None:
+            self.progress_callback(self.progress)
+
+        if item_result.crashed:
+            return _FAILED
+
+        if item_result.exception is not None:
+            logging.error("%sfailed to process %s: %s", self.intend,
+                          item_result.metrics.item, item_result.metrics.error)
+            raise item_result.exception
+        return item_result.result
+
+    def _start_pass(self, missing: List[IT]):
+        """ updates the progress at the beginning of a (retry) pass over the missing entries """
+        if self.progress.items_total > 0:
+            self.progress.retries += len(missing)
+        self.progress.items_total = \
+            self.progress.items_done + self.progress.items_failed + len(missing)
 
     def execute(self) -> Tuple[List[OT], List[IT]]:
         """
         starts the parallel processing and returns the results.
+        Entries which failed permanently because of a worker crash are not part of the
+        results, they are listed in the dead_letters attribute.
 
         Returns:
              Tuple[List[OT], List[IT]]: tuple with two lists: the first are the processed entries,
                  the second list are the entries that couldn't be processed
         """
 
+        self.progress = ExecutionProgress(workers=self.processes)
+        self.dead_letters = []
+
         last_missing = None
         missing: List[IT] = self.get_entries_function()
         result_list: List[OT] = []
@@ -169,6 +536,7 @@ class ParallelExecutorBase(Generic[IT, PT, OT], ABC):
         while (last_missing is None) or (last_missing > len(missing)):
             last_missing = len(missing)
             logging.info("%sitems to process: %d", self.intend, len(missing))
+            self._start_pass(missing)
 
             # break up the list of missing entries in chunks and process every chunk in parallel
             chunk_entries = self.chunksize
@@ -179,12 +547,12 @@ class ParallelExecutorBase(Generic[IT, PT, OT], ABC):
             for i in range(0, len(missing), chunk_entries):
                 chunk = missing[i:i + chunk_entries]
 
-                processed: List[PT]
-
-                if self.execute_serial:
-                    processed = self._execute_serial(chunk)
-                else:
-                    processed = self._execute_parallel(chunk)
+                # the results are received as soon as they are finished, but they are kept
+                # in the order of the chunk
+                processed: List[PT] = [None] * len(chunk)
+                for index, item_result in self._execute_streaming(chunk, len(chunk)):
+                    processed[index] = self._handle_item_result(item_result)
+                processed = [entry for entry in processed if entry is not _FAILED]
 
                 # post process the chunk and add the result to the result_list.
                 # it is olso ok to return nothing
@@ -199,21 +567,169 @@ class ParallelExecutorBase(Generic[IT, PT, OT], ABC):
 
         return result_list, missing
 
+    def execute_streaming(self, max_pending: Optional[int] = None) -> Iterator[OT]:
+        """
+        starts the parallel processing and yields the results as soon as they are available.
+
+        In contrast to execute(), the results are not collected per chunk, but every
+        processed entry is passed directly to the post_process_chunk_function (as a list
+        with one element) and the post processed results are yielded in the order in which
+        the processing finished. So an expensive entry does not block the delivery of the
+        entries that were already processed.
+
+        The number of entries that were submitted for processing but whose results were not
+        yet consumed by the caller is limited by max_pending. As long as the caller doesn't
+        consume the yielded results, no new entries are submitted. Therefore, only a limited
+        number of results is kept in memory at the same time, which makes it possible to
+        process large results incrementally (e.g. writing every result directly to disk).
+
+        Args:
+            max_pending (int, optional, None): max number of entries that are processed or
+             whose results are waiting to be consumed. default is twice the number of processes
+
+        Returns:
+            Iterator[OT]: the post processed entries in the order they were finished
+        """
+        if max_pending is None:
+            max_pending = 2 * self.processes
+        max_pending = max(1, max_pending)
+
+        self.progress = ExecutionProgress(workers=self.processes)
+        self.dead_letters = []
+
+        last_missing = None
+        missing: List[IT] = self.get_entries_function()
+
+        # we retry as long as we were able to process additional entries with in the while loop.
+        while len(missing) > 0 and ((last_missing is None) or (last_missing > len(missing))):
+            last_missing = len(missing)
+            logging.info("%sitems to process: %d", self.intend, len(missing))
+            self._start_pass(missing)
+
+            for _, item_result in self._execute_streaming(missing, max_pending):
+                processed = self._handle_item_result(item_result)
+                if processed is not _FAILED:
+                    yield from self.post_process_chunk_function([processed])
+
+            missing = self.get_entries_function()
+
 
 class ParallelExecutor(ParallelExecutorBase[IT, PT, OT]):
     """
     Parallel executor that uses multiprocess package to parallelize
     """
-    def _execute_parallel(self, chunk: List[IT]) -> List[PT]:
-        with Pool(self.processes) as pool:
-            return pool.map(self._process_throttled_parallel, chunk)
+    def _get_workers(self, requested: Optional[int], memory_per_task_mb: Optional[int]) -> int:
+        return ResourceGovernor.get_processes(requested=requested,
+                                              memory_per_task_mb=memory_per_task_mb)
+
+    @staticmethod
+    def _get_multiprocess_pool(pool: Pool) -> Optional[Any]:
+        # pathos doesn't provide access to the underlying multiprocess pool, which is needed to
+        # watch the worker processes and to register callbacks. The private attributes are
+        # only used with the pathos versions they were verified with, otherwise crashed
+        # workers are not detected.
+        if _PATHOS_VERSION not in _SUPPORTED_PATHOS_VERSIONS:
+            return None
+        try:
+            multiprocess_pool = pool._serve()  # pylint: disable=W0212
+            list(multiprocess_pool._pool)  # pylint: disable=W0212
+            return multiprocess_pool
+        except (AttributeError, TypeError):
+            return None
+
+    def _execute_parallel_streaming(self, entries: List[IT], max_pending: int, processes: int) \
+            -> Generator[Tuple[int, ItemResult[PT]], None, List[int]]:
+        with Pool(processes) as pool:
+            multiprocess_pool = self._get_multiprocess_pool(pool)
+            if multiprocess_pool is None:
+                logging.info("%scrashed workers are not detected with pathos %s", self.intend,
+                             pathos.__version__)
+                workers = set()
+            else:
+                workers = set(multiprocess_pool._pool)  # pylint: disable=W0212
+
+            # set by the result handler thread of the pool as soon as any result arrived
+            finished = threading.Event()
+
+            def on_finished(_):
+                finished.set()
+
+            entries_iter = enumerate(entries)
+            pending = []
+            while True:
+                # only submit new entries, if there is space in the pending window
+                while len(pending) < max_pending:
+                    indexed_entry = next(entries_iter, _NO_ENTRY)
+                    if indexed_entry is _NO_ENTRY:
+                        break
+                    index, entry = indexed_entry
+                    if multiprocess_pool is None:
+                        async_result = pool.apipe(self._process_throttled_parallel, entry)
+                    else:
+                        async_result = multiprocess_pool.apply_async(
+                            self._process_throttled_parallel, (entry,),
+                            callback=on_finished, error_callback=on_finished)
+                    pending.append((index, async_result))
+
+                if len(pending) == 0:
+                    return []
+
+                # cleared before the results are checked, so that no notification gets lost
+                finished.clear()
+                ready = [(index, async_result) for index, async_result in pending
+                         if async_result.ready()]
+                if len(ready) == 0:
+                    if multiprocess_pool is None:
+                        pending[0][1].wait(timeout=0.05)
+                        continue
+
+                    # the pool replaces workers that exited, so a dead worker is either still
+                    # in the list of the started workers or was already replaced by a new one
+                    current = list(multiprocess_pool._pool)  # pylint: disable=W0212
+                    if any(worker.exitcode is not None for worker in workers) or \
+                            any(worker not in workers for worker in current):
+                        # a worker died, so the result of the entry it processed will never
+                        # arrive. the pool is replaced and the unfinished entries are returned.
+                        logging.warning("%sa worker process died unexpectedly", self.intend)
+                        pool.terminate()
+                        pool.clear()
+                        return [index for index, _ in pending] + \
+                            [index for index, _ in entries_iter]
+                    # the timeout is only needed to check the workers, finished results
+                    # wake up the wait immediately
+                    finished.wait(timeout=_WORKER_CHECK_INTERVAL_SECONDS)
+                    continue
+
+                for index, async_result in ready:
+                    pending.remove((index, async_result))
+                    yield index, async_result.get()
 
 
 class ThreadExecutor(ParallelExecutorBase[IT, PT, OT]):
     """
     Parallel exector that uses Threads to parallelize
     """
-    def _execute_parallel(self, chunk: List[IT]) -> List[PT]:
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            # Herunterladen der Dateien parallel
-            return list(executor.map(self._process_throttled_parallel, chunk))
+    def _get_workers(self, requested: Optional[int], memory_per_task_mb: Optional[int]) -> int:
+        return ResourceGovernor.get_threads(requested=requested)
+
+    def _execute_parallel_streaming(self, entries: List[IT], max_pending: int, processes: int) \
+            -> Generator[Tuple[int, ItemResult[PT]], None, List[int]]:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=processes) as executor:
+            entries_iter = enumerate(entries)
+            pending = {}
+            while True:
+                # only submit new entries, if there is space in the pending window
+                while len(pending) < max_pending:
+                    indexed_entry = next(entries_iter, _NO_ENTRY)
+                    if indexed_entry is _NO_ENTRY:
+                        break
+                    index, entry = indexed_entry
+                    pending[executor.submit(self._process_throttled_parallel, entry)] = index
+
+                if len(pending) == 0:
+                    return []
+
+                done, _ = concurrent.futures.wait(
+                    pending.keys(), return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
@@ -0,0 +1,272 @@
+"""
+Central definition of the resources (processes, threads, memory, and io) that the library is
+allowed to use when it executes tasks in parallel.
+
+The limits are defined with the following precedence:
+1. environment variables (e.g. SECFSDSTOOLS_MAX_PROCESSES)
+2. the values in the configuration file (e.g. MaxProcesses)
+3. automatically detected values. On hosts and in containers with cgroup cpu and memory
+   limits, these limits are used instead of the number of cores and the memory of the host.
+
+Setting max_processes to 1 turns off parallel processing in the whole library.
+"""
+import logging
+import math
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from secfsdstools.a_config.configmodel import Configuration
+
+LOGGER = logging.getLogger(__name__)
+
+MAX_PROCESSES_ENV_VAR_NAME: str = 'SECFSDSTOOLS_MAX_PROCESSES'
+MAX_THREADS_ENV_VAR_NAME: str = 'SECFSDSTOOLS_MAX_THREADS'
+MEMORY_BUDGET_MB_ENV_VAR_NAME: str = 'SECFSDSTOOLS_MEMORY_BUDGET_MB'
+IO_CONCURRENCY_ENV_VAR_NAME: str = 'SECFSDSTOOLS_IO_CONCURRENCY'
+
+CGROUP_BASE_DIR: str = '/sys/fs/cgroup'
+
+# values above this limit mean "no limit" in cgroup v1 memory.limit_in_bytes
+_CGROUP_V1_NO_MEMORY_LIMIT: int = 2 ** 60
+
+
+def _read_first_line(path: str) -> Optional[str]:
+    try:
+        with open(path, 'r', encoding='utf8') as file:
+            return file.readline().strip()
+    except OSError:
+        return None
+
+
+def get_cgroup_cpu_limit(cgroup_dir: str = CGROUP_BASE_DIR) -> Optional[float]:
+    """
+    reads the cpu quota of the current cgroup (supports cgroup v2 and v1).
+
+    Args:
+        cgroup_dir (str, optional, '/sys/fs/cgroup'): the mount point of the cgroup filesystem
+
+    Returns:
+        Optional[float]: number of cpus the cgroup may use, None if there is no limit
+    """
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    cpu_max = _read_first_line(os.path.join(cgroup_dir, 'cpu.max'))
+    if cpu_max:
+        parts = cpu_max.split()
+        if len(parts) == 2 and parts[0] != 'max':
+            return int(parts[0]) / int(parts[1])
+        return None
+
+    # cgroup v1: quota is -1 if there is no limit
+    quota = _read_first_line(os.path.join(cgroup_dir, 'cpu', 'cpu.cfs_quota_us'))
+    period = _read_first_line(os.path.join(cgroup_dir, 'cpu', 'cpu.cfs_period_us'))
+    if quota and period and int(quota) > 0 and int(period) > 0:
+        return int(quota) / int(period)
+    return None
+
+
+def get_cgroup_memory_limit_mb(cgroup_dir: str = CGROUP_BASE_DIR) -> Optional[int]:
+    """
+    reads the memory limit of the current cgroup (supports cgroup v2 and v1).
+
+    Args:
+        cgroup_dir (str, optional, '/sys/fs/cgroup'): the mount point of the cgroup filesystem
+
+    Returns:
+        Optional[int]: the memory limit in MB, None if there is no limit
+    """
+    memory_max = _read_first_line(os.path.join(cgroup_dir, 'memory.max'))
+    if memory_max:
+        if memory_max == 'max':
+            return None
+        return int(memory_max) // (1024 * 1024)
+
+    limit_in_bytes = _read_first_line(os.path.join(cgroup_dir, 'memory', 'memory.limit_in_bytes'))
+    if limit_in_bytes and int(limit_in_bytes) < _CGROUP_V1_NO_MEMORY_LIMIT:
+        return int(limit_in_bytes) // (1024 * 1024)
+    return None
+
+
+def get_available_cpus(cgroup_dir: str = CGROUP_BASE_DIR) -> int:
+    """
+    calculates the number of cpus that can be used by the current process. This considers
+    the number of cores of the host, the cpu affinity of the process and cgroup cpu quotas.
+
+    Args:
+        cgroup_dir (str, optional, '/sys/fs/cgroup'): the mount point of the cgroup filesystem
+
+    Returns:
+        int: number of usable cpus, at least 1
+    """
+    cpus = os.cpu_count() or 1
+    if hasattr(os, 'sched_getaffinity'):
+        cpus = min(cpus, len(os.sched_getaffinity(0)))
+
+    cgroup_cpus = get_cgroup_cpu_limit(cgroup_dir)
+    if cgroup_cpus is not None:
+        cpus = min(cpus, math.ceil(cgroup_cpus))
+
+    return max(1, cpus)
+
+
+def _read_int_env(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    if value is None or value.strip() == '':
+        return None
+    return int(value)
+
+
+@dataclass
+class ResourceLimits:
+    """ The resources the library may use. """
+    max_processes: int
+    max_threads: int
+    io_concurrency: int
+    memory_budget_mb: Optional[int] = None
+
+
+class ResourceGovernor:
+    """
+    Provides the resource limits to all executors of the library. The limits are global, so
+    every ParallelExecutor, ThreadExecutor, and downloader draws from the same definition.
+    """
+
+    _limits: Optional[ResourceLimits] = None
+    _io_semaphore: Optional[threading.BoundedSemaphore] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, configuration: Optional[Configuration] = None,
+                  cgroup_dir: str = CGROUP_BASE_DIR) -> ResourceLimits:
+        """
+        (re)calculates the limits based on the environment variables, the provided configuration
+        and the detected cpu and memory resources.
+
+        Args:
+            configuration (Configuration, optional, None): configuration with the limits
+             defined in the config file
+            cgroup_dir (str, optional, '/sys/fs/cgroup'): the mount point of the cgroup filesystem
+
+        Returns:
+            ResourceLimits: the calculated limits
+        """
+        cpus = get_available_cpus(cgroup_dir)
+
+        def select(env_var_name: str, configured: Optional[int],
+                   default: Optional[int]) -> Optional[int]:
+            env_value = _read_int_env(env_var_name)
+            if env_value is not None:
+                return env_value
+            if configured is not None:
+                return configured
+            return default
+
+        max_processes = select(MAX_PROCESSES_ENV_VAR_NAME,
+                               configuration.max_processes if configuration else None,
+                               cpus)
+        max_threads = select(MAX_THREADS_ENV_VAR_NAME,
+                             configuration.max_threads if configuration else None,
+                             min(32, cpus + 4))
+        io_concurrency = select(IO_CONCURRENCY_ENV_VAR_NAME,
+                                configuration.io_concurrency if configuration else None,
+                                min(8, max(2, cpus)))
+        memory_budget_mb = select(MEMORY_BUDGET_MB_ENV_VAR_NAME,
+                                  configuration.memory_budget_mb if configuration else None,
+                                  get_cgroup_memory_limit_mb(cgroup_dir))
+
+        limits = ResourceLimits(max_processes=max(1, max_processes),
+                                max_threads=max(1, max_threads),
+                                io_concurrency=max(1, io_concurrency),
+                                memory_budget_mb=memory_budget_mb)
+
+        with cls._lock:
+            cls._limits = limits
+            cls._io_semaphore = threading.BoundedSemaphore(limits.io_concurrency)
+
+        LOGGER.debug('resource limits: %s', limits)
+        return limits
+
+    @classmethod
+    def get_limits(cls) -> ResourceLimits:
+        """
+        returns the current limits. If the governor was not configured yet, the limits are
+        calculated based on the environment variables and the detected resources.
+
+        Returns:
+            ResourceLimits: the current limits
+        """
+        if cls._limits is None:
+            cls.configure()
+        return cls._limits
+
+    @classmethod
+    def get_processes(cls, requested: Optional[int] = None,
+                      memory_per_task_mb: Optional[int] = None) -> int:
+        """
+        returns the number of processes that may be used.
+
+        Args:
+            requested (int, optional, None): number of processes requested by the caller,
+             capped by the max_processes limit. If None, max_processes is returned
+            memory_per_task_mb (int, optional, None): estimated memory that a single
+             task needs. If a memory budget is defined, the number of processes is reduced
+             so that the budget is not exceeded
+
+        Returns:
+            int: number of processes, at least 1
+        """
+        limits = cls.get_limits()
+        processes = limits.max_processes if requested is None \
+            else min(requested, limits.max_processes)
+
+        if memory_per_task_mb and limits.memory_budget_mb:
+            processes = min(processes, limits.memory_budget_mb // memory_per_task_mb)
+
+        return max(1, processes)
+
+    @classmethod
+    def get_threads(cls, requested: Optional[int] = None) -> int:
+        """
+        returns the number of threads that may be used.
+
+        Args:
+            requested (int, optional, None): number of threads requested by the caller,
+             capped by the max_threads limit. If None, max_threads is returned
+
+        Returns:
+            int: number of threads, at least 1
+        """
+        limits = cls.get_limits()
+        if requested is None:
+            return limits.max_threads
+        return max(1, min(requested, limits.max_threads))
+
+    @classmethod
+    def get_io_concurrency(cls, requested: Optional[int] = None) -> int:
+        """
+        returns the number of concurrent io operations (downloads, file reads) that may be used.
+
+        Args:
+            requested (int, optional, None): concurrency requested by the caller,
+             capped by the io_concurrency limit. If None, io_concurrency is returned
+
+        Returns:
+            int: number of concurrent io operations, at least 1
+        """
+        limits = cls.get_limits()
+        if requested is None:
+            return limits.io_concurrency
+        return max(1, min(requested, limits.io_concurrency))
+
+    @classmethod
+    def io_slot(cls) -> threading.BoundedSemaphore:
+        """
+        returns the semaphore which is shared by all io operations within the current process.
+        use it as context manager: 'with ResourceGovernor.io_slot(): ...'
+
+        Returns:
+            threading.BoundedSemaphore: the shared io semaphore
+        """
+        cls.get_limits()
+        return cls._io_semaphore
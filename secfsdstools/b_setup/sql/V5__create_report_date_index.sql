@@ -0,0 +1,3 @@
+CREATE INDEX IF NOT EXISTS index_parquet_reports_filed ON index_parquet_reports (filed);
+
+CREATE INDEX IF NOT EXISTS index_parquet_reports_period ON index_parquet_reports (period);
@@ -10,6 +10,7 @@ from typing import Tuple, List, Dict
 from secfsdstools.a_utils.downloadutils import UrlDownloader
 from secfsdstools.a_utils.fileutils import get_filenames_in_directory, get_directories_in_directory
 from secfsdstools.a_utils.parallelexecution import ThreadExecutor
+from secfsdstools.a_utils.resourcegovernor import ResourceGovernor
 
 LOGGER = logging.getLogger(__name__)
 
@@ -72,8 +73,9 @@ class BaseDownloader(ABC):
         downloads the missing quarterly zip files from the sec.
         """
 
+        # the number of parallel downloads is capped by the io concurrency limit
         executor = ThreadExecutor[Tuple[str, str], str, type(None)](
-            processes=3,
+            processes=ResourceGovernor.get_io_concurrency(requested=3),
             max_calls_per_sec=8,
             chunksize=3,
             execute_serial=False
@@ -5,6 +5,7 @@ from typing import List, Optional
 
 import pandas as pd
 
+from secfsdstools.a_utils.asyncexecution import AsyncRequestExecutor
 from secfsdstools.a_utils.dbutils import DB
 
 
@@ -33,6 +34,18 @@ class IndexFileProcessingState:
     processTime: str  # pylint: disable=C0103
 
 
+def _first_per_adsh(reports: List[IndexReport]) -> List[IndexReport]:
+    # the reports are ordered by adsh, only the first entry of every adsh is kept
+    last_adsh = None
+    filtered_reports: List[IndexReport] = []
+    for report in reports:
+        if last_adsh == report.adsh:
+            continue
+        last_adsh = report.adsh
+        filtered_reports.append(report)
+    return filtered_reports
+
+
 class ParquetDBIndexingAccessor(DB):
     """ Dataaccess class for index related tables of parquet files"""
     index_reports_table = 'index_parquet_reports'
@@ -216,16 +229,52 @@ class ParquetDBIndexingAccessor(DB):
                     ORDER BY adsh, originFileType DESC"""
 
         reports: List[IndexReport] = self.execute_fetchall_typed(sql, IndexReport)
+        return _first_per_adsh(reports)
+
+    def read_index_reports_for_period_range(self,
+                                            filed_from: Optional[int] = None,
+                                            filed_to: Optional[int] = None,
+                                            period_from: Optional[int] = None,
+                                            period_to: Optional[int] = None,
+                                            forms: Optional[List[str]] = None) \
+            -> List[IndexReport]:
+        """
+        returns the IndexReport instances of all reports which were filed and whose period
+        ended within the provided ranges. The dates are ints in the format yyyymmdd, the
+        bounds are inclusive, and None means unbounded.
+        If a report is present in a quarter file and in a daily file, only the entry of
+        the quarter file is returned.
 
-        last_adsh = None
-        filtered_reports: List[IndexReport] = []
-        for report in reports:
-            if last_adsh == report.adsh:
-                continue
-            last_adsh = report.adsh
-            filtered_reports.append(report)
+        Args:
+            filed_from (int, optional, None): earliest filed date
+            filed_to (int, optional, None): latest filed date
+            period_from (int, optional, None): earliest period date
+            period_to (int, optional, None): latest period date
+            forms (List[str], optional, None): list of the forms to be returned,
+             like ['10-Q', '10-K']
+        Returns:
+            List[IndexReport]: the matching reports ordered by adsh
+        """
+        conditions = [f'{column} {operator} {int(value)}'
+                      for column, operator, value in [('filed', '>=', filed_from),
+                                                      ('filed', '<=', filed_to),
+                                                      ('period', '>=', period_from),
+                                                      ('period', '<=', period_to)]
+                      if value is not None]
+        if forms is not None:
+            forms_str = ", ".join(["'" + x.upper() + "'" for x in forms])
+            conditions.append(f'form in ({forms_str})')
 
-        return filtered_reports
+        where = f'WHERE {" and ".join(conditions)}' if conditions else ''
+        # sorting by originfiletype, so we prefer official data from SEC,
+        # over the daily files, in case both should be present.
+        sql = f"""SELECT *
+                    FROM {self.index_reports_table}
+                    {where}
+                    ORDER BY adsh, originFileType DESC"""
+
+        reports: List[IndexReport] = self.execute_fetchall_typed(sql, IndexReport)
+        return _first_per_adsh(reports)
 
     def read_index_reports_for_ciks(self, ciks: List[int], forms: Optional[List[str]] = None) \
             -> List[IndexReport]:
@@ -273,6 +322,62 @@ class ParquetDBIndexingAccessor(DB):
 
         return self.execute_read_as_df(sql)
 
+    async def read_index_report_for_adsh_async(
+            self, adsh: str, executor: Optional[AsyncRequestExecutor] = None) -> IndexReport:
+        """
+        async variant of read_index_report_for_adsh. The query is executed in the thread pool
+        of the executor and identical in-flight lookups are coalesced.
+
+        Args:
+            adsh (str):  adsh
+            executor (AsyncRequestExecutor, optional, None): the executor, None uses the
+             shared default executor
+        Returns:
+            IndexReport: the report for the provided adsh
+        """
+        executor = executor or AsyncRequestExecutor.get_default()
+        return await executor.run(self.read_index_report_for_adsh, adsh,
+                                  key=f'{self.database}|adsh|{adsh}')
+
+    async def read_index_reports_for_adshs_async(
+            self, adshs: List[str],
+            executor: Optional[AsyncRequestExecutor] = None) -> List[IndexReport]:
+        """
+        async variant of read_index_reports_for_adshs. The query is executed in the thread pool
+        of the executor and identical in-flight lookups are coalesced.
+
+        Args:
+            adshs (List[str]):  adshs
+            executor (AsyncRequestExecutor, optional, None): the executor, None uses the
+             shared default executor
+        Returns:
+            List[IndexReport]: the reports for the provided adshs
+        """
+        executor = executor or AsyncRequestExecutor.get_default()
+        key = f'{self.database}|adshs|{",".join(sorted(x.upper() for x in adshs))}'
+        return await executor.run(self.read_index_reports_for_adshs, adshs, key=key)
+
+    async def read_index_reports_for_ciks_async(
+            self, ciks: List[int], forms: Optional[List[str]] = None,
+            executor: Optional[AsyncRequestExecutor] = None) -> List[IndexReport]:
+        """
+        async variant of read_index_reports_for_ciks. The query is executed in the thread pool
+        of the executor and identical in-flight lookups are coalesced.
+
+        Args:
+            ciks (List[int]): ciks of the companies
+            forms (List[str], optional, None): list of the forms to be returend,
+             like ['10-Q', '10-K']
+            executor (AsyncRequestExecutor, optional, None): the executor, None uses the
+             shared default executor
+        Returns:
+            List[IndexReport]
+        """
+        executor = executor or AsyncRequestExecutor.get_default()
+        forms_key = None if forms is None else ",".join(sorted(x.upper() for x in forms))
+        key = f'{self.database}|ciks|{",".join(str(x) for x in sorted(ciks))}|{forms_key}'
+        return await executor.run(self.read_index_reports_for_ciks, ciks, forms, key=key)
+
     def find_company_by_name(self, name_part: str) -> pd.DataFrame:
         """
         Finds companies in the index based on the provided part of the name.
@@ -10,7 +10,7 @@ from typing import List, Tuple
 from secfsdstools.a_utils.constants import SUB_TXT, PRE_TXT, NUM_TXT, NUM_DTYPE, PRE_DTYPE, \
     SUB_DTYPE
 from secfsdstools.a_utils.fileutils import get_directories_in_directory, \
-    read_df_from_file_in_zip
+    read_df_from_file_in_zip, get_size
 from secfsdstools.a_utils.parallelexecution import ParallelExecutor
 
 LOGGER = logging.getLogger(__name__)
@@ -123,8 +123,11 @@ class ToParquetTransformer:
         executor.set_get_entries_function(get_entries)
         executor.set_process_element_function(process_element)
         executor.set_post_process_chunk_function(post_process)
+        # transform the biggest zip files first
+        executor.set_cost_function(lambda element: get_size(element[1]))
 
         result, failed = executor.execute()
+        failed = failed + executor.dead_letters
 
         if len(failed) > 0:
             LOGGER.error("The following files could not be transformed: %s", failed)
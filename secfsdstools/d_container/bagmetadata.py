@@ -0,0 +1,230 @@
+"""
+Metadata of a stored bag. The metadata is written as a small json file next to the data, so that
+the content of a stored bag can be inspected without loading it.
+
+The content hash of a table is the sum (modulo 2^64) of the hashes of its rows, so it doesn't
+depend on the order of the rows. Before hashing, integer columns are converted to int64, float
+columns to float64, and string and categorical columns to object, so that the hash doesn't depend
+on the dtypes in which a bag was loaded or compacted, nor on the file format.
+"""
+import hashlib
+import json
+import os
+from dataclasses import dataclass, asdict, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from secfsdstools.a_utils.constants import PRE_NUM_INDEX_TXT
+from secfsdstools.d_container.partitioning import filed_to_quarter
+
+METADATA_FILE = 'bag_metadata.json'
+
+# multiplier to combine the hashes of the columns of a row
+_COMBINE_MULTIPLIER = np.uint64(1000003)
+
+
+def _normalize_dtype(series: pd.Series) -> pd.Series:
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return series
+    if pd.api.types.is_integer_dtype(dtype):
+        # nullable integers with missing values are read as float64 with the numpy backend
+        if series.hasnans:
+            return series.astype(np.float64)
+        return series if dtype == np.int64 else series.astype(np.int64)
+    if pd.api.types.is_float_dtype(dtype):
+        return series if dtype == np.float64 else series.astype(np.float64)
+    if dtype != object:
+        # strings, categories, and other extension types
+        return series.astype(object)
+    return series
+
+
+def hash_columns(columns: Iterable[pd.Series]) -> int:
+    """
+    calculates the content hash of a table from its columns, the columns are processed one
+    after the other, so that they can be read one by one.
+
+    Args:
+        columns (Iterable[pd.Series]): the columns of the table in the order of the table
+
+    Returns:
+        int: the content hash of the table
+    """
+    row_hashes: Optional[np.ndarray] = None
+    for column in columns:
+        column_hashes = pd.util.hash_pandas_object(_normalize_dtype(column),
+                                                   index=False).to_numpy()
+        if row_hashes is None:
+            row_hashes = column_hashes.copy()
+        else:
+            # uint64 arithmetic wraps around
+            row_hashes *= _COMBINE_MULTIPLIER
+            row_hashes ^= column_hashes
+
+    if row_hashes is None or len(row_hashes) == 0:
+        return 0
+    return int(row_hashes.sum(dtype=np.uint64))
+
+
+def hash_dataframe(df: pd.DataFrame) -> int:
+    """
+    calculates the content hash of a dataframe, the index is not considered.
+    """
+    return hash_columns(df.iloc[:, position] for position in range(df.shape[1]))
+
+
+def _value_range(series: Optional[pd.Series]) -> Optional[Tuple[int, int]]:
+    if series is None or series.count() == 0:
+        return None
+    return int(series.min()), int(series.max())
+
+
+def _distinct(series: Optional[pd.Series]) -> Optional[int]:
+    return None if series is None else int(series.nunique())
+
+
+def _counts(series: Optional[pd.Series], key_type: Callable) -> Dict:
+    if series is None:
+        return {}
+    return {key_type(key): int(value) for key, value in series.value_counts().items()}
+
+
+def _combine_ranges(ranges: List[Optional[Tuple[int, int]]]) -> Optional[Tuple[int, int]]:
+    ranges = [entry for entry in ranges if entry is not None]
+    if len(ranges) == 0:
+        return None
+    return min(entry[0] for entry in ranges), max(entry[1] for entry in ranges)
+
+
+def _add_counts(counts: List[Dict]) -> Dict:
+    result: Dict = {}
+    for entry in counts:
+        for key, value in entry.items():
+            result[key] = result.get(key, 0) + value
+    return result
+
+
+@dataclass
+class BagMetadata:
+    """
+    Contains the metadata of a stored bag.
+    """
+    table_rows: Dict[str, int]
+    number_of_reports: int
+    distinct_adshs: int
+    distinct_ciks: Optional[int]
+    reports_per_form: Dict[str, int]
+    reports_per_period_date: Dict[int, int]
+    period_range: Optional[Tuple[int, int]]
+    ddate_range: Optional[Tuple[int, int]]
+    quarters: List[str]
+    table_hashes: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def content_hash(self) -> Optional[str]:
+        """ a hash over the content of all tables, None if the bag was saved without hashes """
+        if len(self.table_hashes) == 0:
+            return None
+        content = json.dumps(sorted(self.table_hashes.items()))
+        return hashlib.sha256(content.encode('utf8')).hexdigest()
+
+    @staticmethod
+    def calculate(sub_df: pd.DataFrame, tables: Dict[str, pd.DataFrame],
+                  ddates: Optional[pd.Series] = None,
+                  content_hash: bool = True) -> 'BagMetadata':
+        """
+        calculates the metadata of a bag.
+
+        Args:
+            sub_df (pd.DataFrame): the sub.txt data
+            tables (Dict[str, pd.DataFrame]): all tables of the bag by their name, including sub
+            ddates (pd.Series, optional, None): the ddate column of num.txt
+            content_hash (bool, optional, True): calculate the hashes of the tables, which
+             requires a pass over all the data
+
+        Returns:
+            BagMetadata: the calculated metadata
+        """
+        # bags may have been loaded with a subset of the sub.txt columns
+        quarters = [] if len(sub_df) == 0 or 'filed' not in sub_df.columns else \
+            sorted(filed_to_quarter(sub_df.filed).unique().tolist())
+        return BagMetadata(
+            table_rows={name: len(df) for name, df in tables.items()},
+            number_of_reports=len(sub_df),
+            distinct_adshs=int(sub_df.adsh.nunique()),
+            distinct_ciks=_distinct(sub_df.get('cik')),
+            reports_per_form=_counts(sub_df.get('form'), str),
+            reports_per_period_date=_counts(sub_df.get('period'), int),
+            period_range=_value_range(sub_df.get('period')),
+            ddate_range=_value_range(ddates),
+            quarters=quarters,
+            # the row positions of normalized bags change when bags are concatenated
+            table_hashes={name: hash_dataframe(df) for name, df in tables.items()
+                          if name != PRE_NUM_INDEX_TXT} if content_hash else {})
+
+    @staticmethod
+    def combine(parts: List['BagMetadata'], sub_df: pd.DataFrame,
+                table_hashes: Dict[str, int]) -> 'BagMetadata':
+        """
+        calculates the metadata of concatenated bags from the metadata of the parts.
+        The hashes of the tables have to be calculated from the concatenated data, since the
+        concatenation may widen the dtypes of the parts (e.g. int to float).
+
+        Args:
+            parts (List[BagMetadata]): the metadata of the concatenated bags
+            sub_df (pd.DataFrame): the concatenated sub.txt data, used for the distinct counts
+            table_hashes (Dict[str, int]): the hashes of the concatenated tables
+
+        Returns:
+            BagMetadata: the metadata of the concatenated bag
+        """
+        return BagMetadata(
+            table_rows=_add_counts([part.table_rows for part in parts]),
+            number_of_reports=sum(part.number_of_reports for part in parts),
+            distinct_adshs=int(sub_df.adsh.nunique()),
+            distinct_ciks=_distinct(sub_df.get('cik')),
+            reports_per_form=_add_counts([part.reports_per_form for part in parts]),
+            reports_per_period_date=_add_counts([part.reports_per_period_date
+                                                 for part in parts]),
+            period_range=_combine_ranges([part.period_range for part in parts]),
+            ddate_range=_combine_ranges([part.ddate_range for part in parts]),
+            quarters=sorted({quarter for part in parts for quarter in part.quarters}),
+            table_hashes=table_hashes)
+
+    def write(self, target_path: str):
+        """
+        writes the metadata into the directory of the bag.
+        """
+        with open(os.path.join(target_path, METADATA_FILE), 'w', encoding='utf8') as file:
+            json.dump(asdict(self), file)
+
+    @staticmethod
+    def exists(target_path: str) -> bool:
+        """
+        checks whether metadata was written for the bag in the directory.
+        """
+        return os.path.isfile(os.path.join(target_path, METADATA_FILE))
+
+    @staticmethod
+    def read(target_path: str) -> Optional['BagMetadata']:
+        """
+        reads the metadata of the bag in the directory.
+
+        Returns:
+            BagMetadata: the metadata or None, if the bag was stored without metadata
+        """
+        if not BagMetadata.exists(target_path):
+            return None
+        with open(os.path.join(target_path, METADATA_FILE), 'r', encoding='utf8') as file:
+            content = json.load(file)
+
+        # json only supports strings as keys and lists instead of tuples
+        content['reports_per_period_date'] = {int(key): value for key, value
+                                              in content['reports_per_period_date'].items()}
+        for name in ['period_range', 'ddate_range']:
+            if content[name] is not None:
+                content[name] = tuple(content[name])
+        return BagMetadata(**content)
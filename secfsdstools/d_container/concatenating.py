@@ -0,0 +1,237 @@
+"""
+Low-copy concatenation of dataframes with the same columns. Instead of consolidating the blocks of
+all input frames like pd.concat does, every column of the result is allocated once with its final
+size and filled with the data of the input frames. Categorical columns with different categories
+are combined with union_categoricals instead of being converted to object columns.
+
+Saved bags are concatenated table by table, streaming the row groups resp. record batches of the
+source files into the target file, so that only one part has to be held in memory at a time.
+"""
+import json
+import logging
+import os
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from pandas.api.extensions import ExtensionArray
+from pandas.api.types import union_categoricals
+
+from secfsdstools.a_utils.constants import NUM_TXT, PRE_NUM_INDEX_TXT, PRE_TXT
+from secfsdstools.d_container.fileformats import ARROW_FORMAT, FILE_FORMATS, PARQUET_FORMAT, \
+    check_file_format, read_arrow_file
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _concat_column(columns: List[pd.Series],
+                   total_rows: int) -> Union[np.ndarray, ExtensionArray]:
+    first = columns[0]
+    dtypes = {column.dtype for column in columns}
+
+    if len(dtypes) == 1 and isinstance(first.dtype, np.dtype):
+        # preallocate the result column and copy the parts into it
+        result = np.empty(total_rows, dtype=first.dtype)
+        position = 0
+        for column in columns:
+            result[position:position + len(column)] = column.to_numpy()
+            position += len(column)
+        return result
+
+    if len(dtypes) == 1:
+        # extension arrays (categorical, arrow, ...) with the same dtype
+        return type(first.array)._concat_same_type(  # pylint: disable=protected-access
+            [column.array for column in columns])
+
+    if all(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes):
+        try:
+            return union_categoricals([column.array for column in columns])
+        except TypeError:
+            # ordered categoricals with different categories cannot be combined
+            pass
+
+    # different dtypes, use the type promotion of pd.concat
+    return pd.concat(columns, ignore_index=True).array
+
+
+def concat_dataframes(dfs: List[pd.DataFrame], ignore_index: bool = True) -> pd.DataFrame:
+    """
+    concatenates dataframes with the same columns. The memory needed is the size of the result,
+    no intermediate copies of the input frames are created.
+    Frames with different columns are concatenated with pd.concat.
+
+    Args:
+        dfs (List[pd.DataFrame]): the dataframes to concatenate
+        ignore_index (bool, optional, True): create a new RangeIndex instead of concatenating the
+         indexes of the frames
+
+    Returns:
+        pd.DataFrame: the concatenated dataframe
+    """
+    if len(dfs) == 0:
+        # raises the same error as pd.concat
+        return pd.concat(dfs)
+
+    columns = dfs[0].columns
+    if columns.has_duplicates or any(not df.columns.equals(columns) for df in dfs[1:]):
+        LOGGER.debug("dataframes with different columns, using pd.concat")
+        return pd.concat(dfs, ignore_index=ignore_index)
+
+    total_rows = sum(len(df) for df in dfs)
+    data = {column: _concat_column([df[column] for df in dfs], total_rows)
+            for column in columns}
+
+    if ignore_index:
+        index = pd.RangeIndex(total_rows)
+    else:
+        index = dfs[0].index.append([df.index for df in dfs[1:]])
+
+    result = pd.DataFrame(data, index=index, copy=False)
+    result.columns = columns
+    return result
+
+
+def _data_file(source_path: str, name: str) -> str:
+    for file_format in FILE_FORMATS:
+        path = os.path.join(source_path, f'{name}.{file_format}')
+        if os.path.exists(path):
+            return path
+    raise ValueError(f"{source_path} doesn't contain the data for {name}")
+
+
+def _read_schema(path: str) -> pa.Schema:
+    if path.endswith(PARQUET_FORMAT):
+        return pq.read_schema(path)
+    with pa.memory_map(path, 'r') as source:
+        return pa.ipc.open_file(source).schema
+
+
+def _iter_tables(path: str) -> Iterator[pa.Table]:
+    # parquet files are read row group by row group, arrow files batch by batch
+    if path.endswith(PARQUET_FORMAT):
+        parquet_file = pq.ParquetFile(path)
+        for row_group in range(parquet_file.num_row_groups):
+            yield parquet_file.read_row_group(row_group)
+        return
+    table = read_arrow_file(path, mmap=True)
+    for batch in table.to_batches():
+        yield pa.Table.from_batches([batch], schema=table.schema)
+
+
+def _index_columns(schema: pa.Schema) -> List[str]:
+    pandas_metadata = schema.pandas_metadata or {}
+    return [column for column in pandas_metadata.get('index_columns', [])
+            if isinstance(column, str)]
+
+
+def _without_index(schema: pa.Schema) -> pa.Schema:
+    # the concatenated data gets a new RangeIndex
+    index_columns = _index_columns(schema)
+    metadata = dict(schema.metadata or {})
+    pandas_metadata = schema.pandas_metadata
+    if pandas_metadata is not None:
+        pandas_metadata['index_columns'] = []
+        pandas_metadata['columns'] = [column for column in pandas_metadata['columns']
+                                      if column['field_name'] not in index_columns]
+        metadata[b'pandas'] = json.dumps(pandas_metadata).encode('utf8')
+    return pa.schema([field for field in schema if field.name not in index_columns],
+                     metadata=metadata)
+
+
+def _unify_types(name: str, types: List[pa.DataType]) -> pa.DataType:
+    if len(set(types)) > 1:
+        # e.g. compacted and not compacted bags: categoricals are decoded, integers widened
+        types = [data_type.value_type if pa.types.is_dictionary(data_type) else data_type
+                 for data_type in types]
+    types = [data_type for data_type in types if not pa.types.is_null(data_type)]
+    if len(types) == 0:
+        return pa.null()
+    if len(set(types)) == 1:
+        return types[0]
+    if all(pa.types.is_integer(data_type) for data_type in types):
+        return max(types, key=lambda data_type: data_type.bit_width)
+    if all(pa.types.is_integer(data_type) or pa.types.is_floating(data_type)
+           for data_type in types):
+        return pa.float64()
+    raise ValueError(f"column {name} has incompatible types: {set(types)}")
+
+
+def _unify_schemas(schemas: List[pa.Schema]) -> pa.Schema:
+    names: List[str] = []
+    for schema in schemas:
+        names.extend(name for name in schema.names if name not in names)
+    fields = [pa.field(name, _unify_types(name, [schema.field(name).type for schema in schemas
+                                                 if name in schema.names]))
+              for name in names]
+    return pa.schema(fields, metadata=schemas[0].metadata)
+
+
+def _conform(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    arrays = [table.column(field.name).cast(field.type) if field.name in table.column_names
+              else pa.nulls(len(table), field.type)
+              for field in schema]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def concat_saved_tables(source_paths: List[str], target_path: str, tables: List[str],
+                        file_format: str = PARQUET_FORMAT, compression: Optional[str] = None):
+    """
+    concatenates the tables of stored bags directly into the files of a new bag. The sources
+    are read one after the other in row groups, so the memory needed doesn't depend on the size
+    of the sources or the result. The index of the concatenated dataframes is reset.
+    The row positions of the pre_num_index table of normalized bags are adjusted by the rows
+    of num and pre of the preceding sources, so these tables have to appear before the index.
+
+    Args:
+        source_paths (List[str]): the directories of the stored bags
+        target_path (str): the directory of the new bag, it has to exist and must be empty
+        tables (List[str]): the names of the tables to concatenate
+        file_format (str, optional, 'parquet'): 'parquet' or 'arrow'
+        compression (str, optional, None): the compression, see write_dataframe
+    """
+    check_file_format(file_format)
+    if not os.path.isdir(target_path):
+        raise ValueError(f"the path {target_path} does not exist")
+    if len(os.listdir(target_path)) > 0:
+        raise ValueError(f"the target_path {target_path} is not empty")
+
+    rows: Dict[Tuple[str, str], int] = {}
+    for table in tables:
+        files = [_data_file(source_path, table) for source_path in source_paths]
+        schemas = [_without_index(_read_schema(file)) for file in files]
+        if table == PRE_NUM_INDEX_TXT:
+            # the row positions of the concatenated data may exceed the int32 range
+            schema = pa.schema([(name, pa.int64()) for name in ['num_index', 'pre_index']],
+                               metadata=schemas[0].metadata)
+        else:
+            schema = _unify_schemas(schemas)
+        if file_format == ARROW_FORMAT and \
+                any(pa.types.is_dictionary(field.type) for field in schema):
+            raise ValueError("categorical columns can only be concatenated into parquet files")
+
+        target_file = os.path.join(target_path, f'{table}.{file_format}')
+        if file_format == PARQUET_FORMAT:
+            writer = pq.ParquetWriter(target_file, schema, compression=compression or 'snappy')
+        else:
+            writer = pa.ipc.new_file(target_file, schema,
+                                     options=pa.ipc.IpcWriteOptions(compression=compression))
+
+        num_offset = 0
+        pre_offset = 0
+        with writer:
+            for source_path, file in zip(source_paths, files):
+                rows[(source_path, table)] = 0
+                for part in _iter_tables(file):
+                    part = _conform(part, schema)
+                    if table == PRE_NUM_INDEX_TXT:
+                        part = pa.table({'num_index': pc.add(part['num_index'], num_offset),
+                                         'pre_index': pc.add(part['pre_index'], pre_offset)},
+                                        schema=schema)
+                    writer.write_table(part)
+                    rows[(source_path, table)] += len(part)
+                if table == PRE_NUM_INDEX_TXT:
+                    num_offset += rows[(source_path, NUM_TXT)]
+                    pre_offset += rows[(source_path, PRE_TXT)]
@@ -3,23 +3,322 @@ Defines the container that keeps the data of sub.txt, num.txt, and  pre.txt toge
 """
 
 import os
+import shutil
 from dataclasses import dataclass
-from typing import Dict, List, TypeVar, Generic
+from typing import Dict, Iterator, List, Optional, Tuple, TypeVar, Generic
 
+import numpy as np
 import pandas as pd
-
-from secfsdstools.a_utils.constants import SUB_TXT, PRE_TXT, NUM_TXT, PRE_NUM_TXT
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from secfsdstools.a_utils.constants import SUB_TXT, PRE_TXT, NUM_TXT, PRE_NUM_TXT, \
+    PRE_NUM_INDEX_TXT
+from secfsdstools.d_container.bagmetadata import BagMetadata, hash_columns
+from secfsdstools.d_container.concatenating import concat_dataframes, concat_saved_tables
+from secfsdstools.d_container.fileformats import ARROW_FORMAT, FILE_FORMATS, PARQUET_FORMAT, \
+    check_file_format, read_arrow_file, write_arrow_file
 from secfsdstools.d_container.filter import FilterBase
+from secfsdstools.d_container.footprint import compact_dataframe, memory_report
+from secfsdstools.d_container.partitioning import Filter, PartitionedStorage, \
+    append_partitioned_tables, check_load_options, load_partitioned_tables, \
+    save_partitioned_tables
+from secfsdstools.d_container.joining import DEFAULT_PARTITION_ROWS, PRE_NUM_JOIN_KEYS, \
+    join_pre_num, match_on_keys, take_joined
 from secfsdstools.d_container.presentation import Presenter
 
 RAW = TypeVar('RAW', bound='RawDataBag')
 JOINED = TypeVar('JOINED', bound='JoinedDataBag')
 T = TypeVar('T')
 
+# dtype_backend that keeps the data in arrow arrays (ArrowDtype columns) instead of numpy arrays
+ARROW_DTYPE_BACKEND = 'pyarrow'
+
+# the column that compact(float32_values=True) stores as float32
+VALUE_COLUMN = 'value'
+
+
+def check_dtype_backend(dtype_backend: Optional[str]):
+    """
+    checks whether the dtype_backend is supported by the installed pandas version.
+
+    Args:
+        dtype_backend (str, optional): None (numpy), 'numpy_nullable', or 'pyarrow'
+    """
+    if dtype_backend is not None and not hasattr(pd, 'ArrowDtype'):
+        raise ValueError(f"dtype_backend '{dtype_backend}' requires pandas 2.0 or later")
+
+
+def read_parquet(path: str, dtype_backend: Optional[str] = None, **kwargs) -> pd.DataFrame:
+    """
+    reads a parquet file into a dataframe. With dtype_backend 'pyarrow' the columns stay backed
+    by the arrow arrays that were read from the file, so no conversion to numpy and python
+    string objects takes place.
+
+    Args:
+        path (str): the parquet file
+        dtype_backend (str, optional, None): None (numpy), 'numpy_nullable', or 'pyarrow'
+        **kwargs: further arguments for pd.read_parquet (e.g. filters)
+
+    Returns:
+        pd.DataFrame: the loaded dataframe
+    """
+    if dtype_backend is None:
+        return pd.read_parquet(path, **kwargs)
+    check_dtype_backend(dtype_backend)
+    return pd.read_parquet(path, dtype_backend=dtype_backend, **kwargs)
+
+
+def read_parquet_semi_join(path: str, column: str, values: List[str],
+                           dtype_backend: Optional[str] = None,
+                           filters: Optional[List[Filter]] = None,
+                           columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    reads the rows of a parquet file whose column contains one of the values. Instead of
+    evaluating an ('column', 'in', values) filter for every row, the column is read dictionary
+    encoded, so the values only have to be looked up in the dictionary of every chunk and the
+    rows are selected by their dictionary indices. Only the selected rows are converted to pandas.
+
+    Args:
+        path (str): the parquet file
+        column (str): the string column to join on (e.g. adsh)
+        values (List[str]): the values of the column to keep
+        dtype_backend (str, optional, None): None (numpy) or 'pyarrow'
+        filters (List[Tuple[str, str, Any]], optional, None): further filters which are
+         pushed down into the scan
+        columns (List[str], optional, None): the columns to read, None means all. The join
+         column has to be part of the columns.
+
+    Returns:
+        pd.DataFrame: the rows with one of the values in the column
+    """
+    if dtype_backend not in (None, ARROW_DTYPE_BACKEND):
+        raise ValueError(f"dtype_backend '{dtype_backend}' is not supported for semi joins")
+
+    table = pq.read_table(path, columns=columns, filters=filters or None,
+                          read_dictionary=[column], use_pandas_metadata=True, pre_buffer=True)
+    value_set = pa.array(values, type=pa.string())
+    masks = []
+    for chunk in table.column(column).chunks:
+        selected_indices = pc.index_in(value_set, value_set=chunk.dictionary).drop_null()
+        masks.append(pc.is_in(chunk.indices, value_set=selected_indices))
+    table = table.filter(pa.chunked_array(masks, type=pa.bool_()))
+
+    # decode the dictionary of the selected rows, so that the column has the type of the file
+    position = table.schema.get_field_index(column)
+    table = table.set_column(position, column, table.column(column).cast(pa.string()))
+    return table_to_pandas(table, dtype_backend=dtype_backend)
+
+
+def table_to_pandas(table: pa.Table, dtype_backend: Optional[str] = None) -> pd.DataFrame:
+    """
+    converts a pyarrow table into a dataframe with the provided dtype_backend.
+
+    Args:
+        table (pa.Table): the table to convert
+        dtype_backend (str, optional, None): None (numpy), 'numpy_nullable', or 'pyarrow'
+
+    Returns:
+        pd.DataFrame: the converted dataframe
+    """
+    if dtype_backend is None:
+        return table.to_pandas()
+    check_dtype_backend(dtype_backend)
+    if dtype_backend == ARROW_DTYPE_BACKEND:
+        # the columns keep referencing the arrow buffers, no conversion takes place
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+    return table.to_pandas().convert_dtypes(dtype_backend=dtype_backend)
+
+
+def is_arrow_backed(df: pd.DataFrame) -> bool:
+    """
+    checks whether at least one column of the dataframe is backed by an arrow array.
+    """
+    return hasattr(pd, 'ArrowDtype') and \
+        any(isinstance(dtype, pd.ArrowDtype) for dtype in df.dtypes)
+
+
+def to_numpy_backed(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    converts a dataframe with arrow backed columns into a dataframe with the numpy and object
+    dtypes that pd.read_parquet produces by default. Dataframes without arrow backed columns
+    are returned as they are.
+    """
+    if not is_arrow_backed(df):
+        return df
+
+    converted = df.copy(deep=False)
+    for name, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.ArrowDtype):
+            # same conversion that pyarrow applies when a table is converted to pandas
+            converted[name] = pa.array(df[name].array).to_pandas().to_numpy()
+    return converted
+
+
+def to_arrow_backed(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    converts a dataframe into a dataframe with arrow backed columns (ArrowDtype).
+    """
+    check_dtype_backend(ARROW_DTYPE_BACKEND)
+    if is_arrow_backed(df):
+        return df
+    return pa.Table.from_pandas(df, preserve_index=True).to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def write_dataframe(df: pd.DataFrame, target_path: str, name: str,
+                    file_format: str = PARQUET_FORMAT, compression: Optional[str] = None,
+                    **parquet_kwargs):
+    """
+    writes the dataframe into the file '<name>.<file_format>' in target_path.
+
+    Args:
+        df (pd.DataFrame): the dataframe to write
+        target_path (str): the directory
+        name (str): the name of the file without the extension
+        file_format (str, optional, 'parquet'): 'parquet' or 'arrow'
+        compression (str, optional, None): for 'arrow' None (uncompressed, can be memory-mapped),
+         'lz4', or 'zstd'. For 'parquet' None means the default compression of pandas.
+        **parquet_kwargs: further arguments for to_parquet
+    """
+    check_file_format(file_format)
+    path = os.path.join(target_path, f'{name}.{file_format}')
+    if file_format == PARQUET_FORMAT:
+        if compression is not None:
+            parquet_kwargs['compression'] = compression
+        df.to_parquet(path, **parquet_kwargs)
+        return
+
+    write_arrow_file(pa.Table.from_pandas(df), path, compression=compression)
+
+
+def read_dataframe(target_path: str, name: str, dtype_backend: Optional[str] = None,
+                   mmap: bool = False) -> pd.DataFrame:
+    """
+    reads the dataframe that was stored with write_dataframe. The format is detected by the
+    extension of the file.
+
+    Args:
+        target_path (str): the directory
+        name (str): the name of the file without the extension
+        dtype_backend (str, optional, None): None (numpy), 'numpy_nullable', or 'pyarrow'
+        mmap (bool, optional, False): memory-map files in the arrow format. Together with
+         dtype_backend 'pyarrow', the data is not copied at all.
+
+    Returns:
+        pd.DataFrame: the loaded dataframe
+    """
+    arrow_path = os.path.join(target_path, f'{name}.{ARROW_FORMAT}')
+    if os.path.exists(arrow_path):
+        return table_to_pandas(read_arrow_file(arrow_path, mmap=mmap), dtype_backend)
+    return read_parquet(os.path.join(target_path, f'{name}.{PARQUET_FORMAT}'),
+                        dtype_backend=dtype_backend)
+
+
+def dataframe_exists(target_path: str, name: str) -> bool:
+    """
+    checks whether a dataframe with the given name was stored in target_path in one of the
+    supported formats.
+    """
+    return any(os.path.exists(os.path.join(target_path, f'{name}.{file_format}'))
+               for file_format in FILE_FORMATS)
+
+
+def convert_bag(source_path: str, target_path: str, file_format: str = ARROW_FORMAT,
+                compression: Optional[str] = None):
+    """
+    converts a stored bag (RawDataBag, JoinedDataBag, or StandardizedBag) into the provided
+    file format. The data is converted on the arrow level, so the converted files are loaded
+    into identical dataframes. Files in other formats are copied.
+    The target directory has to exist and must be empty.
+
+    Args:
+        source_path (str): the directory of the stored bag
+        target_path (str): the directory of the converted bag
+        file_format (str, optional, 'arrow'): 'arrow' or 'parquet'
+        compression (str, optional, None): the compression, see write_dataframe
+    """
+    check_file_format(file_format)
+    if PartitionedStorage.is_partitioned(source_path):
+        raise ValueError("partitioned bags cannot be converted")
+    if not os.path.isdir(target_path):
+        raise ValueError(f"the path {target_path} does not exist")
+    if len(os.listdir(target_path)) > 0:
+        raise ValueError(f"the target_path {target_path} is not empty")
+
+    for filename in sorted(os.listdir(source_path)):
+        path = os.path.join(source_path, filename)
+        name, extension = os.path.splitext(filename)
+        extension = extension[1:]
+        if extension not in FILE_FORMATS:
+            shutil.copy2(path, os.path.join(target_path, filename))
+            continue
+
+        if extension == PARQUET_FORMAT:
+            table = pq.read_table(path)
+        else:
+            table = read_arrow_file(path)
+
+        target_file = os.path.join(target_path, f'{name}.{file_format}')
+        if file_format == PARQUET_FORMAT:
+            pq.write_table(table, target_file, compression=compression or 'snappy')
+            continue
+
+        # the dictionaries of categorical columns may differ between the row groups
+        write_arrow_file(table.unify_dictionaries(), target_file, compression=compression)
+
+
+def _read_columns(target_path: str, name: str) -> Iterator[pd.Series]:
+    # reads the columns of a stored dataframe without index columns one after the other, so
+    # that only one column has to be held in memory at a time
+    arrow_path = os.path.join(target_path, f'{name}.{ARROW_FORMAT}')
+    if os.path.exists(arrow_path):
+        table = read_arrow_file(arrow_path, mmap=True)
+        for column in table.column_names:
+            yield table_to_pandas(table.select([column]))[column]
+        return
+
+    parquet_file = pq.ParquetFile(os.path.join(target_path, f'{name}.{PARQUET_FORMAT}'))
+    for column in parquet_file.schema_arrow.names:
+        yield table_to_pandas(parquet_file.read(columns=[column]))[column]
+
+
+def _write_concatenated_metadata(source_paths: List[str], target_path: str, tables: List[str]):
+    # the counts and ranges of the result are combined from the metadata of the sources, the
+    # hashes are calculated from the concatenated tables
+    parts = [BagMetadata.read(source_path) for source_path in source_paths]
+    if all(part is not None for part in parts):
+        table_hashes = {table: hash_columns(_read_columns(target_path, table))
+                        for table in tables if table != PRE_NUM_INDEX_TXT}
+        BagMetadata.combine(parts, sub_df=read_dataframe(target_path, SUB_TXT),
+                            table_hashes=table_hashes).write(target_path)
+
+
+def column_view(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    """
+    returns a dataframe with the provided columns which references the data of df. Unlike
+    df[columns], no data is copied. Replacing a column of the returned dataframe doesn't change
+    df, but modifying the values in place does.
+
+    Args:
+        df (pd.DataFrame): the dataframe
+        columns (List[str]): the columns to select
+
+    Returns:
+        pd.DataFrame: the dataframe with the selected columns
+    """
+    return pd.DataFrame({column: df[column].array for column in columns},
+                        index=df.index, copy=False)
+
 
 class DataBagBase(Generic[T]):
     """
     Base class for the DataBag types
+
+    The dataframes of a bag are treated as immutable: filters, joins, and presenters never
+    modify them in place. Therefore, bags created by filters can share data with the bag they
+    were created from and no defensive copies are needed. If you want to modify the
+    dataframes of a bag, use copy_bag or the get_*_copy methods first.
     """
 
     def __getitem__(self, bagfilter: FilterBase[T]) -> T:
@@ -57,10 +356,102 @@ class DataBagBase(Generic[T]):
         return presenter.present(self)
 
 
+def _compact_index(index: np.ndarray) -> np.ndarray:
+    # row positions are stored as int32 as long as possible
+    if len(index) == 0 or index.max() < np.iinfo(np.int32).max:
+        return index.astype(np.int32, copy=False)
+    return index.astype(np.int64, copy=False)
+
+
+class NormalizedPreNum:
+    """
+    Normalized representation of the joined pre and num data. Instead of the joined dataframe,
+    in which the num values are repeated for every pre entry and the pre attributes for every
+    num entry, the num and the pre dataframes are kept together with the row positions of the
+    joined rows. The i-th joined row consists of num_df.iloc[num_index[i]] and
+    pre_df.iloc[pre_index[i]].
+    """
+
+    def __init__(self, num_df: pd.DataFrame, pre_df: pd.DataFrame,
+                 num_index: np.ndarray, pre_index: np.ndarray):
+        """
+        Args:
+            num_df: num.txt dataframe
+            pre_df: pre.txt dataframe, the key columns (adsh, tag, version) are optional
+            num_index: the row positions in num_df of the joined rows
+            pre_index: the row positions in pre_df of the joined rows
+        """
+        self.num_df = num_df
+        self.pre_df = pre_df
+        self.num_index = _compact_index(num_index)
+        self.pre_index = _compact_index(pre_index)
+
+    def __len__(self) -> int:
+        return len(self.num_index)
+
+    @property
+    def columns(self) -> List[str]:
+        """ the columns of the joined dataframe """
+        return self.num_df.columns.tolist() + \
+            [column for column in self.pre_df.columns if column not in PRE_NUM_JOIN_KEYS]
+
+    def to_dataframe(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        creates the joined dataframe.
+
+        Args:
+            columns (List[str], optional, None): create only the provided columns
+
+        Returns:
+            pd.DataFrame: the joined dataframe
+        """
+        return take_joined(self.num_df, self.pre_df, PRE_NUM_JOIN_KEYS,
+                           self.num_index, self.pre_index, columns=columns)
+
+    def compact(self) -> 'NormalizedPreNum':
+        """
+        returns a NormalizedPreNum that only contains the rows of num and pre which are part of
+        the join and in which pre only contains the non-key columns.
+        """
+        num_rows, num_index = np.unique(self.num_index, return_inverse=True)
+        pre_rows, pre_index = np.unique(self.pre_index, return_inverse=True)
+        pre_columns = [column for column in self.pre_df.columns
+                       if column not in PRE_NUM_JOIN_KEYS]
+
+        return NormalizedPreNum(num_df=self.num_df.iloc[num_rows].reset_index(drop=True),
+                                pre_df=self.pre_df[pre_columns].iloc[pre_rows]
+                                .reset_index(drop=True),
+                                num_index=num_index,
+                                pre_index=pre_index)
+
+    @staticmethod
+    def concat(parts: List['NormalizedPreNum']) -> 'NormalizedPreNum':
+        """
+        Merges multiple NormalizedPreNum instances together.
+        """
+        pre_columns = [column for column in parts[0].pre_df.columns
+                       if column not in PRE_NUM_JOIN_KEYS]
+        num_offsets = np.cumsum([0] + [len(part.num_df) for part in parts[:-1]])
+        pre_offsets = np.cumsum([0] + [len(part.pre_df) for part in parts[:-1]])
+
+        return NormalizedPreNum(
+            num_df=concat_dataframes([part.num_df for part in parts]),
+            pre_df=concat_dataframes([part.pre_df[pre_columns] for part in parts]),
+            num_index=np.concatenate([part.num_index.astype(np.int64) + offset
+                                      for part, offset in zip(parts, num_offsets)]),
+            pre_index=np.concatenate([part.pre_index.astype(np.int64) + offset
+                                      for part, offset in zip(parts, pre_offsets)]))
+
+
 class JoinedDataBag(DataBagBase[JOINED]):
     """
     the DataBag in which the pre.txt and the num.txt are joined based on the
     adsh, tag, and version.
+
+    The joined data can also be kept in a normalized form (see RawDataBag.join(normalized=True)).
+    In this case, pre_num_df is only created when it is accessed the first time, and replaces the
+    normalized data. Single columns can be accessed with get_pre_num_columns without creating
+    the whole joined dataframe.
     """
 
     @classmethod
@@ -78,15 +469,77 @@ class JoinedDataBag(DataBagBase[JOINED]):
         """
         return JoinedDataBag(sub_df=sub_df, pre_num_df=pre_num_df)
 
-    def __init__(self, sub_df: pd.DataFrame, pre_num_df: pd.DataFrame):
+    @classmethod
+    def create_normalized(cls, sub_df: pd.DataFrame, normalized: NormalizedPreNum) -> JOINED:
+        """
+        create a new JoinedDataBag with normalized joined data.
+
+        Args:
+            sub_df: sub.txt dataframe
+
+            normalized: the normalized joined pre.txt and num.txt data
+
+        Returns:
+            JoinedDataBag: new instance of JoinedDataBag
+        """
+        return JoinedDataBag(sub_df=sub_df, normalized=normalized)
+
+    def __init__(self, sub_df: pd.DataFrame, pre_num_df: Optional[pd.DataFrame] = None,
+                 normalized: Optional[NormalizedPreNum] = None):
         """
         constructor.
         Args:
             sub_df: sub.txt dataframe
             pre_num_df: joined pre.txt and num.txt dataframe
+            normalized: normalized joined pre.txt and num.txt data, used if pre_num_df is None
         """
+        if pre_num_df is None and normalized is None:
+            raise ValueError("either pre_num_df or normalized has to be provided")
+
         self.sub_df = sub_df
-        self.pre_num_df = pre_num_df
+        self._pre_num_df = pre_num_df
+        self.normalized = normalized if pre_num_df is None else None
+        # the metadata of the stored bag, if the bag was loaded
+        self._metadata: Optional[BagMetadata] = None
+
+    @property
+    def pre_num_df(self) -> pd.DataFrame:
+        """
+        the joined pre.txt and num.txt dataframe. For normalized bags, the dataframe is created
+        when it is accessed the first time. The normalized data is released afterwards, so that
+        only one form of the data is kept in memory, and the bag is no longer normalized.
+        """
+        if self._pre_num_df is None:
+            self._pre_num_df = self.normalized.to_dataframe()
+            self.normalized = None
+        return self._pre_num_df
+
+    @pre_num_df.setter
+    def pre_num_df(self, pre_num_df: pd.DataFrame):
+        self._pre_num_df = pre_num_df
+        self.normalized = None
+
+    def is_normalized(self) -> bool:
+        """
+        Returns:
+            bool: True if the joined data is kept in the normalized form
+        """
+        return self.normalized is not None
+
+    def get_pre_num_columns(self, columns: List[str]) -> pd.DataFrame:
+        """
+        returns the provided columns of the joined pre_num data. For normalized bags, only these
+        columns are created.
+
+        Args:
+            columns: the columns to return
+
+        Returns:
+            pd.DataFrame: dataframe with the requested columns
+        """
+        if self._pre_num_df is not None:
+            return column_view(self._pre_num_df, columns)
+        return column_view(self.normalized.to_dataframe(columns=columns), columns)
 
     def get_sub_copy(self) -> pd.DataFrame:
         """
@@ -113,43 +566,259 @@ class JoinedDataBag(DataBagBase[JOINED]):
         Returns:
             JoinedDataBag: new instance of JoinedDataBag
         """
+        if self._pre_num_df is None:
+            return JoinedDataBag.create_normalized(
+                sub_df=self.sub_df.copy(),
+                normalized=NormalizedPreNum(num_df=self.normalized.num_df.copy(),
+                                            pre_df=self.normalized.pre_df.copy(),
+                                            num_index=self.normalized.num_index.copy(),
+                                            pre_index=self.normalized.pre_index.copy()))
         return JoinedDataBag.create(sub_df=self.sub_df.copy(),
                                     pre_num_df=self.pre_num_df.copy())
 
-    def save(self, target_path: str):
+    def save(self, target_path: str, file_format: str = PARQUET_FORMAT,
+             compression: Optional[str] = None, content_hash: bool = True):
         """
         Stores the bag under the given directory.
         The directory has to exist and must be empty.
 
         Args:
-            target_path: the directory under which the parquet files for sub and pre_num
+            target_path: the directory under which the files for sub and pre_num
                   will be created
+            file_format (str, optional, 'parquet'): 'parquet' or 'arrow'. Uncompressed arrow
+             files can be memory-mapped with load(mmap=True).
+            compression (str, optional, None): for 'arrow' None (uncompressed), 'lz4', or 'zstd'
+            content_hash (bool, optional, True): store the content hash in the metadata. The
+             hash requires a pass over all the data, so it can be skipped for temporary copies.
 
         """
+        check_file_format(file_format)
         if not os.path.isdir(target_path):
             raise ValueError(f"the path {target_path} does not exist")
 
         if len(os.listdir(target_path)) > 0:
             raise ValueError(f"the target_path {target_path} is not empty")
 
-        self.sub_df.to_parquet(os.path.join(target_path, f'{SUB_TXT}.parquet'))
-        self.pre_num_df.to_parquet(os.path.join(target_path, f'{PRE_NUM_TXT}.parquet'))
+        write_dataframe(self.sub_df, target_path, SUB_TXT, file_format, compression)
+
+        if self._pre_num_df is not None:
+            write_dataframe(self.pre_num_df, target_path, PRE_NUM_TXT, file_format, compression)
+            BagMetadata.calculate(sub_df=self.sub_df,
+                                  tables={SUB_TXT: self.sub_df, PRE_NUM_TXT: self.pre_num_df},
+                                  ddates=self.pre_num_df.get('ddate'),
+                                  content_hash=content_hash).write(target_path)
+            return
+
+        # normalized bags are stored without creating the joined dataframe
+        normalized = self.normalized.compact()
+        write_dataframe(normalized.num_df, target_path, NUM_TXT, file_format, compression)
+        write_dataframe(normalized.pre_df, target_path, PRE_TXT, file_format, compression)
+        index_df = pd.DataFrame({'num_index': normalized.num_index,
+                                 'pre_index': normalized.pre_index})
+        if file_format == PARQUET_FORMAT:
+            # delta encoding stores the mostly ascending row positions very compact
+            write_dataframe(index_df, target_path, PRE_NUM_INDEX_TXT, file_format, compression,
+                            use_dictionary=False, column_encoding='DELTA_BINARY_PACKED')
+        else:
+            write_dataframe(index_df, target_path, PRE_NUM_INDEX_TXT, file_format, compression)
+
+        BagMetadata.calculate(sub_df=self.sub_df,
+                              tables={SUB_TXT: self.sub_df, NUM_TXT: normalized.num_df,
+                                      PRE_TXT: normalized.pre_df, PRE_NUM_INDEX_TXT: index_df},
+                              ddates=normalized.num_df.get('ddate'),
+                              content_hash=content_hash).write(target_path)
+
+    def to_pandas(self) -> JOINED:
+        """
+        returns a bag in which arrow backed columns are converted to numpy and object columns.
+
+        Returns:
+            JoinedDataBag: bag with numpy backed dataframes
+        """
+        if self._pre_num_df is None:
+            return JoinedDataBag.create_normalized(
+                sub_df=to_numpy_backed(self.sub_df),
+                normalized=NormalizedPreNum(num_df=to_numpy_backed(self.normalized.num_df),
+                                            pre_df=to_numpy_backed(self.normalized.pre_df),
+                                            num_index=self.normalized.num_index,
+                                            pre_index=self.normalized.pre_index))
+        return JoinedDataBag.create(sub_df=to_numpy_backed(self.sub_df),
+                                    pre_num_df=to_numpy_backed(self.pre_num_df))
+
+    def to_arrow(self) -> JOINED:
+        """
+        returns a bag in which all columns are backed by arrow arrays (requires pandas 2.0).
+
+        Returns:
+            JoinedDataBag: bag with arrow backed dataframes
+        """
+        if self._pre_num_df is None:
+            return JoinedDataBag.create_normalized(
+                sub_df=to_arrow_backed(self.sub_df),
+                normalized=NormalizedPreNum(num_df=to_arrow_backed(self.normalized.num_df),
+                                            pre_df=to_arrow_backed(self.normalized.pre_df),
+                                            num_index=self.normalized.num_index,
+                                            pre_index=self.normalized.pre_index))
+        return JoinedDataBag.create(sub_df=to_arrow_backed(self.sub_df),
+                                    pre_num_df=to_arrow_backed(self.pre_num_df))
+
+    def _memory_tables(self) -> Dict[str, pd.DataFrame]:
+        if self._pre_num_df is None:
+            return {'num_df': self.normalized.num_df, 'pre_df': self.normalized.pre_df}
+        return {'pre_num_df': self.pre_num_df}
+
+    def memory_report(self, float32_values: bool = False) -> pd.DataFrame:
+        """
+        reports the memory usage of every column together with the dtype that compact()
+        would use. For normalized bags, the num and pre data is reported.
+
+        Args:
+            float32_values (bool, optional, False): report the value column as float32
+
+        Returns:
+            pd.DataFrame: with the columns table, column, dtype, memory_bytes, share,
+             recommended_dtype, and recommended_memory_bytes
+        """
+        return memory_report({'sub_df': self.sub_df, **self._memory_tables()},
+                             float32_columns=[VALUE_COLUMN] if float32_values else [])
+
+    def compact(self, categorize: bool = True, float32_values: bool = False) -> JOINED:
+        """
+        returns a bag which needs less memory: integer columns are downcasted to the smallest
+        possible type and string columns with few distinct values are categorized. The dtypes
+        are kept by save and load.
+
+        Args:
+            categorize (bool, optional, True): categorize string columns, the key columns
+             adsh, tag, and version are never categorized
+            float32_values (bool, optional, False): store the value column as float32, which
+             is only exact for about 7 significant digits
+
+        Returns:
+            JoinedDataBag: the compacted bag
+        """
+        float32_columns = [VALUE_COLUMN] if float32_values else []
+        sub_df = compact_dataframe(self.sub_df, categorize=categorize)
+        if self._pre_num_df is None:
+            return JoinedDataBag.create_normalized(
+                sub_df=sub_df,
+                normalized=NormalizedPreNum(
+                    num_df=compact_dataframe(self.normalized.num_df, categorize=categorize,
+                                             float32_columns=float32_columns),
+                    pre_df=compact_dataframe(self.normalized.pre_df, categorize=categorize),
+                    num_index=self.normalized.num_index,
+                    pre_index=self.normalized.pre_index))
+        return JoinedDataBag.create(sub_df=sub_df,
+                                    pre_num_df=compact_dataframe(self.pre_num_df,
+                                                                 categorize=categorize,
+                                                                 float32_columns=float32_columns))
+
+    def save_partitioned(self, target_path: str, partition_by: Optional[List[str]] = None):
+        """
+        Stores the bag in the partitioned format under the given directory. The data is
+        partitioned by the quarter in which a report was filed and optionally by the form and
+        the stmt. The directory has to exist and must be empty.
+        Note: the joined data of normalized bags is created for this format.
+
+        Args:
+            target_path: the directory under which the partitioned data is stored
+            partition_by (List[str], optional, None): additional partition keys: 'form', 'stmt'
+        """
+        save_partitioned_tables(target_path,
+                                tables={SUB_TXT: self.sub_df, PRE_NUM_TXT: self.pre_num_df},
+                                partition_by=partition_by)
+
+    def append(self, target_path: str) -> int:
+        """
+        Appends the content of the bag to a bag that was stored with save_partitioned.
+        Existing files are not rewritten, reports which are already stored are skipped.
+
+        Args:
+            target_path: the directory of the partitioned bag
+
+        Returns:
+            int: the number of appended reports
+        """
+        return append_partitioned_tables(target_path,
+                                         tables={SUB_TXT: self.sub_df,
+                                                 PRE_NUM_TXT: self.pre_num_df})
 
     @staticmethod
-    def load(target_path: str) -> JOINED:
+    def load(target_path: str, dtype_backend: Optional[str] = None,
+             filters: Optional[List[Filter]] = None,
+             columns: Optional[List[str]] = None,
+             mmap: bool = False) -> JOINED:
         """
         Loads the content of the current bag at the specified location.
 
         Args:
-            target_path: the directory which contains the parquet files for sub and pre_num
+            target_path: the directory which contains the files for sub and pre_num
+            dtype_backend (str, optional, None): use 'pyarrow' to keep the loaded data in
+             arrow backed columns, which needs considerably less memory for the string
+             columns (requires pandas 2.0)
+            filters (List[Tuple[str, str, Any]], optional, None): only for partitioned bags,
+             e.g. [('quarter', 'in', ['2020q1', '2020q2']), ('form', '==', '10-K')]. Only the
+             partitions matching the quarter, form, and stmt filters are read.
+            columns (List[str], optional, None): only for partitioned bags, the columns to load.
+             The key columns are always loaded.
+            mmap (bool, optional, False): memory-map files that were saved in the 'arrow' format.
+             Together with dtype_backend 'pyarrow', the data is not copied into memory and
+             is shared between all processes that load the bag.
 
         Returns:
             JoinedDataBag: the loaded Databag
         """
-        sub_df = pd.read_parquet(os.path.join(target_path, f'{SUB_TXT}.parquet'))
-        pre_num_df = pd.read_parquet(os.path.join(target_path, f'{PRE_NUM_TXT}.parquet'))
+        check_load_options(target_path, filters, columns)
+        if PartitionedStorage.is_partitioned(target_path):
+            tables = {table: table_to_pandas(data, dtype_backend) for table, data in
+                      load_partitioned_tables(target_path,
+                                              key_columns={SUB_TXT: ['adsh'],
+                                                           PRE_NUM_TXT: PRE_NUM_JOIN_KEYS},
+                                              filters=filters, columns=columns).items()}
+            return JoinedDataBag.create(sub_df=tables[SUB_TXT], pre_num_df=tables[PRE_NUM_TXT])
+
+        sub_df = read_dataframe(target_path, SUB_TXT, dtype_backend=dtype_backend, mmap=mmap)
+
+        if dataframe_exists(target_path, PRE_NUM_INDEX_TXT):
+            index_df = read_dataframe(target_path, PRE_NUM_INDEX_TXT, mmap=mmap)
+            normalized = NormalizedPreNum(
+                num_df=read_dataframe(target_path, NUM_TXT, dtype_backend=dtype_backend,
+                                      mmap=mmap),
+                pre_df=read_dataframe(target_path, PRE_TXT, dtype_backend=dtype_backend,
+                                      mmap=mmap),
+                num_index=index_df['num_index'].to_numpy(),
+                pre_index=index_df['pre_index'].to_numpy())
+            bag = JoinedDataBag.create_normalized(sub_df=sub_df, normalized=normalized)
+        else:
+            pre_num_df = read_dataframe(target_path, PRE_NUM_TXT, dtype_backend=dtype_backend,
+                                        mmap=mmap)
+            bag = JoinedDataBag.create(sub_df=sub_df, pre_num_df=pre_num_df)
+
+        bag._metadata = BagMetadata.read(target_path)  # pylint: disable=protected-access
+        return bag
+
+    @staticmethod
+    def inspect(target_path: str) -> BagMetadata:
+        """
+        returns the metadata of a stored bag (row counts, number of reports and companies,
+        reports per form and period, the date ranges, the quarters, and a content hash)
+        without loading it. Bags which were stored without metadata are loaded to
+        calculate it.
 
-        return JoinedDataBag.create(sub_df=sub_df, pre_num_df=pre_num_df)
+        Args:
+            target_path: the directory of the stored bag
+
+        Returns:
+            BagMetadata: the metadata of the bag
+        """
+        metadata = BagMetadata.read(target_path)
+        if metadata is not None:
+            return metadata
+
+        bag = JoinedDataBag.load(target_path)
+        return BagMetadata.calculate(sub_df=bag.sub_df,
+                                     tables={SUB_TXT: bag.sub_df, PRE_NUM_TXT: bag.pre_num_df},
+                                     ddates=bag.pre_num_df.get('ddate'))
 
     @staticmethod
     def concat(bags: List[JOINED]) -> JOINED:
@@ -165,10 +834,41 @@ class JoinedDataBag(DataBagBase[JOINED]):
 
         """
         sub_dfs = [db.sub_df for db in bags]
+
+        # normalized bags stay normalized
+        if all(db.is_normalized() for db in bags):
+            return JoinedDataBag.create_normalized(
+                sub_df=concat_dataframes(sub_dfs, ignore_index=False),
+                normalized=NormalizedPreNum.concat([db.normalized for db in bags]))
+
         pre_num_dfs = [db.pre_num_df for db in bags]
 
-        return JoinedDataBag.create(sub_df=pd.concat(sub_dfs),
-                                    pre_num_df=pd.concat(pre_num_dfs))
+        return JoinedDataBag.create(sub_df=concat_dataframes(sub_dfs, ignore_index=False),
+                                    pre_num_df=concat_dataframes(pre_num_dfs, ignore_index=False))
+
+    @staticmethod
+    def concat_saved(source_paths: List[str], target_path: str,
+                     file_format: str = PARQUET_FORMAT, compression: Optional[str] = None):
+        """
+        Concatenates stored bags directly into a new stored bag without loading them. The bags
+        are read one after the other, so the memory needed is independent of the number of bags.
+        Either all or none of the bags have to be normalized.
+
+        Args:
+            source_paths: the directories of the stored bags
+            target_path: the directory of the new bag, it has to exist and must be empty
+            file_format (str, optional, 'parquet'): 'parquet' or 'arrow'
+            compression (str, optional, None): for 'arrow' None (uncompressed), 'lz4', or 'zstd'
+        """
+        normalized = [dataframe_exists(path, PRE_NUM_INDEX_TXT) for path in source_paths]
+        if len(set(normalized)) > 1:
+            raise ValueError("normalized and not normalized bags cannot be concatenated")
+
+        tables = [SUB_TXT, NUM_TXT, PRE_TXT, PRE_NUM_INDEX_TXT] if any(normalized) \
+            else [SUB_TXT, PRE_NUM_TXT]
+        concat_saved_tables(source_paths, target_path, tables=tables,
+                            file_format=file_format, compression=compression)
+        _write_concatenated_metadata(source_paths, target_path, tables=tables)
 
 
 @dataclass
@@ -206,6 +906,8 @@ class RawDataBag(DataBagBase[RAW]):
         self.sub_df = sub_df
         self.pre_df = pre_df
         self.num_df = num_df
+        # the metadata of the stored bag, if the bag was loaded
+        self._metadata: Optional[BagMetadata] = None
 
     def copy_bag(self):
         """
@@ -246,20 +948,40 @@ class RawDataBag(DataBagBase[RAW]):
         """
         return self.num_df.copy()
 
-    def join(self) -> JoinedDataBag:
+    def join(self, partition_rows: int = DEFAULT_PARTITION_ROWS,
+             parallel: bool = False, normalized: bool = False) -> JoinedDataBag:
         """
         merges the raw data of pre and num together.
+        The result is the same as pd.merge(num_df, pre_df, on=['adsh', 'tag', 'version']), but
+        the join works on integer encoded keys and processes the num data in partitions, which
+        needs a lot less temporary memory for big bags.
+
+        Args:
+            partition_rows (int, optional, 2'000'000): number of num rows that are joined in one
+             partition. Smaller partitions need less temporary memory.
+            parallel (bool, optional, False): join the partitions in parallel threads
+            normalized (bool, optional, False): keep the joined data in the normalized form,
+             so that the joined pre_num_df is only created when it is accessed
 
         Returns:
             JoinedDataBag: the DataBag where pre and num are merged
 
         """
 
+        if normalized:
+            num_index, pre_index = match_on_keys(self.num_df, self.pre_df, PRE_NUM_JOIN_KEYS,
+                                                 partition_rows=partition_rows,
+                                                 parallel=parallel)
+            return JoinedDataBag.create_normalized(
+                sub_df=self.sub_df,
+                normalized=NormalizedPreNum(num_df=self.num_df, pre_df=self.pre_df,
+                                            num_index=num_index, pre_index=pre_index))
+
         # merge num and pre together. only rows in num are considered for which entries in pre exist
-        pre_num_df = pd.merge(self.num_df,
-                              self.pre_df,
-                              on=['adsh', 'tag',
-                                  'version'])  # don't produce index_x and index_y columns
+        pre_num_df = join_pre_num(num_df=self.num_df,
+                                  pre_df=self.pre_df,
+                                  partition_rows=partition_rows,
+                                  parallel=parallel)
 
         return JoinedDataBag.create(sub_df=self.sub_df, pre_num_df=pre_num_df)
 
@@ -272,9 +994,18 @@ class RawDataBag(DataBagBase[RAW]):
         - number of reports per form (10-K, 10-Q, ...)
         - number of reports per period date (counts per value in the period column of sub-file)
 
+        The statistics of a loaded bag are taken from the metadata that was stored with the bag.
+
         Returns:
             RawDataBagStats: instance with basic report infos
         """
+        if self._metadata is not None:
+            return RawDataBagStats(num_entries=self._metadata.table_rows[NUM_TXT],
+                                   pre_entries=self._metadata.table_rows[PRE_TXT],
+                                   number_of_reports=self._metadata.number_of_reports,
+                                   reports_per_form=dict(self._metadata.reports_per_form),
+                                   reports_per_period_date=dict(
+                                       self._metadata.reports_per_period_date))
 
         num_entries = len(self.num_df)
         pre_entries = len(self.pre_df)
@@ -289,43 +1020,195 @@ class RawDataBag(DataBagBase[RAW]):
                                reports_per_period_date=reports_per_period_date
                                )
 
-    def save(self, target_path: str):
+    def save(self, target_path: str, file_format: str = PARQUET_FORMAT,
+             compression: Optional[str] = None, content_hash: bool = True):
         """
         Stores the bag under the given directory.
         The directory has to exist and must be empty.
 
         Args:
-            target_path: the directory under which three parquet files for sub_txt, pre_text,
+            target_path: the directory under which three files for sub_txt, pre_text,
                   and num_txt will be created
+            file_format (str, optional, 'parquet'): 'parquet' or 'arrow'. Uncompressed arrow
+             files can be memory-mapped with load(mmap=True).
+            compression (str, optional, None): for 'arrow' None (uncompressed), 'lz4', or 'zstd'
+            content_hash (bool, optional, True): store the content hash in the metadata. The
+             hash requires a pass over all the data, so it can be skipped for temporary copies.
 
         """
+        check_file_format(file_format)
         if not os.path.isdir(target_path):
             raise ValueError(f"the path {target_path} does not exist")
 
         if len(os.listdir(target_path)) > 0:
             raise ValueError(f"the target_path {target_path} is not empty")
 
-        self.sub_df.to_parquet(os.path.join(target_path, f'{SUB_TXT}.parquet'))
-        self.pre_df.to_parquet(os.path.join(target_path, f'{PRE_TXT}.parquet'))
-        self.num_df.to_parquet(os.path.join(target_path, f'{NUM_TXT}.parquet'))
+        write_dataframe(self.sub_df, target_path, SUB_TXT, file_format, compression)
+        write_dataframe(self.pre_df, target_path, PRE_TXT, file_format, compression)
+        write_dataframe(self.num_df, target_path, NUM_TXT, file_format, compression)
+        self._calculate_metadata(content_hash=content_hash).write(target_path)
+
+    def _calculate_metadata(self, content_hash: bool = True) -> BagMetadata:
+        return BagMetadata.calculate(sub_df=self.sub_df,
+                                     tables={SUB_TXT: self.sub_df, PRE_TXT: self.pre_df,
+                                             NUM_TXT: self.num_df},
+                                     ddates=self.num_df.get('ddate'),
+                                     content_hash=content_hash)
+
+    def to_pandas(self) -> RAW:
+        """
+        returns a bag in which arrow backed columns are converted to numpy and object columns.
+
+        Returns:
+            RawDataBag: bag with numpy backed dataframes
+        """
+        return RawDataBag.create(sub_df=to_numpy_backed(self.sub_df),
+                                 pre_df=to_numpy_backed(self.pre_df),
+                                 num_df=to_numpy_backed(self.num_df))
+
+    def to_arrow(self) -> RAW:
+        """
+        returns a bag in which all columns are backed by arrow arrays (requires pandas 2.0).
+
+        Returns:
+            RawDataBag: bag with arrow backed dataframes
+        """
+        return RawDataBag.create(sub_df=to_arrow_backed(self.sub_df),
+                                 pre_df=to_arrow_backed(self.pre_df),
+                                 num_df=to_arrow_backed(self.num_df))
+
+    def memory_report(self, float32_values: bool = False) -> pd.DataFrame:
+        """
+        reports the memory usage of every column together with the dtype that compact()
+        would use.
+
+        Args:
+            float32_values (bool, optional, False): report the value column as float32
+
+        Returns:
+            pd.DataFrame: with the columns table, column, dtype, memory_bytes, share,
+             recommended_dtype, and recommended_memory_bytes
+        """
+        return memory_report({'sub_df': self.sub_df, 'pre_df': self.pre_df,
+                              'num_df': self.num_df},
+                             float32_columns=[VALUE_COLUMN] if float32_values else [])
+
+    def compact(self, categorize: bool = True, float32_values: bool = False) -> RAW:
+        """
+        returns a bag which needs less memory: integer columns are downcasted to the smallest
+        possible type (e.g. int8 for qtrs, inpth, and negating, int16 for line and report) and
+        string columns with few distinct values are categorized. The dtypes are kept by save
+        and load.
+
+        Args:
+            categorize (bool, optional, True): categorize string columns, the key columns
+             adsh, tag, and version are never categorized
+            float32_values (bool, optional, False): store the value column as float32, which
+             is only exact for about 7 significant digits
+
+        Returns:
+            RawDataBag: the compacted bag
+        """
+        return RawDataBag.create(
+            sub_df=compact_dataframe(self.sub_df, categorize=categorize),
+            pre_df=compact_dataframe(self.pre_df, categorize=categorize),
+            num_df=compact_dataframe(self.num_df, categorize=categorize,
+                                     float32_columns=[VALUE_COLUMN] if float32_values else []))
+
+    def save_partitioned(self, target_path: str, partition_by: Optional[List[str]] = None):
+        """
+        Stores the bag in the partitioned format under the given directory. The data is
+        partitioned by the quarter in which a report was filed and optionally by the form and
+        the stmt (pre_txt only). The directory has to exist and must be empty.
+
+        Args:
+            target_path: the directory under which the partitioned data is stored
+            partition_by (List[str], optional, None): additional partition keys: 'form', 'stmt'
+        """
+        save_partitioned_tables(target_path,
+                                tables={SUB_TXT: self.sub_df, PRE_TXT: self.pre_df,
+                                        NUM_TXT: self.num_df},
+                                partition_by=partition_by)
+
+    def append(self, target_path: str) -> int:
+        """
+        Appends the content of the bag to a bag that was stored with save_partitioned.
+        Existing files are not rewritten, reports which are already stored are skipped.
+
+        Args:
+            target_path: the directory of the partitioned bag
+
+        Returns:
+            int: the number of appended reports
+        """
+        return append_partitioned_tables(target_path,
+                                         tables={SUB_TXT: self.sub_df, PRE_TXT: self.pre_df,
+                                                 NUM_TXT: self.num_df})
 
     @staticmethod
-    def load(target_path: str) -> RAW:
+    def load(target_path: str, dtype_backend: Optional[str] = None,
+             filters: Optional[List[Filter]] = None,
+             columns: Optional[List[str]] = None,
+             mmap: bool = False) -> RAW:
         """
         Loads the content of the current bag at the specified location.
 
         Args:
-            target_path: the directory which contains the three parquet files for sub_txt, pre_txt,
+            target_path: the directory which contains the three files for sub_txt, pre_txt,
              and num_txt
+            dtype_backend (str, optional, None): use 'pyarrow' to keep the loaded data in
+             arrow backed columns, which needs considerably less memory for the string
+             columns (requires pandas 2.0)
+            filters (List[Tuple[str, str, Any]], optional, None): only for partitioned bags,
+             e.g. [('quarter', 'in', ['2020q1', '2020q2']), ('form', '==', '10-K')]. Only the
+             partitions matching the quarter, form, and stmt filters are read.
+            columns (List[str], optional, None): only for partitioned bags, the columns to load.
+             The key columns are always loaded.
+            mmap (bool, optional, False): memory-map files that were saved in the 'arrow' format.
+             Together with dtype_backend 'pyarrow', the data is not copied into memory and
+             is shared between all processes that load the bag.
 
         Returns:
             RawDataBag: the loaded Databag
         """
-        sub_df = pd.read_parquet(os.path.join(target_path, f'{SUB_TXT}.parquet'))
-        pre_df = pd.read_parquet(os.path.join(target_path, f'{PRE_TXT}.parquet'))
-        num_df = pd.read_parquet(os.path.join(target_path, f'{NUM_TXT}.parquet'))
+        check_load_options(target_path, filters, columns)
+        if PartitionedStorage.is_partitioned(target_path):
+            tables = {table: table_to_pandas(data, dtype_backend) for table, data in
+                      load_partitioned_tables(target_path,
+                                              key_columns={SUB_TXT: ['adsh'],
+                                                           PRE_TXT: PRE_NUM_JOIN_KEYS,
+                                                           NUM_TXT: PRE_NUM_JOIN_KEYS},
+                                              filters=filters, columns=columns).items()}
+            return RawDataBag.create(sub_df=tables[SUB_TXT], pre_df=tables[PRE_TXT],
+                                     num_df=tables[NUM_TXT])
+
+        sub_df = read_dataframe(target_path, SUB_TXT, dtype_backend=dtype_backend, mmap=mmap)
+        pre_df = read_dataframe(target_path, PRE_TXT, dtype_backend=dtype_backend, mmap=mmap)
+        num_df = read_dataframe(target_path, NUM_TXT, dtype_backend=dtype_backend, mmap=mmap)
+
+        bag = RawDataBag.create(sub_df=sub_df, pre_df=pre_df, num_df=num_df)
+        bag._metadata = BagMetadata.read(target_path)  # pylint: disable=protected-access
+        return bag
 
-        return RawDataBag.create(sub_df=sub_df, pre_df=pre_df, num_df=num_df)
+    @staticmethod
+    def inspect(target_path: str) -> BagMetadata:
+        """
+        returns the metadata of a stored bag (row counts, number of reports and companies,
+        reports per form and period, the date ranges, the quarters, and a content hash)
+        without loading it. Bags which were stored without metadata are loaded to
+        calculate it.
+
+        Args:
+            target_path: the directory of the stored bag
+
+        Returns:
+            BagMetadata: the metadata of the bag
+        """
+        metadata = BagMetadata.read(target_path)
+        if metadata is not None:
+            return metadata
+        # pylint: disable=protected-access
+        return RawDataBag.load(target_path)._calculate_metadata()
 
     @staticmethod
     def concat(bags: List[RAW]) -> RAW:
@@ -344,8 +1227,24 @@ class RawDataBag(DataBagBase[RAW]):
         pre_dfs = [db.pre_df for db in bags]
         num_dfs = [db.num_df for db in bags]
 
-        # todo: might be more efficient if the contained maps were just combined
-        #       instead of being recalculated
-        return RawDataBag.create(sub_df=pd.concat(sub_dfs, ignore_index=True),
-                                 pre_df=pd.concat(pre_dfs, ignore_index=True),
-                                 num_df=pd.concat(num_dfs, ignore_index=True))
+        return RawDataBag.create(sub_df=concat_dataframes(sub_dfs),
+                                 pre_df=concat_dataframes(pre_dfs),
+                                 num_df=concat_dataframes(num_dfs))
+
+    @staticmethod
+    def concat_saved(source_paths: List[str], target_path: str,
+                     file_format: str = PARQUET_FORMAT, compression: Optional[str] = None):
+        """
+        Concatenates stored bags directly into a new stored bag without loading them. The bags
+        are read one after the other, so the memory needed is independent of the number of bags.
+
+        Args:
+            source_paths: the directories of the stored bags
+            target_path: the directory of the new bag, it has to exist and must be empty
+            file_format (str, optional, 'parquet'): 'parquet' or 'arrow'
+            compression (str, optional, None): for 'arrow' None (uncompressed), 'lz4', or 'zstd'
+        """
+        tables = [SUB_TXT, PRE_TXT, NUM_TXT]
+        concat_saved_tables(source_paths, target_path, tables=tables,
+                            file_format=file_format, compression=compression)
+        _write_concatenated_metadata(source_paths, target_path, tables=tables)
@@ -0,0 +1,58 @@
+"""
+The file formats in which the dataframes of a bag can be stored, together with the low-level
+functions to write and read arrow IPC files.
+"""
+from typing import Optional
+
+import pyarrow as pa
+
+
+# the formats in which the dataframes of a bag can be stored. Uncompressed files in the arrow IPC
+# (feather v2) format can be memory-mapped, so loading them takes almost no time and the data is
+# shared between processes through the page cache.
+PARQUET_FORMAT = 'parquet'
+ARROW_FORMAT = 'arrow'
+FILE_FORMATS = [PARQUET_FORMAT, ARROW_FORMAT]
+
+
+def check_file_format(file_format: str):
+    """
+    checks whether the file_format is supported.
+
+    Args:
+        file_format (str): 'parquet' or 'arrow'
+    """
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f"file_format '{file_format}' is not supported, use one of {FILE_FORMATS}")
+
+
+def write_arrow_file(table: pa.Table, path: str, compression: Optional[str] = None):
+    """
+    writes a table into a file in the arrow IPC format.
+
+    Args:
+        table (pa.Table): the table to write
+        path (str): the arrow file
+        compression (str, optional, None): None (uncompressed, can be memory-mapped), 'lz4',
+         or 'zstd'
+    """
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    with pa.ipc.new_file(path, table.schema, options=options) as writer:
+        writer.write_table(table)
+
+
+def read_arrow_file(path: str, mmap: bool = False) -> pa.Table:
+    """
+    reads a file in the arrow IPC format. If mmap is True, the file is memory-mapped instead of
+    being read. The data of uncompressed files is then directly referenced by the returned table.
+
+    Args:
+        path (str): the arrow file
+        mmap (bool, optional, False): memory-map the file
+
+    Returns:
+        pa.Table: the content of the file
+    """
+    source = pa.memory_map(path, 'r') if mmap else pa.OSFile(path, 'rb')
+    with source:
+        return pa.ipc.open_file(source).read_all()
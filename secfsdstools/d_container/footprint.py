@@ -0,0 +1,165 @@
+"""
+Memory footprint of the dataframes of a bag. The columns of sub.txt, pre.txt, and num.txt are
+read with generic dtypes (e.g. int32 for qtrs and line, object for the strings), so a lot of
+memory can be saved by using the smallest possible integer types and categoricals for strings
+with only a few distinct values.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from secfsdstools.d_container.joining import PRE_NUM_JOIN_KEYS
+
+# string columns in which at most this ratio of the values is distinct are categorized
+CATEGORY_RATIO = 0.5
+
+# the join keys are never categorized, since the join and the filters expect the same dtypes
+# in pre and num
+NOT_CATEGORIZED_COLUMNS = PRE_NUM_JOIN_KEYS
+
+_INTEGER_TYPES = [np.int8, np.int16, np.int32, np.int64]
+
+# columns whose values can exceed the range of the data at hand in other reports
+MINIMAL_INTEGER_TYPES = {'line': np.int16, 'report': np.int16}
+
+
+def _smallest_integer_type(series: pd.Series) -> np.dtype:
+    if len(series) == 0:
+        return series.dtype
+    min_value, max_value = series.min(), series.max()
+    minimal_type = MINIMAL_INTEGER_TYPES.get(series.name, np.int8)
+    for int_type in _INTEGER_TYPES[_INTEGER_TYPES.index(minimal_type):]:
+        info = np.iinfo(int_type)
+        if info.min <= min_value and max_value <= info.max:
+            return np.dtype(int_type)
+    return series.dtype
+
+
+def _is_string_column(series: pd.Series) -> bool:
+    return series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) == 'string'
+
+
+def _recommended_dtype(series: pd.Series, categorize: bool, float32: bool) -> Optional[Any]:
+    # returns None if the dtype of the series is already the most compact one. the categorical
+    # dtype contains the distinct values, so its memory can be estimated without converting
+    dtype = series.dtype
+    if not isinstance(dtype, np.dtype):
+        return None
+
+    if np.issubdtype(dtype, np.signedinteger):
+        int_type = _smallest_integer_type(series)
+        return int_type if int_type.itemsize < dtype.itemsize else None
+
+    if float32 and dtype == np.float64:
+        return np.dtype(np.float32)
+
+    if categorize and len(series) > 0 and series.name not in NOT_CATEGORIZED_COLUMNS \
+            and _is_string_column(series):
+        values = series.unique()
+        if len(values) <= CATEGORY_RATIO * len(series):
+            return pd.CategoricalDtype(pd.Index(values).dropna())
+
+    return None
+
+
+def _estimated_memory_bytes(series: pd.Series, dtype: Any) -> int:
+    if isinstance(dtype, pd.CategoricalDtype):
+        # pandas uses the smallest integer type for the codes, that can address all categories
+        categories = len(dtype.categories)
+        codes_type = next(int_type for int_type in _INTEGER_TYPES
+                          if categories < np.iinfo(int_type).max)
+        return len(series) * np.dtype(codes_type).itemsize \
+            + int(dtype.categories.memory_usage(deep=True))
+    return len(series) * dtype.itemsize
+
+
+def compact_series(series: pd.Series, categorize: bool = True,
+                   float32: bool = False) -> pd.Series:
+    """
+    converts the series into the dtype that needs the least memory without losing information.
+    Integers are downcasted to the smallest integer type, string columns with few distinct values
+    are categorized. Arrow backed columns are not changed.
+
+    Args:
+        series (pd.Series): the series to compact
+        categorize (bool, optional, True): categorize string columns
+        float32 (bool, optional, False): convert float64 to float32, which is only exact for
+         about 7 significant digits
+
+    Returns:
+        pd.Series: the compacted series or the series itself, if nothing can be saved
+    """
+    dtype = _recommended_dtype(series, categorize=categorize, float32=float32)
+    if dtype is None:
+        return series
+    if isinstance(dtype, pd.CategoricalDtype):
+        # let pandas sort the categories
+        return series.astype('category')
+    return series.astype(dtype)
+
+
+def compact_dataframe(df: pd.DataFrame, categorize: bool = True,
+                      float32_columns: Iterable[str] = ()) -> pd.DataFrame:
+    """
+    compacts every column of the dataframe with compact_series.
+
+    Args:
+        df (pd.DataFrame): the dataframe to compact
+        categorize (bool, optional, True): categorize string columns
+        float32_columns (Iterable[str], optional, ()): float64 columns that are stored as float32
+
+    Returns:
+        pd.DataFrame: the compacted dataframe
+    """
+    float32_columns = set(float32_columns)
+    data = {column: compact_series(df[column], categorize=categorize,
+                                   float32=column in float32_columns)
+            for column in df.columns}
+    result = pd.DataFrame(data, index=df.index, copy=False)
+    result.columns = df.columns
+    return result
+
+
+def memory_report(tables: Dict[str, pd.DataFrame], categorize: bool = True,
+                  float32_columns: Iterable[str] = ()) -> pd.DataFrame:
+    """
+    creates a report about the memory usage of every column of the provided dataframes together
+    with the dtype that compact_series recommends and the memory needed with that dtype.
+    The recommended memory is estimated from the value range resp. the distinct values of a
+    column, no compacted copies are created.
+
+    Args:
+        tables (Dict[str, pd.DataFrame]): the dataframes by name
+        categorize (bool, optional, True): consider categorizing string columns
+        float32_columns (Iterable[str], optional, ()): float64 columns to report as float32
+
+    Returns:
+        pd.DataFrame: with the columns table, column, dtype, memory_bytes, share,
+         recommended_dtype, and recommended_memory_bytes
+    """
+    float32_columns = set(float32_columns)
+    entries: List[Dict] = []
+    for table, df in tables.items():
+        for column in df.columns:
+            series = df[column]
+            memory_bytes = int(series.memory_usage(index=False, deep=True))
+            dtype = _recommended_dtype(series, categorize=categorize,
+                                       float32=column in float32_columns)
+            entries.append({'table': table,
+                            'column': column,
+                            'dtype': str(series.dtype),
+                            'memory_bytes': memory_bytes,
+                            'recommended_dtype': str(series.dtype if dtype is None
+                                                     else 'category' if
+                                                     isinstance(dtype, pd.CategoricalDtype)
+                                                     else dtype),
+                            'recommended_memory_bytes':
+                                memory_bytes if dtype is None
+                                else _estimated_memory_bytes(series, dtype)})
+
+    report_df = pd.DataFrame(entries, columns=['table', 'column', 'dtype', 'memory_bytes',
+                                               'recommended_dtype', 'recommended_memory_bytes'])
+    total = report_df.memory_bytes.sum()
+    report_df.insert(4, 'share', report_df.memory_bytes / total if total > 0 else 0.0)
+    return report_df
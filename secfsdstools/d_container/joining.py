@@ -0,0 +1,257 @@
+"""
+Join engine for the pre and num data. Instead of hashing the three string key columns
+(adsh, tag, version) of both dataframes at once like pd.merge does, the keys are encoded into a
+single int64 value. The matching rows are then found with a sort-merge on the integer keys,
+which is done in partitions of the num rows, so that the temporary memory stays bounded.
+The result is identical (values, dtypes, and row order) to
+pd.merge(num_df, pre_df, on=['adsh', 'tag', 'version']).
+"""
+import logging
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from secfsdstools.a_utils.parallelexecution import ThreadExecutor
+
+LOGGER = logging.getLogger(__name__)
+
+PRE_NUM_JOIN_KEYS = ['adsh', 'tag', 'version']
+
+# number of num rows that are matched against pre in one partition
+DEFAULT_PARTITION_ROWS = 2_000_000
+
+# the combined key must fit into an int64
+_MAX_KEY_SPACE = 2 ** 62
+
+
+@lru_cache(maxsize=1)
+def _merge_groups_equal_keys() -> bool:
+    # older pandas versions return the rows of an inner merge grouped by the key in the order of
+    # the first appearance in the left frame, newer versions keep the order of the left frame.
+    left = pd.DataFrame({'key': [2, 1, 2]})
+    right = pd.DataFrame({'key': [1, 2], 'value': [1, 2]})
+    return pd.merge(left, right, on='key')['value'].tolist() == [2, 2, 1]
+
+
+def _encode_keys(left: pd.DataFrame, right: pd.DataFrame,
+                 on: List[str]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    encodes the key columns of both frames into int64 values. The first key column is the most
+    significant part of the encoded value. Keys of the left frame which are not present in the
+    right frame are encoded as -1.
+
+    Returns None if the keys cannot be encoded (null values or too many distinct values).
+    """
+    left_keys = np.zeros(len(left), dtype=np.int64)
+    right_keys = np.zeros(len(right), dtype=np.int64)
+    left_missing = np.zeros(len(left), dtype=bool)
+    key_space = 1
+
+    for column in on:
+        if left[column].isna().any() or right[column].isna().any():
+            return None
+
+        right_codes, uniques = pd.factorize(right[column])
+        left_codes = pd.Index(uniques).get_indexer(left[column])
+
+        key_space *= max(1, len(uniques))
+        if key_space >= _MAX_KEY_SPACE:
+            return None
+
+        right_keys = right_keys * len(uniques) + right_codes
+        left_keys = left_keys * len(uniques) + left_codes
+        left_missing |= left_codes < 0
+
+    left_keys[left_missing] = -1
+    return left_keys, right_keys
+
+
+def _is_sorted(values: np.ndarray) -> bool:
+    return len(values) < 2 or bool(np.all(values[1:] >= values[:-1]))
+
+
+def _match_partition(left_positions: np.ndarray, left_keys: np.ndarray,
+                     sorted_right_keys: np.ndarray,
+                     right_order: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    finds all matching rows in the sorted right keys for the given left rows.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: the row positions in the left and right frame
+    """
+    keys = left_keys[left_positions]
+    starts = np.searchsorted(sorted_right_keys, keys, side='left')
+    ends = np.searchsorted(sorted_right_keys, keys, side='right')
+    counts = ends - starts
+
+    left_index = np.repeat(left_positions, counts)
+
+    # position of every result row within the group of matching right rows
+    offsets = np.arange(len(left_index), dtype=np.int64) - np.repeat(np.cumsum(counts) - counts,
+                                                                    counts)
+    right_index = np.repeat(starts, counts) + offsets
+    if right_order is not None:
+        right_index = right_order[right_index]
+    return left_index, right_index
+
+
+def _take(series: pd.Series, index: np.ndarray):
+    # extension arrays (categorical, arrow, ...) keep their type
+    if isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+        return series.array.take(index)
+    return np.take(series.to_numpy(), index)
+
+
+def _match_with_merge(left: pd.DataFrame, right: pd.DataFrame,
+                      on: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    # let pd.merge calculate the row positions of the joined rows
+    positions = pd.merge(left[on].assign(__left=np.arange(len(left), dtype=np.int64)),
+                         right[on].assign(__right=np.arange(len(right), dtype=np.int64)),
+                         on=on)
+    return positions['__left'].to_numpy(), positions['__right'].to_numpy()
+
+
+def match_on_keys(left: pd.DataFrame, right: pd.DataFrame, on: List[str],
+                  partition_rows: int = DEFAULT_PARTITION_ROWS,
+                  parallel: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    calculates the row positions of an inner join of the two dataframes. The i-th row of the
+    join consists of the row left_index[i] of the left and right_index[i] of the right frame.
+    The order of the rows is the same as the order of pd.merge(left, right, on=on).
+
+    Args:
+        left (pd.DataFrame): the left dataframe
+        right (pd.DataFrame): the right dataframe
+        on (List[str]): the key columns
+        partition_rows (int, optional, 2'000'000): number of left rows that are matched in one
+         partition. Smaller partitions need less temporary memory.
+        parallel (bool, optional, False): match the partitions in parallel threads
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: the row positions in the left and the right frame
+    """
+    encoded = None
+    if all(left[column].dtype == right[column].dtype for column in on):
+        encoded = _encode_keys(left, right, on)
+    if encoded is None:
+        LOGGER.debug("keys cannot be encoded as integers, using pd.merge")
+        return _match_with_merge(left, right, on)
+    left_keys, right_keys = encoded
+
+    # sort-merge: if the right keys are already sorted, no sorting is necessary
+    right_order: Optional[np.ndarray] = None
+    sorted_right_keys = right_keys
+    if not _is_sorted(right_keys):
+        right_order = np.argsort(right_keys, kind='stable')
+        sorted_right_keys = right_keys[right_order]
+
+    # the order in which the left rows appear in the result
+    if _merge_groups_equal_keys() and not _is_sorted(left_keys):
+        group_codes, _ = pd.factorize(left_keys)
+        left_order = np.argsort(group_codes, kind='stable')
+    else:
+        left_order = np.arange(len(left), dtype=np.int64)
+
+    partitions = [left_order[start:start + partition_rows]
+                  for start in range(0, len(left_order), max(1, partition_rows))]
+
+    def match(partition: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return _match_partition(partition, left_keys, sorted_right_keys, right_order)
+
+    if parallel and len(partitions) > 1:
+        executor = ThreadExecutor[np.ndarray, Tuple[np.ndarray, np.ndarray], type(None)](
+            chunksize=0)
+        executor.set_get_entries_function(lambda: partitions)
+        executor.set_process_element_function(match)
+        executor.set_post_process_chunk_function(lambda parts: parts)
+        matches, _ = executor.execute()
+    else:
+        matches = [match(partition) for partition in partitions]
+
+    if len(matches) == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    return np.concatenate([left_part for left_part, _ in matches]), \
+        np.concatenate([right_part for _, right_part in matches])
+
+
+def take_joined(left: pd.DataFrame, right: pd.DataFrame, on: List[str],
+                left_index: np.ndarray, right_index: np.ndarray,
+                columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    creates the joined dataframe from the row positions calculated by match_on_keys.
+    The columns of the left frame are followed by the non-key columns of the right frame.
+
+    Args:
+        left (pd.DataFrame): the left dataframe
+        right (pd.DataFrame): the right dataframe, it may also only contain the non-key columns
+        on (List[str]): the key columns
+        left_index (np.ndarray): the row positions in the left frame
+        right_index (np.ndarray): the row positions in the right frame
+        columns (List[str], optional, None): create only the provided columns
+
+    Returns:
+        pd.DataFrame: the joined dataframe
+    """
+    # the result is created column by column, so that at most one temporary column exists
+    result = {}
+    for column in left.columns:
+        if columns is None or column in columns:
+            result[column] = _take(left[column], left_index)
+    for column in right.columns:
+        if column not in on and (columns is None or column in columns):
+            result[column] = _take(right[column], right_index)
+
+    return pd.DataFrame(result, copy=False)
+
+
+def merge_on_keys(left: pd.DataFrame, right: pd.DataFrame, on: List[str],
+                  partition_rows: int = DEFAULT_PARTITION_ROWS,
+                  parallel: bool = False) -> pd.DataFrame:
+    """
+    inner join of two dataframes that produces the same result as pd.merge(left, right, on=on).
+
+    Args:
+        left (pd.DataFrame): the left dataframe
+        right (pd.DataFrame): the right dataframe
+        on (List[str]): the key columns
+        partition_rows (int, optional, 2'000'000): number of left rows that are matched in one
+         partition. Smaller partitions need less temporary memory.
+        parallel (bool, optional, False): match the partitions in parallel threads
+
+    Returns:
+        pd.DataFrame: the joined dataframe
+    """
+    right_value_columns = [column for column in right.columns if column not in on]
+    if len(left) == 0 or len(right) == 0 or \
+            any(column in left.columns for column in right_value_columns) or \
+            any(left[column].dtype != right[column].dtype for column in on):
+        # pd.merge would add suffixes, convert the key columns, or reorder the columns of an
+        # empty result, this is not supported by the engine
+        return pd.merge(left, right, on=on)
+
+    left_index, right_index = match_on_keys(left, right, on,
+                                            partition_rows=partition_rows, parallel=parallel)
+    return take_joined(left, right, on, left_index, right_index)
+
+
+def join_pre_num(num_df: pd.DataFrame, pre_df: pd.DataFrame,
+                 partition_rows: int = DEFAULT_PARTITION_ROWS,
+                 parallel: bool = False) -> pd.DataFrame:
+    """
+    joins num and pre on adsh, tag, and version. Only rows in num are considered for which
+    entries in pre exist.
+
+    Args:
+        num_df (pd.DataFrame): the num dataframe
+        pre_df (pd.DataFrame): the pre dataframe
+        partition_rows (int, optional, 2'000'000): number of num rows that are matched in one
+         partition
+        parallel (bool, optional, False): match the partitions in parallel threads
+
+    Returns:
+        pd.DataFrame: the joined dataframe
+    """
+    return merge_on_keys(num_df, pre_df, on=PRE_NUM_JOIN_KEYS,
+                         partition_rows=partition_rows, parallel=parallel)
@@ -0,0 +1,387 @@
+"""
+Partitioned on-disk format for the databags.
+
+Every table of a bag (e.g. sub.txt, pre.txt, and num.txt) is stored in its own directory which
+is partitioned by the quarter in which a report was filed and optionally by the form of the
+report and the stmt:
+
+    <root>/<table>/quarter=2010q1/form=10-K/stmt=BS/part-<uuid>.parquet
+
+New data can be appended without rewriting the existing files. Loading only reads the
+partitions that match the provided filters and only the requested columns.
+"""
+import json
+import logging
+import os
+import uuid
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from secfsdstools.a_utils.constants import SUB_TXT
+from secfsdstools.a_utils.parallelexecution import ThreadExecutor
+
+LOGGER = logging.getLogger(__name__)
+
+METADATA_FILE = '_partitioning.json'
+SCHEMA_FILE = '_schema.parquet'
+
+QUARTER_KEY = 'quarter'
+FORM_KEY = 'form'
+STMT_KEY = 'stmt'
+
+# the optional partition keys, the quarter is always used
+SUPPORTED_PARTITION_KEYS = [FORM_KEY, STMT_KEY]
+
+_NULL_VALUE = '__null__'
+
+Filter = Tuple[str, str, Any]
+
+
+def filed_to_quarter(filed: pd.Series) -> pd.Series:
+    """
+    calculates the quarter in the form '2010q1' from the filed column (yyyymmdd) of sub.txt.
+    """
+    filed = filed.astype('int64')
+    year = filed // 10000
+    quarter = (filed // 100 % 100 - 1) // 3 + 1
+    return year.astype(str) + 'q' + quarter.astype(str)
+
+
+def _encode_value(value: Any) -> str:
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return _NULL_VALUE
+    return quote(str(value), safe='')
+
+
+def _decode_value(value: str) -> Optional[str]:
+    if value == _NULL_VALUE:
+        return None
+    return unquote(value)
+
+
+def _matches(value: Optional[str], operator: str, expected: Any) -> bool:
+    if operator in ('=', '=='):
+        return value == str(expected)
+    if operator == '!=':
+        return value != str(expected)
+    if operator == 'in':
+        return value in [str(entry) for entry in expected]
+    if operator == 'not in':
+        return value not in [str(entry) for entry in expected]
+    raise ValueError(f"operator {operator} is not supported for partition keys")
+
+
+def _schema_for(df: pd.DataFrame) -> pa.Schema:
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    # columns which only contain None values in the first data have to accept strings later
+    fields = [pa.field(field.name, pa.string()) if field.type == pa.null() else field
+              for field in schema]
+    return pa.schema(fields)
+
+
+class PartitionedStorage:
+    """
+    Reads and writes the tables of a bag in the partitioned format.
+    """
+
+    @staticmethod
+    def is_partitioned(root_path: str) -> bool:
+        """
+        checks whether the directory contains a bag in the partitioned format.
+        """
+        return os.path.isfile(os.path.join(root_path, METADATA_FILE))
+
+    def __init__(self, root_path: str):
+        self.root_path = root_path
+
+    def create(self, tables: List[str], partition_by: Optional[List[str]] = None):
+        """
+        initializes an empty partitioned storage in root_path. The directory has to exist
+        and must be empty.
+
+        Args:
+            tables (List[str]): the names of the tables, the first one has to be sub.txt
+            partition_by (List[str], optional, None): additional partition keys ('form', 'stmt'),
+             the data is always partitioned by the quarter
+        """
+        if not os.path.isdir(self.root_path):
+            raise ValueError(f"the path {self.root_path} does not exist")
+
+        if len(os.listdir(self.root_path)) > 0:
+            raise ValueError(f"the target_path {self.root_path} is not empty")
+
+        partition_by = partition_by or []
+        unsupported = [key for key in partition_by if key not in SUPPORTED_PARTITION_KEYS]
+        if unsupported:
+            raise ValueError(f"unsupported partition keys: {unsupported}")
+
+        with open(os.path.join(self.root_path, METADATA_FILE), 'w', encoding='utf8') as file:
+            json.dump({'tables': tables,
+                       'partition_by': [QUARTER_KEY] + partition_by}, file)
+
+    def _read_metadata(self) -> Dict[str, Any]:
+        if not self.is_partitioned(self.root_path):
+            raise ValueError(f"{self.root_path} does not contain a partitioned bag")
+        with open(os.path.join(self.root_path, METADATA_FILE), 'r', encoding='utf8') as file:
+            return json.load(file)
+
+    @property
+    def tables(self) -> List[str]:
+        """ the names of the stored tables """
+        return self._read_metadata()['tables']
+
+    @property
+    def partition_by(self) -> List[str]:
+        """ the partition keys """
+        return self._read_metadata()['partition_by']
+
+    def _table_partition_keys(self, df_columns: List[str]) -> List[str]:
+        # stmt is only used for tables that contain a stmt column
+        return [key for key in self.partition_by if key != STMT_KEY or STMT_KEY in df_columns]
+
+    def read_adshs(self, sub_table: str) -> Set[str]:
+        """
+        returns the adshs of all reports that are stored.
+
+        Args:
+            sub_table (str): the name of the table containing the sub.txt data
+
+        Returns:
+            Set[str]: the stored adshs
+        """
+        files = self._list_files(sub_table, filters=[])
+        if len(files) == 0:
+            return set()
+        return set(pq.ParquetDataset(files).read(columns=['adsh']).column('adsh').to_pylist())
+
+    def write(self, tables: Dict[str, pd.DataFrame], sub_df: pd.DataFrame):
+        """
+        appends the data of the tables to the storage. The tables are written in parallel.
+
+        Args:
+            tables (Dict[str, pd.DataFrame]): the data per table name
+            sub_df (pd.DataFrame): the sub.txt data, used to calculate the quarter and the form
+             of every report
+        """
+        adsh_quarter = dict(zip(sub_df.adsh, filed_to_quarter(sub_df.filed)))
+        adsh_form = dict(zip(sub_df.adsh, sub_df.form))
+
+        def process_element(entry: Tuple[str, pd.DataFrame]) -> str:
+            table, df = entry
+            self._write_table(table, df, adsh_quarter=adsh_quarter, adsh_form=adsh_form)
+            return table
+
+        executor = ThreadExecutor[Tuple[str, pd.DataFrame], str, type(None)](
+            processes=len(tables), chunksize=0)
+        executor.set_get_entries_function(lambda: list(tables.items()))
+        executor.set_process_element_function(process_element)
+        executor.set_post_process_chunk_function(lambda parts: parts)
+        executor.execute()
+
+    def _get_schema(self, table: str, df: pd.DataFrame) -> pa.Schema:
+        schema_file = os.path.join(self.root_path, table, SCHEMA_FILE)
+        if os.path.isfile(schema_file):
+            return pq.read_schema(schema_file)
+
+        # the schema of the first data that is written is used for all appended data
+        schema = _schema_for(df)
+        os.makedirs(os.path.join(self.root_path, table), exist_ok=True)
+        pq.write_table(schema.empty_table(), schema_file)
+        return schema
+
+    def _write_table(self, table: str, df: pd.DataFrame,
+                     adsh_quarter: Dict[str, str], adsh_form: Dict[str, str]):
+        schema = self._get_schema(table, df)
+        if len(df) == 0:
+            return
+
+        keys = self._table_partition_keys(df.columns.tolist())
+        # every key column is factorized, so that only its unique values have to be encoded
+        key_codes: List[np.ndarray] = []
+        key_values: List[List[str]] = []
+        for key in keys:
+            if key == QUARTER_KEY:
+                values = df.adsh.map(adsh_quarter)
+            elif key == FORM_KEY:
+                values = df.adsh.map(adsh_form)
+            else:
+                values = df[key]
+            codes, uniques = pd.factorize(values)
+            encoded = [_encode_value(value) for value in uniques]
+            if (codes == -1).any():
+                # missing values get their own code after the unique values
+                codes = np.where(codes == -1, len(encoded), codes)
+                encoded.append(_NULL_VALUE)
+            key_codes.append(codes)
+            key_values.append(encoded)
+
+        # the codes of all keys are combined into a single partition code, the rows of every
+        # partition are the consecutive positions after sorting by it
+        shape = tuple(len(values) for values in key_values)
+        partition_codes = np.ravel_multi_index(key_codes, shape)
+        order = np.argsort(partition_codes, kind='stable')
+        boundaries = np.flatnonzero(np.diff(partition_codes[order])) + 1
+        for positions in np.split(order, boundaries):
+            value_codes = np.unravel_index(partition_codes[positions[0]], shape)
+            partition_dir = os.path.join(self.root_path, table,
+                                         *[f'{key}={values[code]}' for key, values, code
+                                           in zip(keys, key_values, value_codes)])
+            os.makedirs(partition_dir, exist_ok=True)
+            part = df.iloc[positions]
+            pq.write_table(pa.Table.from_pandas(part, schema=schema, preserve_index=False),
+                           os.path.join(partition_dir, f'part-{uuid.uuid4().hex}.parquet'))
+
+    def _list_files(self, table: str, filters: List[Filter]) -> List[str]:
+        table_dir = os.path.join(self.root_path, table)
+        partition_filters = [entry for entry in filters if entry[0] in self.partition_by]
+
+        files: List[str] = []
+        for current_dir, _, filenames in sorted(os.walk(table_dir)):
+            relative = os.path.relpath(current_dir, table_dir)
+            partition_values: Dict[str, Optional[str]] = {}
+            if relative != '.':
+                for part in relative.split(os.sep):
+                    key, value = part.split('=', 1)
+                    partition_values[key] = _decode_value(value)
+
+            if all(_matches(partition_values[key], operator, expected)
+                   for key, operator, expected in partition_filters
+                   if key in partition_values):
+                files.extend(os.path.join(current_dir, filename)
+                             for filename in sorted(filenames)
+                             if filename.startswith('part-'))
+        return files
+
+    def read_table(self, table: str,
+                   filters: Optional[List[Filter]] = None,
+                   columns: Optional[List[str]] = None) -> pa.Table:
+        """
+        reads the data of a table. Only the partitions which match the filters are read.
+
+        Args:
+            table (str): the name of the table
+            filters (List[Tuple[str, str, Any]], optional, None): filters in the format of
+             pd.read_parquet (e.g. [('quarter', 'in', ['2010q1']), ('stmt', '==', 'BS')]).
+             Filters on columns which are not part of the table are ignored.
+            columns (List[str], optional, None): the columns to read, None means all
+
+        Returns:
+            pa.Table: the loaded data
+        """
+        schema = pq.read_schema(os.path.join(self.root_path, table, SCHEMA_FILE))
+        filters = filters or []
+
+        files = self._list_files(table, filters)
+        if columns is not None:
+            columns = [column for column in schema.names if column in columns]
+
+        if len(files) == 0:
+            empty = schema.empty_table()
+            return empty.select(columns) if columns is not None else empty
+
+        row_filters = [entry for entry in filters if entry[0] in schema.names]
+        dataset = pq.ParquetDataset(files, schema=schema,
+                                    filters=row_filters if row_filters else None)
+        return dataset.read(columns=columns)
+
+
+def _with_keys(columns: Optional[List[str]], key_columns: List[str]) -> Optional[List[str]]:
+    if columns is None:
+        return None
+    return key_columns + [column for column in columns if column not in key_columns]
+
+
+def save_partitioned_tables(target_path: str, tables: Dict[str, pd.DataFrame],
+                            partition_by: Optional[List[str]] = None):
+    """
+    stores the tables of a bag in the partitioned format. The directory has to exist and
+    must be empty.
+
+    Args:
+        target_path (str): the root directory of the partitioned bag
+        tables (Dict[str, pd.DataFrame]): the data per table, the first one has to be sub.txt
+        partition_by (List[str], optional, None): additional partition keys ('form', 'stmt')
+    """
+    storage = PartitionedStorage(target_path)
+    storage.create(tables=list(tables.keys()), partition_by=partition_by)
+    storage.write(tables=tables, sub_df=tables[SUB_TXT])
+
+
+def append_partitioned_tables(target_path: str, tables: Dict[str, pd.DataFrame]) -> int:
+    """
+    appends the tables of a bag to a bag in the partitioned format. Reports (identified by
+    the adsh) which are already stored are skipped.
+
+    Args:
+        target_path (str): the root directory of the partitioned bag
+        tables (Dict[str, pd.DataFrame]): the data per table, the first one has to be sub.txt
+
+    Returns:
+        int: the number of appended reports
+    """
+    storage = PartitionedStorage(target_path)
+    if storage.tables != list(tables.keys()):
+        raise ValueError(f"{target_path} contains the tables {storage.tables}")
+
+    existing_adshs = storage.read_adshs(SUB_TXT)
+    if existing_adshs:
+        tables = {table: df[~df.adsh.isin(existing_adshs)] for table, df in tables.items()}
+
+    storage.write(tables=tables, sub_df=tables[SUB_TXT])
+    return len(tables[SUB_TXT])
+
+
+def load_partitioned_tables(target_path: str, key_columns: Dict[str, List[str]],
+                            filters: Optional[List[Filter]] = None,
+                            columns: Optional[List[str]] = None) -> Dict[str, pa.Table]:
+    """
+    loads the tables of a bag in the partitioned format. If the filters restrict the
+    sub.txt data, the other tables only contain the data of the selected reports.
+
+    Args:
+        target_path (str): the root directory of the partitioned bag
+        key_columns (Dict[str, List[str]]): the columns which are always loaded per table
+        filters (List[Tuple[str, str, Any]], optional, None): filters in the format of
+         pd.read_parquet. The keys 'quarter' (e.g. '2010q1'), and, if the bag is partitioned by
+         them, 'form' and 'stmt' only read the matching partitions.
+        columns (List[str], optional, None): the columns to load, None means all
+
+    Returns:
+        Dict[str, pa.Table]: the loaded data per table
+    """
+    storage = PartitionedStorage(target_path)
+    filters = filters or []
+
+    sub_table = storage.read_table(SUB_TXT, filters=filters,
+                                   columns=_with_keys(columns, key_columns[SUB_TXT]))
+    result = {SUB_TXT: sub_table}
+
+    other_filters = list(filters)
+    if any(column in sub_table.column_names for column, _, _ in filters):
+        # only load the data of the selected reports
+        other_filters.append(('adsh', 'in', sub_table.column('adsh').to_pylist()))
+
+    for table in storage.tables[1:]:
+        result[table] = storage.read_table(table, filters=other_filters,
+                                           columns=_with_keys(columns, key_columns[table]))
+    return result
+
+
+def check_load_options(target_path: str, filters: Optional[List[Filter]],
+                       columns: Optional[List[str]]):
+    """
+    checks that filters and columns are only used to load bags in the partitioned format.
+
+    Args:
+        target_path (str): the directory of the bag
+        filters (List[Tuple[str, str, Any]], optional): the filters to load the bag with
+        columns (List[str], optional): the columns to load
+    """
+    if (filters is not None or columns is not None) and \
+            not PartitionedStorage.is_partitioned(target_path):
+        raise ValueError("filters and columns are only supported for partitioned bags")
@@ -1,14 +1,99 @@
 """
 Collector Base Class
 """
+import concurrent.futures
 import os
 from abc import ABC
-from typing import List, Optional, Tuple, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import pandas as pd
+import pyarrow.parquet as pq
 
+from secfsdstools.a_utils.asyncexecution import AsyncRequestExecutor
 from secfsdstools.a_utils.constants import NUM_TXT, PRE_TXT, SUB_TXT
-from secfsdstools.d_container.databagmodel import RawDataBag
+from secfsdstools.a_utils.fileutils import get_size
+from secfsdstools.a_utils.resourcegovernor import ResourceGovernor
+from secfsdstools.d_container.databagmodel import RawDataBag, read_parquet, \
+    read_parquet_semi_join, ARROW_DTYPE_BACKEND
+from secfsdstools.e_collector.collectorcache import CollectorCache, create_cache_key
+from secfsdstools.e_collector.columnprojection import ColumnProjection, get_projection
+
+# strategies to select the pre and num rows of the reports that were selected in sub.txt
+# push an ('adsh', 'in', adshs) filter into the scan, which is evaluated for every row
+FILTER_ADSH_STRATEGY = 'filter'
+# read adsh dictionary encoded and select the rows by their dictionary indices
+SEMI_JOIN_ADSH_STRATEGY = 'semijoin'
+# all reports are selected, so no adsh filter is needed
+NO_ADSH_FILTER_STRATEGY = 'none'
+ADSH_STRATEGIES = [FILTER_ADSH_STRATEGY, SEMI_JOIN_ADSH_STRATEGY, NO_ADSH_FILTER_STRATEGY]
+
+
+def choose_adsh_strategy(selected_reports: int, total_reports: int,
+                         dtype_backend: Optional[str] = None) -> str:
+    """
+    chooses how the pre and num rows of the selected reports are read. The crossover points
+    were measured with sandbox/semijoin_benchmark.py: on a file with the size of a quarter, the
+    semi join is faster than the 'in' filter for every selectivity, since the filter is evaluated
+    for every row and doesn't prune any row groups (the rows are not sorted by adsh). Only if all
+    reports are selected, reading the file without an adsh filter is faster.
+
+    Args:
+        selected_reports (int): the number of reports selected in sub.txt
+        total_reports (int): the number of reports in sub.txt
+        dtype_backend (str, optional, None): the dtype_backend of the collector
+
+    Returns:
+        str: one of the ADSH_STRATEGIES
+    """
+    if selected_reports >= total_reports > 0:
+        return NO_ADSH_FILTER_STRATEGY
+    if dtype_backend in (None, ARROW_DTYPE_BACKEND):
+        return SEMI_JOIN_ADSH_STRATEGY
+    return FILTER_ADSH_STRATEGY
+
+
+def estimate_read_bytes(datapath: str, selected_reports: Optional[int] = None) -> int:
+    """
+    estimates the amount of data that is read from the parquet files in datapath. If only
+    some reports are selected, the size of the files is weighted with the share of the
+    selected reports. Used to choose the execution backend of the collectors.
+
+    Args:
+        datapath (str): the directory with the parquet files
+        selected_reports (int, optional, None): the number of selected reports,
+         None means all reports are read
+
+    Returns:
+        int: the estimated number of bytes, 0 if the datapath does not exist
+    """
+    size = get_size(datapath)
+    sub_path = os.path.join(datapath, f'{SUB_TXT}.parquet')
+    if selected_reports is None or size == 0 or not os.path.isfile(sub_path):
+        return size
+
+    # the number of rows is read from the footer of the file
+    total_reports = pq.read_metadata(sub_path).num_rows
+    if total_reports == 0:
+        return size
+    return int(size * min(1.0, selected_reports / total_reports))
+
+
+def get_bag_size(databag: RawDataBag) -> Tuple[int, int]:
+    """
+    calculates the number of rows in pre and num and the memory that is used by the
+    dataframes of the bag (without the memory of the objects referenced by object columns).
+    Used to report the produced rows and bytes in the progress of parallel executions.
+
+    Args:
+        databag (RawDataBag): the bag to measure
+
+    Returns:
+        Tuple[int, int]: number of rows and number of bytes
+    """
+    dfs = [databag.sub_df, databag.pre_df, databag.num_df]
+    rows = len(databag.pre_df) + len(databag.num_df)
+    size = sum(int(df.memory_usage(index=True, deep=False).sum()) for df in dfs)
+    return rows, size
 
 
 class BaseCollector(ABC):
@@ -18,21 +103,93 @@ class BaseCollector(ABC):
 
     def __init__(self, datapath: str,
                  stmt_filter: Optional[List[str]] = None,
-                 tag_filter: Optional[List[str]] = None):
+                 tag_filter: Optional[List[str]] = None,
+                 dtype_backend: Optional[str] = None,
+                 cache: Optional[CollectorCache] = None,
+                 adsh_strategy: Optional[str] = None,
+                 columns: Optional[Union[str, ColumnProjection]] = None):
+        """
+        Args:
+            datapath (str): the directory with the sub, pre, and num parquet files
+            stmt_filter (List[str], optional, None):
+                List of stmts that should be read (BS, IS, ...)
+            tag_filter (List[str], optional, None):
+                List of tags that should be read (Assets, Liabilities, ...)
+            dtype_backend (str, optional, None): None (numpy), 'numpy_nullable', or 'pyarrow'
+            cache (CollectorCache, optional, None): cache for the collected bags
+            adsh_strategy (str, optional, None): how the pre and num rows of the selected reports
+             are read (one of ADSH_STRATEGIES). None chooses the strategy with
+             choose_adsh_strategy.
+            columns (Union[str, ColumnProjection], optional, None): the columns to read, either
+             a ColumnProjection or the name of a preset ('presenter', 'standardizer', 'notext').
+             None reads all columns.
+        """
+        if adsh_strategy is not None and adsh_strategy not in ADSH_STRATEGIES:
+            raise ValueError(f"adsh_strategy '{adsh_strategy}' is not supported, "
+                             f"use one of {ADSH_STRATEGIES}")
         self.datapath = datapath
         self.stmt_filter = stmt_filter
         self.tag_filter = tag_filter
+        self.dtype_backend = dtype_backend
+        self.cache = cache
+        self.adsh_strategy = adsh_strategy
+        self.projection = get_projection(columns)
 
     def _read_df_from_raw_parquet(self,
                                   file: str,
-                                  filters=None) -> pd.DataFrame:
+                                  filters=None,
+                                  semi_join_adshs: Optional[List[str]] = None) -> pd.DataFrame:
+        path = os.path.join(self.datapath, f'{file}.parquet')
         try:
-            return pd.read_parquet(os.path.join(self.datapath, f'{file}.parquet'),
-                                   filters=filters)
+            with ResourceGovernor.io_slot():
+                columns = None
+                if self.projection is not None:
+                    # the schema is read from the footer, so that the order of the columns
+                    # stays the same
+                    columns = self.projection.get_columns(file, pq.read_schema(path).names)
+
+                if semi_join_adshs is not None:
+                    return read_parquet_semi_join(path, column='adsh', values=semi_join_adshs,
+                                                  dtype_backend=self.dtype_backend,
+                                                  filters=filters,
+                                                  columns=columns)
+                # pyarrow reads the column chunks with several threads and coalesces the
+                # reads of the row groups into fewer, bigger requests (pre_buffer)
+                return read_parquet(path,
+                                    dtype_backend=self.dtype_backend,
+                                    filters=filters,
+                                    columns=columns,
+                                    use_threads=True,
+                                    pre_buffer=True)
         except Exception as ex:
             print("Error reading file:", self.datapath, file, ex)
             raise ex
 
+    def _read_dfs_from_raw_parquet(self, reads: Dict[str, Dict[str, Any]]) \
+            -> Dict[str, pd.DataFrame]:
+        """
+        reads the files concurrently, every file is read with the provided arguments of
+        _read_df_from_raw_parquet. The number of concurrent reads is limited by the
+        io_concurrency of the ResourceGovernor.
+        """
+        workers = ResourceGovernor.get_io_concurrency(requested=len(reads))
+        if workers == 1:
+            return {file: self._read_df_from_raw_parquet(file=file, **kwargs)
+                    for file, kwargs in reads.items()}
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {file: executor.submit(self._read_df_from_raw_parquet, file=file, **kwargs)
+                       for file, kwargs in reads.items()}
+            return {file: future.result() for file, future in futures.items()}
+
+    def _get_adsh_strategy(self, selected_reports: int) -> str:
+        if self.adsh_strategy is not None:
+            return self.adsh_strategy
+        # the number of rows is read from the footer of the file
+        total_reports = pq.read_metadata(os.path.join(self.datapath, f'{SUB_TXT}.parquet')).num_rows
+        return choose_adsh_strategy(selected_reports=selected_reports,
+                                    total_reports=total_reports,
+                                    dtype_backend=self.dtype_backend)
 
     def _get_pre_num_filters(self,
                              adshs: Optional[List[str]],
@@ -56,9 +213,27 @@ class BaseCollector(ABC):
 
         return pre_filter, num_filter
 
+    def get_cache_key(self, sub_df_filter: Tuple[str, str, Union[str, List[str]]]) -> str:
+        """
+        returns the key under which the result of basecollect is cached.
+
+        Args:
+            sub_df_filter: filter that applies directly on the sub.txt dataframe.
+
+        Returns:
+            str: the key for the CollectorCache
+        """
+        return create_cache_key(datapath=self.datapath,
+                                sub_df_filter=sub_df_filter,
+                                stmt_filter=self.stmt_filter,
+                                tag_filter=self.tag_filter,
+                                dtype_backend=self.dtype_backend,
+                                columns=self.projection.to_dict() if self.projection else None)
+
     def basecollect(self, sub_df_filter: Tuple[str, str, Union[str, List[str]]]) -> RawDataBag:
         """
-        basic implementation of the collect method
+        basic implementation of the collect method. If a cache is set, the bag is returned from
+        the cache or added to it.
 
         Args:
             sub_df_filter: filter that applies directly on the sub.txt dataframe.
@@ -67,24 +242,70 @@ class BaseCollector(ABC):
             RawDataBag: the loaded instance of RawDataBag
 
         """
+        if self.cache is None:
+            return self._read_bag(sub_df_filter)
 
-        sub_df = self._read_df_from_raw_parquet(file=SUB_TXT,
-                                                filters=[sub_df_filter] if sub_df_filter else None)
-        adshs = sub_df.adsh.to_list()
-        pre_filter, num_filter = self._get_pre_num_filters(adshs=adshs,
-                                                           stmts=self.stmt_filter,
-                                                           tags=self.tag_filter)
+        key = self.get_cache_key(sub_df_filter)
+        databag = self.cache.get(key, self.datapath)
+        if databag is None:
+            # the version is read before the data, so that changes during the read are detected
+            version = self.cache.get_version(self.datapath)
+            databag = self._read_bag(sub_df_filter)
+            self.cache.put(key, self.datapath, databag, version=version)
+        return databag
 
-        pre_df = self._read_df_from_raw_parquet(
-            file=PRE_TXT, filters=pre_filter if pre_filter else None
-        )
+    async def basecollect_async(self, sub_df_filter: Tuple[str, str, Union[str, List[str]]],
+                                executor: Optional[AsyncRequestExecutor] = None) -> RawDataBag:
+        """
+        async variant of basecollect. The files are read in the thread pool of the executor,
+        so the event loop is not blocked. Identical requests (same data, filters, and columns)
+        that are in flight at the same time are only read once.
 
-        num_df = self._read_df_from_raw_parquet(
-            file=NUM_TXT, filters=num_filter if num_filter else None
-        )
+        Args:
+            sub_df_filter: filter that applies directly on the sub.txt dataframe.
+            executor (AsyncRequestExecutor, optional, None): the executor, None uses the shared
+             default executor
+
+        Returns:
+            RawDataBag: the loaded instance of RawDataBag
+        """
+        executor = executor or AsyncRequestExecutor.get_default()
+        return await executor.run(self.basecollect, sub_df_filter,
+                                  key=self.get_cache_key(sub_df_filter))
+
+    def _read_bag(self, sub_df_filter: Tuple[str, str, Union[str, List[str]]]) -> RawDataBag:
+        if sub_df_filter:
+            # pre and num only depend on the adshs of the selected reports, so they are read
+            # concurrently after sub
+            sub_df = self._read_df_from_raw_parquet(file=SUB_TXT, filters=[sub_df_filter])
+            adshs = sub_df.adsh.to_list()
+            strategy = self._get_adsh_strategy(selected_reports=len(adshs))
+
+            pre_filter, num_filter = self._get_pre_num_filters(
+                adshs=adshs if strategy == FILTER_ADSH_STRATEGY else None,
+                stmts=self.stmt_filter,
+                tags=self.tag_filter)
+            semi_join_adshs = adshs if strategy == SEMI_JOIN_ADSH_STRATEGY else None
+            dfs = self._read_dfs_from_raw_parquet(
+                {PRE_TXT: {'filters': pre_filter or None, 'semi_join_adshs': semi_join_adshs},
+                 NUM_TXT: {'filters': num_filter or None, 'semi_join_adshs': semi_join_adshs}})
+        else:
+            # all reports are selected, so no adsh filter is needed and all files are read
+            # concurrently
+            pre_filter, num_filter = self._get_pre_num_filters(adshs=None,
+                                                               stmts=self.stmt_filter,
+                                                               tags=self.tag_filter)
+            dfs = self._read_dfs_from_raw_parquet({SUB_TXT: {},
+                                                   PRE_TXT: {'filters': pre_filter or None},
+                                                   NUM_TXT: {'filters': num_filter or None}})
+            sub_df = dfs[SUB_TXT]
+
+        pre_df = dfs[PRE_TXT]
+        num_df = dfs[NUM_TXT]
 
         # pandas pivot works better if coreg is not nan, so we set it here to a simple dash
-        num_df.loc[num_df.coreg.isna(), 'coreg'] = ''
+        if 'coreg' in num_df.columns:
+            num_df['coreg'] = num_df['coreg'].fillna('')
 
         return RawDataBag.create(sub_df=sub_df, pre_df=pre_df, num_df=num_df)
 
@@ -96,3 +317,15 @@ class BaseCollector(ABC):
             RawDataBag: the collected Data
 
         """
+
+    async def collect_async(self, executor: Optional[AsyncRequestExecutor] = None) -> RawDataBag:
+        """
+        async variant of collect. Overwritten by subclasses
+
+        Args:
+            executor (AsyncRequestExecutor, optional, None): the executor, None uses the shared
+             default executor
+
+        Returns:
+            RawDataBag: the collected Data
+        """
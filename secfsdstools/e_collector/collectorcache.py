@@ -0,0 +1,358 @@
+"""
+Two-tier cache for the results of the collectors.
+
+The same popular reports are often collected again and again, and every collect reads the
+sub.txt, pre.txt, and num.txt parquet files of the source. The CollectorCache keeps the collected
+bags in an in-memory LRU tier, which is bounded by the memory the bags use, and optionally in a
+disk tier, in which the bags are stored in the arrow format and which is bounded by a time to live
+and the size of the stored files.
+
+Entries are keyed by the source directory and the filters of the collect. They are invalidated
+as soon as one of the parquet files of the source or the index database changes.
+
+Since bags are treated as immutable, the bags of the memory tier are returned without copying.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from secfsdstools.a_utils.constants import NUM_TXT, PRE_TXT, SUB_TXT
+from secfsdstools.d_container.databagmodel import RawDataBag, ARROW_FORMAT, is_arrow_backed
+
+LOGGER = logging.getLogger(__name__)
+
+ENTRY_FILE = 'cache_entry.json'
+INDEX_DB_FILE = 'secfsdstools.db'
+
+_SOURCE_FILES = [SUB_TXT, PRE_TXT, NUM_TXT]
+_TMP_PREFIX = 'tmp-'
+
+
+@dataclass
+class CacheMetrics:
+    """
+    Counters of a CollectorCache.
+    """
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    memory_evictions: int = 0
+    disk_evictions: int = 0
+
+    @property
+    def hits(self) -> int:
+        """ the hits of both tiers """
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_ratio(self) -> float:
+        """ the ratio of the lookups which were answered from the cache """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+
+def _normalize(value: Any) -> Any:
+    # lists are sorted, so that the order of the adshs or tags doesn't change the key
+    if isinstance(value, (list, tuple, set, frozenset)):
+        entries = [_normalize(entry) for entry in value]
+        return entries if isinstance(value, tuple) else sorted(entries, key=str)
+    return value
+
+
+def create_cache_key(datapath: str,
+                     sub_df_filter: Optional[Tuple[str, str, Any]] = None,
+                     stmt_filter: Optional[List[str]] = None,
+                     tag_filter: Optional[List[str]] = None,
+                     dtype_backend: Optional[str] = None,
+                     columns: Optional[Dict[str, Optional[List[str]]]] = None) -> str:
+    """
+    creates the key of a collect from the source directory and the filters. The sub_df_filter
+    contains the adshs, ciks, or forms that are read.
+
+    Args:
+        datapath (str): the directory with the parquet files of the source
+        sub_df_filter (Tuple[str, str, Any], optional, None): the filter on sub.txt
+        stmt_filter (List[str], optional, None): the stmts that are read
+        tag_filter (List[str], optional, None): the tags that are read
+        dtype_backend (str, optional, None): the dtype_backend of the collected bag
+        columns (Dict[str, Optional[List[str]]], optional, None): the column projection
+
+    Returns:
+        str: the key
+    """
+    content = json.dumps([os.path.abspath(datapath),
+                          _normalize(sub_df_filter),
+                          _normalize(stmt_filter or []),
+                          _normalize(tag_filter or []),
+                          dtype_backend,
+                          columns])
+    return hashlib.sha256(content.encode('utf8')).hexdigest()
+
+
+def get_bag_memory(databag: RawDataBag) -> int:
+    """
+    calculates the memory of the dataframes of the bag including the objects referenced by
+    object columns.
+    """
+    return sum(int(df.memory_usage(index=True, deep=True).sum())
+               for df in [databag.sub_df, databag.pre_df, databag.num_df])
+
+
+def _directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(current_dir, filename))
+               for current_dir, _, filenames in os.walk(path) for filename in filenames)
+
+
+def _file_version(path: str) -> List[int]:
+    try:
+        stat = os.stat(path)
+        return [stat.st_mtime_ns, stat.st_size]
+    except OSError:
+        return [0, 0]
+
+
+class CollectorCache:
+    """
+    In-memory LRU cache for collected bags with an optional disk tier.
+    The cache can be shared by several collectors and threads.
+    """
+
+    def __init__(self,
+                 max_memory_bytes: int = 512 * 1024 * 1024,
+                 disk_dir: Optional[str] = None,
+                 max_disk_bytes: int = 4 * 1024 * 1024 * 1024,
+                 ttl_seconds: Optional[float] = 24 * 60 * 60,
+                 db_dir: Optional[str] = None):
+        """
+        Args:
+            max_memory_bytes (int, optional, 512MB): the memory the bags in the memory tier
+             may use. Bags which are bigger than this are not kept in memory.
+            disk_dir (str, optional, None): the directory of the disk tier, None means that
+             there is no disk tier
+            max_disk_bytes (int, optional, 4GB): the size of the files in the disk tier
+            ttl_seconds (float, optional, 1 day): the time after which the entries of the disk
+             tier expire, None means that they don't expire
+            db_dir (str, optional, None): the directory of the index database. If it is
+             provided, all entries are invalidated when the index is updated.
+        """
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+        self.db_dir = db_dir
+
+        self._lock = threading.Lock()
+        # key -> (version, bag, memory)
+        self._memory: 'OrderedDict[str, Tuple[List[int], RawDataBag, int]]' = OrderedDict()
+        self._memory_bytes = 0
+        self._metrics = CacheMetrics()
+
+        if self.disk_dir is not None:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    @property
+    def metrics(self) -> CacheMetrics:
+        """ a snapshot of the counters of the cache """
+        with self._lock:
+            return CacheMetrics(**asdict(self._metrics))
+
+    @property
+    def memory_bytes(self) -> int:
+        """ the memory used by the bags in the memory tier """
+        return self._memory_bytes
+
+    def get_version(self, datapath: str) -> List[int]:
+        """
+        returns the version of the source, which changes when one of its parquet files or the
+        index database is modified.
+        """
+        version: List[int] = []
+        for file in _SOURCE_FILES:
+            version.extend(_file_version(os.path.join(datapath, f'{file}.parquet')))
+        if self.db_dir is not None:
+            version.extend(_file_version(os.path.join(self.db_dir, INDEX_DB_FILE)))
+        return version
+
+    def get(self, key: str, datapath: str) -> Optional[RawDataBag]:
+        """
+        returns the cached bag or None, if there is no valid entry for the key.
+
+        Args:
+            key (str): the key created with create_cache_key
+            datapath (str): the source directory, used to check whether the entry is outdated
+
+        Returns:
+            Optional[RawDataBag]: the cached bag
+        """
+        version = self.get_version(datapath)
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] == version:
+                    self._memory.move_to_end(key)
+                    self._metrics.memory_hits += 1
+                    return entry[1]
+                self._remove_from_memory(key)
+                self._metrics.invalidations += 1
+
+        databag = self._get_from_disk(key, version)
+        with self._lock:
+            if databag is None:
+                self._metrics.misses += 1
+                return None
+            self._metrics.disk_hits += 1
+            self._put_into_memory(key, version, databag)
+        return databag
+
+    def put(self, key: str, datapath: str, databag: RawDataBag,
+            version: Optional[List[int]] = None):
+        """
+        adds a collected bag to the cache.
+
+        Args:
+            key (str): the key created with create_cache_key
+            datapath (str): the source directory from which the bag was collected
+            databag (RawDataBag): the collected bag
+            version (List[int], optional, None): the version of the source before the bag was
+             collected. If the source was modified while the bag was collected, the bag is
+             outdated as soon as it is added.
+        """
+        if version is None:
+            version = self.get_version(datapath)
+
+        with self._lock:
+            self._put_into_memory(key, version, databag)
+        self._put_onto_disk(key, version, databag)
+
+    def clear(self):
+        """
+        removes all entries from both tiers.
+        """
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            if self.disk_dir is not None:
+                for name in os.listdir(self.disk_dir):
+                    shutil.rmtree(os.path.join(self.disk_dir, name), ignore_errors=True)
+
+    def _remove_from_memory(self, key: str):
+        _, _, memory = self._memory.pop(key)
+        self._memory_bytes -= memory
+
+    def _put_into_memory(self, key: str, version: List[int], databag: RawDataBag):
+        memory = get_bag_memory(databag)
+        if memory > self.max_memory_bytes:
+            LOGGER.debug("bag with %d bytes is too big for the memory tier", memory)
+            return
+
+        if key in self._memory:
+            self._remove_from_memory(key)
+
+        # evict the least recently used entries
+        while self._memory_bytes + memory > self.max_memory_bytes:
+            oldest_key = next(iter(self._memory))
+            self._remove_from_memory(oldest_key)
+            self._metrics.memory_evictions += 1
+
+        self._memory[key] = (version, databag, memory)
+        self._memory_bytes += memory
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key)
+
+    def _read_entry(self, entry_dir: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(entry_dir, ENTRY_FILE), 'r', encoding='utf8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _is_expired(self, entry: Dict[str, Any]) -> bool:
+        return self.ttl_seconds is not None and \
+            time.time() - entry['created'] > self.ttl_seconds
+
+    def _get_from_disk(self, key: str, version: List[int]) -> Optional[RawDataBag]:
+        if self.disk_dir is None:
+            return None
+
+        entry_dir = self._entry_dir(key)
+        entry = self._read_entry(entry_dir)
+        if entry is None:
+            return None
+
+        if entry['version'] != version or self._is_expired(entry):
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            with self._lock:
+                self._metrics.invalidations += 1
+            return None
+
+        try:
+            databag = RawDataBag.load(entry_dir, dtype_backend=entry['dtype_backend'])
+        except (OSError, ValueError) as ex:
+            # the entry was removed by another process in the meantime
+            LOGGER.debug("could not read cache entry %s: %s", entry_dir, ex)
+            return None
+
+        # the modification time of the entry file is used to find the least recently used entries
+        os.utime(os.path.join(entry_dir, ENTRY_FILE))
+        return databag
+
+    def _put_onto_disk(self, key: str, version: List[int], databag: RawDataBag):
+        if self.disk_dir is None:
+            return
+
+        # the bag is written into a temporary directory first, so that other processes never
+        # see an incomplete entry
+        tmp_dir = os.path.join(self.disk_dir, f'{_TMP_PREFIX}{uuid.uuid4().hex}')
+        os.makedirs(tmp_dir)
+        # the content hash isn't needed to find the entries and would require a pass over the data
+        databag.save(tmp_dir, file_format=ARROW_FORMAT, content_hash=False)
+        dtype_backend = 'pyarrow' if is_arrow_backed(databag.num_df) else None
+        with open(os.path.join(tmp_dir, ENTRY_FILE), 'w', encoding='utf8') as file:
+            json.dump({'version': version, 'created': time.time(),
+                       'dtype_backend': dtype_backend}, file)
+
+        entry_dir = self._entry_dir(key)
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        try:
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # another thread or process stored the same entry in the meantime
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self._evict_from_disk()
+
+    def _evict_from_disk(self):
+        entries: List[Tuple[float, int, str]] = []
+        for name in os.listdir(self.disk_dir):
+            entry_dir = os.path.join(self.disk_dir, name)
+            if name.startswith(_TMP_PREFIX):
+                continue
+            entry = self._read_entry(entry_dir)
+            if entry is None or self._is_expired(entry):
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                with self._lock:
+                    self._metrics.disk_evictions += 1
+                continue
+            last_used = os.path.getmtime(os.path.join(entry_dir, ENTRY_FILE))
+            entries.append((last_used, _directory_size(entry_dir), entry_dir))
+
+        # remove the least recently used entries until the size limit is met
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+            with self._lock:
+                self._metrics.disk_evictions += 1
@@ -0,0 +1,126 @@
+"""
+Column projections for the collectors. Most pipelines only use a few of the columns of sub.txt
+(which has 36 columns), pre.txt, and num.txt. Text columns like footnote in num.txt or plabel in
+pre.txt need a lot of memory and time to be decoded, so the collectors can be told to only read
+the columns that are needed.
+
+The key columns which are needed to join pre and num and to filter by adsh are always read.
+"""
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple, Union
+
+from secfsdstools.a_utils.constants import NUM_TXT, PRE_TXT, SUB_TXT
+
+# columns that are always loaded, since they are needed to join the data
+SUB_KEY_COLUMNS = ['adsh']
+PRE_NUM_KEY_COLUMNS = ['adsh', 'tag', 'version']
+
+# the columns needed by the filters of the rawfiltering and joinedfiltering modules
+_SUB_FILTER_COLUMNS = ('adsh', 'cik', 'form', 'period', 'filed')
+_PRE_FILTER_COLUMNS = ('adsh', 'tag', 'version', 'stmt')
+_NUM_FILTER_COLUMNS = ('adsh', 'tag', 'version', 'coreg', 'ddate', 'qtrs', 'uom', 'value')
+
+
+@dataclass(frozen=True)
+class ColumnProjection:
+    """
+    The columns of sub.txt, pre.txt, and num.txt that are read. None means all columns.
+    The key columns are always read.
+    """
+    sub_columns: Optional[Tuple[str, ...]] = None
+    pre_columns: Optional[Tuple[str, ...]] = None
+    num_columns: Optional[Tuple[str, ...]] = None
+
+    @staticmethod
+    def create(sub_columns: Optional[List[str]] = None,
+               pre_columns: Optional[List[str]] = None,
+               num_columns: Optional[List[str]] = None) -> 'ColumnProjection':
+        """
+        creates a projection from lists of columns.
+
+        Args:
+            sub_columns (List[str], optional, None): the columns of sub.txt, None means all
+            pre_columns (List[str], optional, None): the columns of pre.txt, None means all
+            num_columns (List[str], optional, None): the columns of num.txt, None means all
+
+        Returns:
+            ColumnProjection: the projection
+        """
+        def to_tuple(columns: Optional[List[str]]) -> Optional[Tuple[str, ...]]:
+            return None if columns is None else tuple(columns)
+
+        return ColumnProjection(sub_columns=to_tuple(sub_columns),
+                                pre_columns=to_tuple(pre_columns),
+                                num_columns=to_tuple(num_columns))
+
+    def get_columns(self, file: str, available: List[str]) -> Optional[List[str]]:
+        """
+        returns the columns to read from a file in the order of the file, including the key
+        columns.
+
+        Args:
+            file (str): sub.txt, pre.txt, or num.txt
+            available (List[str]): the columns of the file
+
+        Returns:
+            Optional[List[str]]: the columns to read, None means all columns
+        """
+        selected, key_columns = {SUB_TXT: (self.sub_columns, SUB_KEY_COLUMNS),
+                                 PRE_TXT: (self.pre_columns, PRE_NUM_KEY_COLUMNS),
+                                 NUM_TXT: (self.num_columns, PRE_NUM_KEY_COLUMNS)}[file]
+        if selected is None:
+            return None
+        return [name for name in available if name in key_columns or name in selected]
+
+    def to_dict(self) -> Dict[str, Optional[List[str]]]:
+        """ returns the projection as a dictionary, e.g. to create a cache key """
+        return {name: None if columns is None else list(columns)
+                for name, columns in asdict(self).items()}
+
+
+# the columns needed to present a bag with the StandardStatementPresenter
+PRESENTER_PROJECTION = ColumnProjection(
+    sub_columns=_SUB_FILTER_COLUMNS + ('name', 'fye', 'fy', 'fp'),
+    pre_columns=_PRE_FILTER_COLUMNS + ('report', 'line', 'inpth', 'negating'),
+    num_columns=_NUM_FILTER_COLUMNS)
+
+# the columns needed by the standardizers
+STANDARDIZER_PROJECTION = ColumnProjection(
+    sub_columns=_SUB_FILTER_COLUMNS + ('name', 'fye', 'fy', 'fp'),
+    pre_columns=_PRE_FILTER_COLUMNS + ('report', 'line', 'negating'),
+    num_columns=_NUM_FILTER_COLUMNS)
+
+# all columns except the long text columns
+NO_TEXT_PROJECTION = ColumnProjection(
+    sub_columns=_SUB_FILTER_COLUMNS + ('name', 'sic', 'countryba', 'stprba', 'cityba',
+                                       'countryinc', 'fye', 'fy', 'fp', 'accepted',
+                                       'prevrpt', 'detail', 'nciks'),
+    pre_columns=_PRE_FILTER_COLUMNS + ('report', 'line', 'inpth', 'rfile', 'negating'),
+    num_columns=_NUM_FILTER_COLUMNS)
+
+PROJECTION_PRESETS: Dict[str, ColumnProjection] = {
+    'presenter': PRESENTER_PROJECTION,
+    'standardizer': STANDARDIZER_PROJECTION,
+    'notext': NO_TEXT_PROJECTION,
+}
+
+
+def get_projection(columns: Optional[Union[str, ColumnProjection]]) \
+        -> Optional[ColumnProjection]:
+    """
+    returns the projection for the columns parameter of the collectors.
+
+    Args:
+        columns (Union[str, ColumnProjection], optional): the name of one of the
+         PROJECTION_PRESETS ('presenter', 'standardizer', 'notext'), a ColumnProjection, or None
+         to read all columns
+
+    Returns:
+        Optional[ColumnProjection]: the projection or None
+    """
+    if columns is None or isinstance(columns, ColumnProjection):
+        return columns
+    if columns not in PROJECTION_PRESETS:
+        raise ValueError(f"unknown column preset '{columns}', "
+                         f"use one of {list(PROJECTION_PRESETS.keys())}")
+    return PROJECTION_PRESETS[columns]
@@ -1,11 +1,14 @@
 """
 Collects all data by the cik company.
 """
-from typing import Optional, List
+from typing import Optional, List, Union
 
 from secfsdstools.a_config.configmgt import ConfigurationManager
 from secfsdstools.a_config.configmodel import Configuration
+from secfsdstools.a_utils.asyncexecution import AsyncRequestExecutor
 from secfsdstools.c_index.indexdataaccess import IndexReport, ParquetDBIndexingAccessor
+from secfsdstools.e_collector.collectorcache import CollectorCache
+from secfsdstools.e_collector.columnprojection import ColumnProjection
 from secfsdstools.e_collector.multireportcollecting import MultiReportCollector
 
 
@@ -22,7 +25,10 @@ class CompanyReportCollector:
             forms_filter: Optional[List[str]] = None,
             stmt_filter: Optional[List[str]] = None,
             tag_filter: Optional[List[str]] = None,
-            configuration: Optional[Configuration] = None):
+            configuration: Optional[Configuration] = None,
+            cache: Optional[CollectorCache] = None,
+            columns: Optional[Union[str, ColumnProjection]] = None,
+            execution_backend: Optional[str] = None):
         """
         creates a MultiReportCollector instance for the provided ciks and forms (e.g. 10-K..)
         If no configuration object is passed,
@@ -38,6 +44,11 @@ class CompanyReportCollector:
             tag_filter (List[str], optional, None:
                 List of tags that should be read (Assets, Liabilities, ...)
             configuration (Configuration, optional, None): Optional configuration object
+            cache (CollectorCache, optional, None): cache for the collected bags
+            columns (Union[str, ColumnProjection], optional, None): the columns to read,
+                either a ColumnProjection or a preset ('presenter', 'standardizer', 'notext')
+            execution_backend (str, optional, None): 'inline', 'threads', or 'processes'.
+                None chooses the backend based on the amount of data to read.
 
         Returns:
             MultiReportCollector: instance of MultiReportCollector
@@ -56,5 +67,56 @@ class CompanyReportCollector:
 
         return MultiReportCollector.get_reports_by_indexreports(index_reports=index_reports,
                                                                 stmt_filter=stmt_filter,
-                                                                tag_filter=tag_filter
+                                                                tag_filter=tag_filter,
+                                                                cache=cache,
+                                                                columns=columns,
+                                                                execution_backend=execution_backend
                                                                 )
+
+    @classmethod
+    async def get_company_collector_async(
+            cls, ciks: List[int],
+            forms_filter: Optional[List[str]] = None,
+            stmt_filter: Optional[List[str]] = None,
+            tag_filter: Optional[List[str]] = None,
+            configuration: Optional[Configuration] = None,
+            cache: Optional[CollectorCache] = None,
+            columns: Optional[Union[str, ColumnProjection]] = None,
+            executor: Optional[AsyncRequestExecutor] = None):
+        """
+        async variant of get_company_collector. The configuration and the index are read
+        without blocking the event loop. Use collect_async() on the returned collector to
+        load the data.
+
+        Args:
+            ciks (List[int]): a list of central identification keys which is assigned
+                             by the sec to every company
+            forms_filter (List[str], optional, None):
+                List of forms that should be read (10-K, 10-Q, ...)
+            stmt_filter (List[str], optional, None):
+                List of stmts that should be read (BS, IS, ...)
+            tag_filter (List[str], optional, None:
+                List of tags that should be read (Assets, Liabilities, ...)
+            configuration (Configuration, optional, None): Optional configuration object
+            cache (CollectorCache, optional, None): cache for the collected bags
+            columns (Union[str, ColumnProjection], optional, None): the columns to read,
+                either a ColumnProjection or a preset ('presenter', 'standardizer', 'notext')
+            executor (AsyncRequestExecutor, optional, None): the executor, None uses the shared
+                default executor
+
+        Returns:
+            MultiReportCollector: instance of MultiReportCollector
+        """
+        executor = executor or AsyncRequestExecutor.get_default()
+        if configuration is None:
+            configuration = await executor.run(ConfigurationManager.read_config_file)
+
+        dbaccessor = ParquetDBIndexingAccessor(db_dir=configuration.db_dir)
+        index_reports: List[IndexReport] = await dbaccessor.read_index_reports_for_ciks_async(
+            ciks, forms_filter, executor=executor)
+
+        return MultiReportCollector.get_reports_by_indexreports(index_reports=index_reports,
+                                                                stmt_filter=stmt_filter,
+                                                                tag_filter=tag_filter,
+                                                                cache=cache,
+                                                                columns=columns)
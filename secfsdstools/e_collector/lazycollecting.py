@@ -0,0 +1,389 @@
+"""
+Lazy variant of the RawDataBag. Instead of loading all the data of sub.txt, pre.txt, and
+num.txt and applying the filters one after another on the loaded dataframes, the
+LazyRawDataBag records the source (the parquet folders of the zip files) and the chain of
+filters. Filters which can be expressed as predicates on a single parquet file are pushed down
+to the pyarrow dataset scan, so that rows which are filtered out are never loaded into pandas.
+
+The data is only read when materialize() or join() is called.
+"""
+import logging
+import os
+from dataclasses import dataclass, replace
+from typing import Callable, FrozenSet, Iterable, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from secfsdstools.a_utils.basic import calculate_previous_period
+from secfsdstools.a_utils.constants import NUM_TXT, PRE_TXT, SUB_TXT
+from secfsdstools.d_container.databagmodel import JoinedDataBag, RawDataBag, \
+    check_dtype_backend, table_to_pandas
+from secfsdstools.d_container.filter import FilterBase
+from secfsdstools.d_container.presentation import Presenter
+from secfsdstools.e_collector.columnprojection import PRE_NUM_KEY_COLUMNS, SUB_KEY_COLUMNS
+from secfsdstools.e_filter.rawfiltering import AdshRawFilter, MainCoregRawFilter, \
+    OfficialTagsOnlyRawFilter, ReportPeriodAndPreviousPeriodRawFilter, ReportPeriodRawFilter, \
+    StmtRawFilter, TagRawFilter, USDOnlyRawFilter
+
+LOGGER = logging.getLogger(__name__)
+
+# the period filters that can be pushed down
+CURRENT_PERIOD = 'current'
+PREVIOUS_PERIOD = 'previous'
+
+
+def _intersect(current: Optional[FrozenSet[str]],
+               values: Iterable[str]) -> FrozenSet[str]:
+    values = frozenset(values)
+    return values if current is None else current & values
+
+
+@dataclass(frozen=True)
+class ScanPlan:
+    """
+    The predicates and projections which are applied when the parquet files are scanned.
+    None means that there is no restriction.
+    """
+    forms: Optional[FrozenSet[str]] = None
+    adshs: Optional[FrozenSet[str]] = None
+    stmts: Optional[FrozenSet[str]] = None
+    tags: Optional[FrozenSet[str]] = None
+    main_coreg_only: bool = False
+    usd_only: bool = False
+    official_tags_only: bool = False
+    # allowed values of the ddate column in relation to the period of the report
+    report_periods: Optional[FrozenSet[str]] = None
+    sub_columns: Optional[List[str]] = None
+    pre_columns: Optional[List[str]] = None
+    num_columns: Optional[List[str]] = None
+
+    def push_down(self, bagfilter: FilterBase[RawDataBag]) -> Optional['ScanPlan']:
+        """
+        tries to express the provided filter as part of the scan.
+
+        Args:
+            bagfilter (FilterBase[RawDataBag]): the filter to push down
+
+        Returns:
+            Optional[ScanPlan]: the new plan containing the filter, or None if the filter
+            cannot be pushed down.
+        """
+        # the type is checked exactly, since subclasses might change the filter logic
+        filter_type = type(bagfilter)
+
+        if filter_type is AdshRawFilter:
+            return replace(self, adshs=_intersect(self.adshs, bagfilter.adshs))
+        if filter_type is StmtRawFilter:
+            return replace(self, stmts=_intersect(self.stmts, bagfilter.stmts))
+        if filter_type is TagRawFilter:
+            return replace(self, tags=_intersect(self.tags, bagfilter.tags))
+        if filter_type is MainCoregRawFilter:
+            return replace(self, main_coreg_only=True)
+        if filter_type is USDOnlyRawFilter:
+            return replace(self, usd_only=True)
+        if filter_type is OfficialTagsOnlyRawFilter:
+            return replace(self, official_tags_only=True)
+        if filter_type is ReportPeriodRawFilter:
+            return replace(self, report_periods=_intersect(self.report_periods,
+                                                           [CURRENT_PERIOD]))
+        if filter_type is ReportPeriodAndPreviousPeriodRawFilter:
+            return replace(self, report_periods=_intersect(self.report_periods,
+                                                           [CURRENT_PERIOD, PREVIOUS_PERIOD]))
+        return None
+
+
+def _get_columns(dataset: ds.Dataset, selected: Optional[List[str]],
+                 key_columns: List[str]) -> List[str]:
+    # the pandas index is stored as a separate column if it isn't a simple range index
+    available = [name for name in dataset.schema.names if not name.startswith('__index_level_')]
+    if selected is None:
+        return available
+    return [name for name in available if name in key_columns or name in selected]
+
+
+def _and(expressions: List[ds.Expression]) -> Optional[ds.Expression]:
+    if len(expressions) == 0:
+        return None
+    result = expressions[0]
+    for expression in expressions[1:]:
+        result = result & expression
+    return result
+
+
+class _DatapathScanner:
+    """
+    Scans the parquet files of a single zip file based on the ScanPlan.
+    """
+
+    def __init__(self, datapath: str, plan: ScanPlan, dtype_backend: Optional[str] = None):
+        self.datapath = datapath
+        self.plan = plan
+        self.dtype_backend = dtype_backend
+
+    def _dataset(self, file: str) -> ds.Dataset:
+        return ds.dataset(os.path.join(self.datapath, f'{file}.parquet'), format='parquet')
+
+    def _read_sub(self) -> pa.Table:
+        plan = self.plan
+        dataset = self._dataset(SUB_TXT)
+
+        predicates = []
+        if plan.forms is not None:
+            predicates.append(ds.field('form').isin(list(plan.forms)))
+        if plan.adshs is not None:
+            predicates.append(ds.field('adsh').isin(list(plan.adshs)))
+
+        key_columns = SUB_KEY_COLUMNS + (['period'] if plan.report_periods else [])
+        return dataset.to_table(columns=_get_columns(dataset, plan.sub_columns, key_columns),
+                                filter=_and(predicates))
+
+    def _common_predicates(self, sub_adshs: pa.Array) -> List[ds.Expression]:
+        plan = self.plan
+        predicates = []
+        if plan.forms is not None or plan.adshs is not None:
+            # semi join with the filtered sub data
+            predicates.append(ds.field('adsh').isin(sub_adshs))
+        if plan.tags is not None:
+            predicates.append(ds.field('tag').isin(list(plan.tags)))
+        if plan.official_tags_only:
+            predicates.append(~ds.field('version').isin(sub_adshs))
+        return predicates
+
+    def _read_pre(self, sub_adshs: pa.Array) -> pa.Table:
+        plan = self.plan
+        dataset = self._dataset(PRE_TXT)
+
+        predicates = self._common_predicates(sub_adshs)
+        if plan.stmts is not None:
+            predicates.append(ds.field('stmt').isin(list(plan.stmts)))
+
+        return dataset.to_table(columns=_get_columns(dataset, plan.pre_columns,
+                                                     PRE_NUM_KEY_COLUMNS),
+                                filter=_and(predicates))
+
+    def _read_num(self, sub_table: pa.Table) -> pa.Table:
+        plan = self.plan
+        dataset = self._dataset(NUM_TXT)
+        sub_adshs = sub_table.column('adsh').combine_chunks()
+
+        predicates = self._common_predicates(sub_adshs)
+        if plan.main_coreg_only:
+            predicates.append(ds.field('coreg').is_null() | (ds.field('coreg') == ''))
+        if plan.usd_only:
+            # same logic as the USDOnlyRawFilter: currencies consist of 3 uppercase letters
+            uom = ds.field('uom')
+            predicates.append((uom == 'USD')
+                              | (pc.utf8_length(uom) != 3)
+                              | ~pc.utf8_is_upper(uom))
+
+        key_columns = PRE_NUM_KEY_COLUMNS + (['ddate'] if plan.report_periods else [])
+        columns = _get_columns(dataset, plan.num_columns, key_columns)
+        scanner = dataset.scanner(columns=columns, filter=_and(predicates))
+
+        if not plan.report_periods:
+            return scanner.to_table()
+
+        # the ddate has to be compared with the period of the report, this cannot be
+        # expressed as a dataset predicate, so it is evaluated on every batch while scanning
+        allowed_ddates = self._get_allowed_ddates(sub_table)
+        batches = [batch.filter(self._ddate_mask(batch, sub_adshs, allowed_ddates))
+                   for batch in scanner.to_batches()]
+        return pa.Table.from_batches(batches, schema=scanner.projected_schema)
+
+    def _get_allowed_ddates(self, sub_table: pa.Table) -> List[pa.Array]:
+        periods = sub_table.column('period').to_pylist()
+        allowed = []
+        if CURRENT_PERIOD in self.plan.report_periods:
+            allowed.append(pa.array(periods, type=pa.int64()))
+        if PREVIOUS_PERIOD in self.plan.report_periods:
+            allowed.append(pa.array([calculate_previous_period(period) for period in periods],
+                                    type=pa.int64()))
+        return allowed
+
+    @staticmethod
+    def _ddate_mask(batch: pa.RecordBatch, sub_adshs: pa.Array,
+                    allowed_ddates: List[pa.Array]) -> pa.Array:
+        # position of the adsh of every row within the sub data (null if not present)
+        positions = pc.index_in(batch.column('adsh'), value_set=sub_adshs)
+        ddates = pc.cast(batch.column('ddate'), pa.int64())
+
+        mask = None
+        for allowed in allowed_ddates:
+            matches = pc.fill_null(pc.equal(ddates, pc.take(allowed, positions)), False)
+            mask = matches if mask is None else pc.or_(mask, matches)
+        return mask
+
+    def scan(self) -> RawDataBag:
+        """
+        reads the data from the parquet files of the datapath.
+
+        Returns:
+            RawDataBag: the bag containing only the data which matches the plan
+        """
+        sub_table = self._read_sub()
+        sub_adshs = sub_table.column('adsh').combine_chunks()
+
+        pre_table = self._read_pre(sub_adshs)
+        num_table = self._read_num(sub_table)
+
+        sub_df = table_to_pandas(sub_table, self.dtype_backend)
+        if self.plan.sub_columns is not None and 'period' not in self.plan.sub_columns \
+                and 'period' in sub_df.columns:
+            sub_df = sub_df.drop(columns=['period'])
+
+        num_df = table_to_pandas(num_table, self.dtype_backend)
+        if self.plan.num_columns is not None and 'ddate' not in self.plan.num_columns \
+                and 'ddate' in num_df.columns:
+            num_df = num_df.drop(columns=['ddate'])
+
+        # pandas pivot works better if coreg is not nan, so we set it here to a simple dash
+        if 'coreg' in num_df.columns:
+            num_df['coreg'] = num_df['coreg'].fillna('')
+
+        return RawDataBag.create(sub_df=sub_df,
+                                 pre_df=table_to_pandas(pre_table, self.dtype_backend),
+                                 num_df=num_df)
+
+
+class LazyRawDataBag:
+    """
+    A RawDataBag that is only loaded when materialize() or join() is called.
+
+    Filters are applied with the same syntax as on the RawDataBag:
+    bag[ReportPeriodRawFilter()][MainCoregRawFilter()][USDOnlyRawFilter()].
+    As long as the filters in the chain are one of the filters of the rawfiltering module,
+    they are translated into predicates on the parquet scan. Other filters, and all filters
+    that follow them in the chain, are applied in order on the materialized RawDataBag.
+    """
+
+    def __init__(self,
+                 datapaths: List[str],
+                 plan: Optional[ScanPlan] = None,
+                 post_load_filter: Optional[Callable[[RawDataBag], RawDataBag]] = None,
+                 filters: Optional[List[FilterBase[RawDataBag]]] = None,
+                 dtype_backend: Optional[str] = None):
+        """
+        Args:
+            datapaths (List[str]): the folders containing the parquet files of the zip files
+
+            plan (ScanPlan, optional, None): the predicates and projections for the scan
+
+            post_load_filter (Callable[[RawDataBag], RawDataBag], optional, None): a filter
+                that is directly applied after the data of a single zip has been loaded.
+
+            filters (List[FilterBase[RawDataBag]], optional, None): the filters that have to
+                be applied after the data was loaded
+
+            dtype_backend (str, optional, None): use 'pyarrow' to keep the loaded data in
+                arrow backed columns (requires pandas 2.0)
+        """
+        check_dtype_backend(dtype_backend)
+        self.datapaths = datapaths
+        self.plan = plan if plan is not None else ScanPlan()
+        self.post_load_filter = post_load_filter
+        self.filters: List[FilterBase[RawDataBag]] = filters if filters is not None else []
+        self.dtype_backend = dtype_backend
+
+    def _copy(self, plan: ScanPlan, filters: List[FilterBase[RawDataBag]]) -> 'LazyRawDataBag':
+        return LazyRawDataBag(datapaths=self.datapaths,
+                              plan=plan,
+                              post_load_filter=self.post_load_filter,
+                              filters=filters,
+                              dtype_backend=self.dtype_backend)
+
+    def __getitem__(self, bagfilter: FilterBase[RawDataBag]) -> 'LazyRawDataBag':
+        """
+        forwards to the filter method, so that filters can be chained in a simple syntax:
+        bag[filter1][filter2] is equal to bag.filter(filter1).filter(filter2)
+
+        Args:
+            bagfilter: the filter to be applied
+
+        Returns:
+            LazyRawDataBag: the lazy databag containing the filter
+        """
+        return self.filter(bagfilter)
+
+    def filter(self, bagfilter: FilterBase[RawDataBag]) -> 'LazyRawDataBag':
+        """
+        adds the filter to the plan. No data is loaded.
+
+        Args:
+            bagfilter: the filter to be applied
+
+        Returns:
+            LazyRawDataBag: the lazy databag containing the filter
+        """
+        # the post_load_filter and filters which cannot be pushed down are opaque, so
+        # filters that follow them have to be applied in order after loading
+        if self.post_load_filter is None and len(self.filters) == 0:
+            plan = self.plan.push_down(bagfilter)
+            if plan is not None:
+                return self._copy(plan=plan, filters=[])
+
+        return self._copy(plan=self.plan, filters=self.filters + [bagfilter])
+
+    def select(self,
+               sub_columns: Optional[List[str]] = None,
+               pre_columns: Optional[List[str]] = None,
+               num_columns: Optional[List[str]] = None) -> 'LazyRawDataBag':
+        """
+        restricts the columns that are loaded. The key columns (adsh for sub, adsh, tag, and
+        version for pre and num) are always loaded. Columns needed by filters that are applied
+        after loading have to be selected as well.
+
+        Args:
+            sub_columns (List[str], optional, None): the columns of sub.txt, None means all
+            pre_columns (List[str], optional, None): the columns of pre.txt, None means all
+            num_columns (List[str], optional, None): the columns of num.txt, None means all
+
+        Returns:
+            LazyRawDataBag: the lazy databag with the projection
+        """
+        plan = replace(self.plan,
+                       sub_columns=sub_columns,
+                       pre_columns=pre_columns,
+                       num_columns=num_columns)
+        return self._copy(plan=plan, filters=self.filters)
+
+    def materialize(self) -> RawDataBag:
+        """
+        loads the data and applies the filters which were not pushed down.
+
+        Returns:
+            RawDataBag: the loaded and filtered bag
+        """
+        LOGGER.debug("scan plan: %s, filters applied after loading: %s",
+                     self.plan, [type(bagfilter).__name__ for bagfilter in self.filters])
+
+        bags: List[RawDataBag] = []
+        for datapath in self.datapaths:
+            LOGGER.info("processing %s", datapath)
+            bag = _DatapathScanner(datapath=datapath, plan=self.plan,
+                                   dtype_backend=self.dtype_backend).scan()
+            if self.post_load_filter is not None:
+                bag = self.post_load_filter(bag)
+            bags.append(bag)
+
+        rawdatabag = RawDataBag.concat(bags)
+        for bagfilter in self.filters:
+            rawdatabag = bagfilter.filter(rawdatabag)
+        return rawdatabag
+
+    def join(self) -> JoinedDataBag:
+        """
+        loads the data and merges the raw data of pre and num together.
+
+        Returns:
+            JoinedDataBag: the DataBag where pre and num are merged
+        """
+        return self.materialize().join()
+
+    def present(self, presenter: Presenter[RawDataBag]) -> pd.DataFrame:
+        """
+        loads the data and applies the presenter
+        """
+        return presenter.present(self.materialize())
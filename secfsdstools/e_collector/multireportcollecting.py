@@ -1,15 +1,20 @@
 """
 Reads several reports from different files parallel
 """
+import asyncio
 from collections import defaultdict
 from dataclasses import dataclass
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple, Union
 
-from secfsdstools.e_collector.basecollector import BaseCollector
+from secfsdstools.e_collector.basecollector import BaseCollector, estimate_read_bytes
+from secfsdstools.e_collector.collectorcache import CollectorCache
+from secfsdstools.e_collector.columnprojection import ColumnProjection
 
 from secfsdstools.a_config.configmgt import ConfigurationManager
 from secfsdstools.a_config.configmodel import Configuration
-from secfsdstools.a_utils.parallelexecution import ParallelExecutor
+from secfsdstools.a_utils.asyncexecution import AsyncRequestExecutor
+from secfsdstools.a_utils.executionbackend import check_execution_backend, \
+    choose_execution_backend, create_executor
 from secfsdstools.c_index.indexdataaccess import IndexReport, ParquetDBIndexingAccessor
 from secfsdstools.d_container.databagmodel import RawDataBag
 
@@ -24,7 +29,10 @@ class MultiReportCollector:
     def get_reports_by_adshs(cls, adshs: List[str],
                              stmt_filter: Optional[List[str]] = None,
                              tag_filter: Optional[List[str]] = None,
-                             configuration: Optional[Configuration] = None):
+                             configuration: Optional[Configuration] = None,
+                             cache: Optional[CollectorCache] = None,
+                             columns: Optional[Union[str, ColumnProjection]] = None,
+                             execution_backend: Optional[str] = None):
         """
         creates the MultiReportCollector instance for a certain list of adshs.
 
@@ -38,6 +46,11 @@ class MultiReportCollector:
                 List of tags that should be read (Assets, Liabilities, ...)
 
             configuration (Configuration optional, default=None): Optional configuration object
+            cache (CollectorCache, optional, None): cache for the collected bags
+            columns (Union[str, ColumnProjection], optional, None): the columns to read,
+                either a ColumnProjection or a preset ('presenter', 'standardizer', 'notext')
+            execution_backend (str, optional, None): 'inline', 'threads', or 'processes'.
+                None chooses the backend based on the amount of data to read.
 
         Returns:
             MultiReportCollector: instance of MultiReportCollector
@@ -50,13 +63,62 @@ class MultiReportCollector:
         index_reports = dbaccessor.read_index_reports_for_adshs(adshs=adshs)
         return MultiReportCollector(index_reports=index_reports,
                                     stmt_filter=stmt_filter,
-                                    tag_filter=tag_filter)
+                                    tag_filter=tag_filter,
+                                    cache=cache,
+                                    columns=columns,
+                                    execution_backend=execution_backend)
+
+    @classmethod
+    async def get_reports_by_adshs_async(cls, adshs: List[str],
+                                         stmt_filter: Optional[List[str]] = None,
+                                         tag_filter: Optional[List[str]] = None,
+                                         configuration: Optional[Configuration] = None,
+                                         cache: Optional[CollectorCache] = None,
+                                         columns: Optional[Union[str, ColumnProjection]] = None,
+                                         executor: Optional[AsyncRequestExecutor] = None):
+        """
+        async variant of get_reports_by_adshs. The configuration and the index are read
+        without blocking the event loop.
+
+        Args:
+            adshs (List[str]): List with unique report ids to load
+            stmt_filter (List[str], optional, None):
+                List of stmts that should be read (BS, IS, ...)
+            tag_filter (List[str], optional, None:
+                List of tags that should be read (Assets, Liabilities, ...)
+
+            configuration (Configuration optional, default=None): Optional configuration object
+            cache (CollectorCache, optional, None): cache for the collected bags
+            columns (Union[str, ColumnProjection], optional, None): the columns to read,
+                either a ColumnProjection or a preset ('presenter', 'standardizer', 'notext')
+            executor (AsyncRequestExecutor, optional, None): the executor, None uses the shared
+                default executor
+
+        Returns:
+            MultiReportCollector: instance of MultiReportCollector
+        """
+        executor = executor or AsyncRequestExecutor.get_default()
+        if configuration is None:
+            configuration = await executor.run(ConfigurationManager.read_config_file)
+
+        dbaccessor = ParquetDBIndexingAccessor(db_dir=configuration.db_dir)
+
+        index_reports = await dbaccessor.read_index_reports_for_adshs_async(adshs=adshs,
+                                                                            executor=executor)
+        return MultiReportCollector(index_reports=index_reports,
+                                    stmt_filter=stmt_filter,
+                                    tag_filter=tag_filter,
+                                    cache=cache,
+                                    columns=columns)
 
     @classmethod
     def get_reports_by_indexreports(cls,
                                     index_reports: List[IndexReport],
                                     stmt_filter: Optional[List[str]] = None,
                                     tag_filter: Optional[List[str]] = None,
+                                    cache: Optional[CollectorCache] = None,
+                                    columns: Optional[Union[str, ColumnProjection]] = None,
+                                    execution_backend: Optional[str] = None
                                     ):
         """
         crates the MultiReportCollector instance based on IndexReport instances
@@ -67,21 +129,45 @@ class MultiReportCollector:
                 List of stmts that should be read (BS, IS, ...)
             tag_filter (List[str], optional, None:
                 List of tags that should be read (Assets, Liabilities, ...)
+            cache (CollectorCache, optional, None): cache for the collected bags
+            columns (Union[str, ColumnProjection], optional, None): the columns to read,
+                either a ColumnProjection or a preset ('presenter', 'standardizer', 'notext')
+            execution_backend (str, optional, None): 'inline', 'threads', or 'processes'.
+                None chooses the backend based on the amount of data to read.
 
         Returns:
             MultiReportCollector: instance of MultiReportCollector
         """
         return MultiReportCollector(index_reports=index_reports,
                                     stmt_filter=stmt_filter,
-                                    tag_filter=tag_filter)
+                                    tag_filter=tag_filter,
+                                    cache=cache,
+                                    columns=columns,
+                                    execution_backend=execution_backend)
 
     def __init__(self, index_reports: List[IndexReport],
                  stmt_filter: Optional[List[str]] = None,
-                 tag_filter: Optional[List[str]] = None):
+                 tag_filter: Optional[List[str]] = None,
+                 cache: Optional[CollectorCache] = None,
+                 columns: Optional[Union[str, ColumnProjection]] = None,
+                 execution_backend: Optional[str] = None):
         super().__init__()
+        check_execution_backend(execution_backend)
         self.index_reports = index_reports
         self.stmt_filter = stmt_filter
         self.tag_filter = tag_filter
+        self.cache = cache
+        self.columns = columns
+        self.execution_backend = execution_backend
+        # the backend that was used by the last execution
+        self.backend: Optional[str] = None
+
+    def _get_reports_per_file(self) -> Dict[str, List[IndexReport]]:
+        # organize by originfile, so that every file is only read once
+        adshs_per_file: Dict[str, List[IndexReport]] = defaultdict(list)
+        for report in self.index_reports:
+            adshs_per_file[report.originFile].append(report)
+        return adshs_per_file
 
     def _multi_collect(self) -> RawDataBag:
         """
@@ -91,52 +177,80 @@ class MultiReportCollector:
         Returns:
             RawDataBag: a single DataBag containing all the collected reports
         """
-        # todo: consider optimization to group by the same source file
-        #   and use the filter option on pd.read_parquet()
-        reports: List[IndexReport] = self.index_reports
-
-        # organize by originfile
-        adshs_per_file: Dict[str, List[IndexReport]] = defaultdict(list)
-        for report in reports:
-            adshs_per_file[report.originFile].append(report)
+        adshs_per_file = self._get_reports_per_file()
 
-        def get_entries() -> List[List[IndexReport]]:
-            # the result is a list of list of IndexReports. Every IndexReport list has the same
-            # originFile and therefore also the same fullPath.
-            return list(adshs_per_file.values())
+        stmt_filter = self.stmt_filter
+        tag_filter = self.tag_filter
+        columns = self.columns
 
-        def process_element(element: List[IndexReport]) -> RawDataBag:
+        def create_collector(element: List[IndexReport]) -> Tuple[BaseCollector, Tuple]:
             # the received list only contains reports that are stored in the same file, so
             # they all have the same fullPath.
-            datapath = element[0].fullPath
-            adshs = [x.adsh for x in element]
+            collector = BaseCollector(datapath=element[0].fullPath,
+                                      stmt_filter=stmt_filter,
+                                      tag_filter=tag_filter,
+                                      columns=columns)
+            return collector, ('adsh', 'in', [x.adsh for x in element])
 
-            collector = BaseCollector(datapath=datapath,
-                                      stmt_filter=self.stmt_filter,
-                                      tag_filter=self.tag_filter)
+        # the cache is used in this process, so that the memory tier is filled. Only the
+        # files for which no bag is cached are read by the executor.
+        bags_per_file: Dict[str, RawDataBag] = {}
+        missing: Dict[str, List[IndexReport]] = dict(adshs_per_file)
+        if self.cache is not None:
+            for origin_file, element in adshs_per_file.items():
+                collector, adsh_filter = create_collector(element)
+                databag = self.cache.get(collector.get_cache_key(adsh_filter), collector.datapath)
+                if databag is not None:
+                    bags_per_file[origin_file] = databag
+                    del missing[origin_file]
+
+        if len(missing) == 0:
+            return RawDataBag.concat([bags_per_file[origin_file]
+                                      for origin_file in adshs_per_file])
 
-            adsh_filter = ('adsh', 'in', adshs)
+        versions = {origin_file: self.cache.get_version(element[0].fullPath)
+                    for origin_file, element in missing.items()} if self.cache else {}
+
+        def get_entries() -> List[List[IndexReport]]:
+            # the result is a list of list of IndexReports. Every IndexReport list has the same
+            # originFile and therefore also the same fullPath.
+            return list(missing.values())
 
-            return collector.basecollect(sub_df_filter=adsh_filter)
+        def process_element(element: List[IndexReport]) -> Tuple[str, RawDataBag]:
+            collector, adsh_filter = create_collector(element)
+            return element[0].originFile, collector.basecollect(sub_df_filter=adsh_filter)
 
-        def post_process(parts: List[RawDataBag]) -> List[RawDataBag]:
+        def post_process(parts: List[Tuple[str, RawDataBag]]) -> List[Tuple[str, RawDataBag]]:
             # do nothing
             return parts
 
-        execute_serial = False
-        if len(self.index_reports) == 1:
-            execute_serial = True
-        executor = ParallelExecutor(chunksize=0, execute_serial=execute_serial)
+        sizes = {origin_file: estimate_read_bytes(element[0].fullPath,
+                                                  selected_reports=len(element))
+                 for origin_file, element in missing.items()}
+        self.backend = choose_execution_backend(entries=len(missing),
+                                                estimated_bytes=sum(sizes.values()),
+                                                requested=self.execution_backend)
+        executor = create_executor(self.backend)
 
         executor.set_get_entries_function(get_entries)
         executor.set_process_element_function(process_element)
         executor.set_post_process_chunk_function(post_process)
+        executor.set_cost_function(lambda element: sizes[element[0].originFile])
 
         # we ignore the missing, since get_entries always returns the whole list
-        collected_reports: List[RawDataBag]
+        collected_reports: List[Tuple[str, RawDataBag]]
         collected_reports, _ = executor.execute()
 
-        return RawDataBag.concat(collected_reports)
+        for origin_file, databag in collected_reports:
+            bags_per_file[origin_file] = databag
+            if self.cache is not None:
+                collector, adsh_filter = create_collector(missing[origin_file])
+                self.cache.put(collector.get_cache_key(adsh_filter), collector.datapath, databag,
+                               version=versions[origin_file])
+
+        # the reports are always in the order of the files, independent of which files were
+        # cached and in which order the executor finished them
+        return RawDataBag.concat([bags_per_file[origin_file] for origin_file in adshs_per_file])
 
     def collect(self) -> RawDataBag:
         """
@@ -146,3 +260,29 @@ class MultiReportCollector:
             RawDataBag: the collected Data
         """
         return self._multi_collect()
+
+    async def collect_async(self, executor: Optional[AsyncRequestExecutor] = None) -> RawDataBag:
+        """
+        collects the data without blocking the event loop and returns a Databag. The files are
+        read concurrently in the thread pool of the executor instead of in separate processes.
+        Concurrent requests for the same reports are only read once.
+
+        Args:
+            executor (AsyncRequestExecutor, optional, None): the executor, None uses the shared
+             default executor
+
+        Returns:
+            RawDataBag: the collected Data
+        """
+        requests = []
+        for element in self._get_reports_per_file().values():
+            collector = BaseCollector(datapath=element[0].fullPath,
+                                      stmt_filter=self.stmt_filter,
+                                      tag_filter=self.tag_filter,
+                                      cache=self.cache,
+                                      columns=self.columns)
+            requests.append(collector.basecollect_async(
+                sub_df_filter=('adsh', 'in', [x.adsh for x in element]), executor=executor))
+
+        databags: List[RawDataBag] = list(await asyncio.gather(*requests))
+        return RawDataBag.concat(databags)
@@ -0,0 +1,87 @@
+"""
+Collects all reports that were filed or whose period ended within a date range.
+"""
+import logging
+from typing import Optional, List, Union
+
+from secfsdstools.a_config.configmgt import ConfigurationManager
+from secfsdstools.a_config.configmodel import Configuration
+from secfsdstools.c_index.indexdataaccess import IndexReport, ParquetDBIndexingAccessor
+from secfsdstools.e_collector.collectorcache import CollectorCache
+from secfsdstools.e_collector.columnprojection import ColumnProjection
+from secfsdstools.e_collector.multireportcollecting import MultiReportCollector
+
+LOGGER = logging.getLogger(__name__)
+
+
+class PeriodRangeCollector:
+    """
+    Collects the reports which were filed or whose period ended within a date range.
+    For instance, it is a simple way to read all 10-K reports filed between 2019 and 2021
+    without having to know in which quarter or daily files they are stored.
+    """
+
+    @classmethod
+    def get_period_range_collector(
+            cls,
+            filed_from: Optional[int] = None,
+            filed_to: Optional[int] = None,
+            period_from: Optional[int] = None,
+            period_to: Optional[int] = None,
+            forms_filter: Optional[List[str]] = None,
+            stmt_filter: Optional[List[str]] = None,
+            tag_filter: Optional[List[str]] = None,
+            configuration: Optional[Configuration] = None,
+            cache: Optional[CollectorCache] = None,
+            columns: Optional[Union[str, ColumnProjection]] = None,
+            execution_backend: Optional[str] = None) -> MultiReportCollector:
+        """
+        creates a MultiReportCollector instance for the reports matching the date ranges and
+        forms. The matching reports are selected in the index, so only the quarter and daily
+        files which contain at least one of them are read, and only the selected reports are
+        read from these files. If a report is present in a quarter and in a daily file, it is
+        read from the quarter file.
+        If no configuration object is passed, it reads the configuration from the config file.
+
+        Args:
+            filed_from (int, optional, None): earliest filed date (yyyymmdd, inclusive)
+            filed_to (int, optional, None): latest filed date (yyyymmdd, inclusive)
+            period_from (int, optional, None): earliest period date (yyyymmdd, inclusive)
+            period_to (int, optional, None): latest period date (yyyymmdd, inclusive)
+            forms_filter (List[str], optional, None):
+                List of forms that should be read (10-K, 10-Q, ...)
+            stmt_filter (List[str], optional, None):
+                List of stmts that should be read (BS, IS, ...)
+            tag_filter (List[str], optional, None:
+                List of tags that should be read (Assets, Liabilities, ...)
+            configuration (Configuration, optional, None): Optional configuration object
+            cache (CollectorCache, optional, None): cache for the collected bags
+            columns (Union[str, ColumnProjection], optional, None): the columns to read,
+                either a ColumnProjection or a preset ('presenter', 'standardizer', 'notext')
+            execution_backend (str, optional, None): 'inline', 'threads', or 'processes'.
+                None chooses the backend based on the amount of data to read.
+
+        Returns:
+            MultiReportCollector: instance of MultiReportCollector
+        """
+        if all(value is None for value in [filed_from, filed_to, period_from, period_to]):
+            raise ValueError("at least one bound of the filed or the period range has to be set")
+
+        if configuration is None:
+            configuration = ConfigurationManager.read_config_file()
+
+        dbaccessor = ParquetDBIndexingAccessor(db_dir=configuration.db_dir)
+        index_reports: List[IndexReport] = dbaccessor.read_index_reports_for_period_range(
+            filed_from=filed_from, filed_to=filed_to,
+            period_from=period_from, period_to=period_to,
+            forms=forms_filter)
+
+        LOGGER.info("%d reports in %d files match the period range", len(index_reports),
+                    len({report.fullPath for report in index_reports}))
+
+        return MultiReportCollector.get_reports_by_indexreports(index_reports=index_reports,
+                                                                stmt_filter=stmt_filter,
+                                                                tag_filter=tag_filter,
+                                                                cache=cache,
+                                                                columns=columns,
+                                                                execution_backend=execution_backend)
@@ -1,11 +1,14 @@
 """ contains collector, that reads a single report """
-from typing import Optional, List
+from typing import Optional, List, Union
 
 from secfsdstools.a_config.configmgt import ConfigurationManager
 from secfsdstools.a_config.configmodel import Configuration
+from secfsdstools.a_utils.asyncexecution import AsyncRequestExecutor
 from secfsdstools.c_index.indexdataaccess import ParquetDBIndexingAccessor, IndexReport
 from secfsdstools.d_container.databagmodel import RawDataBag
 from secfsdstools.e_collector.basecollector import BaseCollector
+from secfsdstools.e_collector.collectorcache import CollectorCache
+from secfsdstools.e_collector.columnprojection import ColumnProjection
 
 
 class SingleReportCollector(BaseCollector):
@@ -18,7 +21,9 @@ class SingleReportCollector(BaseCollector):
     def get_report_by_adsh(cls, adsh: str,
                            stmt_filter: Optional[List[str]] = None,
                            tag_filter: Optional[List[str]] = None,
-                           configuration: Optional[Configuration] = None):
+                           configuration: Optional[Configuration] = None,
+                           cache: Optional[CollectorCache] = None,
+                           columns: Optional[Union[str, ColumnProjection]] = None):
         """
         creates the ReportReader instance for a certain adsh.
         if no configuration is passed, it reads the config from the config file
@@ -34,6 +39,11 @@ class SingleReportCollector(BaseCollector):
 
             configuration (Configuration optional, default=None): Optional configuration object
 
+            cache (CollectorCache, optional, None): cache for the collected bags
+
+            columns (Union[str, ColumnProjection], optional, None): the columns to read,
+                either a ColumnProjection or a preset ('presenter', 'standardizer', 'notext')
+
         Returns:
             SingleReportCollector: instance of SingleReportCollector
 
@@ -45,13 +55,64 @@ class SingleReportCollector(BaseCollector):
         return SingleReportCollector.get_report_by_indexreport(
             dbaccessor.read_index_report_for_adsh(adsh=adsh),
             stmt_filter=stmt_filter,
-            tag_filter=tag_filter)
+            tag_filter=tag_filter,
+            cache=cache,
+            columns=columns)
+
+    @classmethod
+    async def get_report_by_adsh_async(cls, adsh: str,
+                                       stmt_filter: Optional[List[str]] = None,
+                                       tag_filter: Optional[List[str]] = None,
+                                       configuration: Optional[Configuration] = None,
+                                       cache: Optional[CollectorCache] = None,
+                                       columns: Optional[Union[str, ColumnProjection]] = None,
+                                       executor: Optional[AsyncRequestExecutor] = None):
+        """
+        async variant of get_report_by_adsh. The configuration and the index are read
+        without blocking the event loop.
+
+        Args:
+            adsh (str): unique report id
+
+            stmt_filter (List[str], optional, None):
+                List of stmts that should be read (BS, IS, ...)
+
+            tag_filter (List[str], optional, None:
+                List of tags that should be read (Assets, Liabilities, ...)
+
+            configuration (Configuration optional, default=None): Optional configuration object
+
+            cache (CollectorCache, optional, None): cache for the collected bags
+
+            columns (Union[str, ColumnProjection], optional, None): the columns to read,
+                either a ColumnProjection or a preset ('presenter', 'standardizer', 'notext')
+
+            executor (AsyncRequestExecutor, optional, None): the executor, None uses the shared
+                default executor
+
+        Returns:
+            SingleReportCollector: instance of SingleReportCollector
+        """
+        executor = executor or AsyncRequestExecutor.get_default()
+        if configuration is None:
+            configuration = await executor.run(ConfigurationManager.read_config_file)
+
+        dbaccessor = ParquetDBIndexingAccessor(db_dir=configuration.db_dir)
+        index_report = await dbaccessor.read_index_report_for_adsh_async(adsh=adsh,
+                                                                         executor=executor)
+        return SingleReportCollector.get_report_by_indexreport(index_report,
+                                                               stmt_filter=stmt_filter,
+                                                               tag_filter=tag_filter,
+                                                               cache=cache,
+                                                               columns=columns)
 
     @classmethod
     def get_report_by_indexreport(cls,
                                   index_report: IndexReport,
                                   stmt_filter: Optional[List[str]] = None,
-                                  tag_filter: Optional[List[str]] = None):
+                                  tag_filter: Optional[List[str]] = None,
+                                  cache: Optional[CollectorCache] = None,
+                                  columns: Optional[Union[str, ColumnProjection]] = None):
         """
         crates the ReportReader instance based on the IndexReport instance
 
@@ -64,18 +125,28 @@ class SingleReportCollector(BaseCollector):
             tag_filter (List[str], optional, None:
                 List of tags that should be read (Assets, Liabilities, ...)
 
+            cache (CollectorCache, optional, None): cache for the collected bags
+
+            columns (Union[str, ColumnProjection], optional, None): the columns to read,
+                either a ColumnProjection or a preset ('presenter', 'standardizer', 'notext')
+
         Returns:
             SingleReportCollector: isntance of SingleReportCollector
         """
         return SingleReportCollector(report=index_report,
                                      tag_filter=tag_filter,
-                                     stmt_filter=stmt_filter)
+                                     stmt_filter=stmt_filter,
+                                     cache=cache,
+                                     columns=columns)
 
     def __init__(self,
                  report: IndexReport,
                  stmt_filter: Optional[List[str]] = None,
-                 tag_filter: Optional[List[str]] = None):
-        super().__init__(datapath=report.fullPath, stmt_filter=stmt_filter, tag_filter=tag_filter)
+                 tag_filter: Optional[List[str]] = None,
+                 cache: Optional[CollectorCache] = None,
+                 columns: Optional[Union[str, ColumnProjection]] = None):
+        super().__init__(datapath=report.fullPath, stmt_filter=stmt_filter, tag_filter=tag_filter,
+                         cache=cache, columns=columns)
         self.report = report
         self.databag: Optional[RawDataBag] = None
 
@@ -89,3 +160,18 @@ class SingleReportCollector(BaseCollector):
         """
         adsh_filter = ('adsh', '==', self.report.adsh)
         return self.basecollect(sub_df_filter=adsh_filter)
+
+    async def collect_async(self, executor: Optional[AsyncRequestExecutor] = None) -> RawDataBag:
+        """
+        collects the data without blocking the event loop and returns a Databag. Concurrent
+        requests for the same report are only read once.
+
+        Args:
+            executor (AsyncRequestExecutor, optional, None): the executor, None uses the shared
+             default executor
+
+        Returns:
+            RawDataBag: the collected Data
+        """
+        adsh_filter = ('adsh', '==', self.report.adsh)
+        return await self.basecollect_async(sub_df_filter=adsh_filter, executor=executor)
@@ -2,18 +2,68 @@
 loads all the data from one single zip file, resp. the folder with the three parquet files to
 which the zip file was transformed to.
 """
+import asyncio
 import logging
-from typing import Optional, List, Callable
+import os
+from dataclasses import replace
+from typing import Optional, List, Callable, Union, Iterator, Tuple, Any, Iterable, TypeVar
 
 from secfsdstools.a_config.configmgt import ConfigurationManager
 from secfsdstools.a_config.configmodel import Configuration
-from secfsdstools.a_utils.parallelexecution import ParallelExecutor
+from secfsdstools.a_utils.asyncexecution import AsyncRequestExecutor
+from secfsdstools.a_utils.executionbackend import check_execution_backend, \
+    choose_execution_backend, create_executor
+from secfsdstools.a_utils.parallelexecution import ParallelExecutorBase, ExecutionProgress
 from secfsdstools.c_index.indexdataaccess import ParquetDBIndexingAccessor
 from secfsdstools.d_container.databagmodel import RawDataBag
-from secfsdstools.e_collector.basecollector import BaseCollector
+from secfsdstools.d_container.partitioning import PartitionedStorage
+from secfsdstools.e_collector.basecollector import BaseCollector, estimate_read_bytes, \
+    get_bag_size
+from secfsdstools.e_collector.columnprojection import ColumnProjection, get_projection
+from secfsdstools.e_collector.lazycollecting import LazyRawDataBag, ScanPlan
 
 LOGGER = logging.getLogger(__name__)
 
+R = TypeVar("R")  # result type of map_reduce
+
+# marks a level of tree_reduce without a pending result
+_EMPTY = object()
+
+
+def tree_reduce(results: Iterable[R], reduce_function: Callable[[R, R], R]) -> Optional[R]:
+    """
+    combines the results pairwise in a balanced tree instead of folding them one after the
+    other. Results are combined as soon as they arrive: like a binary counter, a result is
+    combined with the pending result of the same level, so at most log2(n) partial results
+    are kept. If the size of the results grows when they are combined (e.g. concatenated
+    dataframes), every entry is only copied log2(n) times instead of n times.
+
+    Args:
+        results (Iterable[R]): the results to combine
+        reduce_function (Callable[[R, R], R]): function that combines two results
+
+    Returns:
+        Optional[R]: the combined result, None if there were no results
+    """
+    # pending partial results, the entry at position i combines 2^i results (or is _EMPTY)
+    levels: List[Any] = []
+    for result in results:
+        level = 0
+        while level < len(levels) and levels[level] is not _EMPTY:
+            result = reduce_function(levels[level], result)
+            levels[level] = _EMPTY
+            level += 1
+        if level == len(levels):
+            levels.append(result)
+        else:
+            levels[level] = result
+
+    combined: Any = _EMPTY
+    for partial in levels:
+        if partial is not _EMPTY:
+            combined = partial if combined is _EMPTY else reduce_function(partial, combined)
+    return None if combined is _EMPTY else combined
+
 
 class ZipCollector:
     """
@@ -28,7 +78,11 @@ class ZipCollector:
                         stmt_filter: Optional[List[str]] = None,
                         tag_filter: Optional[List[str]] = None,
                         post_load_filter: Optional[Callable[[RawDataBag], RawDataBag]] = None,
-                        configuration: Optional[Configuration] = None):
+                        configuration: Optional[Configuration] = None,
+                        progress_callback: Optional[Callable[[ExecutionProgress], None]] = None,
+                        dtype_backend: Optional[str] = None,
+                        columns: Optional[Union[str, ColumnProjection]] = None,
+                        execution_backend: Optional[str] = None):
         """
         creates a ZipReportReader instance for the given name of the zipfile.
         Args:
@@ -47,13 +101,29 @@ class ZipCollector:
                 that is directly applied after a single zip has been loaded.
 
             configuration (Configuration, optional, None): configuration object
+
+            progress_callback (Callable[[ExecutionProgress], None], optional, None): function
+                that is called with the current progress every time a zip file was loaded.
+
+            dtype_backend (str, optional, None): use 'pyarrow' to keep the loaded data in
+                arrow backed columns (requires pandas 2.0)
+
+            columns (Union[str, ColumnProjection], optional, None): the columns to read,
+                either a ColumnProjection or a preset ('presenter', 'standardizer', 'notext')
+
+            execution_backend (str, optional, None): 'inline', 'threads', or 'processes'.
+                None chooses the backend based on the amount of data to read.
         """
         return cls.get_zip_by_names(names=[name],
                                     forms_filter=forms_filter,
                                     stmt_filter=stmt_filter,
                                     tag_filter=tag_filter,
                                     post_load_filter=post_load_filter,
-                                    configuration=configuration)
+                                    configuration=configuration,
+                                    progress_callback=progress_callback,
+                                    dtype_backend=dtype_backend,
+                                    columns=columns,
+                                    execution_backend=execution_backend)
 
     @classmethod
     def get_zip_by_names(cls,
@@ -62,7 +132,11 @@ class ZipCollector:
                          stmt_filter: Optional[List[str]] = None,
                          tag_filter: Optional[List[str]] = None,
                          post_load_filter: Optional[Callable[[RawDataBag], RawDataBag]] = None,
-                         configuration: Optional[Configuration] = None):
+                         configuration: Optional[Configuration] = None,
+                         progress_callback: Optional[Callable[[ExecutionProgress], None]] = None,
+                         dtype_backend: Optional[str] = None,
+                         columns: Optional[Union[str, ColumnProjection]] = None,
+                         execution_backend: Optional[str] = None):
         """
         creates a ZipReportReader instance for the given names of the zipfiles.
         Args:
@@ -81,6 +155,18 @@ class ZipCollector:
                 that is directly applied after a single zip has been loaded.
 
             configuration (Configuration, optional, None): configuration object
+
+            progress_callback (Callable[[ExecutionProgress], None], optional, None): function
+                that is called with the current progress every time a zip file was loaded.
+
+            dtype_backend (str, optional, None): use 'pyarrow' to keep the loaded data in
+                arrow backed columns (requires pandas 2.0)
+
+            columns (Union[str, ColumnProjection], optional, None): the columns to read,
+                either a ColumnProjection or a preset ('presenter', 'standardizer', 'notext')
+
+            execution_backend (str, optional, None): 'inline', 'threads', or 'processes'.
+                None chooses the backend based on the amount of data to read.
         """
         if configuration is None:
             configuration = ConfigurationManager.read_config_file()
@@ -92,7 +178,11 @@ class ZipCollector:
                             forms_filter=forms_filter,
                             stmt_filter=stmt_filter,
                             tag_filter=tag_filter,
-                            post_load_filter=post_load_filter)
+                            post_load_filter=post_load_filter,
+                            progress_callback=progress_callback,
+                            dtype_backend=dtype_backend,
+                            columns=columns,
+                            execution_backend=execution_backend)
 
     @classmethod
     def get_all_zips(cls,
@@ -100,7 +190,11 @@ class ZipCollector:
                      stmt_filter: Optional[List[str]] = None,
                      tag_filter: Optional[List[str]] = None,
                      post_load_filter: Optional[Callable[[RawDataBag], RawDataBag]] = None,
-                     configuration: Optional[Configuration] = None):
+                     configuration: Optional[Configuration] = None,
+                     progress_callback: Optional[Callable[[ExecutionProgress], None]] = None,
+                     dtype_backend: Optional[str] = None,
+                     columns: Optional[Union[str, ColumnProjection]] = None,
+                     execution_backend: Optional[str] = None):
         """
         ATTENTION: this will take some time since data from all zip files are read at once.
         Moreover, if you don't apply directly filters, it will load a load of data.
@@ -122,6 +216,18 @@ class ZipCollector:
                 that is directly applied after a single zip has been loaded.
 
             configuration (Configuration, optional, None): configuration object
+
+            progress_callback (Callable[[ExecutionProgress], None], optional, None): function
+                that is called with the current progress every time a zip file was loaded.
+
+            dtype_backend (str, optional, None): use 'pyarrow' to keep the loaded data in
+                arrow backed columns (requires pandas 2.0)
+
+            columns (Union[str, ColumnProjection], optional, None): the columns to read,
+                either a ColumnProjection or a preset ('presenter', 'standardizer', 'notext')
+
+            execution_backend (str, optional, None): 'inline', 'threads', or 'processes'.
+                None chooses the backend based on the amount of data to read.
         """
         if configuration is None:
             configuration = ConfigurationManager.read_config_file()
@@ -137,61 +243,112 @@ class ZipCollector:
                             forms_filter=forms_filter,
                             stmt_filter=stmt_filter,
                             tag_filter=tag_filter,
-                            post_load_filter=post_load_filter)
+                            post_load_filter=post_load_filter,
+                            progress_callback=progress_callback,
+                            dtype_backend=dtype_backend,
+                            columns=columns,
+                            execution_backend=execution_backend)
 
     def __init__(self,
                  datapaths: List[str],
                  forms_filter: Optional[List[str]] = None,
                  stmt_filter: Optional[List[str]] = None,
                  tag_filter: Optional[List[str]] = None,
-                 post_load_filter: Optional[Callable[[RawDataBag], RawDataBag]] = None):
+                 post_load_filter: Optional[Callable[[RawDataBag], RawDataBag]] = None,
+                 progress_callback: Optional[Callable[[ExecutionProgress], None]] = None,
+                 dtype_backend: Optional[str] = None,
+                 columns: Optional[Union[str, ColumnProjection]] = None,
+                 execution_backend: Optional[str] = None):
+        check_execution_backend(execution_backend)
 
         self.datapaths = datapaths
         self.forms_filter = forms_filter
         self.stmt_filter = stmt_filter
         self.tag_filter = tag_filter
         self.post_load_filter = post_load_filter
-
-    def _multi_zipcollect(self) -> RawDataBag:
-
+        self.progress_callback = progress_callback
+        self.dtype_backend = dtype_backend
+        self.projection = get_projection(columns)
+        self.execution_backend = execution_backend
+        # the backend that was used by the last execution
+        self.backend: Optional[str] = None
+        self.progress: Optional[ExecutionProgress] = None
+        # datapaths that could not be loaded because the worker process crashed
+        self.dead_letters: List[str] = []
+
+    def _create_executor(self, map_function: Optional[Callable[[RawDataBag], Any]] = None,
+                         execution_backend: Optional[str] = None) \
+            -> ParallelExecutorBase[str, Tuple[str, Any], Tuple[str, Any]]:
         datapaths: List[str] = self.datapaths
 
+        # with the processes backend, the process_element function is sent to the worker
+        # processes, so it only references the needed attributes and not the collector itself
+        # (e.g. the progress_callback)
+        stmt_filter = self.stmt_filter
+        tag_filter = self.tag_filter
+        forms_filter = self.forms_filter
+        post_load_filter = self.post_load_filter
+        dtype_backend = self.dtype_backend
+        projection = self.projection
+
         def get_entries() -> List[str]:
             return datapaths
 
-        def process_element(datapath: str) -> RawDataBag:
+        def process_element(datapath: str) -> Tuple[str, Any]:
             LOGGER.info("processing %s", datapath)
             collector = BaseCollector(datapath=datapath,
-                                      stmt_filter=self.stmt_filter,
-                                      tag_filter=self.tag_filter)
+                                      stmt_filter=stmt_filter,
+                                      tag_filter=tag_filter,
+                                      dtype_backend=dtype_backend,
+                                      columns=projection)
 
-            sub_filter = ('form', 'in', self.forms_filter) if self.forms_filter else None
+            sub_filter = ('form', 'in', forms_filter) if forms_filter else None
 
             rawdatabag = collector.basecollect(sub_df_filter=sub_filter)
 
-            if self.post_load_filter is not None:
-                rawdatabag = self.post_load_filter(rawdatabag)
-            return rawdatabag
+            if post_load_filter is not None:
+                rawdatabag = post_load_filter(rawdatabag)
+            if map_function is not None:
+                return datapath, map_function(rawdatabag)
+            return datapath, rawdatabag
 
-        def post_process(parts: List[RawDataBag]) -> List[RawDataBag]:
+        def post_process(parts: List[Tuple[str, Any]]) -> List[Tuple[str, Any]]:
             # do nothing
             return parts
 
-        execute_serial = False
-        # no need for parallel execution if there is just one zipfile to load
-        if len(self.datapaths) == 1:
-            execute_serial = True
-        executor = ParallelExecutor(chunksize=0, execute_serial=execute_serial)
+        sizes = {datapath: estimate_read_bytes(datapath) for datapath in datapaths}
+        self.backend = choose_execution_backend(entries=len(datapaths),
+                                                estimated_bytes=sum(sizes.values()),
+                                                requested=execution_backend
+                                                or self.execution_backend)
+        executor = create_executor(self.backend)
 
         executor.set_get_entries_function(get_entries)
         executor.set_process_element_function(process_element)
         executor.set_post_process_chunk_function(post_process)
+        if map_function is None:
+            executor.set_result_size_function(lambda result: get_bag_size(result[1]))
+        # load the biggest files first, so that they don't end up at the end
+        executor.set_cost_function(sizes.get)
+        if self.progress_callback is not None:
+            executor.set_progress_callback(self.progress_callback)
+        return executor
+
+    def _finish(self, executor: ParallelExecutorBase):
+        self.progress = executor.progress
+        self.dead_letters = executor.dead_letters
+        if len(self.dead_letters) > 0:
+            LOGGER.error("The following files could not be loaded: %s", self.dead_letters)
+
+    def _multi_zipcollect(self) -> RawDataBag:
+        executor = self._create_executor()
 
         # we ignore the missing, since get_entries always returns the whole list
-        collected_reports: List[RawDataBag]
+        collected_reports: List[Tuple[str, RawDataBag]]
         collected_reports, _ = executor.execute()
+        self._finish(executor)
 
-        return RawDataBag.concat(collected_reports)
+        return RawDataBag.concat([rawdatabag for _, rawdatabag in collected_reports])
 
     def collect(self) -> RawDataBag:
         """
@@ -201,3 +358,154 @@ class ZipCollector:
             RawDataBag: the collected Data
         """
         return self._multi_zipcollect()
+
+    def iter_collect(self, max_pending: Optional[int] = None) \
+            -> Iterator[Tuple[str, RawDataBag]]:
+        """
+        collects the data of every zip file separately and yields the bags as soon as they
+        were loaded, so that the data of all zip files never has to be kept in memory at
+        the same time. The bags are yielded in the order in which the workers finished them.
+
+        As long as the caller hasn't consumed a yielded bag, no further zip files are
+        submitted than max_pending allows, so only a few bags are loaded ahead.
+
+        Args:
+            max_pending (int, optional, None): max number of zip files which are loaded or
+             whose bags are waiting to be consumed. default is twice the number of processes
+
+        Returns:
+            Iterator[Tuple[str, RawDataBag]]: the name of the zip file and its bag
+        """
+        executor = self._create_executor()
+        try:
+            for datapath, rawdatabag in executor.execute_streaming(max_pending=max_pending):
+                yield os.path.basename(datapath), rawdatabag
+        finally:
+            self._finish(executor)
+
+    def collect_to(self, target_path: str, partition_by: Optional[List[str]] = None,
+                   max_pending: Optional[int] = None) -> int:
+        """
+        collects the data of all zip files directly into a bag on disk in the partitioned
+        format (see RawDataBag.save_partitioned). Every loaded bag is appended as soon as it is
+        available, so only a few zip files are kept in memory at the same time. The result
+        can be loaded with RawDataBag.load. The directory has to exist and must either be
+        empty or already contain a partitioned bag, to which the data is appended (reports
+        which are already stored are skipped).
+
+        Args:
+            target_path (str): the directory of the partitioned bag
+            partition_by (List[str], optional, None): additional partition keys: 'form', 'stmt'
+            max_pending (int, optional, None): see iter_collect
+
+        Returns:
+            int: the number of stored reports
+        """
+        reports = 0
+        for name, rawdatabag in self.iter_collect(max_pending=max_pending):
+            if not PartitionedStorage.is_partitioned(target_path):
+                rawdatabag.save_partitioned(target_path, partition_by=partition_by)
+                reports += len(rawdatabag.sub_df)
+            else:
+                reports += rawdatabag.append(target_path)
+            LOGGER.info("stored %s in %s", name, target_path)
+        return reports
+
+    def map_reduce(self, map_function: Callable[[RawDataBag], R],
+                   reduce_function: Callable[[R, R], R],
+                   max_pending: Optional[int] = None,
+                   execution_backend: Optional[str] = None) -> Optional[R]:
+        """
+        applies map_function to the bag of every zip file where the zip file was loaded, so
+        that only the mapped results are kept, and combines the results with reduce_function
+        in the calling process. The map_function is applied after the post_load_filter.
+
+        The results are combined in a tree as soon as they are available (see tree_reduce),
+        so the memory needed depends on the size of the mapped results and not on the loaded
+        data. Since the zip files finish in any order, reduce_function has to be associative
+        and commutative (e.g. adding counts or concatenating dataframes whose order
+        doesn't matter).
+
+        Where map_function runs depends on the execution backend, which is chosen by the
+        amount of data to read (see choose_execution_backend): for small reads it runs in the
+        calling process ('inline') or in its threads ('threads') and shares the memory with
+        the caller. Only with the 'processes' backend, map_function is sent to the worker
+        processes and therefore has to be picklable, i.e. it must not reference objects
+        which can't be pickled, and only the mapped results are pickled back.
+        The reduce_function always runs in the calling process.
+
+        Args:
+            map_function (Callable[[RawDataBag], R]): function that calculates the result for
+             the bag of a single zip file
+            reduce_function (Callable[[R, R], R]): function that combines two results
+            max_pending (int, optional, None): see iter_collect
+            execution_backend (str, optional, None): 'inline', 'threads', or 'processes'
+             overrides the execution backend of the collector for this call, e.g. to force
+             processes for a CPU heavy map_function. None uses the backend of the collector.
+
+        Returns:
+            Optional[R]: the combined result, None if no zip file was loaded
+        """
+        check_execution_backend(execution_backend)
+        executor = self._create_executor(map_function=map_function,
+                                         execution_backend=execution_backend)
+        try:
+            return tree_reduce((result for _, result in
+                                executor.execute_streaming(max_pending=max_pending)),
+                               reduce_function)
+        finally:
+            self._finish(executor)
+
+    async def collect_async(self, executor: Optional[AsyncRequestExecutor] = None) \
+            -> RawDataBag:
+        """
+        collects the data without blocking the event loop and returns a Databag. The zip files
+        are read concurrently in the thread pool of the executor instead of in separate
+        processes. Concurrent requests for the same file and filters are only read once.
+
+        Args:
+            executor (AsyncRequestExecutor, optional, None): the executor, None uses the shared
+             default executor
+
+        Returns:
+            RawDataBag: the collected Data
+        """
+        executor = executor or AsyncRequestExecutor.get_default()
+        sub_filter = ('form', 'in', self.forms_filter) if self.forms_filter else None
+
+        async def collect_datapath(datapath: str) -> RawDataBag:
+            collector = BaseCollector(datapath=datapath,
+                                      stmt_filter=self.stmt_filter,
+                                      tag_filter=self.tag_filter,
+                                      dtype_backend=self.dtype_backend,
+                                      columns=self.projection)
+            rawdatabag = await collector.basecollect_async(sub_df_filter=sub_filter,
+                                                           executor=executor)
+            if self.post_load_filter is not None:
+                # the post_load_filter can't be part of the key, so it is not coalesced
+                rawdatabag = await executor.run(self.post_load_filter, rawdatabag)
+            return rawdatabag
+
+        databags = await asyncio.gather(*[collect_datapath(datapath)
+                                          for datapath in self.datapaths])
+        return RawDataBag.concat(list(databags))
+
+    def collect_lazy(self) -> LazyRawDataBag:
+        """
+        returns a LazyRawDataBag for the configured zip files. No data is loaded until
+        materialize() or join() is called on the returned bag. Filters applied to the lazy bag
+        are pushed down to the parquet scan whenever possible.
+
+        Returns:
+            LazyRawDataBag: the lazy bag with the forms, stmt, and tag filter of the collector
+        """
+        plan = ScanPlan(forms=frozenset(self.forms_filter) if self.forms_filter else None,
+                        stmts=frozenset(self.stmt_filter) if self.stmt_filter else None,
+                        tags=frozenset(self.tag_filter) if self.tag_filter else None)
+        if self.projection is not None:
+            plan = replace(plan, **{name: None if columns is None else list(columns)
+                                    for name, columns in self.projection.to_dict().items()})
+        return LazyRawDataBag(datapaths=self.datapaths,
+                              plan=plan,
+                              post_load_filter=self.post_load_filter,
+                              dtype_backend=self.dtype_backend)
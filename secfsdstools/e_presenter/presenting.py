@@ -54,16 +54,21 @@ class StandardStatementPresenter(Presenter[JoinedDataBag]):
             pd.DataFrame: the dataframe with the final presentation
         """
 
-        pre_num_df = databag.pre_num_df
+        index_columns = ['adsh', 'coreg', 'tag', 'version', 'stmt',
+                         'report', 'line', 'uom', 'negating', 'inpth']
+
+        # only the needed columns, without copying the data of the bag
+        pre_num_df = databag.get_pre_num_columns(index_columns + ['qtrs', 'ddate', 'value'])
         if self.invert_negating:
-            pre_num_df = pre_num_df.copy()
-            pre_num_df.loc[pre_num_df.negating == 1, 'value'] = -pre_num_df.value
+            # replaces the value column, the data of the bag is not changed
+            pre_num_df['value'] = pre_num_df.value.where(pre_num_df.negating != 1,
+                                                         -pre_num_df.value)
 
         num_pre_pivot_df = pre_num_df.pivot_table(
-            index=['adsh', 'coreg', 'tag', 'version', 'stmt',
-                   'report', 'line', 'uom', 'negating', 'inpth'],
+            index=index_columns,
             columns=['qtrs', 'ddate'], # we need to pivot by qtrs and ddate
-            values='value'
+            values='value',
+            observed=True  # only combinations that exist, if columns are categorized
         )
 
         # some cleanup and ordering
@@ -6,7 +6,9 @@ from typing import List, Optional, Set, TypeVar
 import numpy as np
 import pandas as pd
 
-from secfsdstools.d_container.databagmodel import JoinedDataBag
+from secfsdstools.d_container.concatenating import concat_dataframes
+from secfsdstools.d_container.databagmodel import JoinedDataBag, PARQUET_FORMAT, \
+    check_file_format, read_dataframe, write_dataframe
 from secfsdstools.e_presenter.presenting import Presenter
 from secfsdstools.f_standardize.base_rule_framework import RuleGroup, DescriptionEntry, PrePivotRule
 from secfsdstools.f_standardize.base_validation_rules import ValidationRule
@@ -38,59 +40,67 @@ class StandardizedBag:
         self.validation_overview_df = validation_overview_df
         self.process_description_df = process_description_df
 
-    def save(self, target_path: str):
+    def save(self, target_path: str, file_format: str = PARQUET_FORMAT,
+             compression: Optional[str] = None):
         """
         Stores the last result and the log dataframesunder the given directory.
         The directory has to exist and must be empty.
 
         Args:
-            databag: the bag to be saved
-            target_path: the directory under which the parquet files for sub and pre_num
+            target_path: the directory under which the files for the result and the logs
                   will be created
+            file_format (str, optional, 'parquet'): 'parquet' or 'arrow'. Uncompressed arrow
+             files can be memory-mapped with load(mmap=True).
+            compression (str, optional, None): for 'arrow' None (uncompressed), 'lz4', or 'zstd'
 
         """
+        check_file_format(file_format)
         if not os.path.isdir(target_path):
             raise ValueError(f"the path {target_path} does not exist")
 
         if len(os.listdir(target_path)) > 0:
             raise ValueError(f"the target_path {target_path} is not empty")
 
-        self.result_df.to_parquet(os.path.join(target_path, 'result.parquet'))
-        self.applied_prepivot_rules_log_df.to_parquet(
-            os.path.join(target_path, 'applied_prepivot_rules_log.parquet'))
-        self.applied_rules_log_df.to_parquet(os.path.join(target_path, 'applied_rules_log.parquet'))
-        self.stats_df.to_parquet(os.path.join(target_path, 'stats.parquet'))
+        write_dataframe(self.result_df, target_path, 'result', file_format, compression)
+        write_dataframe(self.applied_prepivot_rules_log_df, target_path,
+                        'applied_prepivot_rules_log', file_format, compression)
+        write_dataframe(self.applied_rules_log_df, target_path, 'applied_rules_log',
+                        file_format, compression)
+        write_dataframe(self.stats_df, target_path, 'stats', file_format, compression)
         self.applied_rules_sum_s.to_csv(os.path.join(target_path, 'applied_rules_sum.csv'))
-        self.validation_overview_df.to_parquet(
-            os.path.join(target_path, 'validation_overview.parquet'))
-        self.process_description_df.to_parquet(
-            os.path.join(target_path, 'process_description.parquet'))
+        write_dataframe(self.validation_overview_df, target_path, 'validation_overview',
+                        file_format, compression)
+        write_dataframe(self.process_description_df, target_path, 'process_description',
+                        file_format, compression)
 
     @staticmethod
-    def load(target_path: str) -> STANDARDIZED:
+    def load(target_path: str, dtype_backend: Optional[str] = None,
+             mmap: bool = False) -> STANDARDIZED:
         """
         Loads the content of the bag at the specified location.
 
         Args:
-            target_path: the directory which contains the parquet files
+            target_path: the directory which contains the parquet or arrow files
+            dtype_backend (str, optional, None): use 'pyarrow' to keep the loaded data in
+             arrow backed columns (requires pandas 2.0)
+            mmap (bool, optional, False): memory-map files that were saved in the 'arrow' format
 
         Returns:
             STANDARDIZED: the loaded Databag
         """
 
-        result_df = pd.read_parquet(os.path.join(target_path, 'result.parquet'))
-        applied_prepivot_rules_log_df = pd.read_parquet(
-            os.path.join(target_path, 'applied_prepivot_rules_log.parquet'))
-        applied_rules_log_df = pd.read_parquet(
-            os.path.join(target_path, 'applied_rules_log.parquet'))
-        stats_df = pd.read_parquet(os.path.join(target_path, 'stats.parquet'))
+        def read(name: str) -> pd.DataFrame:
+            return read_dataframe(target_path, name, dtype_backend=dtype_backend, mmap=mmap)
+
+        result_df = read('result')
+        applied_prepivot_rules_log_df = read('applied_prepivot_rules_log')
+        applied_rules_log_df = read('applied_rules_log')
+        stats_df = read('stats')
         applied_rules_sum_s = pd.read_csv(
             os.path.join(target_path, 'applied_rules_sum.csv'),
             header=None, index_col=0).squeeze('columns')
-        validation_overview_df = pd.read_parquet(
-            os.path.join(target_path, 'validation_overview.parquet'))
-        process_description_df = pd.read_parquet(
-            os.path.join(target_path, 'process_description.parquet'))
+        validation_overview_df = read('validation_overview')
+        process_description_df = read('process_description')
 
         return StandardizedBag(result_df=result_df,
                                applied_prepivot_rules_log_df=applied_prepivot_rules_log_df,
@@ -129,9 +139,9 @@ class StandardizedBag:
                                    for bag in bags]
         process_description_dfs = [bag.process_description_df for bag in bags]
 
-        result_df = pd.concat(result_dfs, ignore_index=True)
-        applied_prepivot_rules_log_df = pd.concat(applied_prepivot_rules_log_dfs, ignore_index=True)
-        applied_rules_log_df = pd.concat(applied_rules_log_dfs, ignore_index=True)
+        result_df = concat_dataframes(result_dfs)
+        applied_prepivot_rules_log_df = concat_dataframes(applied_prepivot_rules_log_dfs)
+        applied_rules_log_df = concat_dataframes(applied_rules_log_dfs)
         applied_rules_sum_s: pd.Series = sum(applied_rules_sum_ss)
         process_description_df = process_description_dfs[0]
 
@@ -368,7 +378,7 @@ class Standardizer(Presenter[JoinedDataBag]):
         cpy_pivot_df = cpy_pivot_df[cpy_pivot_df.nan_count < len(available_main_statements)]
         cpy_pivot_df.sort_values(['adsh', 'coreg', 'qtrs', 'nan_count'], inplace=True)
 
-        filtered_pivot_df = cpy_pivot_df.groupby(['adsh', 'coreg', 'qtrs']).first()
+        filtered_pivot_df = cpy_pivot_df.groupby(['adsh', 'coreg', 'qtrs'], observed=True).first()
         filtered_pivot_df.reset_index(inplace=True)
         return filtered_pivot_df
 
@@ -384,8 +394,9 @@ class Standardizer(Presenter[JoinedDataBag]):
         relevant_pivot_cols = \
             self.identifier_cols + ['tag', 'version', 'value', 'line', 'negating']
 
+        # selecting rows and columns at once creates only one copy of the relevant data
         relevant_df = \
-            data_df[relevant_pivot_cols][data_df.tag.isin(self.all_input_tags)]
+            data_df.loc[data_df.tag.isin(self.all_input_tags), relevant_pivot_cols]
 
         # invert the entries that have the negating flag set
         if self.invert_negated:
@@ -541,7 +552,9 @@ class Standardizer(Presenter[JoinedDataBag]):
         Returns:
             pd.DataFrame: the data to be presented
         """
-        standardized_df = self.process(databag.pre_num_df)
+        # only the columns which are used by the processing, without copying the data of the bag
+        standardized_df = self.process(databag.get_pre_num_columns(
+            self.identifier_cols + ['tag', 'version', 'value', 'line', 'negating', 'uom']))
 
         sub_df_cols = self.sub_df_result_cols
 
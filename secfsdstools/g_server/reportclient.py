@@ -0,0 +1,156 @@
+"""
+Thin client for the ReportServer. It only needs the standard library, pandas, and pyarrow.
+"""
+import http.client
+import json
+import socket
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote, urlencode
+
+import pandas as pd
+import pyarrow as pa
+
+from secfsdstools.g_server.reportserver import DEFAULT_PORT
+from secfsdstools.g_server.reportservice import ARROW_FORMAT, JSON_FORMAT
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """ http connection over a unix socket """
+
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)  # pylint: disable=E1101
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class ReportClient:
+    """
+    Queries a ReportServer. The connection is kept open between the requests, so an instance
+    must not be shared between threads.
+    """
+
+    def __init__(self, host: str = '127.0.0.1',
+                 port: int = DEFAULT_PORT,
+                 socket_path: Optional[str] = None,
+                 timeout: float = 60.0):
+        """
+        Args:
+            host (str, optional, '127.0.0.1'): the host of the server
+            port (int, optional, 8765): the port of the server
+            socket_path (str, optional, None): if set, the unix socket of the server is used
+             instead of host and port
+            timeout (float, optional, 60.0): timeout of the requests in seconds
+        """
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._connection: Optional[http.client.HTTPConnection] = None
+
+    def _get_connection(self) -> http.client.HTTPConnection:
+        if self._connection is None:
+            if self.socket_path is not None:
+                self._connection = _UnixHTTPConnection(self.socket_path, self.timeout)
+            else:
+                self._connection = http.client.HTTPConnection(self.host, self.port,
+                                                              timeout=self.timeout)
+        return self._connection
+
+    def _request(self, path: str) -> http.client.HTTPResponse:
+        connection = self._get_connection()
+        connection.request('GET', path)
+        return connection.getresponse()
+
+    def _get(self, path: str) -> http.client.HTTPResponse:
+        try:
+            return self._request(path)
+        except (http.client.RemoteDisconnected, ConnectionError):
+            # a kept alive connection may have been closed by the server, so it is retried once
+            self.close()
+            return self._request(path)
+
+    def _get_body(self, path: str) -> bytes:
+        response = self._get(path)
+        body = response.read()
+        if response.status == http.client.NOT_FOUND:
+            raise KeyError(json.loads(body)['error'])
+        if response.status == http.client.BAD_REQUEST:
+            raise ValueError(json.loads(body)['error'])
+        if response.status != http.client.OK:
+            raise RuntimeError(f"server error {response.status}: {body.decode('utf8')}")
+        return body
+
+    def get_report(self, adsh: str,
+                   stmts: Optional[List[str]] = None,
+                   filters: Optional[List[str]] = None,
+                   invert_negating: bool = False,
+                   add_form_column: bool = False,
+                   response_format: str = ARROW_FORMAT) -> pd.DataFrame:
+        """
+        returns the standard presentation of a report (see StandardStatementPresenter).
+
+        Args:
+            adsh (str): unique report id
+            stmts (List[str], optional, None): the statements to present (BS, IS, ...),
+             None means all statements
+            filters (List[str], optional, None): names of the filters to apply:
+             'reportperiod', 'maincoreg', 'officialtags', 'usdonly'
+            invert_negating (bool, optional, False): see StandardStatementPresenter
+            add_form_column (bool, optional, False): see StandardStatementPresenter
+            response_format (str, optional, 'arrow'): transfer format, 'arrow' or 'json'
+
+        Returns:
+            pd.DataFrame: the presentation of the report
+        """
+        params = {'format': response_format}
+        if stmts:
+            params['stmts'] = ','.join(stmts)
+        if filters:
+            params['filters'] = ','.join(filters)
+        if invert_negating:
+            params['invert_negating'] = '1'
+        if add_form_column:
+            params['add_form_column'] = '1'
+
+        body = self._get_body(f'/report/{quote(adsh)}?{urlencode(params)}')
+        if response_format == JSON_FORMAT:
+            content = json.loads(body)
+            return pd.DataFrame(data=content['data'], columns=content['columns'])
+        return pa.ipc.open_stream(body).read_all().to_pandas()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        returns the metrics of the server (requests, scans, cache hits, p50 and p99 latency).
+
+        Returns:
+            Dict[str, Any]: the metrics
+        """
+        return json.loads(self._get_body('/stats'))
+
+    def is_healthy(self) -> bool:
+        """
+        checks whether the server is running.
+
+        Returns:
+            bool: True if the server answered
+        """
+        try:
+            return json.loads(self._get_body('/health'))['status'] == 'ok'
+        except (OSError, http.client.HTTPException):
+            return False
+
+    def close(self):
+        """ closes the connection """
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self) -> 'ReportClient':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
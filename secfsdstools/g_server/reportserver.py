@@ -0,0 +1,224 @@
+"""
+A long-running local server that returns the standard presentation of single reports. It only
+uses the standard library (http.server), so it also runs offline, and listens either on a tcp
+port or on a unix socket.
+
+Endpoints:
+- GET /report/<adsh>?stmts=BS,IS&filters=maincoreg,usdonly&format=arrow|json
+                    &invert_negating=1&add_form_column=1
+- GET /stats
+- GET /health
+
+Start it with:
+    python -m secfsdstools.g_server.reportserver --port 8765
+and use the ReportClient of the module secfsdstools.g_server.reportclient to query it.
+"""
+import argparse
+import json
+import logging
+import os
+import socketserver
+import stat
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Union
+from urllib.parse import parse_qs, urlparse
+
+from secfsdstools.e_collector.collectorcache import CollectorCache
+from secfsdstools.g_server.reportservice import ARROW_FORMAT, JSON_CONTENT_TYPE, ReportRequest, \
+    ReportService
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+
+
+def _get_list(params: Dict[str, List[str]], name: str) -> Optional[List[str]]:
+    values = [value for param in params.get(name, []) for value in param.split(',') if value]
+    return values or None
+
+
+def _get_flag(params: Dict[str, List[str]], name: str) -> bool:
+    return params.get(name, ['0'])[0].lower() in ('1', 'true', 'yes')
+
+
+class ReportRequestHandler(BaseHTTPRequestHandler):
+    """ handles the requests of the ReportServer """
+
+    # keep-alive, so that a client can reuse its connection
+    protocol_version = 'HTTP/1.1'
+    # the headers and the body are sent separately, so the nagle algorithm would delay the body
+    disable_nagle_algorithm = True
+
+    def _send(self, status: int, content_type: str, body: bytes):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, content: Dict[str, Union[str, int, float, None]]):
+        self._send(status, JSON_CONTENT_TYPE, json.dumps(content).encode('utf8'))
+
+    def do_GET(self):  # pylint: disable=C0103
+        """ handles a GET request """
+        service: ReportService = self.server.service  # type: ignore
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split('/') if part]
+        try:
+            if parts == ['health']:
+                self._send_json(HTTPStatus.OK, {'status': 'ok'})
+            elif parts == ['stats']:
+                self._send_json(HTTPStatus.OK, service.get_stats())
+            elif len(parts) == 2 and parts[0] == 'report':
+                params = parse_qs(url.query)
+                request = ReportRequest.create(
+                    adsh=parts[1],
+                    stmts=_get_list(params, 'stmts'),
+                    filters=_get_list(params, 'filters'),
+                    invert_negating=_get_flag(params, 'invert_negating'),
+                    add_form_column=_get_flag(params, 'add_form_column'),
+                    response_format=params.get('format', [ARROW_FORMAT])[0])
+                response = service.get_report(request)
+                if response is None:
+                    self._send_json(HTTPStatus.NOT_FOUND,
+                                    {'error': f"report '{request.adsh}' not found"})
+                else:
+                    self._send(HTTPStatus.OK, response.content_type, response.body)
+            else:
+                self._send_json(HTTPStatus.NOT_FOUND, {'error': f"unknown path '{url.path}'"})
+        except ValueError as ex:
+            self._send_json(HTTPStatus.BAD_REQUEST, {'error': str(ex)})
+        except Exception as ex:  # pylint: disable=W0703
+            LOGGER.exception("failed to process %s", self.path)
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(ex)})
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        # the client address is not available for unix sockets
+        LOGGER.debug(format, *args)
+
+
+class _UnixRequestHandler(ReportRequestHandler):
+    # TCP_NODELAY can't be set on unix sockets
+    disable_nagle_algorithm = False
+
+
+class _TCPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service: ReportService):
+        self.service = service
+        super().__init__(address, ReportRequestHandler)
+
+
+if hasattr(socketserver, 'ThreadingUnixStreamServer'):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):  # pylint: disable=E1101
+        daemon_threads = True
+
+        def __init__(self, socket_path: str, service: ReportService):
+            self.service = service
+            super().__init__(socket_path, _UnixRequestHandler)
+
+
+class ReportServer:
+    """
+    Serves the reports of a ReportService over http, either on a tcp port or on a unix socket.
+    """
+
+    def __init__(self, service: ReportService,
+                 host: str = '127.0.0.1',
+                 port: int = DEFAULT_PORT,
+                 socket_path: Optional[str] = None):
+        """
+        Args:
+            service (ReportService): the service that returns the reports
+            host (str, optional, '127.0.0.1'): the host to listen on
+            port (int, optional, 8765): the port to listen on, 0 chooses a free port
+            socket_path (str, optional, None): if set, the server listens on this unix socket
+             instead of the tcp port. An existing socket at this path is replaced, any other
+             existing file raises a ValueError.
+        """
+        self.service = service
+        self.socket_path = socket_path
+        if socket_path is not None:
+            if os.path.exists(socket_path):
+                # only a stale socket of a previous server is replaced, never another file
+                if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+                    raise ValueError(f"{socket_path} exists and is not a socket")
+                os.remove(socket_path)
+            self._server = _UnixServer(socket_path, service)
+        else:
+            self._server = _TCPServer((host, port), service)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> Optional[int]:
+        """ the port the server listens on, None for unix sockets """
+        if self.socket_path is not None:
+            return None
+        return self._server.server_address[1]
+
+    def serve_forever(self):
+        """ serves requests until shutdown() is called """
+        LOGGER.info("serving reports on %s", self.socket_path or self._server.server_address)
+        self._server.serve_forever()
+
+    def start(self) -> 'ReportServer':
+        """
+        serves the requests in a background thread.
+
+        Returns:
+            ReportServer: the started server
+        """
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def shutdown(self):
+        """ stops the server and closes the socket """
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        if self.socket_path is not None and os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    def __enter__(self) -> 'ReportServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+
+def main():
+    """ starts a ReportServer for the configured index db """
+    parser = argparse.ArgumentParser(description='serves the reports of the index db')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--socket', default=None, help='listen on this unix socket')
+    parser.add_argument('--cache-memory-mb', type=int, default=512,
+                        help='memory for the collected reports')
+    parser.add_argument('--columns', default='presenter',
+                        help="columns preset ('presenter', 'standardizer', 'notext')")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    service = ReportService.create(
+        cache=CollectorCache(max_memory_bytes=args.cache_memory_mb * 1024 * 1024),
+        columns=args.columns)
+    # the index is loaded before the first request
+    service.snapshot.refresh()
+
+    server = ReportServer(service, host=args.host, port=args.port, socket_path=args.socket)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
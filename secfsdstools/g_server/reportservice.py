@@ -0,0 +1,647 @@
+"""
+The logic of the report server. A ReportService lives as long as the server process, so the
+costs that every short-lived process has to pay before it can return a single report are only
+paid once:
+
+- the index of the reports is kept in memory as a snapshot and reloaded when the db changes
+- the collected reports are kept in the memory tier of a CollectorCache
+- frequently used quarter files are kept in memory as HotFiles, sorted by adsh
+- the rendered responses of recent requests are kept in memory
+- concurrent requests for reports of the same quarter file are batched into a single scan
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from secfsdstools.a_config.configmgt import ConfigurationManager
+from secfsdstools.a_config.configmodel import Configuration
+from secfsdstools.a_utils.constants import NUM_TXT, PRE_TXT, SUB_TXT
+from secfsdstools.a_utils.resourcegovernor import ResourceGovernor
+from secfsdstools.c_index.indexdataaccess import IndexReport, ParquetDBIndexingAccessor
+from secfsdstools.d_container.databagmodel import RawDataBag, table_to_pandas
+from secfsdstools.d_container.filter import FilterBase
+from secfsdstools.e_collector.basecollector import BaseCollector, choose_adsh_strategy
+from secfsdstools.e_collector.collectorcache import CollectorCache
+from secfsdstools.e_collector.columnprojection import ColumnProjection, get_projection
+from secfsdstools.e_filter.rawfiltering import MainCoregRawFilter, OfficialTagsOnlyRawFilter, \
+    ReportPeriodRawFilter, StmtRawFilter, USDOnlyRawFilter
+from secfsdstools.e_presenter.presenting import StandardStatementPresenter
+
+LOGGER = logging.getLogger(__name__)
+
+JSON_FORMAT = 'json'
+ARROW_FORMAT = 'arrow'
+RESPONSE_FORMATS = [JSON_FORMAT, ARROW_FORMAT]
+
+JSON_CONTENT_TYPE = 'application/json'
+ARROW_CONTENT_TYPE = 'application/vnd.apache.arrow.stream'
+
+# the filters that can be requested by name. They are applied in the order of the request.
+RAW_FILTERS: Dict[str, Callable[[], FilterBase[RawDataBag]]] = {
+    'reportperiod': ReportPeriodRawFilter,
+    'maincoreg': MainCoregRawFilter,
+    'officialtags': OfficialTagsOnlyRawFilter,
+    'usdonly': USDOnlyRawFilter,
+}
+
+# the number of response times that are used to calculate the percentiles
+_LATENCY_WINDOW = 10000
+
+
+@dataclass(frozen=True)
+class ReportRequest:
+    """ A request for the standard presentation of a single report. """
+    adsh: str
+    stmts: Optional[Tuple[str, ...]] = None
+    filters: Tuple[str, ...] = ()
+    invert_negating: bool = False
+    add_form_column: bool = False
+    response_format: str = ARROW_FORMAT
+
+    @staticmethod
+    def create(adsh: str,
+               stmts: Optional[List[str]] = None,
+               filters: Optional[List[str]] = None,
+               invert_negating: bool = False,
+               add_form_column: bool = False,
+               response_format: str = ARROW_FORMAT) -> 'ReportRequest':
+        """
+        creates and validates a request.
+
+        Args:
+            adsh (str): unique report id
+            stmts (List[str], optional, None): the statements to present (BS, IS, ...),
+             None means all statements
+            filters (List[str], optional, None): names of the RAW_FILTERS to apply
+            invert_negating (bool, optional, False): see StandardStatementPresenter
+            add_form_column (bool, optional, False): see StandardStatementPresenter
+            response_format (str, optional, 'arrow'): one of RESPONSE_FORMATS
+
+        Returns:
+            ReportRequest: the request
+        """
+        for name in filters or []:
+            if name not in RAW_FILTERS:
+                raise ValueError(f"unknown filter '{name}', use one of {list(RAW_FILTERS.keys())}")
+        if response_format not in RESPONSE_FORMATS:
+            raise ValueError(f"unknown format '{response_format}', use one of {RESPONSE_FORMATS}")
+        return ReportRequest(adsh=adsh.upper(),
+                             stmts=tuple(sorted({x.upper() for x in stmts})) if stmts else None,
+                             filters=tuple(filters or []),
+                             invert_negating=invert_negating,
+                             add_form_column=add_form_column,
+                             response_format=response_format)
+
+
+@dataclass
+class Response:
+    """ A rendered response. """
+    content_type: str
+    body: bytes
+
+
+@dataclass
+class ServiceMetrics:
+    """ Counts the requests and the scans of the service. """
+    requests: int = 0
+    response_hits: int = 0
+    scans: int = 0
+    scanned_reports: int = 0
+    hot_file_hits: int = 0
+    hot_file_loads: int = 0
+    not_found: int = 0
+    latencies_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=_LATENCY_WINDOW))
+
+    def get_percentile(self, percentile: float) -> Optional[float]:
+        """
+        returns the percentile of the response times of the most recent requests.
+
+        Args:
+            percentile (float): the percentile, e.g. 99
+
+        Returns:
+            Optional[float]: the response time in ms, None if there were no requests
+        """
+        if len(self.latencies_ms) == 0:
+            return None
+        return float(np.percentile(np.array(self.latencies_ms), percentile))
+
+    def to_dict(self) -> Dict[str, Union[int, float, None]]:
+        """ returns the metrics as a dictionary """
+        return {'requests': self.requests,
+                'response_hits': self.response_hits,
+                'scans': self.scans,
+                'scanned_reports': self.scanned_reports,
+                'hot_file_hits': self.hot_file_hits,
+                'hot_file_loads': self.hot_file_loads,
+                'not_found': self.not_found,
+                'p50_ms': self.get_percentile(50),
+                'p99_ms': self.get_percentile(99)}
+
+
+class IndexSnapshot:
+    """
+    An in memory copy of the index_parquet_reports table. If a report is present in a quarter
+    and a daily file, the quarter file is preferred. The snapshot is reloaded when the
+    modification time or the size of the db file changes.
+    """
+
+    def __init__(self, db_dir: str):
+        self.accessor = ParquetDBIndexingAccessor(db_dir=db_dir)
+        self._lock = threading.Lock()
+        self._version: Optional[Tuple[int, int]] = None
+        self._reports_df: pd.DataFrame = pd.DataFrame()
+        self._reports_per_file: Dict[str, int] = {}
+
+    def _get_db_version(self) -> Tuple[int, int]:
+        stat = os.stat(self.accessor.database)
+        return stat.st_mtime_ns, stat.st_size
+
+    def refresh(self) -> bool:
+        """
+        reloads the index, if the db file changed.
+
+        Returns:
+            bool: True if the index was reloaded
+        """
+        version = self._get_db_version()
+        if version == self._version:
+            return False
+
+        with self._lock:
+            if version == self._version:
+                return False
+            reports_df = self.accessor.read_all_indexreports_df()
+            # 'quarter' is sorted before 'daily', so the official data is kept
+            reports_df = reports_df.sort_values('originFileType', ascending=False) \
+                .drop_duplicates('adsh').set_index('adsh')
+            self._reports_per_file = reports_df.fullPath.value_counts().to_dict()
+            self._reports_df = reports_df
+            self._version = version
+            LOGGER.info("loaded index snapshot with %d reports", len(reports_df))
+            return True
+
+    @property
+    def version(self) -> Optional[Tuple[int, int]]:
+        """ the modification time and size of the db file of the loaded snapshot """
+        return self._version
+
+    def get_report(self, adsh: str) -> Optional[IndexReport]:
+        """
+        returns the IndexReport for the adsh.
+
+        Args:
+            adsh (str): unique report id
+
+        Returns:
+            Optional[IndexReport]: the report, None if the adsh is not in the index
+        """
+        self.refresh()
+        reports_df = self._reports_df
+        if adsh not in reports_df.index:
+            return None
+        row = reports_df.loc[adsh]
+        return IndexReport(adsh=adsh, **{name: row[name] for name in reports_df.columns})
+
+    def get_number_of_reports(self, full_path: str) -> int:
+        """
+        returns the number of reports in a file.
+
+        Args:
+            full_path (str): the path to the parquet directory of the file
+
+        Returns:
+            int: the number of reports
+        """
+        return self._reports_per_file.get(full_path, 0)
+
+
+def split_by_adsh(databag: RawDataBag, adshs: List[str]) -> Dict[str, RawDataBag]:
+    """
+    splits a bag that contains several reports into a bag per report.
+
+    Args:
+        databag (RawDataBag): the bag with the reports
+        adshs (List[str]): the adshs of the reports
+
+    Returns:
+        Dict[str, RawDataBag]: a bag for every adsh
+    """
+    dfs = [databag.sub_df, databag.pre_df, databag.num_df]
+    positions = [df.groupby('adsh', sort=False, observed=True).indices for df in dfs]
+    empty = np.array([], dtype=np.int64)
+
+    return {adsh: RawDataBag.create(*[df.take(indices.get(adsh, empty))
+                                      for df, indices in zip(dfs, positions)])
+            for adsh in adshs}
+
+
+class HotFile:
+    """
+    The projected sub.txt, pre.txt, and num.txt of a file in memory. The tables are sorted by
+    adsh (the sort is stable, so the rows of a report keep the order of the file) and the rows of
+    every report are found by their range, so that a report can be returned without a scan.
+    """
+
+    @staticmethod
+    def load(datapath: str, projection: Optional[ColumnProjection],
+             version: List[int]) -> 'HotFile':
+        """
+        reads the files of a quarter into memory.
+
+        Args:
+            datapath (str): the directory with the parquet files
+            projection (ColumnProjection, optional): the columns to read, None means all
+            version (List[int]): the version of the files (see CollectorCache.get_version)
+
+        Returns:
+            HotFile: the loaded file
+        """
+        tables: Dict[str, pa.Table] = {}
+        ranges: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        for file in [SUB_TXT, PRE_TXT, NUM_TXT]:
+            path = os.path.join(datapath, f'{file}.parquet')
+            with ResourceGovernor.io_slot():
+                columns = None
+                if projection is not None:
+                    columns = projection.get_columns(file, pq.read_schema(path).names)
+                table = pq.read_table(path, columns=columns, use_pandas_metadata=True,
+                                      pre_buffer=True)
+            table = table.sort_by('adsh').combine_chunks()
+            tables[file] = table
+            ranges[file] = HotFile._get_ranges(table.column('adsh'))
+        return HotFile(datapath=datapath, version=version, tables=tables, ranges=ranges)
+
+    @staticmethod
+    def _get_ranges(adshs: pa.ChunkedArray) -> Dict[str, Tuple[int, int]]:
+        # the column is sorted, so every adsh starts where the value changes
+        values = adshs.to_numpy(zero_copy_only=False)
+        if len(values) == 0:
+            return {}
+        starts = np.flatnonzero(values[1:] != values[:-1]) + 1
+        starts = np.concatenate([[0], starts])
+        ends = np.concatenate([starts[1:], [len(values)]])
+        return {values[start]: (int(start), int(end - start)) for start, end in zip(starts, ends)}
+
+    def __init__(self, datapath: str, version: List[int], tables: Dict[str, pa.Table],
+                 ranges: Dict[str, Dict[str, Tuple[int, int]]]):
+        self.datapath = datapath
+        self.version = version
+        self.tables = tables
+        self.ranges = ranges
+
+    @property
+    def nbytes(self) -> int:
+        """ the memory used by the tables """
+        return sum(table.nbytes for table in self.tables.values())
+
+    def get_bag(self, adsh: str) -> RawDataBag:
+        """
+        returns the data of a report, like BaseCollector.basecollect would.
+
+        Args:
+            adsh (str): unique report id
+
+        Returns:
+            RawDataBag: the data of the report
+        """
+        dfs = {}
+        for file, table in self.tables.items():
+            start, length = self.ranges[file].get(adsh, (0, 0))
+            dfs[file] = table_to_pandas(table.slice(start, length))
+
+        num_df = dfs[NUM_TXT]
+        if 'coreg' in num_df.columns:
+            num_df['coreg'] = num_df['coreg'].fillna('')
+        return RawDataBag.create(sub_df=dfs[SUB_TXT], pre_df=dfs[PRE_TXT], num_df=num_df)
+
+
+class _ScanBatch:
+    """ the reports of a file that are read with the same scan """
+
+    def __init__(self):
+        self.adshs: Set[str] = set()
+        self.done = threading.Event()
+        self.databags: Dict[str, RawDataBag] = {}
+        self.error: Optional[Exception] = None
+
+
+class ReportService:
+    """
+    Returns the standard presentation of single reports. The service is thread safe and is
+    meant to be used by a long-running server process, see ReportServer.
+    """
+
+    @classmethod
+    def create(cls, configuration: Optional[Configuration] = None, **kwargs) -> 'ReportService':
+        """
+        creates the service for the index db of the configuration.
+        If no configuration is passed, it reads the config from the config file
+
+        Args:
+            configuration (Configuration, optional, None): Optional configuration object
+            **kwargs: the other parameters of the constructor
+
+        Returns:
+            ReportService: the service
+        """
+        if configuration is None:
+            configuration = ConfigurationManager.read_config_file()
+        return ReportService(db_dir=configuration.db_dir, **kwargs)
+
+    def __init__(self, db_dir: str,
+                 cache: Optional[CollectorCache] = None,
+                 columns: Optional[Union[str, ColumnProjection]] = 'presenter',
+                 max_responses: int = 1024,
+                 batch_window_seconds: float = 0.0,
+                 max_hot_file_bytes: int = 1024 * 1024 * 1024,
+                 hot_file_after_scans: int = 2):
+        """
+        Args:
+            db_dir (str): the directory of the index db
+            cache (CollectorCache, optional, None): the cache for the collected reports,
+             None creates a memory only cache
+            columns (Union[str, ColumnProjection], optional, 'presenter'): the columns to read
+            max_responses (int, optional, 1024): the number of rendered responses that are kept
+             in memory
+            batch_window_seconds (float, optional, 0.0): how long a scan waits for further
+             requests for the same file. Requests that arrive while a scan of the same file
+             is running are always batched into the next scan.
+            max_hot_file_bytes (int, optional, 1GB): the memory for the HotFiles, 0 turns them
+             off
+            hot_file_after_scans (int, optional, 2): a file is loaded as HotFile in the
+             background after this number of scans
+        """
+        self.snapshot = IndexSnapshot(db_dir=db_dir)
+        self.cache = cache if cache is not None else CollectorCache()
+        self.columns = columns
+        self.max_responses = max_responses
+        self.batch_window_seconds = batch_window_seconds
+        self.max_hot_file_bytes = max_hot_file_bytes
+        self.hot_file_after_scans = hot_file_after_scans
+        self.metrics = ServiceMetrics()
+
+        self._lock = threading.Lock()
+        self._responses: 'OrderedDict[Tuple, Response]' = OrderedDict()
+        self._open_batches: Dict[str, _ScanBatch] = {}
+        self._scan_locks: Dict[str, threading.Lock] = {}
+        self._hot_files: 'OrderedDict[str, HotFile]' = OrderedDict()
+        self._scan_counts: Dict[str, int] = {}
+        self._loading: Set[str] = set()
+
+    def _create_collector(self, datapath: str) -> BaseCollector:
+        return BaseCollector(datapath=datapath, columns=self.columns)
+
+    def _get_cache_key(self, report: IndexReport) -> str:
+        return self._create_collector(report.fullPath).get_cache_key(('adsh', '==', report.adsh))
+
+    def collect(self, report: IndexReport) -> RawDataBag:
+        """
+        returns the raw data of a report from the cache or by reading it in a batched scan.
+
+        Args:
+            report (IndexReport): the report
+
+        Returns:
+            RawDataBag: the data of the report
+        """
+        key = self._get_cache_key(report)
+        databag = self.cache.get(key, report.fullPath)
+        if databag is not None:
+            return databag
+
+        version = self.cache.get_version(report.fullPath)
+        hot_file = self._get_hot_file(report.fullPath, version)
+        if hot_file is None:
+            return self._collect_batched(report)
+
+        databag = hot_file.get_bag(report.adsh)
+        self.cache.put(key, report.fullPath, databag, version=version)
+        with self._lock:
+            self.metrics.hot_file_hits += 1
+        return databag
+
+    def _get_hot_file(self, datapath: str, version: List[int]) -> Optional[HotFile]:
+        with self._lock:
+            hot_file = self._hot_files.get(datapath)
+            if hot_file is None:
+                return None
+            if hot_file.version != version:
+                # the files were changed
+                del self._hot_files[datapath]
+                return None
+            self._hot_files.move_to_end(datapath)
+            return hot_file
+
+    def load_hot_file(self, datapath: str):
+        """
+        loads a file as HotFile and evicts the least recently used HotFiles if the memory
+        limit is exceeded.
+
+        Args:
+            datapath (str): the directory with the parquet files
+        """
+        try:
+            version = self.cache.get_version(datapath)
+            hot_file = HotFile.load(datapath, get_projection(self.columns), version)
+            LOGGER.info("loaded %s as hot file (%d bytes)", datapath, hot_file.nbytes)
+            with self._lock:
+                self.metrics.hot_file_loads += 1
+                if hot_file.nbytes <= self.max_hot_file_bytes:
+                    self._hot_files[datapath] = hot_file
+                while sum(x.nbytes for x in self._hot_files.values()) > self.max_hot_file_bytes:
+                    self._hot_files.popitem(last=False)
+        except Exception:  # pylint: disable=W0703
+            # the requests for the file are still answered by scans
+            LOGGER.exception("failed to load %s as hot file", datapath)
+        finally:
+            with self._lock:
+                self._loading.discard(datapath)
+                self._scan_counts[datapath] = 0
+
+    def _count_scan(self, datapath: str):
+        if self.max_hot_file_bytes <= 0:
+            return
+        with self._lock:
+            count = self._scan_counts.get(datapath, 0) + 1
+            self._scan_counts[datapath] = count
+            if count < self.hot_file_after_scans or datapath in self._loading \
+                    or datapath in self._hot_files:
+                return
+            self._loading.add(datapath)
+        # the requests are answered by scans until the file is loaded
+        threading.Thread(target=self.load_hot_file, args=(datapath,), daemon=True).start()
+
+    def _collect_batched(self, report: IndexReport) -> RawDataBag:
+        datapath = report.fullPath
+        with self._lock:
+            batch = self._open_batches.get(datapath)
+            leader = batch is None
+            if leader:
+                batch = _ScanBatch()
+                self._open_batches[datapath] = batch
+                scan_lock = self._scan_locks.setdefault(datapath, threading.Lock())
+            batch.adshs.add(report.adsh)
+
+        if leader:
+            if self.batch_window_seconds > 0:
+                time.sleep(self.batch_window_seconds)
+            # while a scan of the same file is running, the batch stays open and collects
+            # the requests that arrive in the meantime
+            with scan_lock:
+                with self._lock:
+                    del self._open_batches[datapath]
+                try:
+                    batch.databags = self._scan(datapath, sorted(batch.adshs))
+                except Exception as ex:  # pylint: disable=W0703
+                    batch.error = ex
+                finally:
+                    batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.databags[report.adsh]
+
+    def _scan(self, datapath: str, adshs: List[str]) -> Dict[str, RawDataBag]:
+        collector = self._create_collector(datapath)
+        keys = {adsh: collector.get_cache_key(('adsh', '==', adsh)) for adsh in adshs}
+
+        # reports that were requested again while the previous scan was running are
+        # already cached
+        databags: Dict[str, RawDataBag] = {}
+        for adsh in adshs:
+            databag = self.cache.get(keys[adsh], datapath)
+            if databag is not None:
+                databags[adsh] = databag
+        missing = [adsh for adsh in adshs if adsh not in databags]
+        if len(missing) == 0:
+            return databags
+
+        # the number of reports in the file is known from the snapshot, so the footer of
+        # sub.txt doesn't have to be read to choose the strategy
+        collector.adsh_strategy = choose_adsh_strategy(
+            selected_reports=len(missing),
+            total_reports=self.snapshot.get_number_of_reports(datapath))
+        version = self.cache.get_version(datapath)
+        scanned = split_by_adsh(collector.basecollect(('adsh', 'in', missing)), missing)
+
+        for adsh, databag in scanned.items():
+            self.cache.put(keys[adsh], datapath, databag, version=version)
+
+        with self._lock:
+            self.metrics.scans += 1
+            self.metrics.scanned_reports += len(missing)
+        LOGGER.debug("scanned %d reports of %s", len(missing), datapath)
+        self._count_scan(datapath)
+        databags.update(scanned)
+        return databags
+
+    def present(self, request: ReportRequest, report: IndexReport) -> pd.DataFrame:
+        """
+        returns the standard presentation of a report.
+
+        Args:
+            request (ReportRequest): the request
+            report (IndexReport): the report of the request
+
+        Returns:
+            pd.DataFrame: the presentation
+        """
+        databag = self.collect(report)
+        if request.stmts:
+            databag = databag[StmtRawFilter(stmts=list(request.stmts))]
+        for name in request.filters:
+            databag = databag[RAW_FILTERS[name]()]
+
+        if len(databag.num_df) == 0:
+            return pd.DataFrame()
+        presenter = StandardStatementPresenter(invert_negating=request.invert_negating,
+                                               add_form_column=request.add_form_column)
+        return databag.join().present(presenter)
+
+    def get_report(self, request: ReportRequest) -> Optional[Response]:
+        """
+        returns the rendered presentation of a report.
+
+        Args:
+            request (ReportRequest): the request
+
+        Returns:
+            Optional[Response]: the response, None if the report is not in the index
+        """
+        start = time.perf_counter()
+        report = self.snapshot.get_report(request.adsh)
+        if report is None:
+            with self._lock:
+                self.metrics.requests += 1
+                self.metrics.not_found += 1
+            return None
+
+        # the response depends on the version of the index and of the data
+        key = (request, self.snapshot.version, tuple(self.cache.get_version(report.fullPath)))
+        with self._lock:
+            response = self._responses.get(key)
+            if response is not None:
+                self._responses.move_to_end(key)
+                self.metrics.response_hits += 1
+
+        if response is None:
+            response = render(self.present(request, report), request.response_format)
+            with self._lock:
+                self._responses[key] = response
+                while len(self._responses) > self.max_responses:
+                    self._responses.popitem(last=False)
+
+        with self._lock:
+            self.metrics.requests += 1
+            self.metrics.latencies_ms.append((time.perf_counter() - start) * 1000)
+        return response
+
+    def get_stats(self) -> Dict[str, Union[int, float, None]]:
+        """
+        returns the metrics of the service and its cache.
+
+        Returns:
+            Dict[str, Union[int, float, None]]: the metrics
+        """
+        with self._lock:
+            stats = self.metrics.to_dict()
+            stats['responses'] = len(self._responses)
+            stats['hot_files'] = len(self._hot_files)
+            stats['hot_file_bytes'] = sum(x.nbytes for x in self._hot_files.values())
+        stats['cache_hit_ratio'] = self.cache.metrics.hit_ratio
+        stats['cache_memory_bytes'] = self.cache.memory_bytes
+        return stats
+
+
+def render(df: pd.DataFrame, response_format: str) -> Response:
+    """
+    renders a dataframe as json (orient 'split' without the index) or as arrow ipc stream.
+
+    Args:
+        df (pd.DataFrame): the dataframe
+        response_format (str): one of RESPONSE_FORMATS
+
+    Returns:
+        Response: the rendered response
+    """
+    if response_format == JSON_FORMAT:
+        return Response(content_type=JSON_CONTENT_TYPE,
+                        body=df.to_json(orient='split', index=False).encode('utf8'))
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(content_type=ARROW_CONTENT_TYPE, body=sink.getvalue().to_pybytes())
@@ -7,13 +7,19 @@ The same logic is also contained and further explained in the
 Please have a look at this notebook for a detailed explanation of the logic
 """
 import os
+import re
+import shutil
 from glob import glob
 from typing import Callable, Optional
 from typing import List
 
+import pandas as pd
+
 from secfsdstools.a_config.configmgt import ConfigurationManager
 from secfsdstools.c_index.indexdataaccess import ParquetDBIndexingAccessor
+from secfsdstools.d_container.bagmetadata import BagMetadata
 from secfsdstools.d_container.databagmodel import RawDataBag, JoinedDataBag
+from secfsdstools.d_container.partitioning import filed_to_quarter
 from secfsdstools.e_collector.zipcollecting import ZipCollector
 
 
@@ -53,7 +59,11 @@ def save_databag(databag: RawDataBag, base_path: str, sub_path: str) -> JoinedDa
     os.makedirs(target_path_raw, exist_ok=True)
     databag.save(target_path_raw)
 
-    target_path_joined = os.path.join(base_path, sub_path, 'joined')
+    return _save_joined_databag(databag=databag,
+                                target_path_joined=os.path.join(base_path, sub_path, 'joined'))
+
+
+def _save_joined_databag(databag: RawDataBag, target_path_joined: str) -> JoinedDataBag:
     os.makedirs(target_path_joined, exist_ok=True)
     print("create joined databag")
     joined_databag = databag.join()
@@ -133,6 +143,31 @@ def read_all_zip_names() -> List[str]:
             not x.fullPath.endswith("2009q1.zip")]
 
 
+def _quarter_of_zip(file_name: str) -> Optional[str]:
+    # quarter files are named like 2010q1.zip, daily files like 20100125.zip
+    match = re.match(r'^(\d{4}q[1-4])\.zip$', file_name)
+    if match:
+        return match.group(1)
+    match = re.match(r'^(\d{8})\.zip$', file_name)
+    if match:
+        return filed_to_quarter(pd.Series([int(match.group(1))])).iloc[0]
+    return None
+
+
+def _is_stored(target_path: str, file_name: str) -> bool:
+    """
+    checks whether the bag in target_path was completely stored and contains the data of the
+    zip file. The metadata is the last file written by save, so a bag without metadata is
+    incomplete. Bags of zip files whose quarter can't be determined are never reused.
+    """
+    metadata = BagMetadata.read(target_path)
+    if metadata is None:
+        return False
+    quarter = _quarter_of_zip(file_name)
+    # bags without any reports have no quarters
+    return quarter is not None and set(metadata.quarters) <= {quarter}
+
+
 def build_tmp_set(financial_statement: str,
                   file_names: List[str],
                   base_path: str = "set/tmp/",
@@ -146,6 +181,13 @@ def build_tmp_set(financial_statement: str,
     <target_path>/<file_name>/<financial_statement>/raw
     <target_path>/<file_name>/<financial_statement>/joined
 
+    Zip files which were already processed are skipped, so the function can be called again
+    after new zip files were downloaded or after it was interrupted. A bag counts as stored
+    as soon as its metadata was written, since the metadata is the last file that is written
+    by save, and if the quarters in the metadata match the zip file. If only the raw bag was
+    stored, it is loaded and only the joined bag is created. Incomplete bags and bags of other
+    data are removed and created again.
+
     Args:
         financial_statement (str): the statement you want to read the data for "BS", "CF", "IS"
         post_load_filter (Callable, optional): a post_load_filter method that is applied after
@@ -155,6 +197,28 @@ def build_tmp_set(financial_statement: str,
     """
 
     for file_name in file_names:
+        target_path = os.path.join(base_path, file_name)
+        target_path_raw = os.path.join(target_path, financial_statement, 'raw')
+        target_path_joined = os.path.join(target_path, financial_statement, 'joined')
+
+        raw_stored = _is_stored(target_path_raw, file_name)
+        joined_stored = raw_stored and _is_stored(target_path_joined, file_name)
+        if joined_stored:
+            print(f"skip {file_name}, it was already processed")
+            continue
+
+        # save requires empty directories
+        for path, stored in [(target_path_raw, raw_stored), (target_path_joined, False)]:
+            if not stored and os.path.exists(path):
+                print(f"remove incomplete or outdated bag {path}")
+                shutil.rmtree(path)
+
+        if raw_stored:
+            print(f"load stored rawdatabag from {target_path_raw}")
+            _save_joined_databag(databag=RawDataBag.load(target_path_raw),
+                                 target_path_joined=target_path_joined)
+            continue
+
         collector = ZipCollector.get_zip_by_name(name=file_name,
                                                  forms_filter=["10-K", "10-Q"],
                                                  stmt_filter=[financial_statement],
@@ -162,7 +226,6 @@ def build_tmp_set(financial_statement: str,
 
         rawdatabag = collector.collect()
 
-        target_path = os.path.join(base_path, file_name)
         # saving the raw databag, joining and saving the joined databag
         save_databag(databag=rawdatabag, base_path=target_path, sub_path=financial_statement)
 
@@ -172,6 +235,8 @@ def create_rawdatabag(financial_statement: str,
                       target_path: str = "set/serial/"):
     """
     Concatenates the preprocessed and by statement separated rawdatabags into a single databag.
+    The rawdatabags are directly concatenated into the files of the target databag without
+    loading them all into memory.
 
     Args:
         financial_statement: the statement for which data has to be concatenated.
@@ -179,12 +244,10 @@ def create_rawdatabag(financial_statement: str,
         target_path: the target path of the daset
     """
     raw_files = glob(f"{tmp_path}/*/{financial_statement}/raw/", recursive=True)
-    raw_databags = [RawDataBag.load(file) for file in raw_files]
-    raw_databag = RawDataBag.concat(raw_databags)
     target_path_raw = os.path.join(target_path, financial_statement, 'raw')
     print(f"store rawdatabag under {target_path_raw}")
     os.makedirs(target_path_raw, exist_ok=True)
-    raw_databag.save(target_path_raw)
+    RawDataBag.concat_saved(source_paths=raw_files, target_path=target_path_raw)
 
 
 def create_joineddatabag(financial_statement: str,
@@ -192,6 +255,8 @@ def create_joineddatabag(financial_statement: str,
                          target_path: str = "set/serial/"):
     """
     Concatenates the preprocessed and by statement separated joineddatabag into a single databag.
+    The joineddatabags are directly concatenated into the files of the target databag without
+    loading them all into memory.
 
     Args:
         financial_statement: the statement for which data has to be concatenated.
@@ -200,12 +265,10 @@ def create_joineddatabag(financial_statement: str,
     """
 
     joined_files = glob(f"{tmp_path}/*/{financial_statement}/joined/", recursive=True)
-    joined_databags = [JoinedDataBag.load(file) for file in joined_files]
-    joined_databag = JoinedDataBag.concat(joined_databags)
     target_path_joined = os.path.join(target_path, financial_statement, 'joined')
     print(f"store joineddatabag under {target_path_joined}")
     os.makedirs(target_path_joined, exist_ok=True)
-    joined_databag.save(target_path_joined)
+    JoinedDataBag.concat_saved(source_paths=joined_files, target_path=target_path_joined)
 
 
 def create_datasets_for_main_statements_serial(target_path: str = "set/parallel/",
@@ -240,14 +303,12 @@ def create_datasets_for_main_statements_serial(target_path: str = "set/parallel/
     build_tmp_set(financial_statement="CF", file_names=file_names,
                   post_load_filter=default_postloadfilter, base_path=tmp_path)
 
-    # Note: calling the create_rawdatabag needs about 8-10 GB of free memory.
-    #       the memory should be garbage collected between the different create_rawdatabag calls
+    # Note: create_rawdatabag and create_joineddatabag read the temporary datasets one after
+    #       the other, so they only need the memory of the largest temporary dataset
     create_rawdatabag(financial_statement="BS", target_path=target_path, tmp_path=tmp_path)
     create_rawdatabag(financial_statement="IS", target_path=target_path, tmp_path=tmp_path)
     create_rawdatabag(financial_statement="CF", target_path=target_path, tmp_path=tmp_path)
 
-    # Note: calling the create_joinedatabag needs about 4 GB of free memory.
-    #       the memory should be garbage collected between the different create_joineddatabag calls
     create_joineddatabag(financial_statement="BS", target_path=target_path, tmp_path=tmp_path)
     create_joineddatabag(financial_statement="IS", target_path=target_path, tmp_path=tmp_path)
     create_joineddatabag(financial_statement="CF", target_path=target_path, tmp_path=tmp_path)
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from secfsdstools.a_utils.asyncexecution import AsyncRequestExecutor
+from secfsdstools.a_utils.resourcegovernor import ResourceGovernor
+
+
+@pytest.fixture
+def executor():
+    executor = AsyncRequestExecutor(max_workers=4)
+    yield executor
+    executor.shutdown()
+
+
+def test_coalescing(executor):
+    calls = []
+    release = threading.Event()
+
+    def blocking(value: int) -> int:
+        calls.append(value)
+        release.wait(5)
+        return value * 2
+
+    async def run():
+        requests = [executor.run(blocking, 1, key='a') for _ in range(5)]
+        requests.append(executor.run(blocking, 2, key='b'))
+        requests.append(executor.run(blocking, 1))
+        waiting = asyncio.gather(*requests)
+        await asyncio.sleep(0.05)
+        assert executor.in_flight == 2
+        release.set()
+        return await waiting
+
+    assert asyncio.run(run()) == [2, 2, 2, 2, 2, 4, 2]
+    assert sorted(calls) == [1, 1, 2]
+    assert executor.metrics.executed == 3
+    assert executor.metrics.coalesced == 4
+    assert executor.in_flight == 0
+
+    # finished requests are executed again
+    asyncio.run(executor.run(blocking, 1, key='a'))
+    assert executor.metrics.executed == 4
+
+
+def test_exceptions_and_cancellation(executor):
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise ValueError("failed")
+
+    def slow():
+        release.wait(5)
+        return 'done'
+
+    async def run():
+        failed = [asyncio.ensure_future(executor.run(failing, key='f')) for _ in range(2)]
+        cancelled = asyncio.ensure_future(executor.run(slow, key='s'))
+        other = asyncio.ensure_future(executor.run(slow, key='s'))
+        await asyncio.sleep(0.05)
+
+        # cancelling one caller doesn't cancel the request of the other callers
+        cancelled.cancel()
+        release.set()
+        assert await other == 'done'
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        for request in failed:
+            with pytest.raises(ValueError):
+                await request
+
+    asyncio.run(run())
+
+
+def test_event_loop_not_blocked(executor):
+    async def run():
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        beat = asyncio.ensure_future(heartbeat())
+        await executor.run(time.sleep, 0.2)
+        beat.cancel()
+        return ticks
+
+    assert asyncio.run(run()) > 5
+
+
+def test_bounded_by_governor(monkeypatch):
+    monkeypatch.setenv('SECFSDSTOOLS_MAX_THREADS', '3')
+    ResourceGovernor._limits = None
+    try:
+        executor = AsyncRequestExecutor(max_workers=10)
+        assert executor.max_workers == 3
+        executor.shutdown()
+    finally:
+        ResourceGovernor._limits = None
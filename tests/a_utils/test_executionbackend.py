@@ -0,0 +1,55 @@
+import pytest
+
+from secfsdstools.a_utils.executionbackend import EXECUTION_BACKEND_ENV_VAR_NAME, \
+    INLINE_BACKEND, PROCESSES_BACKEND, THREADS_BACKEND, THREADS_MAX_BYTES, \
+    choose_execution_backend, create_executor
+from secfsdstools.a_utils.parallelexecution import ParallelExecutor, ThreadExecutor
+from secfsdstools.a_utils.resourcegovernor import MAX_PROCESSES_ENV_VAR_NAME, ResourceGovernor
+
+MB = 1024 * 1024
+
+
+@pytest.fixture(autouse=True)
+def reset_governor(monkeypatch):
+    monkeypatch.delenv(EXECUTION_BACKEND_ENV_VAR_NAME, raising=False)
+    monkeypatch.setenv(MAX_PROCESSES_ENV_VAR_NAME, '4')
+    ResourceGovernor._limits = None
+    yield
+    ResourceGovernor._limits = None
+
+
+def test_choose_execution_backend(caplog):
+    assert choose_execution_backend(entries=1, estimated_bytes=10 * THREADS_MAX_BYTES) \
+           == INLINE_BACKEND
+    assert choose_execution_backend(entries=3, estimated_bytes=MB) == INLINE_BACKEND
+    assert choose_execution_backend(entries=3, estimated_bytes=100 * MB) == THREADS_BACKEND
+    assert choose_execution_backend(entries=3, estimated_bytes=2 * THREADS_MAX_BYTES) \
+           == PROCESSES_BACKEND
+    assert 'using the processes execution backend' in caplog.text
+
+
+def test_override(monkeypatch):
+    assert choose_execution_backend(entries=3, estimated_bytes=MB,
+                                    requested=PROCESSES_BACKEND) == PROCESSES_BACKEND
+
+    monkeypatch.setenv(EXECUTION_BACKEND_ENV_VAR_NAME, THREADS_BACKEND)
+    assert choose_execution_backend(entries=1, estimated_bytes=MB) == THREADS_BACKEND
+
+    with pytest.raises(ValueError):
+        choose_execution_backend(entries=1, estimated_bytes=MB, requested='unknown')
+
+
+def test_single_process(monkeypatch):
+    # no process pool if only one process may be used
+    monkeypatch.setenv(MAX_PROCESSES_ENV_VAR_NAME, '1')
+    ResourceGovernor._limits = None
+    assert choose_execution_backend(entries=3, estimated_bytes=2 * THREADS_MAX_BYTES) \
+           == THREADS_BACKEND
+
+
+def test_create_executor():
+    inline = create_executor(INLINE_BACKEND)
+    assert isinstance(inline, ThreadExecutor) and inline.execute_serial
+    threads = create_executor(THREADS_BACKEND)
+    assert isinstance(threads, ThreadExecutor) and not threads.execute_serial
+    assert isinstance(create_executor(PROCESSES_BACKEND), ParallelExecutor)
@@ -2,7 +2,7 @@ import os
 
 import numpy as np
 
-from secfsdstools.a_utils.fileutils import write_content_to_zip, read_content_from_zip, read_df_from_file_in_zip, get_filenames_in_directory
+from secfsdstools.a_utils.fileutils import write_content_to_zip, read_content_from_zip, read_df_from_file_in_zip, get_filenames_in_directory, get_size
 
 CURRENT_DIR, CURRENT_FILE = os.path.split(__file__)
 
@@ -54,3 +54,13 @@ def test_get_filenames_in_directory(tmp_path):
     list_of_zips = get_filenames_in_directory(os.path.join(tmp_path, '*.zip'))
     assert len(list_of_zips) == 1
     assert list_of_zips[0] == 'demo.zip'
+
+
+def test_get_size(tmp_path):
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'a.txt').write_text('12345')
+    (tmp_path / 'sub' / 'b.txt').write_text('123')
+
+    assert get_size(str(tmp_path / 'a.txt')) == 5
+    assert get_size(str(tmp_path)) == 8
+    assert get_size(str(tmp_path / 'notexisting')) == 0
@@ -1,6 +1,27 @@
+import logging
+import os
+import signal
+import sys
+from time import sleep
 from typing import List
 
-from secfsdstools.a_utils.parallelexecution import ParallelExecutor
+import pytest
+
+from secfsdstools.a_utils import parallelexecution
+from secfsdstools.a_utils.parallelexecution import ParallelExecutor, ThreadExecutor, \
+    ExecutionProgress
+from secfsdstools.a_utils.resourcegovernor import ResourceGovernor, MAX_PROCESSES_ENV_VAR_NAME, \
+    MAX_THREADS_ENV_VAR_NAME
+
+
+@pytest.fixture(autouse=True)
+def parallel_governor(monkeypatch):
+    # make sure the parallel code paths are used, even on a host with a single cpu
+    monkeypatch.setenv(MAX_PROCESSES_ENV_VAR_NAME, '4')
+    monkeypatch.setenv(MAX_THREADS_ENV_VAR_NAME, '4')
+    ResourceGovernor._limits = None
+    yield
+    ResourceGovernor._limits = None
 
 
 def test_parallelexcution():
@@ -37,3 +58,237 @@ def test_parallelexcution():
 
     assert len(processed) == 500
     assert len(missing) == 0
+
+
+def test_parallelexecution_streaming():
+    data_list = [str(x) for x in range(50)]
+    was_read = [False]
+
+    def get_unprocessed_entries() -> List[str]:
+        if not was_read[0]:
+            was_read[0] = True
+            return data_list
+        return []
+
+    executor = ParallelExecutor[str, str, str](processes=4)
+    executor.set_get_entries_function(get_unprocessed_entries)
+    executor.set_process_element_function(lambda x: "0" + x)
+    executor.set_post_process_chunk_function(lambda x: x)
+
+    processed = list(executor.execute_streaming(max_pending=4))
+
+    assert len(processed) == 50
+    assert sorted(processed) == sorted(["0" + x for x in data_list])
+
+
+def test_threadexecution_streaming_backpressure():
+    data_list = [str(x) for x in range(20)]
+    started: List[str] = []
+
+    def process_element(entry: str) -> str:
+        started.append(entry)
+        return entry
+
+    executor = ThreadExecutor[str, str, str](processes=4)
+    executor.set_get_entries_function(lambda: data_list if len(started) == 0 else [])
+    executor.set_process_element_function(process_element)
+    executor.set_post_process_chunk_function(lambda x: x)
+
+    stream = executor.execute_streaming(max_pending=3)
+    first = next(stream)
+
+    # while the caller holds the first result, no more than max_pending entries are started
+    sleep(0.2)
+    assert first in data_list
+    assert len(started) <= 3
+
+    rest = list(stream)
+    assert len(rest) + 1 == 20
+
+
+def test_serial_streaming():
+    executor = ParallelExecutor[int, int, int](execute_serial=True)
+    was_read = [False]
+
+    def get_entries() -> List[int]:
+        if not was_read[0]:
+            was_read[0] = True
+            return [1, 2, 3]
+        return []
+
+    executor.set_get_entries_function(get_entries)
+    executor.set_process_element_function(lambda x: x * 2)
+    executor.set_post_process_chunk_function(lambda x: x)
+
+    assert list(executor.execute_streaming()) == [2, 4, 6]
+
+
+def test_progress_and_metrics():
+    received: List[ExecutionProgress] = []
+
+    executor = ParallelExecutor[int, int, int](processes=2, chunksize=0)
+    was_read = [False]
+
+    def get_entries() -> List[int]:
+        if not was_read[0]:
+            was_read[0] = True
+            return list(range(6))
+        return []
+
+    executor.set_get_entries_function(get_entries)
+    executor.set_process_element_function(lambda x: x * 10)
+    executor.set_post_process_chunk_function(lambda x: x)
+    executor.set_result_size_function(lambda x: (1, 8))
+    executor.set_progress_callback(lambda progress: received.append(progress.items_done))
+
+    processed, _ = executor.execute()
+
+    # the order of the results is kept
+    assert processed == [0, 10, 20, 30, 40, 50]
+    assert received == [1, 2, 3, 4, 5, 6]
+
+    progress = executor.progress
+    assert progress.items_total == 6
+    assert progress.items_done == 6
+    assert progress.items_remaining == 0
+    assert progress.eta == 0
+    assert progress.rows == 6
+    assert progress.bytes == 48
+    assert len(progress.item_metrics) == 6
+    assert len(progress.slowest_items(2)) == 2
+    assert progress.item_metrics[0].worker_pid > 0
+
+
+def test_worker_exception_is_reported():
+    executor = ParallelExecutor[int, int, int](processes=2, chunksize=0)
+    executor.set_get_entries_function(lambda: [1, 0, 2])
+    executor.set_process_element_function(lambda x: 10 // x)
+    executor.set_post_process_chunk_function(lambda x: x)
+
+    with pytest.raises(ZeroDivisionError):
+        executor.execute()
+
+    failed = [metrics for metrics in executor.progress.item_metrics if metrics.error is not None]
+    assert len(failed) == 1
+    assert "ZeroDivisionError" in failed[0].error
+
+
+def test_cost_function_orders_submission():
+    processing_order: List[int] = []
+
+    def process_element(entry: int) -> int:
+        processing_order.append(entry)
+        return entry
+
+    executor = ParallelExecutor[int, int, int](execute_serial=True, chunksize=0)
+    was_read = [False]
+
+    def get_entries() -> List[int]:
+        if not was_read[0]:
+            was_read[0] = True
+            return [3, 10, 1, 7]
+        return []
+
+    executor.set_get_entries_function(get_entries)
+    executor.set_process_element_function(process_element)
+    executor.set_post_process_chunk_function(lambda x: x)
+    executor.set_cost_function(float)
+
+    processed, _ = executor.execute()
+
+    # the most expensive entries are processed first, but the result keeps the input order
+    assert processing_order == [10, 7, 3, 1]
+    assert processed == [3, 10, 1, 7]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses SIGKILL")
+def test_worker_crash_is_retried_and_dead_lettered(tmp_path):
+    marker_file = str(tmp_path / "crashed_once")
+
+    def process_element(entry: int) -> int:
+        # entry 2 crashes the first time it is processed (like a memory spike)
+        # entry 4 always crashes the worker
+        if entry == 2 and not os.path.exists(marker_file):
+            open(marker_file, "w", encoding="utf8").close()
+            os.kill(os.getpid(), signal.SIGKILL)
+        if entry == 4:
+            os.kill(os.getpid(), signal.SIGKILL)
+        sleep(0.05)
+        return entry * 10
+
+    executor = ParallelExecutor[int, int, int](processes=2, chunksize=0)
+    executor.set_get_entries_function(lambda: [0, 1, 2, 3, 4, 5])
+    executor.set_process_element_function(process_element)
+    executor.set_post_process_chunk_function(lambda x: x)
+
+    processed, _ = executor.execute()
+
+    assert processed == [0, 10, 20, 30, 50]
+    assert executor.dead_letters == [4]
+    assert executor.progress.items_failed == 1
+
+
+def test_streaming_doesnt_wait_for_the_first_entry():
+    def process_element(entry: int) -> int:
+        if entry == 0:
+            sleep(1.0)
+        return entry
+
+    executor = ParallelExecutor[int, int, int](processes=2)
+    executor.set_get_entries_function(lambda: [0, 1, 2, 3])
+    executor.set_process_element_function(process_element)
+    executor.set_post_process_chunk_function(lambda x: x)
+
+    processed = list(executor.execute_streaming(max_pending=4))
+
+    # the fast entries are delivered while the first one is still processed
+    assert processed[-1] == 0
+    assert sorted(processed) == [0, 1, 2, 3]
+
+
+def test_unsupported_pathos_version(monkeypatch):
+    # without access to the worker processes, the entries are still processed
+    monkeypatch.setattr(parallelexecution, '_SUPPORTED_PATHOS_VERSIONS', [])
+
+    executor = ParallelExecutor[int, int, int](processes=2)
+    executor.set_get_entries_function(lambda: [0, 1, 2, 3])
+    executor.set_process_element_function(lambda entry: entry * 10)
+    executor.set_post_process_chunk_function(lambda x: x)
+
+    processed, _ = executor.execute()
+
+    assert processed == [0, 10, 20, 30]
+
+
+def test_memory_error_is_retried_and_dead_lettered():
+    executor = ParallelExecutor[int, int, int](execute_serial=True, chunksize=0)
+    executor.set_get_entries_function(lambda: [1, 2, 3])
+
+    def process_element(entry: int) -> int:
+        if entry == 2:
+            raise MemoryError()
+        return entry
+
+    executor.set_process_element_function(process_element)
+    executor.set_post_process_chunk_function(lambda x: x)
+
+    processed = list(executor.execute_streaming())
+
+    assert sorted(processed) == [1, 3]
+    assert executor.dead_letters == [2]
+
+
+def test_progress_logging(caplog):
+    executor = ThreadExecutor[int, int, int](processes=2, chunksize=0)
+    executor.set_get_entries_function(lambda: list(range(50)))
+    executor.set_process_element_function(lambda x: x)
+    executor.set_post_process_chunk_function(lambda x: x)
+
+    with caplog.at_level(logging.INFO):
+        executor.execute()
+
+    # not every item is logged on info level, but the last one is
+    progress_messages = [record.getMessage() for record in caplog.records
+                         if 'items in' in record.getMessage()]
+    assert 0 < len(progress_messages) < 50
+    assert 'processed 50/50 items' in progress_messages[-1]
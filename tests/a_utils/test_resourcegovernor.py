@@ -0,0 +1,93 @@
+import os
+from unittest.mock import patch
+
+import pytest
+
+from secfsdstools.a_config.configmodel import Configuration
+from secfsdstools.a_utils.parallelexecution import ParallelExecutor, ThreadExecutor
+from secfsdstools.a_utils.resourcegovernor import ResourceGovernor, get_cgroup_cpu_limit, \
+    get_cgroup_memory_limit_mb, get_available_cpus, MAX_PROCESSES_ENV_VAR_NAME
+
+
+@pytest.fixture(autouse=True)
+def reset_governor():
+    ResourceGovernor._limits = None
+    yield
+    ResourceGovernor._limits = None
+
+
+def _write(path, content: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf8') as file:
+        file.write(content)
+
+
+def test_cgroup_v2_limits(tmp_path):
+    _write(str(tmp_path / 'cpu.max'), '150000 100000\n')
+    _write(str(tmp_path / 'memory.max'), str(2 * 1024 * 1024 * 1024) + '\n')
+
+    assert get_cgroup_cpu_limit(str(tmp_path)) == 1.5
+    assert get_cgroup_memory_limit_mb(str(tmp_path)) == 2048
+    assert get_available_cpus(str(tmp_path)) <= 2
+
+
+def test_cgroup_v2_no_limits(tmp_path):
+    _write(str(tmp_path / 'cpu.max'), 'max 100000\n')
+    _write(str(tmp_path / 'memory.max'), 'max\n')
+
+    assert get_cgroup_cpu_limit(str(tmp_path)) is None
+    assert get_cgroup_memory_limit_mb(str(tmp_path)) is None
+
+
+def test_cgroup_v1_limits(tmp_path):
+    _write(str(tmp_path / 'cpu' / 'cpu.cfs_quota_us'), '200000\n')
+    _write(str(tmp_path / 'cpu' / 'cpu.cfs_period_us'), '100000\n')
+    _write(str(tmp_path / 'memory' / 'memory.limit_in_bytes'), str(512 * 1024 * 1024) + '\n')
+
+    assert get_cgroup_cpu_limit(str(tmp_path)) == 2.0
+    assert get_cgroup_memory_limit_mb(str(tmp_path)) == 512
+
+
+def test_no_cgroup(tmp_path):
+    assert get_cgroup_cpu_limit(str(tmp_path)) is None
+    assert get_cgroup_memory_limit_mb(str(tmp_path)) is None
+    assert get_available_cpus(str(tmp_path)) >= 1
+
+
+def test_configuration_and_env_precedence(tmp_path):
+    config = Configuration(download_dir="", db_dir="", parquet_dir="", user_agent_email="",
+                           max_processes=3, max_threads=5, io_concurrency=2,
+                           memory_budget_mb=1000)
+
+    with patch.dict(os.environ, {}, clear=True):
+        limits = ResourceGovernor.configure(config, cgroup_dir=str(tmp_path))
+    assert limits.max_processes == 3
+    assert limits.max_threads == 5
+    assert limits.io_concurrency == 2
+    assert limits.memory_budget_mb == 1000
+
+    with patch.dict(os.environ, {MAX_PROCESSES_ENV_VAR_NAME: '2'}, clear=True):
+        limits = ResourceGovernor.configure(config, cgroup_dir=str(tmp_path))
+    assert limits.max_processes == 2
+
+    # requested values are capped, the memory budget reduces the number of processes
+    assert ResourceGovernor.get_processes(requested=10) == 2
+    assert ResourceGovernor.get_processes(memory_per_task_mb=800) == 1
+    assert ResourceGovernor.get_threads(requested=10) == 5
+    assert ResourceGovernor.get_io_concurrency(requested=3) == 2
+
+
+def test_executors_use_governor(tmp_path):
+    config = Configuration(download_dir="", db_dir="", parquet_dir="", user_agent_email="",
+                           max_processes=1, max_threads=4)
+    with patch.dict(os.environ, {}, clear=True):
+        ResourceGovernor.configure(config, cgroup_dir=str(tmp_path))
+
+    process_executor = ParallelExecutor()
+    assert process_executor.processes == 1
+    # parallelism is turned off, if only one process is allowed
+    assert process_executor.execute_serial
+
+    thread_executor = ThreadExecutor(processes=8)
+    assert thread_executor.processes == 4
+    assert not thread_executor.execute_serial
@@ -45,3 +45,30 @@ def test_parquetindexprocessing(parquetindexaccessor):
     all_states_df: pd.DataFrame = parquetindexaccessor.read_all_indexfileprocessing_df()
     assert len(all_states_df) == 1
     assert all_states_df.iloc[0].fileName == '2022q1.zip'
+
+
+def test_read_index_reports_for_period_range(parquetindexaccessor):
+    def report(adsh: str, form: str, filed: int, period: int, origin_file: str,
+               origin_file_type: str) -> IndexReport:
+        return IndexReport(adsh=adsh, cik=1, form=form, name='bla', filed=filed, period=period,
+                           originFile=origin_file, originFileType=origin_file_type,
+                           fullPath='', url='')
+
+    parquetindexaccessor.insert_indexreport(
+        data=report('a1', '10-K', 20220130, 20211231, '2022q1.zip', 'quarter'))
+    parquetindexaccessor.insert_indexreport(
+        data=report('a1', '10-K', 20220130, 20211231, '20220130.zip', 'daily'))
+    parquetindexaccessor.insert_indexreport(
+        data=report('a2', '10-Q', 20220215, 20211231, '2022q1.zip', 'quarter'))
+    parquetindexaccessor.insert_indexreport(
+        data=report('a3', '10-K', 20220420, 20220331, '20220420.zip', 'daily'))
+
+    reports = parquetindexaccessor.read_index_reports_for_period_range(filed_from=20220101,
+                                                                       filed_to=20220331)
+    assert [(r.adsh, r.originFile) for r in reports] == [('a1', '2022q1.zip'),
+                                                          ('a2', '2022q1.zip')]
+
+    reports = parquetindexaccessor.read_index_reports_for_period_range(period_from=20211231,
+                                                                       forms=['10-k'])
+    assert [(r.adsh, r.originFile) for r in reports] == [('a1', '2022q1.zip'),
+                                                          ('a3', '20220420.zip')]
@@ -0,0 +1,35 @@
+import pandas as pd
+
+from secfsdstools.d_container.concatenating import concat_dataframes
+
+
+def test_concat_same_as_pd_concat():
+    df1 = pd.DataFrame({'key': ['a', 'b'], 'value': [1.0, 2.0], 'count': [1, 2]})
+    df2 = pd.DataFrame({'key': ['c'], 'value': [3.0], 'count': [3]}, index=[5])
+
+    result = concat_dataframes([df1, df2])
+    assert result.equals(pd.concat([df1, df2], ignore_index=True))
+    assert isinstance(result.index, pd.RangeIndex)
+
+    result = concat_dataframes([df1, df2], ignore_index=False)
+    assert result.equals(pd.concat([df1, df2]))
+    assert result.index.tolist() == [0, 1, 5]
+
+
+def test_concat_categoricals():
+    df1 = pd.DataFrame({'key': pd.Categorical(['a', 'b'])})
+    df2 = pd.DataFrame({'key': pd.Categorical(['c'])})
+
+    # pd.concat would convert the column to object
+    result = concat_dataframes([df1, df2])
+    assert isinstance(result.key.dtype, pd.CategoricalDtype)
+    assert result.key.tolist() == ['a', 'b', 'c']
+
+
+def test_concat_different_columns_and_dtypes():
+    df1 = pd.DataFrame({'key': ['a'], 'value': [1]})
+    df2 = pd.DataFrame({'key': ['b'], 'value': [2.5]})
+    df3 = pd.DataFrame({'key': ['c'], 'other': [1]})
+
+    assert concat_dataframes([df1, df2]).equals(pd.concat([df1, df2], ignore_index=True))
+    assert concat_dataframes([df1, df3]).equals(pd.concat([df1, df3], ignore_index=True))
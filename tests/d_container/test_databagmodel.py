@@ -1,6 +1,11 @@
 import os
 
-from secfsdstools.d_container.databagmodel import RawDataBag, RawDataBagStats, JoinedDataBag
+import pandas as pd
+import pytest
+
+from secfsdstools.d_container.databagmodel import RawDataBag, RawDataBagStats, JoinedDataBag, \
+    is_arrow_backed, convert_bag
+from secfsdstools.e_filter.rawfiltering import ReportPeriodRawFilter, USDOnlyRawFilter
 
 CURRENT_DIR, _ = os.path.split(__file__)
 PATH_TO_BAG_1 = f'{CURRENT_DIR}/../_testdata/parquet/quarter/2010q1.zip'
@@ -90,3 +95,225 @@ def test_merge_joined_bag():
 
     assert concatenated.sub_df.shape == (1017, 36)
     assert concatenated.pre_num_df.shape == (294079, 16)
+
+
+@pytest.mark.skipif(not hasattr(pd, 'ArrowDtype'), reason="requires pandas 2.0")
+def test_arrow_backed_bag(tmp_path):
+    bag: RawDataBag = RawDataBag.load(PATH_TO_BAG_1)
+    arrow_bag: RawDataBag = RawDataBag.load(PATH_TO_BAG_1, dtype_backend='pyarrow')
+
+    assert is_arrow_backed(arrow_bag.num_df)
+    assert arrow_bag.num_df.memory_usage(deep=True).sum() < \
+           bag.num_df.memory_usage(deep=True).sum()
+
+    # filters and join work on the arrow backed columns
+    filtered = bag[ReportPeriodRawFilter()][USDOnlyRawFilter()]
+    arrow_filtered = arrow_bag[ReportPeriodRawFilter()][USDOnlyRawFilter()]
+    assert arrow_filtered.num_df.shape == filtered.num_df.shape
+    assert arrow_bag.join().pre_num_df.shape == bag.join().pre_num_df.shape
+
+    # concat, save and load keep the arrow backed columns
+    concatenated = RawDataBag.concat([arrow_bag, arrow_bag])
+    assert is_arrow_backed(concatenated.pre_df)
+
+    arrow_bag.save(str(tmp_path))
+    loaded = RawDataBag.load(str(tmp_path), dtype_backend='pyarrow')
+    assert is_arrow_backed(loaded.sub_df)
+
+    # conversion to numpy is only done on request
+    converted = arrow_bag.to_pandas()
+    assert not is_arrow_backed(converted.num_df)
+    pd.testing.assert_frame_equal(converted.num_df, bag.num_df)
+    pd.testing.assert_frame_equal(converted.sub_df, bag.sub_df)
+
+    assert is_arrow_backed(bag.join().to_arrow().pre_num_df)
+
+
+def test_normalized_joined_bag(tmp_path):
+    bag1: RawDataBag = RawDataBag.load(PATH_TO_BAG_1)
+
+    joined_bag: JoinedDataBag = bag1.join()
+    normalized_bag: JoinedDataBag = bag1.join(normalized=True)
+
+    assert normalized_bag.is_normalized()
+    assert normalized_bag.get_pre_num_columns(['value', 'stmt']) \
+        .equals(joined_bag.pre_num_df[['value', 'stmt']])
+
+    # the joined data is stored without the expanded product and stays normalized
+    normalized_bag.save(str(tmp_path))
+    assert not os.path.exists(tmp_path / 'pre_num.txt.parquet')
+
+    loaded_bag = JoinedDataBag.load(str(tmp_path))
+    assert loaded_bag.is_normalized()
+
+    concatenated = JoinedDataBag.concat([normalized_bag, loaded_bag])
+    assert concatenated.is_normalized()
+    assert concatenated.pre_num_df.shape == (2 * 165456, 16)
+
+    assert loaded_bag.pre_num_df.columns.tolist() == joined_bag.pre_num_df.columns.tolist()
+    assert loaded_bag.pre_num_df.equals(joined_bag.pre_num_df)
+    # only the created dataframe is kept
+    assert not loaded_bag.is_normalized()
+    assert loaded_bag.normalized is None
+
+
+def test_arrow_file_format(tmp_path):
+    bag: RawDataBag = RawDataBag.load(PATH_TO_BAG_1)
+
+    arrow_path = tmp_path / 'arrow'
+    arrow_path.mkdir()
+    bag.save(str(arrow_path), file_format='arrow')
+    assert os.path.exists(arrow_path / 'num.txt.arrow')
+
+    loaded = RawDataBag.load(str(arrow_path), mmap=True)
+    assert loaded.num_df.equals(bag.num_df)
+    assert loaded.sub_df.dtypes.equals(bag.sub_df.dtypes)
+
+    # normalized joined bags keep their form
+    joined_path = tmp_path / 'joined'
+    joined_path.mkdir()
+    bag.join(normalized=True).save(str(joined_path), file_format='arrow', compression='lz4')
+    loaded_joined = JoinedDataBag.load(str(joined_path))
+    assert loaded_joined.is_normalized()
+    assert loaded_joined.pre_num_df.equals(bag.join().pre_num_df)
+
+    # existing parquet bags can be converted
+    converted_path = tmp_path / 'converted'
+    converted_path.mkdir()
+    convert_bag(PATH_TO_BAG_1, str(converted_path))
+    assert sorted(os.listdir(converted_path)) == ['num.txt.arrow', 'pre.txt.arrow',
+                                                  'sub.txt.arrow']
+    assert RawDataBag.load(str(converted_path), mmap=True).pre_df.equals(bag.pre_df)
+
+    with pytest.raises(ValueError):
+        bag.save(str(tmp_path / 'converted'), file_format='csv')
+
+
+@pytest.mark.skipif(not hasattr(pd, 'ArrowDtype'), reason="requires pandas 2.0")
+def test_arrow_file_format_mmap_arrow_backed(tmp_path):
+    bag: RawDataBag = RawDataBag.load(PATH_TO_BAG_1)
+    bag.save(str(tmp_path), file_format='arrow')
+
+    # the columns reference the memory-mapped data
+    loaded = RawDataBag.load(str(tmp_path), dtype_backend='pyarrow', mmap=True)
+    assert is_arrow_backed(loaded.num_df)
+    assert loaded.to_pandas().num_df.equals(bag.num_df)
+
+
+def test_concat_saved(tmp_path):
+    bag1: RawDataBag = RawDataBag.load(PATH_TO_BAG_1)
+    bag2: RawDataBag = RawDataBag.load(PATH_TO_BAG_2)[USDOnlyRawFilter()]
+
+    paths = []
+    for name, bag, file_format in [('bag1', bag1, 'parquet'), ('bag2', bag2, 'arrow')]:
+        for kind, content in [('raw', bag), ('normalized', bag.join(normalized=True))]:
+            path = tmp_path / name / kind
+            path.mkdir(parents=True)
+            content.save(str(path), file_format=file_format)
+        paths.append(tmp_path / name)
+
+    expected = RawDataBag.concat([bag1, bag2])
+
+    raw_path = tmp_path / 'raw'
+    raw_path.mkdir()
+    RawDataBag.concat_saved([str(path / 'raw') for path in paths], str(raw_path))
+    loaded = RawDataBag.load(str(raw_path))
+    assert loaded.num_df.equals(expected.num_df)
+    assert loaded.pre_df.equals(expected.pre_df)
+
+    # the row positions of the normalized bags are adjusted
+    joined_path = tmp_path / 'joined'
+    joined_path.mkdir()
+    JoinedDataBag.concat_saved([str(path / 'normalized') for path in paths], str(joined_path),
+                               file_format='arrow')
+    loaded_joined = JoinedDataBag.load(str(joined_path))
+    assert loaded_joined.is_normalized()
+    assert loaded_joined.pre_num_df.equals(expected.join().pre_num_df)
+
+
+def test_memory_report_and_compact(tmp_path):
+    bag: RawDataBag = RawDataBag.load(PATH_TO_BAG_1)
+
+    report_df = bag.memory_report(float32_values=True)
+    assert len(report_df) == 36 + 10 + 9
+    assert report_df.share.sum() == pytest.approx(1.0)
+    value_entry = report_df[(report_df.table == 'num_df') & (report_df.column == 'value')]
+    assert value_entry.recommended_dtype.tolist() == ['float32']
+
+    compact_bag = bag.compact()
+    assert compact_bag.num_df.qtrs.dtype == 'int8'
+    assert compact_bag.pre_df.line.dtype == 'int16'
+    assert compact_bag.num_df.value.dtype == 'float64'
+    assert isinstance(compact_bag.num_df.uom.dtype, pd.CategoricalDtype)
+    assert compact_bag.num_df.adsh.dtype == object
+    assert compact_bag.memory_report().memory_bytes.sum() < report_df.memory_bytes.sum()
+    assert bag.compact(float32_values=True).num_df.value.dtype == 'float32'
+
+    # the estimated memory matches the memory of the compacted columns
+    compact_report_df = compact_bag.memory_report().set_index(['table', 'column'])
+    estimates = report_df.set_index(['table', 'column'])
+    for column in ['qtrs', 'uom']:
+        assert estimates.loc[('num_df', column), 'recommended_dtype'] == \
+               compact_report_df.loc[('num_df', column), 'dtype']
+        assert estimates.loc[('num_df', column), 'recommended_memory_bytes'] == \
+               pytest.approx(compact_report_df.loc[('num_df', column), 'memory_bytes'], rel=0.05)
+
+    # filters and join work on compact bags, save and load keep the dtypes
+    filtered = bag[ReportPeriodRawFilter()][USDOnlyRawFilter()]
+    compact_filtered = compact_bag[ReportPeriodRawFilter()][USDOnlyRawFilter()]
+    assert compact_filtered.num_df.shape == filtered.num_df.shape
+    assert compact_bag.join().pre_num_df.shape == bag.join().pre_num_df.shape
+
+    compact_bag.save(str(tmp_path))
+    loaded = RawDataBag.load(str(tmp_path))
+    assert loaded.num_df.dtypes.equals(compact_bag.num_df.dtypes)
+    assert loaded.pre_df.dtypes.equals(compact_bag.pre_df.dtypes)
+
+
+def test_metadata(tmp_path):
+    bag1: RawDataBag = RawDataBag.load(PATH_TO_BAG_1)
+    bag2: RawDataBag = RawDataBag.load(PATH_TO_BAG_2)
+
+    for name, bag, file_format in [('bag1', bag1, 'parquet'), ('bag2', bag2.compact(), 'arrow')]:
+        (tmp_path / name).mkdir()
+        bag.save(str(tmp_path / name), file_format=file_format)
+
+    metadata = RawDataBag.inspect(str(tmp_path / 'bag1'))
+    assert metadata.table_rows == {'sub.txt': 495, 'pre.txt': 88378, 'num.txt': 151692}
+    assert metadata.number_of_reports == 495
+    assert metadata.distinct_ciks == 484
+    assert metadata.quarters == ['2010q1']
+    assert sum(metadata.reports_per_form.values()) == 495
+    assert metadata.ddate_range[0] <= metadata.ddate_range[1]
+
+    # statistics of a loaded bag are answered from the metadata
+    loaded = RawDataBag.load(str(tmp_path / 'bag1'))
+    assert loaded.statistics() == bag1.statistics()
+
+    # the content hash doesn't depend on the dtypes or the format
+    metadata2 = RawDataBag.inspect(str(tmp_path / 'bag2'))
+    assert metadata2.content_hash == bag2._calculate_metadata().content_hash
+    assert metadata2.content_hash != metadata.content_hash
+
+    # integers, floats, and strings are hashed independent of their width resp. categorization
+    hashes = bag2._calculate_metadata().table_hashes
+    widened_bag = bag2.copy_bag()
+    widened_bag.pre_df['line'] = widened_bag.pre_df.line.astype('int64')
+    widened_bag.sub_df['form'] = widened_bag.sub_df.form.astype('category')
+    assert widened_bag._calculate_metadata().table_hashes == hashes
+
+    # the metadata of concatenated bags is combined from the metadata of the parts, the
+    # hashes are calculated from the concatenated data
+    (tmp_path / 'concat').mkdir()
+    RawDataBag.concat_saved([str(tmp_path / 'bag1'), str(tmp_path / 'bag2')],
+                            str(tmp_path / 'concat'))
+    concat_metadata = RawDataBag.inspect(str(tmp_path / 'concat'))
+    assert concat_metadata == RawDataBag.concat([bag1, bag2])._calculate_metadata()
+
+    # the content hash can be skipped
+    (tmp_path / 'unhashed').mkdir()
+    bag1.save(str(tmp_path / 'unhashed'), content_hash=False)
+    unhashed_metadata = RawDataBag.inspect(str(tmp_path / 'unhashed'))
+    assert unhashed_metadata.content_hash is None
+    assert unhashed_metadata.table_rows == metadata.table_rows
+    assert concat_metadata.quarters == ['2010q1', '2010q2']
@@ -0,0 +1,81 @@
+import gc
+import os
+import tracemalloc
+from typing import Tuple
+
+import pytest
+
+from secfsdstools.d_container.bagmetadata import hash_dataframe
+from secfsdstools.d_container.databagmodel import RawDataBag, column_view
+from secfsdstools.e_filter.rawfiltering import ReportPeriodRawFilter, MainCoregRawFilter, \
+    USDOnlyRawFilter
+from secfsdstools.e_presenter.presenting import StandardStatementPresenter
+
+CURRENT_DIR, _ = os.path.split(__file__)
+PATH_TO_BAG_1 = f'{CURRENT_DIR}/../_testdata/parquet/quarter/2010q1.zip'
+
+
+@pytest.fixture(scope="module")
+def bag() -> RawDataBag:
+    return RawDataBag.load(PATH_TO_BAG_1)
+
+
+def _bag_size(bag: RawDataBag) -> int:
+    return sum(df.memory_usage(deep=True).sum() for df in [bag.sub_df, bag.pre_df, bag.num_df])
+
+
+def _traced_memory(function) -> Tuple[int, int]:
+    # returns the memory still allocated after the call and the peak memory during the call
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = function()
+        current, peak = tracemalloc.get_traced_memory()
+        del result
+        return current, peak
+    finally:
+        tracemalloc.stop()
+
+
+def _peak_memory(function) -> int:
+    return _traced_memory(function)[1]
+
+
+def test_pipeline_does_not_modify_bag(bag):
+    hashes = [hash_dataframe(df) for df in [bag.sub_df, bag.pre_df, bag.num_df]]
+
+    joined_bag = bag[ReportPeriodRawFilter()][MainCoregRawFilter()][USDOnlyRawFilter()].join()
+    pre_num_hash = hash_dataframe(joined_bag.pre_num_df)
+    joined_bag.present(StandardStatementPresenter(invert_negating=True))
+
+    assert hashes == [hash_dataframe(df) for df in [bag.sub_df, bag.pre_df, bag.num_df]]
+    assert pre_num_hash == hash_dataframe(joined_bag.pre_num_df)
+
+
+def test_column_view(bag):
+    view = column_view(bag.num_df, ['adsh', 'value'])
+    assert view.equals(bag.num_df[['adsh', 'value']])
+
+    # replacing a column doesn't change the source
+    view['value'] = -view.value
+    assert (bag.num_df.value.fillna(0) >= 0).any()
+    assert not view.value.equals(bag.num_df.value)
+
+    # the view only references the data of the bag
+    retained, _ = _traced_memory(lambda: column_view(bag.num_df, ['adsh', 'tag', 'value']))
+    assert retained < 0.001 * _bag_size(bag)
+
+
+def test_peak_memory(bag):
+    # the peak memory of the standard pipeline steps in relation to the size of the bag
+    size = _bag_size(bag)
+    filtered = bag[ReportPeriodRawFilter()][MainCoregRawFilter()][USDOnlyRawFilter()]
+    joined_bag = filtered.join()
+
+    assert _peak_memory(
+        lambda: bag[ReportPeriodRawFilter()][MainCoregRawFilter()][USDOnlyRawFilter()]) \
+           < 0.2 * size
+    assert _peak_memory(filtered.join) < 0.2 * size
+    assert _peak_memory(
+        lambda: joined_bag.present(StandardStatementPresenter(invert_negating=True))) \
+           < 0.4 * size
@@ -0,0 +1,71 @@
+import os
+
+import pandas as pd
+import pytest
+
+from secfsdstools.a_utils.resourcegovernor import ResourceGovernor
+from secfsdstools.d_container.databagmodel import RawDataBag
+from secfsdstools.d_container.joining import join_pre_num, merge_on_keys
+
+CURRENT_DIR, _ = os.path.split(__file__)
+PATH_TO_BAG_1 = f'{CURRENT_DIR}/../_testdata/parquet/quarter/2010q1.zip'
+
+KEYS = ['adsh', 'tag', 'version']
+
+
+def _assert_identical(result: pd.DataFrame, expected: pd.DataFrame):
+    # assert_frame_equal is very slow for the object columns of the bags
+    assert result.columns.tolist() == expected.columns.tolist()
+    assert result.dtypes.tolist() == expected.dtypes.tolist()
+    assert result.index.equals(expected.index)
+    assert result.equals(expected)
+
+
+@pytest.fixture(scope="module")
+def bag() -> RawDataBag:
+    return RawDataBag.load(PATH_TO_BAG_1)
+
+
+@pytest.fixture
+def parallel_governor():
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv('SECFSDSTOOLS_MAX_THREADS', '4')
+        ResourceGovernor._limits = None
+        yield
+    ResourceGovernor._limits = None
+
+
+def test_merge_on_keys_order():
+    left = pd.DataFrame({'key': ['b', 'a', 'b', 'c', 'a'], 'left_value': range(5)})
+    right = pd.DataFrame({'key': ['a', 'b', 'a', 'b', 'd'], 'right_value': range(5)})
+
+    _assert_identical(merge_on_keys(left, right, on=['key']),
+                                  pd.merge(left, right, on=['key']))
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_join_pre_num_identical_to_merge(bag, shuffle):
+    num_df, pre_df = bag.num_df, bag.pre_df
+    if shuffle:
+        num_df = num_df.sample(frac=1, random_state=1)
+        pre_df = pre_df.sample(frac=1, random_state=2)
+
+    expected = pd.merge(num_df, pre_df, on=KEYS)
+
+    _assert_identical(join_pre_num(num_df, pre_df), expected)
+    _assert_identical(join_pre_num(num_df, pre_df, partition_rows=10_000), expected)
+
+
+def test_join_pre_num_parallel(bag, parallel_governor):
+    expected = pd.merge(bag.num_df, bag.pre_df, on=KEYS)
+    result = join_pre_num(bag.num_df, bag.pre_df, partition_rows=10_000, parallel=True)
+
+    _assert_identical(result, expected)
+
+
+def test_join_pre_num_categorical(bag):
+    num_df = bag.num_df.astype({'uom': 'category'})
+    pre_df = bag.pre_df.astype({'stmt': 'category'})
+
+    _assert_identical(join_pre_num(num_df, pre_df),
+                                  pd.merge(num_df, pre_df, on=KEYS))
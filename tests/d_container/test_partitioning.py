@@ -0,0 +1,100 @@
+import os
+
+import pandas as pd
+import pytest
+
+from secfsdstools.d_container.databagmodel import RawDataBag, JoinedDataBag
+from secfsdstools.d_container.partitioning import PartitionedStorage, filed_to_quarter
+
+CURRENT_DIR, _ = os.path.split(__file__)
+PATH_TO_BAG_1 = f'{CURRENT_DIR}/../_testdata/parquet/quarter/2010q1.zip'
+PATH_TO_BAG_2 = f'{CURRENT_DIR}/../_testdata/parquet/quarter/2010q2.zip'
+
+
+@pytest.fixture(scope="module")
+def bag1() -> RawDataBag:
+    return RawDataBag.load(PATH_TO_BAG_1)
+
+
+@pytest.fixture(scope="module")
+def bag2() -> RawDataBag:
+    return RawDataBag.load(PATH_TO_BAG_2)
+
+
+def test_filed_to_quarter():
+    assert filed_to_quarter(pd.Series([20100101, 20100331, 20100401, 20101231])).tolist() == \
+           ['2010q1', '2010q1', '2010q2', '2010q4']
+
+
+def test_save_append_and_load(tmp_path, bag1, bag2):
+    target_path = str(tmp_path)
+    bag1.save_partitioned(target_path, partition_by=['stmt'])
+
+    assert PartitionedStorage.is_partitioned(target_path)
+    assert os.path.isdir(os.path.join(target_path, 'pre.txt', 'quarter=2010q1', 'stmt=BS'))
+
+    # appending the same data again doesn't add anything
+    assert bag2.append(target_path) == 522
+    assert bag1.append(target_path) == 0
+
+    loaded = RawDataBag.load(target_path)
+    assert loaded.sub_df.shape == (495 + 522, 36)
+    assert loaded.pre_df.shape == (88378 + 81340, 10)
+    assert loaded.num_df.shape == (151692 + 118947, 9)
+
+
+def test_load_filters_and_columns(tmp_path, bag1, bag2):
+    target_path = str(tmp_path)
+    bag1.save_partitioned(target_path, partition_by=['stmt'])
+    bag2.append(target_path)
+
+    loaded = RawDataBag.load(target_path,
+                             filters=[('quarter', '==', '2010q2'), ('stmt', 'in', ['BS'])],
+                             columns=['stmt', 'value'])
+
+    assert len(loaded.sub_df) == 522
+    assert loaded.pre_df.stmt.unique().tolist() == ['BS']
+    assert loaded.pre_df.columns.tolist() == ['adsh', 'stmt', 'tag', 'version']
+    assert loaded.num_df.columns.tolist() == ['adsh', 'tag', 'version', 'value']
+    assert len(loaded.num_df) == 118947
+
+    # a filter on the sub data restricts pre and num to the selected reports
+    loaded = RawDataBag.load(target_path, filters=[('form', '==', '10-K')])
+    assert loaded.sub_df.form.unique().tolist() == ['10-K']
+    assert loaded.num_df.adsh.isin(loaded.sub_df.adsh).all()
+
+
+def test_joined_bag(tmp_path, bag1):
+    joined_bag = bag1.join()
+    joined_bag.save_partitioned(str(tmp_path), partition_by=['form', 'stmt'])
+
+    loaded = JoinedDataBag.load(str(tmp_path), filters=[('stmt', '==', 'BS')])
+    assert len(loaded.pre_num_df) == (joined_bag.pre_num_df.stmt == 'BS').sum()
+
+
+def test_filters_require_partitioned_bag():
+    with pytest.raises(ValueError):
+        RawDataBag.load(PATH_TO_BAG_1, filters=[('quarter', '==', '2010q1')])
+
+
+def test_write_partitions(tmp_path):
+    sub_df = pd.DataFrame({'adsh': ['a1', 'a2'], 'filed': [20100115, 20100415],
+                           'form': ['10-K', '10-Q']})
+    pre_df = pd.DataFrame({'adsh': ['a1', 'a2', 'a1', 'a2', 'a1'],
+                           'stmt': ['BS', 'IS', None, 'IS', 'BS'],
+                           'line': [1, 2, 3, 4, 5]})
+    storage = PartitionedStorage(str(tmp_path))
+    storage.create(tables=['sub.txt', 'pre.txt'], partition_by=['form', 'stmt'])
+    storage.write(tables={'sub.txt': sub_df, 'pre.txt': pre_df}, sub_df=sub_df)
+
+    partitions = sorted(os.path.relpath(path, tmp_path / 'pre.txt')
+                        for path, _, files in os.walk(tmp_path / 'pre.txt')
+                        if any(file.startswith('part-') for file in files))
+    assert partitions == [os.path.join('quarter=2010q1', 'form=10-K', 'stmt=BS'),
+                          os.path.join('quarter=2010q1', 'form=10-K', 'stmt=__null__'),
+                          os.path.join('quarter=2010q2', 'form=10-Q', 'stmt=IS')]
+
+    # the rows keep their order within a partition
+    bs_df = storage.read_table('pre.txt', filters=[('stmt', '==', 'BS')]).to_pandas()
+    assert bs_df.line.tolist() == [1, 5]
+    assert sorted(storage.read_table('pre.txt').to_pandas().line.tolist()) == [1, 2, 3, 4, 5]
@@ -0,0 +1,104 @@
+import asyncio
+import os
+
+import pytest
+
+from secfsdstools.a_config.configmodel import Configuration
+from secfsdstools.a_utils.asyncexecution import AsyncRequestExecutor
+from secfsdstools.b_setup.setupdb import DbCreator
+from secfsdstools.c_index.indexdataaccess import IndexReport, ParquetDBIndexingAccessor
+from secfsdstools.e_collector.multireportcollecting import MultiReportCollector
+from secfsdstools.e_collector.reportcollecting import SingleReportCollector
+from secfsdstools.e_collector.zipcollecting import ZipCollector
+
+APPLE_ADSH_10Q_2010_Q1 = '0001193125-10-012085'
+APPLE_ADSH_10Q_2010_Q2 = '0001193125-10-088957'
+
+CURRENT_DIR, _ = os.path.split(__file__)
+PATH_TO_PARQUET_Q1 = f'{CURRENT_DIR}/../_testdata/parquet/quarter/2010q1.zip'
+PATH_TO_PARQUET_Q2 = f'{CURRENT_DIR}/../_testdata/parquet/quarter/2010q2.zip'
+
+
+def _report(adsh: str, path: str, origin_file: str) -> IndexReport:
+    return IndexReport(adsh=adsh, cik=320193, name='APPLE INC', form='10-Q', filed=0, period=0,
+                       originFile=origin_file, originFileType='quarter', fullPath=path, url='')
+
+
+@pytest.fixture
+def executor():
+    executor = AsyncRequestExecutor(max_workers=4)
+    yield executor
+    executor.shutdown()
+
+
+def test_single_report_collect_async(executor):
+    collector = SingleReportCollector(report=_report(APPLE_ADSH_10Q_2010_Q1, PATH_TO_PARQUET_Q1,
+                                                     '2010q1.zip'))
+
+    async def run():
+        return await asyncio.gather(*[collector.collect_async(executor=executor)
+                                      for _ in range(5)])
+
+    bags = asyncio.run(run())
+    # the concurrent requests are coalesced into a single read
+    assert executor.metrics.executed == 1
+    assert executor.metrics.coalesced == 4
+    assert all(bag is bags[0] for bag in bags)
+    assert bags[0].num_df.equals(collector.collect().num_df)
+
+
+def test_multi_report_collect_async(executor):
+    reports = [_report(APPLE_ADSH_10Q_2010_Q1, PATH_TO_PARQUET_Q1, '2010q1.zip'),
+               _report(APPLE_ADSH_10Q_2010_Q2, PATH_TO_PARQUET_Q2, '2010q2.zip')]
+    collector = MultiReportCollector.get_reports_by_indexreports(index_reports=reports,
+                                                                 stmt_filter=['BS'])
+
+    bag = asyncio.run(collector.collect_async(executor=executor))
+    assert executor.metrics.executed == 2
+    assert set(bag.sub_df.adsh) == {APPLE_ADSH_10Q_2010_Q1, APPLE_ADSH_10Q_2010_Q2}
+    assert bag.pre_df.shape == collector.collect().pre_df.shape
+
+
+def test_zip_collect_async(executor):
+    collector = ZipCollector(datapaths=[PATH_TO_PARQUET_Q1, PATH_TO_PARQUET_Q2],
+                             forms_filter=['10-K'], stmt_filter=['BS'],
+                             post_load_filter=lambda bag: bag)
+
+    bag = asyncio.run(collector.collect_async(executor=executor))
+    expected = collector.collect()
+    assert set(bag.sub_df.form) == {'10-K'}
+    assert bag.num_df.shape == expected.num_df.shape
+    assert bag.pre_df.shape == expected.pre_df.shape
+
+
+def test_index_lookups_async(tmp_path, executor):
+    DbCreator(db_dir=str(tmp_path)).create_db()
+    accessor = ParquetDBIndexingAccessor(db_dir=str(tmp_path))
+    accessor.insert_indexreport(
+        data=_report(APPLE_ADSH_10Q_2010_Q1, PATH_TO_PARQUET_Q1, '2010q1.zip'))
+    accessor.insert_indexreport(
+        data=_report(APPLE_ADSH_10Q_2010_Q2, PATH_TO_PARQUET_Q2, '2010q2.zip'))
+
+    async def run():
+        return await asyncio.gather(
+            accessor.read_index_report_for_adsh_async(APPLE_ADSH_10Q_2010_Q1, executor=executor),
+            accessor.read_index_reports_for_adshs_async(
+                [APPLE_ADSH_10Q_2010_Q2, APPLE_ADSH_10Q_2010_Q1], executor=executor),
+            accessor.read_index_reports_for_ciks_async([320193], forms=['10-Q'],
+                                                       executor=executor))
+
+    report, reports, company_reports = asyncio.run(run())
+    assert report.originFile == '2010q1.zip'
+    assert [x.adsh for x in reports] == [APPLE_ADSH_10Q_2010_Q1, APPLE_ADSH_10Q_2010_Q2]
+    assert len(company_reports) == 2
+
+    configuration = Configuration(download_dir="", db_dir=str(tmp_path), parquet_dir="",
+                                  user_agent_email="")
+
+    async def collect():
+        collector = await SingleReportCollector.get_report_by_adsh_async(
+            APPLE_ADSH_10Q_2010_Q1, configuration=configuration, executor=executor)
+        return await collector.collect_async(executor=executor)
+
+    bag = asyncio.run(collect())
+    assert bag.sub_df.adsh.tolist() == [APPLE_ADSH_10Q_2010_Q1]
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+from secfsdstools.a_utils.resourcegovernor import ResourceGovernor
+from secfsdstools.e_collector.basecollector import BaseCollector, choose_adsh_strategy, \
+    FILTER_ADSH_STRATEGY, NO_ADSH_FILTER_STRATEGY, SEMI_JOIN_ADSH_STRATEGY
+
+APPLE_ADSH_10Q_2010_Q1 = '0001193125-10-012085'
+CURRENT_DIR, _ = os.path.split(__file__)
+PATH_TO_ZIP = f'{CURRENT_DIR}/../_testdata/parquet/quarter/2010q1.zip'
+
+
+def _assert_same_bags(expected, result):
+    assert expected.sub_df.equals(result.sub_df)
+    assert expected.pre_df.equals(result.pre_df)
+    assert expected.num_df.equals(result.num_df)
+
+
+@pytest.mark.parametrize("sub_df_filter", [('adsh', '==', APPLE_ADSH_10Q_2010_Q1), None])
+def test_concurrent_reads(sub_df_filter):
+    collector = BaseCollector(datapath=PATH_TO_ZIP, stmt_filter=['BS'])
+
+    bags = []
+    for io_concurrency in ['1', '3']:
+        with pytest.MonkeyPatch.context() as monkeypatch:
+            monkeypatch.setenv('SECFSDSTOOLS_IO_CONCURRENCY', io_concurrency)
+            ResourceGovernor._limits = None
+            bags.append(collector.basecollect(sub_df_filter=sub_df_filter))
+    ResourceGovernor._limits = None
+
+    serial, concurrent = bags
+    _assert_same_bags(serial, concurrent)
+    assert set(concurrent.pre_df.stmt) == {'BS'}
+
+
+def test_choose_adsh_strategy():
+    assert choose_adsh_strategy(selected_reports=495, total_reports=495) == \
+           NO_ADSH_FILTER_STRATEGY
+    assert choose_adsh_strategy(selected_reports=1, total_reports=495) == \
+           SEMI_JOIN_ADSH_STRATEGY
+    assert choose_adsh_strategy(selected_reports=1, total_reports=495,
+                                dtype_backend='pyarrow') == SEMI_JOIN_ADSH_STRATEGY
+    assert choose_adsh_strategy(selected_reports=1, total_reports=495,
+                                dtype_backend='numpy_nullable') == FILTER_ADSH_STRATEGY
+
+    with pytest.raises(ValueError):
+        BaseCollector(datapath=PATH_TO_ZIP, adsh_strategy='unknown')
+
+
+@pytest.mark.parametrize("sub_df_filter", [('adsh', '==', APPLE_ADSH_10Q_2010_Q1),
+                                           ('form', 'in', ['10-K']),
+                                           # selects all reports
+                                           ('form', 'in', ['10-K', '10-Q', '20-F', '10-K/A',
+                                                           '8-K', '20-F/A', '40-F', 'S-4'])])
+def test_adsh_strategies(sub_df_filter):
+    # None chooses the strategy automatically
+    bags = [BaseCollector(datapath=PATH_TO_ZIP, stmt_filter=['BS', 'IS'],
+                          adsh_strategy=strategy).basecollect(sub_df_filter=sub_df_filter)
+            for strategy in [FILTER_ADSH_STRATEGY, SEMI_JOIN_ADSH_STRATEGY, None]]
+    _assert_same_bags(bags[0], bags[1])
+    _assert_same_bags(bags[0], bags[2])
+
+    # without an adsh filter, the rows of all reports are read
+    unfiltered = BaseCollector(datapath=PATH_TO_ZIP, stmt_filter=['BS', 'IS'],
+                               adsh_strategy=NO_ADSH_FILTER_STRATEGY) \
+        .basecollect(sub_df_filter=sub_df_filter)
+    assert unfiltered.num_df.adsh.nunique() == 495
+    if len(bags[0].sub_df) == 495:
+        _assert_same_bags(bags[0], unfiltered)
+
+
+def test_adsh_strategies_arrow_backed():
+    pytest.importorskip("pandas", minversion="2.0")
+    bags = [BaseCollector(datapath=PATH_TO_ZIP, dtype_backend='pyarrow',
+                          adsh_strategy=strategy).basecollect(('form', 'in', ['10-K']))
+            for strategy in [FILTER_ADSH_STRATEGY, SEMI_JOIN_ADSH_STRATEGY]]
+    _assert_same_bags(bags[0], bags[1])
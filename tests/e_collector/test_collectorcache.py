@@ -0,0 +1,164 @@
+import os
+import shutil
+import time
+
+import pytest
+
+from secfsdstools.c_index.indexdataaccess import IndexReport
+from secfsdstools.d_container.databagmodel import RawDataBag
+from secfsdstools.e_collector.collectorcache import CollectorCache, create_cache_key, \
+    get_bag_memory
+from secfsdstools.e_collector.multireportcollecting import MultiReportCollector
+from secfsdstools.e_collector.reportcollecting import SingleReportCollector
+
+APPLE_ADSH_10Q_2010_Q1 = '0001193125-10-012085'
+APPLE_ADSH_10Q_2010_Q2 = '0001193125-10-088957'
+
+CURRENT_DIR, _ = os.path.split(__file__)
+PATH_TO_PARQUET_Q1 = f'{CURRENT_DIR}/../_testdata/parquet/quarter/2010q1.zip'
+PATH_TO_PARQUET_Q2 = f'{CURRENT_DIR}/../_testdata/parquet/quarter/2010q2.zip'
+
+
+def _report(adsh: str, path: str, origin_file: str) -> IndexReport:
+    return IndexReport(adsh=adsh, cik=320193, name='APPLE INC', form='10-Q', filed=0, period=0,
+                       originFile=origin_file, originFileType='quarter', fullPath=path, url='')
+
+
+@pytest.fixture
+def datapath(tmp_path) -> str:
+    # a copy of the data, so that the files can be modified
+    path = str(tmp_path / '2010q1.zip')
+    shutil.copytree(PATH_TO_PARQUET_Q1, path)
+    return path
+
+
+def test_cache_key():
+    key = create_cache_key(PATH_TO_PARQUET_Q1, ('adsh', 'in', ['b', 'a']), ['IS', 'BS'])
+    assert key == create_cache_key(PATH_TO_PARQUET_Q1, ('adsh', 'in', ['a', 'b']), ['BS', 'IS'])
+    assert key != create_cache_key(PATH_TO_PARQUET_Q1, ('adsh', 'in', ['a', 'b']), ['BS'])
+    assert key != create_cache_key(PATH_TO_PARQUET_Q2, ('adsh', 'in', ['a', 'b']), ['BS', 'IS'])
+
+
+def test_memory_tier(datapath):
+    cache = CollectorCache()
+    collector = SingleReportCollector(report=_report(APPLE_ADSH_10Q_2010_Q1, datapath,
+                                                     '2010q1.zip'),
+                                      stmt_filter=['BS'], cache=cache)
+
+    bag = collector.collect()
+    assert bag is collector.collect()
+    assert cache.metrics.misses == 1
+    assert cache.metrics.memory_hits == 1
+    assert cache.metrics.hit_ratio == 0.5
+    assert cache.memory_bytes == get_bag_memory(bag)
+
+    # another filter is another entry
+    SingleReportCollector(report=_report(APPLE_ADSH_10Q_2010_Q1, datapath, '2010q1.zip'),
+                          cache=cache).collect()
+    assert cache.metrics.misses == 2
+
+    # modifying the source invalidates the entries
+    os.utime(os.path.join(datapath, 'num.txt.parquet'), ns=(0, 0))
+    new_bag = collector.collect()
+    assert new_bag is not bag
+    assert new_bag.num_df.equals(bag.num_df)
+    assert cache.metrics.invalidations == 1
+    assert cache.metrics.misses == 3
+
+
+def test_memory_tier_eviction(datapath):
+    collector_bs = SingleReportCollector(report=_report(APPLE_ADSH_10Q_2010_Q1, datapath, ''),
+                                         stmt_filter=['BS'])
+    collector_is = SingleReportCollector(report=_report(APPLE_ADSH_10Q_2010_Q1, datapath, ''),
+                                         stmt_filter=['IS'])
+    size_bs = get_bag_memory(collector_bs.collect())
+    size_is = get_bag_memory(collector_is.collect())
+
+    cache = CollectorCache(max_memory_bytes=max(size_bs, size_is) + 1)
+    collector_bs.cache = cache
+    collector_is.cache = cache
+
+    collector_bs.collect()
+    collector_is.collect()
+    assert cache.metrics.memory_evictions == 1
+    assert cache.memory_bytes == size_is
+
+    collector_is.collect()
+    assert cache.metrics.memory_hits == 1
+
+    # bags that are bigger than the memory tier are not cached
+    cache = CollectorCache(max_memory_bytes=10)
+    collector_bs.cache = cache
+    collector_bs.collect()
+    assert cache.memory_bytes == 0
+
+
+def test_disk_tier(datapath, tmp_path):
+    disk_dir = str(tmp_path / 'cache')
+    report = _report(APPLE_ADSH_10Q_2010_Q1, datapath, '2010q1.zip')
+    bag = SingleReportCollector(report=report,
+                                cache=CollectorCache(disk_dir=disk_dir)).collect()
+    assert len(os.listdir(disk_dir)) == 1
+
+    # the entries are stored without the content hash
+    entry_dir = os.path.join(disk_dir, os.listdir(disk_dir)[0])
+    assert RawDataBag.inspect(entry_dir).content_hash is None
+
+    # a new cache, e.g. in another process, reads the entry from the disk
+    cache = CollectorCache(disk_dir=disk_dir)
+    disk_bag = SingleReportCollector(report=report, cache=cache).collect()
+    assert cache.metrics.disk_hits == 1
+    assert disk_bag.num_df.equals(bag.num_df)
+    assert disk_bag.pre_df.equals(bag.pre_df)
+
+    # the bag is now also in the memory tier
+    SingleReportCollector(report=report, cache=cache).collect()
+    assert cache.metrics.memory_hits == 1
+
+    # expired entries are removed
+    cache = CollectorCache(disk_dir=disk_dir, ttl_seconds=0.01)
+    time.sleep(0.02)
+    SingleReportCollector(report=report, cache=cache).collect()
+    assert cache.metrics.misses == 1
+    assert cache.metrics.invalidations == 1
+
+    # only the most recently used entry fits
+    cache = CollectorCache(disk_dir=disk_dir, max_disk_bytes=1)
+    SingleReportCollector(report=report, stmt_filter=['BS'], cache=cache).collect()
+    assert len(os.listdir(disk_dir)) == 0
+    assert cache.metrics.disk_evictions == 2
+
+    cache.clear()
+    assert cache.memory_bytes == 0
+
+
+def test_multireportcollector():
+    cache = CollectorCache()
+    reports = [_report(APPLE_ADSH_10Q_2010_Q1, PATH_TO_PARQUET_Q1, '2010q1.zip'),
+               _report(APPLE_ADSH_10Q_2010_Q2, PATH_TO_PARQUET_Q2, '2010q2.zip')]
+
+    bag = MultiReportCollector.get_reports_by_indexreports(index_reports=reports[:1],
+                                                           cache=cache).collect()
+    assert cache.metrics.misses == 1
+
+    # only the report from the second file has to be read
+    bag = MultiReportCollector.get_reports_by_indexreports(index_reports=reports,
+                                                           cache=cache).collect()
+    assert cache.metrics.memory_hits == 1
+    assert cache.metrics.misses == 2
+    assert set(bag.sub_df.adsh) == {APPLE_ADSH_10Q_2010_Q1, APPLE_ADSH_10Q_2010_Q2}
+
+    cached_bag = MultiReportCollector.get_reports_by_indexreports(index_reports=reports,
+                                                                  cache=cache).collect()
+    assert cache.metrics.memory_hits == 3
+    assert cached_bag.num_df.shape == bag.num_df.shape
+
+    # the order of the reports doesn't depend on which files are cached
+    cache = CollectorCache()
+    MultiReportCollector.get_reports_by_indexreports(index_reports=reports[1:],
+                                                     cache=cache).collect()
+    partly_cached_bag = MultiReportCollector.get_reports_by_indexreports(index_reports=reports,
+                                                                         cache=cache).collect()
+    assert cache.metrics.memory_hits == 1
+    assert partly_cached_bag.sub_df.adsh.tolist() == bag.sub_df.adsh.tolist() == \
+           [APPLE_ADSH_10Q_2010_Q1, APPLE_ADSH_10Q_2010_Q2]
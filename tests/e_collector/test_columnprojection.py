@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+from secfsdstools.a_utils.constants import NUM_TXT, PRE_TXT, SUB_TXT
+from secfsdstools.c_index.indexdataaccess import IndexReport
+from secfsdstools.e_collector.columnprojection import ColumnProjection, get_projection, \
+    PRESENTER_PROJECTION
+from secfsdstools.e_collector.reportcollecting import SingleReportCollector
+from secfsdstools.e_collector.zipcollecting import ZipCollector
+from secfsdstools.e_filter.rawfiltering import ReportPeriodRawFilter, MainCoregRawFilter, \
+    USDOnlyRawFilter, OfficialTagsOnlyRawFilter, StmtRawFilter
+from secfsdstools.e_presenter.presenting import StandardStatementPresenter
+from secfsdstools.f_standardize.bs_standardize import BalanceSheetStandardizer
+
+APPLE_ADSH_10Q_2010_Q1 = '0001193125-10-012085'
+CURRENT_DIR, _ = os.path.split(__file__)
+PATH_TO_ZIP = f'{CURRENT_DIR}/../_testdata/parquet/quarter/2010q1.zip'
+
+
+def _filter(bag):
+    return bag[ReportPeriodRawFilter()][MainCoregRawFilter()][OfficialTagsOnlyRawFilter()][
+        USDOnlyRawFilter()]
+
+
+@pytest.fixture(scope="module")
+def full_bag():
+    return ZipCollector(datapaths=[PATH_TO_ZIP]).collect()
+
+
+def test_get_columns():
+    projection = ColumnProjection.create(num_columns=['value', 'ddate'])
+    assert projection.get_columns(SUB_TXT, ['adsh', 'cik']) is None
+    # the key columns are always read, the order of the file is kept
+    assert projection.get_columns(NUM_TXT, ['adsh', 'tag', 'version', 'ddate', 'value',
+                                            'footnote']) == \
+           ['adsh', 'tag', 'version', 'ddate', 'value']
+    assert projection.to_dict() == {'sub_columns': None, 'pre_columns': None,
+                                     'num_columns': ['value', 'ddate']}
+
+    assert get_projection('presenter') is PRESENTER_PROJECTION
+    assert get_projection(projection) is projection
+    assert get_projection(None) is None
+    with pytest.raises(ValueError):
+        get_projection('unknown')
+
+
+def test_single_report_projection():
+    report = IndexReport(adsh=APPLE_ADSH_10Q_2010_Q1, cik=320193, name='APPLE INC',
+                         form='10-Q', filed=20100125, period=20091231, originFile='2010q1.zip',
+                         originFileType='quarter', fullPath=PATH_TO_ZIP, url='')
+    bag = SingleReportCollector(report=report,
+                                columns=ColumnProjection.create(sub_columns=['form'],
+                                                                pre_columns=['stmt'],
+                                                                num_columns=['value'])).collect()
+
+    assert bag.sub_df.columns.tolist() == ['adsh', 'form']
+    assert bag.pre_df.columns.tolist() == ['adsh', 'stmt', 'tag', 'version']
+    assert bag.num_df.columns.tolist() == ['adsh', 'tag', 'version', 'value']
+    assert bag.num_df.shape == (145, 4)
+    assert bag.join().pre_num_df.shape[0] > 0
+
+
+def test_presenter_preset(full_bag):
+    bag = ZipCollector(datapaths=[PATH_TO_ZIP], columns='presenter').collect()
+    assert 'footnote' not in bag.num_df.columns
+    assert 'plabel' not in bag.pre_df.columns
+    assert len(bag.sub_df.columns) < len(full_bag.sub_df.columns)
+
+    presenter = StandardStatementPresenter(invert_negating=True, add_form_column=True)
+    expected = _filter(full_bag).join().present(presenter)
+    assert _filter(bag).join().present(presenter).equals(expected)
+
+
+def test_standardizer_preset(full_bag):
+    bag = ZipCollector(datapaths=[PATH_TO_ZIP], columns='standardizer').collect()
+
+    expected = _filter(full_bag)[StmtRawFilter(stmts=['BS'])].join() \
+        .present(BalanceSheetStandardizer())
+    result = _filter(bag)[StmtRawFilter(stmts=['BS'])].join().present(BalanceSheetStandardizer())
+    assert result.equals(expected)
+
+
+def test_lazy_projection(full_bag):
+    bag = ZipCollector(datapaths=[PATH_TO_ZIP], columns='presenter').collect_lazy()
+    materialized = _filter(bag).materialize()
+    assert materialized.num_df.columns.tolist() == list(PRESENTER_PROJECTION.num_columns)
+    assert len(materialized.num_df) == len(_filter(full_bag).num_df)
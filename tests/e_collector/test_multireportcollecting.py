@@ -111,3 +111,14 @@ def test_optimized_load(basicconf, caplog):
         assert len(result.sub_df.adsh.unique()) == 8
 
         assert caplog.messages[0].endswith(' 4')
+
+
+def test_execution_backend(multireportcollector):
+    databag = multireportcollector.collect()
+    # two single reports are read inline instead of starting a pool
+    assert multireportcollector.backend == 'inline'
+
+    threads_collector = MultiReportCollector.get_reports_by_indexreports(
+        index_reports=multireportcollector.index_reports, execution_backend='threads')
+    assert threads_collector.collect().pre_df.shape == databag.pre_df.shape
+    assert threads_collector.backend == 'threads'
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from secfsdstools.a_config.configmodel import Configuration
+from secfsdstools.b_setup.setupdb import DbCreator
+from secfsdstools.c_index.indexdataaccess import IndexFileProcessingState, IndexReport, \
+    ParquetDBIndexingAccessor
+from secfsdstools.d_container.databagmodel import read_parquet
+from secfsdstools.e_collector.periodrangecollecting import PeriodRangeCollector
+from secfsdstools.e_collector.zipcollecting import ZipCollector
+
+APPLE_ADSH_10Q_2010_Q1 = '0001193125-10-012085'
+
+CURRENT_DIR, _ = os.path.split(__file__)
+PATH_TO_PARQUET_Q1 = os.path.realpath(f'{CURRENT_DIR}/../_testdata/parquet/quarter/2010q1.zip')
+PATH_TO_PARQUET_Q2 = os.path.realpath(f'{CURRENT_DIR}/../_testdata/parquet/quarter/2010q2.zip')
+
+
+@pytest.fixture(scope="module")
+def configuration(tmp_path_factory) -> Configuration:
+    db_dir = str(tmp_path_factory.mktemp('db'))
+    DbCreator(db_dir=db_dir).create_db()
+    accessor = ParquetDBIndexingAccessor(db_dir=db_dir)
+
+    for path, name in [(PATH_TO_PARQUET_Q1, '2010q1.zip'), (PATH_TO_PARQUET_Q2, '2010q2.zip')]:
+        sub_df = read_parquet(os.path.join(path, 'sub.txt.parquet'),
+                              columns=['adsh', 'cik', 'name', 'form', 'filed', 'period'])
+        sub_df['fullPath'] = path
+        sub_df['originFile'] = name
+        sub_df['originFileType'] = 'quarter'
+        sub_df['url'] = ''
+        accessor.add_index_report(sub_df, IndexFileProcessingState(
+            fileName=name, fullPath=path, status='processed', entries=0, processTime=''))
+
+    # the same report in a daily file, the quarter file has to be preferred
+    accessor.insert_indexreport(IndexReport(adsh=APPLE_ADSH_10Q_2010_Q1, cik=320193,
+                                            name='APPLE INC', form='10-Q', filed=20100125,
+                                            period=20091231, fullPath='/not/existing',
+                                            originFile='20100125.zip', originFileType='daily',
+                                            url=''))
+    return Configuration(db_dir=db_dir, download_dir='', user_agent_email='', parquet_dir='')
+
+
+def test_filed_range(configuration):
+    collector = PeriodRangeCollector.get_period_range_collector(
+        filed_from=20100101, filed_to=20100131, forms_filter=['10-Q'], stmt_filter=['BS'],
+        configuration=configuration, execution_backend='threads')
+
+    assert {report.fullPath for report in collector.index_reports} == {PATH_TO_PARQUET_Q1}
+    assert APPLE_ADSH_10Q_2010_Q1 in [report.adsh for report in collector.index_reports]
+
+    bag = collector.collect()
+    assert collector.backend == 'threads'
+    expected = ZipCollector(datapaths=[PATH_TO_PARQUET_Q1], forms_filter=['10-Q'],
+                            stmt_filter=['BS']).collect()
+    expected_sub_df = expected.sub_df[expected.sub_df.filed <= 20100131]
+    assert set(bag.sub_df.adsh) == set(expected_sub_df.adsh)
+    assert len(bag.pre_df) == len(expected.pre_df[expected.pre_df.adsh.isin(expected_sub_df.adsh)])
+
+
+def test_period_range(configuration):
+    collector = PeriodRangeCollector.get_period_range_collector(
+        period_from=20100301, period_to=20100331, forms_filter=['10-Q'],
+        configuration=configuration)
+
+    assert len(collector.index_reports) > 0
+    assert all(20100301 <= report.period <= 20100331 for report in collector.index_reports)
+    # the reports for march were filed in the second quarter
+    assert {report.fullPath for report in collector.index_reports} == {PATH_TO_PARQUET_Q2}
+
+    with pytest.raises(ValueError):
+        PeriodRangeCollector.get_period_range_collector(forms_filter=['10-K'],
+                                                        configuration=configuration)
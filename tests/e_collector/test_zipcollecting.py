@@ -6,7 +6,11 @@ import pytest
 
 from secfsdstools.a_config.configmodel import Configuration
 from secfsdstools.c_index.indexdataaccess import IndexFileProcessingState
-from secfsdstools.e_collector.zipcollecting import ZipCollector
+from secfsdstools.d_container.databagmodel import RawDataBag
+from secfsdstools.e_collector.zipcollecting import ZipCollector, tree_reduce
+from secfsdstools.e_filter.rawfiltering import AdshRawFilter, MainCoregRawFilter, \
+    OfficialTagsOnlyRawFilter, ReportPeriodAndPreviousPeriodRawFilter, ReportPeriodRawFilter, \
+    USDOnlyRawFilter
 
 CURRENT_DIR, _ = os.path.split(__file__)
 PATH_TO_ZIP = f'{CURRENT_DIR}/../_testdata/parquet/quarter/2010q1.zip'
@@ -63,3 +67,175 @@ def test_tag_filter():
 
     assert bag.pre_df.tag.unique().tolist() == ['Assets']
     assert bag.num_df.tag.unique().tolist() == ['Assets']
+
+
+def test_progress_callback():
+    received = []
+    zipcollector = ZipCollector(datapaths=[PATH_TO_ZIP], stmt_filter=['BS'],
+                                progress_callback=received.append)
+    zipcollector.collect()
+
+    assert len(received) == 1
+    assert zipcollector.progress.items_done == 1
+    assert zipcollector.progress.rows > 0
+
+
+def _sorted(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(df.columns.tolist()).reset_index(drop=True)
+
+
+def test_collect_lazy():
+    zipcollector = ZipCollector(datapaths=[PATH_TO_ZIP], forms_filter=['10-K'],
+                                stmt_filter=['BS'])
+
+    eager_bag = zipcollector.collect()[ReportPeriodAndPreviousPeriodRawFilter()][
+        MainCoregRawFilter()][USDOnlyRawFilter()][OfficialTagsOnlyRawFilter()]
+
+    lazy_bag = zipcollector.collect_lazy()[ReportPeriodAndPreviousPeriodRawFilter()][
+        MainCoregRawFilter()][USDOnlyRawFilter()][OfficialTagsOnlyRawFilter()]
+
+    # all filters are pushed down to the scan
+    assert lazy_bag.filters == []
+    assert lazy_bag.plan.usd_only
+
+    bag = lazy_bag.materialize()
+    pd.testing.assert_frame_equal(_sorted(bag.sub_df), _sorted(eager_bag.sub_df))
+    pd.testing.assert_frame_equal(_sorted(bag.pre_df), _sorted(eager_bag.pre_df))
+    pd.testing.assert_frame_equal(_sorted(bag.num_df), _sorted(eager_bag.num_df))
+
+    assert len(lazy_bag.join().pre_num_df) == len(eager_bag.join().pre_num_df)
+
+
+def test_collect_lazy_with_opaque_filter():
+    zipcollector = ZipCollector(datapaths=[PATH_TO_ZIP])
+
+    adsh = zipcollector.collect().sub_df.adsh.iloc[0]
+
+    class FirstAdshFilter(AdshRawFilter):
+        pass
+
+    # filters after a filter that cannot be pushed down are applied after loading
+    lazy_bag = zipcollector.collect_lazy()[FirstAdshFilter(adshs=[adsh])][ReportPeriodRawFilter()]
+    assert len(lazy_bag.filters) == 2
+
+    bag = lazy_bag.select(num_columns=['ddate', 'value']).materialize()
+    assert bag.sub_df.adsh.unique().tolist() == [adsh]
+    assert bag.num_df.columns.tolist() == ['adsh', 'tag', 'version', 'ddate', 'value']
+    assert (bag.num_df.adsh == adsh).all()
+
+
+@pytest.mark.skipif(not hasattr(pd, 'ArrowDtype'), reason="requires pandas 2.0")
+def test_dtype_backend():
+    zipcollector = ZipCollector(datapaths=[PATH_TO_ZIP], stmt_filter=['BS'],
+                                dtype_backend='pyarrow')
+
+    bag = zipcollector.collect()
+    assert isinstance(bag.num_df.tag.dtype, pd.ArrowDtype)
+
+    lazy_bag = zipcollector.collect_lazy()[MainCoregRawFilter()].materialize()
+    assert isinstance(lazy_bag.pre_df.stmt.dtype, pd.ArrowDtype)
+    assert lazy_bag.pre_df.shape == bag.pre_df.shape
+
+
+PATH_TO_ZIP_Q2 = f'{CURRENT_DIR}/../_testdata/parquet/quarter/2010q2.zip'
+
+
+def test_iter_collect():
+    zipcollector = ZipCollector(datapaths=[PATH_TO_ZIP, PATH_TO_ZIP_Q2], stmt_filter=['BS'],
+                                forms_filter=['10-K'])
+
+    bags = dict(zipcollector.iter_collect(max_pending=1))
+    assert set(bags.keys()) == {'2010q1.zip', '2010q2.zip'}
+    assert zipcollector.progress.items_done == 2
+
+    single_bag = ZipCollector(datapaths=[PATH_TO_ZIP], stmt_filter=['BS'],
+                              forms_filter=['10-K']).collect()
+    assert bags['2010q1.zip'].num_df.shape == single_bag.num_df.shape
+
+
+def test_collect_to(tmp_path):
+    zipcollector = ZipCollector(datapaths=[PATH_TO_ZIP, PATH_TO_ZIP_Q2], stmt_filter=['BS'],
+                                forms_filter=['10-K'])
+    expected = zipcollector.collect()
+
+    reports = zipcollector.collect_to(str(tmp_path))
+    assert reports == len(expected.sub_df)
+
+    bag = RawDataBag.load(str(tmp_path))
+    assert bag.sub_df.shape == expected.sub_df.shape
+    assert bag.pre_df.shape == expected.pre_df.shape
+    assert bag.num_df.shape == expected.num_df.shape
+
+    # reports that are already stored are skipped
+    assert zipcollector.collect_to(str(tmp_path)) == 0
+
+
+def test_tree_reduce():
+    calls = []
+
+    def add(first: list, second: list) -> list:
+        calls.append((len(first), len(second)))
+        return first + second
+
+    result = tree_reduce(([i] for i in range(7)), add)
+    assert sorted(result) == list(range(7))
+    # pairs of equal size are combined first
+    assert calls[:3] == [(1, 1), (1, 1), (2, 2)]
+    assert tree_reduce([], add) is None
+    assert tree_reduce([[1]], add) == [1]
+
+
+def test_map_reduce():
+    zipcollector = ZipCollector(datapaths=[PATH_TO_ZIP, PATH_TO_ZIP_Q2], stmt_filter=['BS'],
+                                post_load_filter=lambda bag: bag[USDOnlyRawFilter()])
+
+    def count_forms(bag: RawDataBag) -> pd.Series:
+        return bag.sub_df.form.value_counts()
+
+    counts = zipcollector.map_reduce(count_forms, lambda a, b: a.add(b, fill_value=0))
+    expected = zipcollector.collect().sub_df.form.value_counts()
+    pd.testing.assert_series_equal(counts.sort_index().astype(int), expected.sort_index(),
+                                   check_names=False)
+    assert zipcollector.progress.items_done == 2
+
+    # inline, the map_function runs in the calling process and shares its memory
+    seen = []
+
+    def remember_reports(bag: RawDataBag) -> int:
+        seen.append(len(bag.sub_df))
+        return len(bag.sub_df)
+
+    total = zipcollector.map_reduce(remember_reports, lambda a, b: a + b,
+                                    execution_backend='inline')
+    assert zipcollector.backend == 'inline'
+    assert total == sum(seen) == expected.sum()
+
+    # the processes backend can be forced
+    process_counts = zipcollector.map_reduce(count_forms, lambda a, b: a.add(b, fill_value=0),
+                                             execution_backend='processes')
+    assert zipcollector.backend == 'processes'
+    pd.testing.assert_series_equal(process_counts.sort_index(), counts.sort_index())
+
+    assert ZipCollector(datapaths=[]).map_reduce(count_forms, lambda a, b: a + b) is None
+
+
+@pytest.mark.parametrize("execution_backend", ['inline', 'threads', 'processes'])
+def test_execution_backend(execution_backend):
+    zipcollector = ZipCollector(datapaths=[PATH_TO_ZIP, PATH_TO_ZIP_Q2], stmt_filter=['BS'],
+                                execution_backend=execution_backend)
+    bag = zipcollector.collect()
+    assert zipcollector.backend == execution_backend
+    assert bag.sub_df.adsh.nunique() == len(bag.sub_df)
+    assert bag.pre_df.shape[0] == ZipCollector(datapaths=[PATH_TO_ZIP], stmt_filter=['BS']) \
+        .collect().pre_df.shape[0] + ZipCollector(datapaths=[PATH_TO_ZIP_Q2],
+                                                  stmt_filter=['BS']).collect().pre_df.shape[0]
+
+
+def test_execution_backend_by_cost():
+    # the test data is tiny, so it is read inline
+    zipcollector = ZipCollector(datapaths=[PATH_TO_ZIP, PATH_TO_ZIP_Q2])
+    zipcollector.collect()
+    assert zipcollector.backend == 'inline'
+
+    with pytest.raises(ValueError):
+        ZipCollector(datapaths=[PATH_TO_ZIP], execution_backend='unknown')
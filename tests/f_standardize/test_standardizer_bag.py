@@ -28,3 +28,11 @@ def test_concatenate(sample_bag1, sample_bag2):
     assert result.stats_df.shape == (12, 14)
 
     print(result.result_df.shape)
+
+
+def test_save_load_arrow(tmp_path, sample_bag1):
+    sample_bag1.save(str(tmp_path), file_format='arrow')
+
+    loaded = StandardizedBag.load(str(tmp_path), mmap=True)
+    assert loaded.result_df.equals(sample_bag1.result_df)
+    assert loaded.applied_rules_log_df.equals(sample_bag1.applied_rules_log_df)
@@ -0,0 +1,203 @@
+import os
+import socket
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from secfsdstools.b_setup.setupdb import DbCreator
+from secfsdstools.c_index.indexdataaccess import IndexFileProcessingState, IndexReport, \
+    ParquetDBIndexingAccessor
+from secfsdstools.d_container.databagmodel import read_parquet
+from secfsdstools.e_collector.reportcollecting import SingleReportCollector
+from secfsdstools.e_filter.rawfiltering import MainCoregRawFilter, StmtRawFilter, \
+    USDOnlyRawFilter
+from secfsdstools.e_presenter.presenting import StandardStatementPresenter
+from secfsdstools.g_server.reportclient import ReportClient
+from secfsdstools.g_server.reportserver import ReportServer
+from secfsdstools.g_server.reportservice import ReportRequest, ReportService, split_by_adsh
+
+APPLE_ADSH_10Q_2010_Q1 = '0001193125-10-012085'
+
+CURRENT_DIR, _ = os.path.split(__file__)
+PATH_TO_PARQUET_Q1 = os.path.realpath(f'{CURRENT_DIR}/../_testdata/parquet/quarter/2010q1.zip')
+
+
+@pytest.fixture(scope="module")
+def db_dir(tmp_path_factory) -> str:
+    db_dir = str(tmp_path_factory.mktemp('db'))
+    DbCreator(db_dir=db_dir).create_db()
+
+    sub_df = read_parquet(os.path.join(PATH_TO_PARQUET_Q1, 'sub.txt.parquet'),
+                          columns=['adsh', 'cik', 'name', 'form', 'filed', 'period'])
+    sub_df['fullPath'] = PATH_TO_PARQUET_Q1
+    sub_df['originFile'] = '2010q1.zip'
+    sub_df['originFileType'] = 'quarter'
+    sub_df['url'] = ''
+    accessor = ParquetDBIndexingAccessor(db_dir=db_dir)
+    accessor.add_index_report(sub_df, IndexFileProcessingState(
+        fileName='2010q1.zip', fullPath=PATH_TO_PARQUET_Q1, status='processed', entries=0,
+        processTime=''))
+
+    # the same report in a daily file, the quarter file has to be preferred
+    accessor.insert_indexreport(IndexReport(adsh=APPLE_ADSH_10Q_2010_Q1, cik=320193,
+                                            name='APPLE INC', form='10-Q', filed=20100125,
+                                            period=20091231, fullPath='/not/existing',
+                                            originFile='20100125.zip', originFileType='daily',
+                                            url=''))
+    return db_dir
+
+
+def _expected(adsh: str) -> pd.DataFrame:
+    report = IndexReport(adsh=adsh, cik=0, name='', form='', filed=0, period=0,
+                         fullPath=PATH_TO_PARQUET_Q1, originFile='2010q1.zip',
+                         originFileType='quarter', url='')
+    bag = SingleReportCollector(report=report).collect()
+    return bag[StmtRawFilter(stmts=['BS'])][MainCoregRawFilter()][USDOnlyRawFilter()] \
+        .join().present(StandardStatementPresenter())
+
+
+def _request(adsh: str, response_format: str = 'arrow') -> ReportRequest:
+    return ReportRequest.create(adsh=adsh, stmts=['BS'], filters=['maincoreg', 'usdonly'],
+                                response_format=response_format)
+
+
+def test_service(db_dir):
+    service = ReportService(db_dir=db_dir)
+    report = service.snapshot.get_report(APPLE_ADSH_10Q_2010_Q1)
+    assert report.originFileType == 'quarter'
+    assert service.snapshot.get_report('unknown') is None
+
+    request = _request(APPLE_ADSH_10Q_2010_Q1)
+    pd.testing.assert_frame_equal(service.present(request, report),
+                                  _expected(APPLE_ADSH_10Q_2010_Q1))
+
+    response = service.get_report(request)
+    assert service.get_report(request) is response
+    assert service.get_report(_request('unknown')) is None
+    stats = service.get_stats()
+    assert stats['requests'] == 3
+    assert stats['response_hits'] == 1
+    assert stats['not_found'] == 1
+    assert stats['scans'] == 1
+
+    with pytest.raises(ValueError):
+        ReportRequest.create(adsh=APPLE_ADSH_10Q_2010_Q1, filters=['unknown'])
+
+
+def test_split_by_adsh():
+    bag = SingleReportCollector(report=IndexReport(
+        adsh=APPLE_ADSH_10Q_2010_Q1, cik=0, name='', form='', filed=0, period=0,
+        fullPath=PATH_TO_PARQUET_Q1, originFile='', originFileType='', url='')).collect()
+    bags = split_by_adsh(bag, [APPLE_ADSH_10Q_2010_Q1, 'missing'])
+    assert bags[APPLE_ADSH_10Q_2010_Q1].num_df.equals(bag.num_df)
+    assert len(bags['missing'].pre_df) == 0
+
+
+def test_batching(db_dir):
+    service = ReportService(db_dir=db_dir, batch_window_seconds=0.2)
+    sub_df = read_parquet(os.path.join(PATH_TO_PARQUET_Q1, 'sub.txt.parquet'),
+                          columns=['adsh', 'form'])
+    adshs = sub_df[sub_df.form == '10-K'].adsh.tolist()[:8]
+    results = {}
+
+    def request(adsh: str):
+        results[adsh] = service.get_report(_request(adsh))
+
+    threads = [threading.Thread(target=request, args=(adsh,)) for adsh in adshs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # all reports are read with a single scan of the file
+    assert service.metrics.scans == 1
+    assert service.metrics.scanned_reports == 8
+    assert all(results[adsh] is not None for adsh in adshs)
+    pd.testing.assert_frame_equal(service.present(_request(adshs[0]),
+                                                  service.snapshot.get_report(adshs[0])),
+                                  _expected(adshs[0]))
+
+
+def test_hot_file(db_dir):
+    service = ReportService(db_dir=db_dir, hot_file_after_scans=1)
+    service.get_report(_request(APPLE_ADSH_10Q_2010_Q1))
+    # the file is loaded in the background after the first scan
+    for _ in range(100):
+        if service.get_stats()['hot_files'] == 1:
+            break
+        time.sleep(0.05)
+    assert service.get_stats()['hot_files'] == 1
+
+    sub_df = read_parquet(os.path.join(PATH_TO_PARQUET_Q1, 'sub.txt.parquet'),
+                          columns=['adsh', 'form'])
+    adsh = sub_df[sub_df.form == '10-K'].adsh.iloc[0]
+    pd.testing.assert_frame_equal(service.present(_request(adsh),
+                                                  service.snapshot.get_report(adsh)),
+                                  _expected(adsh))
+    assert service.metrics.hot_file_hits == 1
+    assert service.metrics.scans == 1
+
+    # hot files that exceed the memory limit are not kept
+    service = ReportService(db_dir=db_dir, max_hot_file_bytes=1)
+    service.load_hot_file(PATH_TO_PARQUET_Q1)
+    assert service.get_stats()['hot_files'] == 0
+
+
+def test_server(db_dir):
+    with ReportServer(ReportService(db_dir=db_dir), port=0) as server, \
+            ReportClient(port=server.port) as client:
+        assert client.is_healthy()
+        expected = _expected(APPLE_ADSH_10Q_2010_Q1)
+
+        report_df = client.get_report(APPLE_ADSH_10Q_2010_Q1, stmts=['BS'],
+                                      filters=['maincoreg', 'usdonly'])
+        pd.testing.assert_frame_equal(report_df, expected)
+
+        json_df = client.get_report(APPLE_ADSH_10Q_2010_Q1, stmts=['BS'],
+                                    filters=['maincoreg', 'usdonly'], response_format='json')
+        pd.testing.assert_frame_equal(json_df, expected, check_dtype=False)
+
+        with pytest.raises(KeyError):
+            client.get_report('unknown')
+        with pytest.raises(ValueError):
+            client.get_report(APPLE_ADSH_10Q_2010_Q1, filters=['unknown'])
+
+        client.get_report(APPLE_ADSH_10Q_2010_Q1, stmts=['BS'], filters=['maincoreg', 'usdonly'])
+        stats = client.get_stats()
+        assert stats['scans'] == 1
+        assert stats['response_hits'] == 1
+        assert stats['p99_ms'] is not None
+
+    assert not ReportClient(port=server.port, timeout=1).is_healthy()
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="unix sockets are not supported")
+def test_unix_socket(db_dir, tmp_path):
+    socket_path = str(tmp_path / 'reports.sock')
+    with ReportServer(ReportService(db_dir=db_dir), socket_path=socket_path), \
+            ReportClient(socket_path=socket_path) as client:
+        report_df = client.get_report(APPLE_ADSH_10Q_2010_Q1, stmts=['BS'],
+                                      filters=['maincoreg', 'usdonly'])
+        pd.testing.assert_frame_equal(report_df, _expected(APPLE_ADSH_10Q_2010_Q1))
+    assert not os.path.exists(socket_path)
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="unix sockets are not supported")
+def test_unix_socket_existing_path(db_dir, tmp_path):
+    # other files are never removed
+    file_path = tmp_path / 'reports.txt'
+    file_path.write_text('content')
+    with pytest.raises(ValueError):
+        ReportServer(ReportService(db_dir=db_dir), socket_path=str(file_path))
+    assert file_path.read_text() == 'content'
+
+    # a stale socket of a previous server is replaced
+    socket_path = str(tmp_path / 'reports.sock')
+    stale_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale_socket.bind(socket_path)
+    stale_socket.close()
+    with ReportServer(ReportService(db_dir=db_dir), socket_path=socket_path), \
+            ReportClient(socket_path=socket_path) as client:
+        assert client.is_healthy()
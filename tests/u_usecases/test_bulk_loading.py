@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from secfsdstools.d_container.databagmodel import RawDataBag, JoinedDataBag
+from secfsdstools.e_collector.zipcollecting import ZipCollector
+from secfsdstools.u_usecases.bulk_loading import build_tmp_set
+
+CURRENT_DIR, _ = os.path.split(__file__)
+PATH_TO_PARQUET_Q1 = f'{CURRENT_DIR}/../_testdata/parquet/quarter/2010q1.zip'
+PATH_TO_PARQUET_Q2 = f'{CURRENT_DIR}/../_testdata/parquet/quarter/2010q2.zip'
+
+
+@pytest.fixture
+def collected_names(monkeypatch):
+    # reads the zip files from the test data instead of the configured parquet directory
+    names = []
+
+    def get_zip_by_name(name, forms_filter, stmt_filter, post_load_filter):
+        names.append(name)
+        return ZipCollector(datapaths=[f'{CURRENT_DIR}/../_testdata/parquet/quarter/{name}'],
+                            forms_filter=forms_filter, stmt_filter=stmt_filter,
+                            post_load_filter=post_load_filter)
+
+    monkeypatch.setattr(ZipCollector, 'get_zip_by_name', get_zip_by_name)
+    return names
+
+
+def test_build_tmp_set_skips_processed_zips(tmp_path, collected_names):
+    build_tmp_set(financial_statement='BS', file_names=['2010q1.zip'], base_path=str(tmp_path))
+    assert collected_names == ['2010q1.zip']
+
+    build_tmp_set(financial_statement='BS', file_names=['2010q1.zip'], base_path=str(tmp_path))
+    assert collected_names == ['2010q1.zip']
+
+
+def test_build_tmp_set_half_written_joined(tmp_path, collected_names):
+    target_path = tmp_path / '2010q1.zip' / 'BS'
+    raw_path, joined_path = target_path / 'raw', target_path / 'joined'
+    raw_path.mkdir(parents=True)
+    bag = RawDataBag.load(PATH_TO_PARQUET_Q1)
+    bag.save(str(raw_path))
+
+    # the run was interrupted while the joined bag was saved
+    joined_path.mkdir()
+    (joined_path / 'sub.txt.parquet').write_text('incomplete')
+
+    build_tmp_set(financial_statement='BS', file_names=['2010q1.zip'], base_path=str(tmp_path))
+
+    # only the joined bag is created from the stored raw bag
+    assert collected_names == []
+    assert JoinedDataBag.load(str(joined_path)).pre_num_df.shape == \
+           bag.join().pre_num_df.shape
+
+
+def test_build_tmp_set_foreign_bag(tmp_path, collected_names):
+    # a bag with the data of another quarter is not accepted
+    raw_path = tmp_path / '2010q1.zip' / 'BS' / 'raw'
+    joined_path = tmp_path / '2010q1.zip' / 'BS' / 'joined'
+    raw_path.mkdir(parents=True)
+    joined_path.mkdir()
+    foreign_bag = RawDataBag.load(PATH_TO_PARQUET_Q2)
+    foreign_bag.save(str(raw_path))
+    foreign_bag.join().save(str(joined_path))
+
+    build_tmp_set(financial_statement='BS', file_names=['2010q1.zip'], base_path=str(tmp_path))
+
+    assert collected_names == ['2010q1.zip']
+    assert RawDataBag.inspect(str(raw_path)).quarters == ['2010q1']
+    assert JoinedDataBag.inspect(str(joined_path)).quarters == ['2010q1']